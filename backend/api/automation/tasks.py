@@ -1,6 +1,11 @@
-﻿from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+﻿from typing import List, Dict, Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import logging
+from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from backend.services.automation.engine_connector import AutomationService
@@ -10,15 +15,32 @@ from backend.api.auth.deps import get_current_active_user
 router = APIRouter()
 logger = logging.getLogger("api")
 
-from backend.core.database import get_session
+from backend.core.config import settings
+from backend.core.database import get_session, SessionLocal
+from backend.core.security import create_stream_token, verify_stream_token
 from sqlmodel import Session, select, desc, col
-from backend.models.automation import AutomationJob, JobLog, TaskType, JobScheduleType, JobStatus
+from backend.models.automation import AutomationJob, JobLog, JobHostResult, TaskType, JobScheduleType, JobStatus
 from backend.models.device import Device
+from backend.services.automation.job_results import JobResultService
+from backend.services.automation.health_store import HealthStore
+from backend.services.automation.interface_counters import InterfaceCounterStore, OFFENDER_METRICS
+from backend.services.automation.event_bus import job_event_bus
+from backend.services.automation.executor import JobPriority, JobQueueFullError
+
+# 作业终态
+TERMINAL_STATUSES = {JobStatus.SUCCESS.value, JobStatus.PARTIAL.value, JobStatus.FAILED.value,
+                     JobStatus.CANCELLED.value, JobStatus.TIMEOUT.value}
 
 class QuickTaskRequest(BaseModel):
     task_type: TaskType
     device_ids: List[int]
     commands: Optional[List[str]] = []
+    bypass_cache: bool = False  # 跳过 getter 缓存，强制向设备取最新数据
+
+def _with_results(session: Session, logs: List[JobLog]) -> List[Dict[str, Any]]:
+    """将明细表中的设备/步骤结果组装回 results 字段，保持前端数据结构不变"""
+    merged = JobResultService(session).get_results(logs)
+    return [{**log.model_dump(), "results": merged.get(log.id, {})} for log in logs]
 
 @router.get("/tasks/inspect/history")
 async def get_inspect_history(
@@ -32,8 +54,8 @@ async def get_inspect_history(
         statement = statement.where(JobLog.job_id == job_id)
     
     statement = statement.order_by(desc(JobLog.start_time)).limit(20)
-    results = session.exec(statement).all()
-    return results
+    logs = session.exec(statement).all()
+    return _with_results(session, logs)
 
 @router.get("/jobs/{job_id}/logs")
 async def get_job_logs(
@@ -48,7 +70,130 @@ async def get_job_logs(
         .order_by(desc(JobLog.start_time))
         .limit(50)
     ).all()
-    return logs
+    return _with_results(session, logs)
+
+def _sse(seq: int, event_type: str, data: Dict[str, Any]) -> str:
+    """格式化一条 Server-Sent Event"""
+    return f"id: {seq}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def _log_exists(log_id: int) -> bool:
+    with SessionLocal() as session:
+        return session.get(JobLog, log_id) is not None
+
+@router.post("/jobs/{log_id}/events/token")
+async def create_job_events_token(
+    log_id: int,
+    current_user: User = Depends(get_current_active_user)
+):
+    """签发订阅作业事件流的短期令牌 (EventSource 无法携带 Authorization 头)"""
+    if not await run_in_threadpool(_log_exists, log_id):
+        raise HTTPException(status_code=404, detail="日志记录不存在")
+    return {"token": create_stream_token(current_user.username, log_id),
+            "expires_in": settings.AUTOMATION_EVENT_TOKEN_TTL}
+
+@router.get("/jobs/{log_id}/events")
+async def stream_job_events(
+    log_id: int,
+    request: Request,
+    token: str = Query(..., description="由 /jobs/{log_id}/events/token 签发的短期令牌"),
+    since: Optional[int] = Query(None, description="断线续传：最后收到的事件序号"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    以 Server-Sent Events 推送作业执行进度的增量事件 (job/host/step/done)。
+    首次连接或序号已过期时先推送一次 snapshot 完整快照；EventSource 重连时自动携带 Last-Event-ID 续传。
+    令牌只在建立连接时校验，过期后重连需重新申请。
+    """
+    if not verify_stream_token(token, log_id):
+        raise HTTPException(status_code=401, detail="事件流令牌无效或已过期")
+    if not await run_in_threadpool(_log_exists, log_id):
+        raise HTTPException(status_code=404, detail="日志记录不存在")
+    if last_event_id and last_event_id.isdigit():
+        # 浏览器自动重连沿用原 URL，since 可能落后于 Last-Event-ID
+        since = max(since or 0, int(last_event_id))
+
+    def load_from_db() -> Tuple[Dict[str, Any], str, Optional[datetime]]:
+        """完整快照 (设备与步骤明细) 及其对应的增量起点"""
+        with SessionLocal() as session:
+            service = JobResultService(session)
+            # 先取起点再读明细：两者之间的写入会在下次增量中重复推送，而不会遗漏
+            watermark = service.last_update(log_id)
+            log = session.get(JobLog, log_id)
+            results = service.get_results([log]).get(log_id, {})
+            return results, getattr(log.status, "value", log.status), watermark
+
+    def load_status() -> Optional[str]:
+        """心跳只查询作业状态列"""
+        with SessionLocal() as session:
+            status = session.exec(select(JobLog.status).where(JobLog.id == log_id)).first()
+            return getattr(status, "value", status)
+
+    def load_changes(after: Optional[datetime]):
+        with SessionLocal() as session:
+            return JobResultService(session).changes_since(log_id, after)
+
+    async def event_stream():
+        sub, backlog, need_snapshot = job_event_bus.subscribe(log_id, since)
+        try:
+            last = since or 0
+            # 其他进程执行的作业 (分布式分片) 收不到本进程事件，心跳时从明细表按 updated_at 拉取增量
+            watermark: Optional[datetime] = None
+            if need_snapshot:
+                snap = job_event_bus.snapshot(log_id)
+                if snap is not None:
+                    results, last = snap
+                    status = JobStatus.RUNNING.value
+                else:
+                    # 作业未在本进程执行 (排队中、已结束或由其他进程执行)，从数据库读取
+                    last = job_event_bus.last_seq(log_id)
+                    results, status, watermark = await run_in_threadpool(load_from_db)
+                yield _sse(last, "snapshot", {"status": status, "results": results})
+                backlog = job_event_bus.backlog_since(log_id, last)
+                if status in TERMINAL_STATUSES and not backlog:
+                    yield _sse(last, "done", {"status": status})
+                    return
+
+            for event in backlog:
+                last = event["seq"]
+                yield _sse(last, event["type"], event["data"])
+                if event["type"] == "done":
+                    return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=settings.AUTOMATION_EVENT_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if job_event_bus.is_live(log_id):
+                        yield ": ping\n\n"
+                        continue
+                    # 作业不在本进程执行：只查状态列，进入终态时才读取一次完整快照
+                    status = await run_in_threadpool(load_status)
+                    if status in TERMINAL_STATUSES:
+                        results, status, _ = await run_in_threadpool(load_from_db)
+                        yield _sse(last, "snapshot", {"status": status, "results": results})
+                        yield _sse(last, "done", {"status": status})
+                        return
+                    hosts, steps, watermark = await run_in_threadpool(load_changes, watermark)
+                    for data in steps:
+                        yield _sse(last, "step", data)
+                    for data in hosts:
+                        yield _sse(last, "host", data)
+                    yield ": ping\n\n"
+                    continue
+                if event["seq"] <= last:
+                    continue
+                last = event["seq"]
+                yield _sse(last, event["type"], event["data"])
+                if event["type"] == "done":
+                    return
+        finally:
+            job_event_bus.unsubscribe(log_id, sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/tasks/logs/{log_id}/summary")
 async def get_inspect_summary(
@@ -61,12 +206,22 @@ async def get_inspect_summary(
     if not log:
         raise HTTPException(status_code=404, detail="日志记录不存在")
     
-    results = log.results or {}
+    result_service = JobResultService(session)
+    total, success_count = result_service.host_counts(log_id)
+    host_rows = session.exec(
+        select(JobHostResult).where(JobHostResult.log_id == log_id).order_by(JobHostResult.id)
+    ).all()
+    # 每台设备取顺序最靠后的健康数据步骤 (查询已按 seq 倒序)
+    health_map = {}
+    for step in result_service.health_steps([log_id]):
+        health_map.setdefault(step.host, step.result)
     
     summary = {
-        "total": len(results),
-        "success": 0,
-        "failed": 0,
+        "total": total,
+        "success": success_count,
+        "failed": total - success_count,
+        # 预检不可达的设备 (已计入 failed)
+        "unreachable": result_service.unreachable_count(log_id),
         "cpu_distribution": {"0-20%": 0, "20-40%": 0, "40-60%": 0, "60-80%": 0, "80-100%": 0},
         "mem_distribution": {"0-20%": 0, "20-40%": 0, "40-60%": 0, "60-80%": 0, "80-100%": 0},
         "hardware_health": {"fans": {"ok": 0, "fail": 0}, "pwr": {"ok": 0, "fail": 0}, "temp": {"ok": 0, "fail": 0}},
@@ -76,29 +231,20 @@ async def get_inspect_summary(
 
     error_devices = []
 
-    for host, data in results.items():
-        # 1. 基础状态统计
-        is_success = data.get("success", False)
-        if is_success:
-            summary["success"] += 1
-        else:
-            summary["failed"] += 1
+    for host_row in host_rows:
+        # 1. 基础状态 (计数已由 SQL 聚合完成)
+        host = host_row.host
+        is_success = host_row.success
         
         # 2. 查找 HealthData
-        health_info = None
-        steps = data.get("steps", [])
-        for step in reversed(steps):
-            res_body = step.get("result")
-            if isinstance(res_body, dict) and ("resources" in res_body or "basic" in res_body):
-                health_info = res_body
-                break
+        health_info = health_map.get(host)
         
         device_entry = {
             "hostname": host,
             "status": "success" if is_success else "failed",
             "cpu": 0,
             "mem": 0,
-            "error_msg": data.get("error")
+            "error_msg": host_row.error
         }
 
         if health_info:
@@ -154,47 +300,13 @@ async def get_overall_inspect_summary(
     all_devices = session.exec(select(Device)).all()
     device_map = {d.name: {"device": d, "latest_result": None} for d in all_devices}
 
-    # 2. 扫描最近的成功/部分成功的巡检日志
-    # 增加更强大的状态匹配，兼容 Enum 对象和多种字符串格式
-    valid_statuses = [JobStatus.SUCCESS, JobStatus.PARTIAL, "success", "partial", "SUCCESS", "PARTIAL"]
-    logs = session.exec(
-        select(JobLog)
-        .where(JobLog.status.in_(valid_statuses))
-        .order_by(desc(JobLog.start_time))
-        .limit(100)
-    ).all()
-
-    # 3. 填充映射 (从新到旧，确保取到的是每台设备的最新数据)
+    # 2. 每台设备最近一次健康采样 (HealthLatest 主键表，巡检时同步维护，无需扫描历史日志)
+    latest = HealthStore(session).latest()
     filled_count = 0
-    total_to_fill = len(device_map)
-    
-    for log in logs:
-        if filled_count >= total_to_fill:
-            break
-            
-        results = log.results or {}
-        for host, data in results.items():
-            if host in device_map and device_map[host]["latest_result"] is None:
-                # 提取 HealthData
-                health_info = None
-                steps = data.get("steps", [])
-                for step in reversed(steps):
-                    if isinstance(step.get("result"), dict) and "resources" in step["result"]:
-                        health_info = step["result"]
-                        break
-                
-                if health_info:
-                    try:
-                        device_map[host]["latest_result"] = {
-                            "log_id": log.id,
-                            "time": log.start_time,
-                            "success": data.get("success", False),
-                            "health": health_info
-                        }
-                        filled_count += 1
-                    except Exception as e:
-                        logger.error(f"解析全量快照数据失败 (Host: {host}): {e}")
-                        continue
+    for name, info in device_map.items():
+        if name in latest:
+            info["latest_result"] = latest[name]
+            filled_count += 1
 
     # 4. 聚合统计
     summary = {
@@ -207,6 +319,8 @@ async def get_overall_inspect_summary(
         # 接下来的分布统计用于次要图表分析
         "cpu_distribution": {"0-20%": 0, "20-40%": 0, "40-60%": 0, "60-80%": 0, "80-100%": 0},
         "mem_distribution": {"0-20%": 0, "20-40%": 0, "40-60%": 0, "60-80%": 0, "80-100%": 0},
+        # 最近一次采样中错误增量最多的接口 (按接口计数器最新值表索引排序)
+        "interface_offenders": InterfaceCounterStore(session).top_offenders("errors", settings.INTERFACE_TOP_N),
         "device_list": []
     }
 
@@ -219,7 +333,7 @@ async def get_overall_inspect_summary(
             "ip": dev.ip,
             "vendor": dev.vendor,
             "model": dev.model,
-            "last_inspected": res["time"] if res else None,
+            "last_inspected": datetime.fromtimestamp(res.ts) if res else None,
             "status": "uninspected",
             "cpu": 0,
             "mem": 0,
@@ -231,16 +345,14 @@ async def get_overall_inspect_summary(
 
         try:
             if res:
-                h = res["health"]
-                is_success = res["success"]
+                is_success = res.success
                 
                 # 基础指标 (确保转为 float 以免 NoneType 报错)
-                cpu = float(h.get("resources", {}).get("cpu_avg") or 0)
-                mem = float(h.get("resources", {}).get("memory_usage") or 0)
-                hw = h.get("hardware", {})
-                temp = float(hw.get("temperature") or 0)
-                fans_ok = hw.get("fans_ok", True)
-                pwr_ok = hw.get("pwr_ok", True)
+                cpu = float(res.cpu or 0)
+                mem = float(res.mem or 0)
+                temp = float(res.max_temp or 0)
+                fans_ok = res.fans_ok
+                pwr_ok = res.pwr_ok
                 
                 entry.update({
                     "status": "success" if is_success else "failed",
@@ -281,6 +393,88 @@ async def get_overall_inspect_summary(
 
     return summary
 
+def _time_range(start: Optional[datetime], end: Optional[datetime], default_days: int = 7) -> Tuple[int, int]:
+    """查询区间转换为 Unix 秒 (缺省为最近 default_days 天)"""
+    end = end or datetime.now()
+    start = start or end - timedelta(days=default_days)
+    if start > end:
+        raise HTTPException(status_code=400, detail="开始时间不能晚于结束时间")
+    return int(start.timestamp()), int(end.timestamp())
+
+@router.get("/health/devices/{device}/series")
+async def get_device_health_series(
+    device: str,
+    start: Optional[datetime] = Query(None, description="开始时间，缺省为 7 天前"),
+    end: Optional[datetime] = Query(None, description="结束时间，缺省为当前"),
+    bucket: Optional[int] = Query(None, ge=1, description="降采样粒度 (秒)，缺省时返回原始采样点，点数过多时自动降采样"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """单台设备的健康指标趋势 (CPU / 内存 / 温度 / 硬件告警 / 接口)"""
+    ts_start, ts_end = _time_range(start, end)
+    store = HealthStore(session)
+    # 原始点数超过上限时改为按区间均分的降采样
+    auto_bucket = -(-(ts_end - ts_start) // settings.HEALTH_MAX_POINTS)
+    if bucket is None:
+        points = store.range(device, ts_start, ts_end, limit=settings.HEALTH_MAX_POINTS + 1)
+        if len(points) <= settings.HEALTH_MAX_POINTS:
+            return {"device": device, "start": ts_start, "end": ts_end, "bucket": None, "points": points}
+        bucket = auto_bucket
+    bucket = max(bucket, auto_bucket)
+    points = store.downsample(ts_start, ts_end, bucket, devices=[device], per_device=False)
+    return {"device": device, "start": ts_start, "end": ts_end, "bucket": bucket, "points": points}
+
+@router.get("/health/trend")
+async def get_health_trend(
+    start: Optional[datetime] = Query(None, description="开始时间，缺省为 7 天前"),
+    end: Optional[datetime] = Query(None, description="结束时间，缺省为当前"),
+    bucket: int = Query(3600, ge=60, description="降采样粒度 (秒)"),
+    devices: Optional[List[str]] = Query(None, description="限定设备，缺省为全部设备"),
+    per_device: bool = Query(False, description="按设备分别聚合 (默认汇总为全网曲线)"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """多设备 / 全网健康趋势 (按时间窗降采样)"""
+    ts_start, ts_end = _time_range(start, end)
+    points = HealthStore(session).downsample(ts_start, ts_end, bucket, devices=devices, per_device=per_device)
+    return {"start": ts_start, "end": ts_end, "bucket": bucket, "points": points}
+
+@router.get("/health/interfaces/top")
+async def get_interface_offenders(
+    metric: str = Query("errors", description="排序指标: errors / discards / utilization"),
+    limit: int = Query(10, ge=1, le=500),
+    devices: Optional[List[str]] = Query(None, description="限定设备，缺省为全部设备"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """全网接口 Top N (最近一次巡检相对上一次的错误 / 丢弃增量或利用率)"""
+    if metric not in OFFENDER_METRICS:
+        raise HTTPException(status_code=400, detail=f"不支持的排序指标: {metric}")
+    return InterfaceCounterStore(session).top_offenders(metric, limit, devices)
+
+@router.get("/health/devices/{device}/interfaces/series")
+async def get_interface_series(
+    device: str,
+    interface: str = Query(..., description="接口名"),
+    start: Optional[datetime] = Query(None, description="开始时间，缺省为 7 天前"),
+    end: Optional[datetime] = Query(None, description="结束时间，缺省为当前"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """单个接口的速率 / 利用率 / 错误增量趋势"""
+    ts_start, ts_end = _time_range(start, end)
+    points = InterfaceCounterStore(session).series(device, interface, ts_start, ts_end)
+    return {"device": device, "interface": interface, "start": ts_start, "end": ts_end, "points": points}
+
+@router.get("/health/latest")
+async def get_health_latest(
+    devices: Optional[List[str]] = Query(None, description="限定设备，缺省为全部设备"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """每台设备最近一次巡检的健康指标"""
+    return list(HealthStore(session).latest(devices).values())
+
 @router.delete("/tasks/logs/{log_id}")
 async def delete_job_log(
     log_id: int,
@@ -292,10 +486,53 @@ async def delete_job_log(
     if not log:
         raise HTTPException(status_code=404, detail="日志记录不存在")
     
+    JobResultService(session).delete_log(log_id)
     session.delete(log)
     session.commit()
     return {"message": "执行记录已删除"}
 
+@router.post("/tasks/logs/{log_id}/cancel")
+async def cancel_job_log(
+    log_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """取消一次执行：排队中的作业直接出队，执行中的作业协作式中止并释放设备连接"""
+    log = session.get(JobLog, log_id)
+    if not log:
+        raise HTTPException(status_code=404, detail="日志记录不存在")
+    if log.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=400, detail=f"作业已结束 ({log.status.value})，无法取消")
+
+    from datetime import datetime
+    from backend.services.automation.scheduler import AutomationScheduler
+    from backend.network_engine.job_control import job_controls
+    from backend.services.automation.shard_queue import shard_queue
+    scheduler = AutomationScheduler()
+
+    # 1. 仍在排队：移出队列并直接记为取消
+    if scheduler.executor.cancel(log_id):
+        log.status = JobStatus.CANCELLED
+        log.end_time = datetime.now()
+        session.add(log)
+        session.commit()
+        job_event_bus.close(log_id, {"status": JobStatus.CANCELLED.value})
+        logger.info(f"用户 {current_user.username} 取消了排队中的作业日志 {log_id}")
+        return {"message": "已从执行队列中移除", "status": JobStatus.CANCELLED.value}
+
+    # 2. 分布式执行：排队中的分片直接取消，执行中的分片由 worker 心跳感知后中止
+    if shard_queue.cancel_log(log_id):
+        logger.info(f"用户 {current_user.username} 请求取消分布式执行的作业日志 {log_id}")
+        return {"message": "已取消排队中的分片，正在中止 worker 上执行中的分片", "status": "cancelling"}
+
+    # 3. 正在执行：设置取消标记，由执行线程在检查点退出并写入最终状态
+    if job_controls.cancel(log_id):
+        logger.info(f"用户 {current_user.username} 请求取消执行中的作业日志 {log_id}")
+        return {"message": "已发送取消请求，正在中止执行中的设备", "status": "cancelling"}
+
+    # 4. 刚出队尚未登记控制句柄，或不在本进程执行
+    raise HTTPException(status_code=409, detail="作业正在启动或不在当前节点执行，请稍后重试")
+
 @router.get("/jobs", response_model=List[AutomationJob])
 async def list_jobs(
     session: Session = Depends(get_session),
@@ -353,27 +590,24 @@ async def run_job_now(
         raise HTTPException(status_code=404, detail="作业不存在")
         
     from backend.services.automation.scheduler import AutomationScheduler
-    from backend.models.automation import JobLog, JobStatus
-    from datetime import datetime
+    scheduler = AutomationScheduler()
     
-    # 1. 同步创建一个待执行的日志记录，以便立即向前端返回 ID
-    new_log = JobLog(
-        job_id=job.id,
-        status=JobStatus.RUNNING,
-        start_time=datetime.now(),
-        total_devices=len(job.target_devices) if job.target_devices else 0,
-        results={}
-    )
-    session.add(new_log)
-    session.commit()
-    session.refresh(new_log)
+    # 1. 合并重复点击：该作业已在队列中等待时直接返回已有记录
+    queued_log_id = scheduler.executor.find_queued(job.id)
+    if queued_log_id:
+        return {
+            "message": f"作业 {job.name} 已在队列中等待执行",
+            "log_id": queued_log_id,
+            "queue_position": scheduler.executor.position(queued_log_id)
+        }
     
-    scheduler = AutomationScheduler()
-    # 2. 启动后台线程执行，传入已建立的 log_id
-    import threading
-    threading.Thread(target=scheduler._run_nornir_job, args=(job.id, new_log.id)).start()
+    # 2. 同步创建待执行的日志记录并提交到执行池，以便立即向前端返回 ID
+    try:
+        log_id, position = scheduler.submit_job(job.id, priority=JobPriority.MANUAL)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
-    return {"message": f"作业 {job.name} 已开始执行", "log_id": new_log.id}
+    return {"message": f"作业 {job.name} 已提交执行", "log_id": log_id, "queue_position": position}
 
 @router.post("/quick-task")
 async def run_quick_task(
@@ -403,6 +637,7 @@ async def run_quick_task(
         task_type=req.task_type,
         target_devices=device_names,
         commands=req.commands,
+        args={"bypass_cache": True} if req.bypass_cache else {},
         schedule_type=JobScheduleType.IMMEDIATE,
         created_by=current_user.username,
         is_active=True
@@ -411,22 +646,50 @@ async def run_quick_task(
     session.commit()
     session.refresh(job)
     
-    # 2. 同步创建初始日志
-    new_log = JobLog(
-        job_id=job.id,
-        status=JobStatus.RUNNING,
-        start_time=datetime.now(),
-        total_devices=len(device_names),
-        results={}
-    )
-    session.add(new_log)
-    session.commit()
-    session.refresh(new_log)
+    # 2. 同步创建初始日志并以交互优先级提交 (排在定时批量作业之前)
+    from backend.services.automation.scheduler import AutomationScheduler
+    try:
+        log_id, position = AutomationScheduler().submit_job(job.id, priority=JobPriority.INTERACTIVE)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
-    # 3. 异步触发
+    return {"message": "即时任务已下发", "job_id": job.id, "log_id": log_id, "queue_position": position}
+
+@router.get("/scheduler/status")
+async def get_scheduler_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    """获取调度器状态：执行池排队情况、设备租约 (全局会话占用、各作业排队深度与租约等待时长)、各区域自适应并发，连接池与 getter 缓存的命中率，分布式分片队列，以及本进程是否为调度领导者"""
+    from backend.services.automation.lease_manager import lease_manager
     from backend.services.automation.scheduler import AutomationScheduler
+    from backend.network_engine.runner import concurrency_registry
+    from backend.network_engine.connection_pool import connection_pool
+    from backend.network_engine.getter_cache import getter_cache
+    from backend.services.automation.shard_queue import shard_queue
     scheduler = AutomationScheduler()
-    import threading
-    threading.Thread(target=scheduler._run_nornir_job, args=(job.id, new_log.id)).start()
-    
-    return {"message": "即时任务已下发", "job_id": job.id, "log_id": new_log.id}
+    return {
+        "executor": scheduler.executor.snapshot(),
+        "leases": lease_manager.snapshot(),
+        "concurrency": concurrency_registry.snapshot(),
+        "connection_pool": connection_pool.snapshot(),
+        "getter_cache": getter_cache.snapshot(),
+        "shards": shard_queue.snapshot(),
+        "leader": scheduler.elector.snapshot() if scheduler.elector else None
+    }
+
+@router.get("/tasks/logs/{log_id}/queue")
+async def get_queue_position(
+    log_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """查询执行记录在执行池中的排队位置"""
+    log = session.get(JobLog, log_id)
+    if not log:
+        raise HTTPException(status_code=404, detail="日志记录不存在")
+    from backend.services.automation.scheduler import AutomationScheduler
+    return {
+        "log_id": log_id,
+        "status": log.status,
+        "position": AutomationScheduler().executor.position(log_id)
+    }
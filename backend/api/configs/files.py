@@ -1,6 +1,6 @@
 ﻿from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 import logging
 
 from backend.services.configs.file_service import FileService
@@ -20,7 +20,8 @@ async def get_config_tree(
     service: FileService = Depends(get_file_service)
 ):
     """获取配置文件的树状结构"""
-    return service.get_tree()
+    # 直接返回已序列化的 JSON，跳过逐节点的响应模型校验与编码
+    return Response(content=service.get_tree_json(), media_type="application/json")
 
 @router.get("/content")
 async def get_file_content(
@@ -44,6 +45,24 @@ async def get_stats(
     """获取统计信息"""
     return service.get_stats()
 
+@router.get("/search")
+async def search_contents(
+    q: str = Query(..., description="搜索内容 (不区分大小写的子串，至少 3 个字符)"),
+    region: Optional[str] = Query(None, description="限定区域"),
+    device: Optional[str] = Query(None, description="限定设备"),
+    version: str = Query("latest", description="latest: 仅最新配置; all: 全部历史版本; 其他值为文件名"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_active_user),
+    service: FileService = Depends(get_file_service)
+):
+    """全文搜索配置内容"""
+    try:
+        return service.search_contents(q, region=region, device=device, version=version, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 @router.post("/open")
 async def open_in_explorer(
     path: str,
@@ -94,6 +113,7 @@ async def import_files(
     """批量导入文件"""
     results = []
     errors = []
+    devices = set()
     
     for item in request.items:
         try:
@@ -105,9 +125,14 @@ async def import_files(
                 timestamp=item.timestamp
             )
             results.append(result)
+            devices.add((item.region, item.device_name))
         except Exception as e:
             logger.error(f"Import failed for {item.path}: {e}")
             errors.append(f"{item.path}: {str(e)}")
+
+    # 导入的历史版本打包压缩 (每台设备保留最新明文)
+    for region, device_name in devices:
+        service.compact(region, device_name)
             
     return {
         "success": len(results),
@@ -116,6 +141,22 @@ async def import_files(
         "results": results
     }
 
+class CompactRequest(BaseModel):
+    region: Optional[str] = None
+    device: Optional[str] = None
+
+@router.post("/compact")
+async def compact_versions(
+    request: CompactRequest,
+    current_user: User = Depends(get_current_active_user),
+    service: FileService = Depends(get_file_service)
+):
+    """将历史配置版本打包为压缩快照 + 行级差异 (未指定时处理全部设备)"""
+    try:
+        return service.compact(request.region, request.device)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 class DeleteFilesRequest(BaseModel):
     paths: List[str]
 
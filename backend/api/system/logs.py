@@ -76,6 +76,64 @@ async def get_logs(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取日志失败: {str(e)}")
 
+def _config_file_results(q: str, index, limit: int = 5) -> List[Dict[str, Any]]:
+    """按文件名搜索配置文件: 优先查元数据索引；索引尚未建立 (启动后的首次校准进行中) 时遍历存储目录"""
+    from sqlmodel import Session, select
+    from backend.models.configs import ConfigFileEntry
+    from backend.services.configs.file_service import FileService
+
+    results = []
+    if index.built():
+        with Session(index.engine) as session:
+            statement = select(ConfigFileEntry).where(ConfigFileEntry.name.contains(q, autoescape=True)).order_by(
+                ConfigFileEntry.mtime.desc()
+            ).limit(limit)
+            for entry in session.exec(statement).all():
+                path = str(index.root / entry.region / entry.device / entry.name)
+                results.append({
+                    "type": "config",
+                    "title": entry.name,
+                    "description": f"区域: {entry.region} | 设备: {entry.device}",
+                    "link": f"/configs?path={path}",
+                    "id": f"file_{entry.region}_{entry.device}_{entry.name}"
+                })
+        return results
+
+    for region in FileService(storage_root=index.root).get_tree():
+        for device in region.get("children", []):
+            for file in device.get("children", []):
+                if q.lower() in file["name"].lower():
+                    results.append({
+                        "type": "config",
+                        "title": file["name"],
+                        "description": f"区域: {region['name']} | 设备: {device['name']}",
+                        "link": f"/configs?path={file['path']}",
+                        "id": file["id"]
+                    })
+                    if len(results) >= limit:
+                        return results
+    return results
+
+def _config_content_results(q: str, search, limit: int = 5) -> List[Dict[str, Any]]:
+    """搜索配置内容 (全文索引，仅各设备最新配置)；索引尚未建立或查询过短时不搜索"""
+    from backend.services.configs.config_search import MIN_QUERY_LENGTH
+
+    if len(q.strip()) < MIN_QUERY_LENGTH or not search.index.built():
+        return []
+    results = []
+    found = search.search(q, limit=limit, hits_per_file=1)
+    for file in found["files"]:
+        hit = file["hits"][0] if file["hits"] else None
+        # 同一文件可能同时命中文件名，内容命中的 id 带行号后缀，避免前端列表 key 重复
+        results.append({
+            "type": "config_content",
+            "title": f"{file['device']} / {file['name']}",
+            "description": f"第 {hit['line']} 行: {hit['text'].strip()}" if hit else f"区域: {file['region']}",
+            "link": f"/configs?path={file['path']}",
+            "id": f"file_{file['region']}_{file['device']}_{file['name']}_L{hit['line'] if hit else 0}",
+        })
+    return results
+
 @router.get("/search")
 async def global_search(
     q: str = Query(..., min_length=1),
@@ -86,7 +144,8 @@ async def global_search(
     from backend.core.database import SessionLocal
     from sqlmodel import select
     from backend.models.device import Device
-    from backend.services.configs.file_service import FileService
+    from backend.services.configs.config_index import config_index
+    from backend.services.configs.config_search import config_search
     
     # 1. 搜索设备
     with SessionLocal() as session:
@@ -103,25 +162,10 @@ async def global_search(
                 "id": d.id
             })
 
-    # 2. 搜索配置文件
-    file_service = FileService()
-    tree = file_service.get_tree()
-    # 简单平铺目录树进行文件名匹配
-    found_files = 0
-    for region in tree:
-        for device in region.get("children", []):
-            for file in device.get("children", []):
-                if q.lower() in file["name"].lower():
-                    results.append({
-                        "type": "config",
-                        "title": file["name"],
-                        "description": f"区域: {region['name']} | 设备: {device['name']}",
-                        "link": f"/configs?path={file['path']}",
-                        "id": file["id"]
-                    })
-                    found_files += 1
-                    if found_files >= 5: break
-            if found_files >= 5: break
-        if found_files >= 5: break
+    # 2. 按文件名搜索配置文件
+    results.extend(_config_file_results(q, config_index))
+
+    # 3. 搜索配置内容
+    results.extend(_config_content_results(q, config_search))
 
     return results
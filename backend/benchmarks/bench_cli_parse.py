@@ -0,0 +1,66 @@
+"""
+命令输出结构化解析基准测试
+
+为 N 台设备生成 display interface brief 输出 (每台 P 个端口)，对比:
+  - ntc-templates parse_output: 每次调用都重新编译模板
+  - TemplateCache.parse:        每个 (平台, 命令) 只编译一次
+
+用法: python -m backend.benchmarks.bench_cli_parse --devices 1000 --ports 52
+"""
+import argparse
+import random
+import sys
+import time
+
+from backend.network_engine.cli_output import HAS_TEXTFSM, NTC_TEMPLATES_DIR, TemplateCache
+
+HEADER = (
+    "PHY: Physical\n*down: administratively down\n(l): loopback\n(s): spoofing\n"
+    "InUti/OutUti: input utility/output utility\n"
+    "Interface                   PHY   Protocol  InUti OutUti   inErrors  outErrors\n"
+)
+
+
+def make_output(ports: int) -> str:
+    lines = [HEADER]
+    for i in range(ports):
+        state = random.choice(["up", "down", "*down"])
+        lines.append(f"GigabitEthernet0/0/{i + 1:<12} {state:<5} {state:<9} {random.randint(0, 99)}% {random.randint(0, 99)}%"
+                     f"  {random.randint(0, 999):>10} {random.randint(0, 999):>10}\n")
+    return "".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--ports", type=int, default=52)
+    args = parser.parse_args()
+    if not HAS_TEXTFSM or not NTC_TEMPLATES_DIR:
+        print("需要安装 textfsm 与 ntc-templates")
+        return 1
+
+    outputs = [make_output(args.ports) for _ in range(args.devices)]
+    command = "display interface brief"
+
+    from ntc_templates.parse import parse_output
+    parse_output(platform="huawei_vrp", command=command, data=outputs[0])  # 预热 ntc 索引
+    start = time.perf_counter()
+    baseline = [parse_output(platform="huawei_vrp", command=command, data=out) for out in outputs]
+    uncached = time.perf_counter() - start
+    print(f"{'ntc parse_output (每次编译)':<36} {uncached * 1000:>10.1f} ms  ({uncached / args.devices * 1e6:.0f} us/台)")
+
+    cache = TemplateCache(templates_dir=None)
+    cache.parse("huawei", command, outputs[0])  # 预热索引与模板
+    start = time.perf_counter()
+    results = [cache.parse("huawei", command, out) for out in outputs]
+    cached = time.perf_counter() - start
+    print(f"{'TemplateCache.parse (编译一次)':<36} {cached * 1000:>10.1f} ms  ({cached / args.devices * 1e6:.0f} us/台)")
+    print(f"加速 {uncached / cached:.1f}x，缓存统计 {cache.stats}")
+
+    same = all(len(r[1]) == len(b) for r, b in zip(results, baseline))
+    print(f"解析记录数与 ntc 一致: {same} (每台 {len(results[0][1])} 条)")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
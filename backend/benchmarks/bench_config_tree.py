@@ -0,0 +1,107 @@
+"""
+配置文件树基准测试
+
+在临时目录中生成 R 个区域 x D 台设备 x F 个配置文件，比较:
+  - 遍历目录构建文件树 (逐个 stat、每台设备读取最新文件识别类型)
+  - 元数据索引首次建立 / 无变化时的全量校准 / 单设备增量更新
+  - 由索引生成文件树 / 按索引版本号缓存的序列化结果，并校验与遍历结果完全一致
+  - 遍历目录统计 vs 读取增量维护的区域统计
+  - 全文索引首次建立，以及按 IP / VLAN 搜索最新配置与全部历史版本
+
+用法: python -m backend.benchmarks.bench_config_tree --regions 30 --devices 100 --files 60
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import SQLModel, create_engine
+
+from backend.models.configs import (
+    ConfigContentDoc, ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry,
+)
+from backend.services.configs.config_index import ConfigIndex
+from backend.services.configs.config_search import ConfigSearchIndex
+from backend.services.configs.file_service import FileService
+
+
+def populate(root: Path, regions: int, devices: int, files: int) -> int:
+    body = "".join(f"interface GigabitEthernet0/0/{i}\n port link-type trunk\n#\n" for i in range(48))
+    total = 0
+    for r in range(regions):
+        for d in range(devices):
+            device_dir = root / f"R{r:02d}" / f"SW-{r:02d}-{d:04d}"
+            device_dir.mkdir(parents=True)
+            for f in range(files):
+                path = device_dir / f"SW-{r:02d}-{d:04d}_{f:04d}.cfg"
+                path.write_text(f"sysname SW-{r:02d}-{d:04d}\nvlan batch {f}\n"
+                                f"interface Vlanif{f}\n ip address 10.{r}.{d % 256}.{f} 255.255.255.0\n{body}",
+                                encoding="utf-8")
+                os.utime(path, (1700000000 + f * 86400, 1700000000 + f * 86400))
+                total += 1
+    return total
+
+
+def timed(label: str, func, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<36} {best * 1000:>10.1f} ms")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regions", type=int, default=30)
+    parser.add_argument("--devices", type=int, default=100, help="每个区域的设备数")
+    parser.add_argument("--files", type=int, default=60, help="每台设备的配置文件数")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_tree_"))
+    try:
+        root = workdir / "configs"
+        total = populate(root, args.regions, args.devices, args.files)
+        engine = create_engine(f"sqlite:///{workdir / 'index.db'}")
+        tables = (ConfigRegionEntry, ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigContentDoc)
+        SQLModel.metadata.create_all(engine, tables=[t.__table__ for t in tables])
+        index = ConfigIndex(engine, root)
+        service = FileService(storage_root=root)
+        print(f"{args.regions} 个区域 x {args.devices} 台设备 x {args.files} 个文件 = {total} 个文件")
+
+        scanned = timed("遍历目录 get_tree", service._scan_tree)
+        timed("索引首次建立", index.reconcile, repeat=1)
+        timed("全量校准 (无变化)", index.reconcile, repeat=1)
+        device_dir = root / "R00" / "SW-00-0000"
+        (device_dir / "SW-00-0000_new.cfg").write_text("sysname SW-00-0000\n", encoding="utf-8")
+        timed("单设备增量更新", lambda: index.refresh_device(device_dir))
+        (device_dir / "SW-00-0000_new.cfg").unlink()
+        index.refresh_device(device_dir)
+        tree = timed("索引 get_tree", index.tree)
+        index.tree_json()
+        timed("索引 get_tree_json (缓存命中)", index.tree_json)
+        timed("遍历目录 get_stats", service._scan_stats)
+        timed("索引 get_stats", index.stats)
+        search = ConfigSearchIndex(engine, index, max_file_bytes=16 * 1024 * 1024)
+        timed("全文索引首次建立", search.sync, repeat=1)
+        ip = f"10.0.0.{args.files - 1}"
+        found = timed(f"搜索 {ip} (最新配置)", lambda: search.search(ip))
+        timed("搜索 vlan batch 7 (全部版本)", lambda: search.search("vlan batch 7", version="all"))
+        if not found["files"]:
+            print("全文搜索未找到预期的配置")
+            return 1
+        if tree != scanned:
+            print("索引生成的文件树与遍历结果不一致")
+            return 1
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
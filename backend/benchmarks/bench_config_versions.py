@@ -0,0 +1,120 @@
+"""
+配置版本压缩存储基准测试
+
+在临时目录中为一台设备生成 V 个每日版本的大型配置 (默认约 2 MB 的防火墙策略)，每个版本随机增删改少量行，测量:
+  - 打包耗时与存储占用 (明文全量 vs 快照 + 行级差异)
+  - 任意版本的还原延迟 (快照本身 / 差异链最长的版本)
+  - get_tree / get_file_content 在打包后的耗时，并校验还原内容与原文逐字节一致
+
+用法: python -m backend.benchmarks.bench_config_versions --versions 60 --lines 40000 --changes 20
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from backend.services.configs.file_service import FileService
+from backend.services.configs.version_store import ConfigVersionStore, HAS_ZSTD
+
+
+def make_config(lines: int) -> list:
+    config = ["#", "sysname FW-BENCH-01", "#"]
+    for i in range(lines // 4):
+        config.append(f"rule name policy_{i:06d}")
+        config.append(f" source-address 10.{i % 256}.{(i // 256) % 256}.0 mask 255.255.255.0")
+        config.append(f" destination-address 172.16.{i % 256}.{(i * 7) % 256} mask 255.255.255.255")
+        config.append(" action permit")
+    return [line + "\n" for line in config]
+
+
+def mutate(config: list, changes: int) -> list:
+    config = list(config)
+    for _ in range(changes):
+        pos = random.randrange(3, len(config))
+        op = random.random()
+        if op < 0.4:
+            config[pos] = config[pos].replace("permit", "deny") if "permit" in config[pos] else config[pos] + " description changed\n"
+        elif op < 0.7:
+            config.insert(pos, f" service-port tcp {random.randint(1, 65535)}\n")
+        else:
+            del config[pos]
+    return config
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def timed(label: str, func, repeat: int = 5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<44} {best * 1000:>10.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=60)
+    parser.add_argument("--lines", type=int, default=40000)
+    parser.add_argument("--changes", type=int, default=20, help="每个版本变更的行数")
+    parser.add_argument("--snapshot-interval", type=int, default=10)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_versions_"))
+    try:
+        device_dir = root / "bench" / "FW-BENCH-01"
+        device_dir.mkdir(parents=True)
+        config = make_config(args.lines)
+        originals = {}
+        now = time.time()
+        for v in range(args.versions):
+            data = "".join(config).encode("utf-8")
+            name = f"FW-BENCH-01_{v:04d}.cfg"
+            path = device_dir / name
+            path.write_bytes(data)
+            mtime = now - (args.versions - v) * 86400
+            os.utime(path, (mtime, mtime))
+            originals[name] = data
+            config = mutate(config, args.changes)
+        plain_size = dir_size(device_dir)
+        print(f"{args.versions} 个版本，单版本约 {len(data) / 1048576:.2f} MB，明文合计 {plain_size / 1048576:.1f} MB "
+              f"(压缩: {'zstd' if HAS_ZSTD else 'zlib'}，快照间隔 {args.snapshot_interval})")
+
+        store = ConfigVersionStore(snapshot_interval=args.snapshot_interval, keep_plain=1)
+        service = FileService(storage_root=root)
+        service.versions = store
+        start = time.perf_counter()
+        stats = store.compact(device_dir)
+        print(f"{'打包 ' + str(stats['packed']) + ' 个版本':<44} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+        packed_size = dir_size(device_dir)
+        print(f"存储占用 {plain_size / 1048576:.1f} MB -> {packed_size / 1048576:.2f} MB ({plain_size / max(packed_size, 1):.0f}x)")
+
+        entries = store.list_versions(device_dir)
+        snapshot = next(e for e in entries if e["kind"] == "full")["name"]
+        deepest = entries[min(args.snapshot_interval, len(entries)) - 1]["name"]
+        timed(f"还原快照版本 ({snapshot})", lambda: store.read(device_dir / snapshot))
+        timed(f"还原最长差异链版本 ({deepest})", lambda: store.read(device_dir / deepest))
+        timed("get_tree", service.get_tree)
+        timed("get_file_content (已打包版本)", lambda: service.get_file_content(str(device_dir / deepest)))
+
+        start = time.perf_counter()
+        mismatched = [name for name in originals
+                      if (store.read(device_dir / name) if store.contains(device_dir / name)
+                          else (device_dir / name).read_bytes()) != originals[name]]
+        print(f"校验全部 {len(originals)} 个版本: {'一致' if not mismatched else '不一致 ' + ', '.join(mismatched)} "
+              f"({time.perf_counter() - start:.2f}s)")
+        return 1 if mismatched else 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
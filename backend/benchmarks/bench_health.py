@@ -0,0 +1,88 @@
+"""
+健康指标时序查询基准测试
+
+在临时 SQLite 库中为 N 台设备生成 D 天的巡检采样 (每天 P 次)，测量:
+  - range:       单台设备 90 天原始采样
+  - downsample:  单台设备 90 天按天降采样
+  - fleet:       全网 90 天按天汇总曲线
+  - latest:      全部设备 / 指定设备的最新采样
+
+用法: python -m backend.benchmarks.bench_health --devices 5000 --days 90 --per-day 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_health_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from backend.core.database import engine  # noqa: E402
+from backend.services.automation.health_store import HealthStore  # noqa: E402
+
+
+def seed(devices: int, days: int, per_day: int) -> int:
+    SQLModel.metadata.create_all(engine)
+    now = int(time.time())
+    step = 86400 // per_day
+    total = 0
+    with Session(engine) as session:
+        store = HealthStore(session)
+        for n in range(days * per_day):
+            ts = now - (days * per_day - n) * step
+            samples = [
+                {
+                    "device": f"dev-{i:05d}", "ts": ts + i % step, "log_id": n, "success": True,
+                    "cpu": random.uniform(1, 90), "mem": random.uniform(10, 80), "max_temp": random.uniform(30, 60),
+                    "fans_ok": True, "pwr_ok": True, "temp_ok": True, "if_total": 52, "if_up": random.randint(10, 52),
+                    "if_errors": random.randint(0, 5), "model": "S5735", "version": "V200R021",
+                }
+                for i in range(devices)
+            ]
+            store.add_samples(samples)
+            total += len(samples)
+    return total
+
+
+def timed(label: str, func, repeat: int = 5) -> float:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:>10.1f} ms  ({len(result)} 行)")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"生成 {args.devices} 台设备 x {args.days} 天 x {args.per_day} 次/天 采样 ...")
+    started = time.perf_counter()
+    total = seed(args.devices, args.days, args.per_day)
+    print(f"写入 {total} 条采样，耗时 {time.perf_counter() - started:.1f}s，库文件 {os.path.getsize(engine.url.database) / 1048576:.1f} MB")
+
+    end = int(time.time())
+    start = end - args.days * 86400
+    device = f"dev-{random.randrange(args.devices):05d}"
+    with Session(engine) as session:
+        store = HealthStore(session)
+        timed(f"range ({device}, {args.days} 天原始)", lambda: store.range(device, start, end))
+        timed(f"downsample ({device}, 按天)", lambda: store.downsample(start, end, 86400, devices=[device], per_device=False))
+        timed(f"fleet ({args.devices} 台, 按天汇总)", lambda: store.downsample(start, end, 86400, per_device=False), repeat=1)
+        timed(f"latest ({args.devices} 台)", lambda: store.latest())
+        targets = [f"dev-{i:05d}" for i in random.sample(range(args.devices), 50)]
+        timed("latest (50 台)", lambda: store.latest(targets))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Inventory 加载基准测试
+
+在临时 SQLite 库中生成 N 台设备，对比:
+  - legacy:   旧实现 (每次作业 SELECT 全表、解密全部凭据、构建全量 Host 后再用 Python 过滤)
+  - cold:     缓存为空时的全量构建
+  - warm:     缓存命中、无设备变更时的全量构建
+  - targeted: 缓存命中时按目标设备 SQL IN 定向构建
+  - changed:  少量设备变更后的定向构建
+
+用法: python -m backend.benchmarks.bench_inventory --devices 10000 --targets 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_inventory_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from backend.core.database import engine  # noqa: E402
+from backend.core.security import encrypt_password  # noqa: E402
+from backend.models.device import Device  # noqa: E402
+from backend.network_engine.core import NetworkEngine  # noqa: E402
+from backend.network_engine.inventory import InventoryCache, inventory_cache  # noqa: E402
+
+
+def seed(count: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    password = encrypt_password("bench-password")
+    secret = encrypt_password("bench-secret")
+    with Session(engine) as session:
+        for i in range(count):
+            session.add(Device(
+                name=f"dev-{i:05d}", ip=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                platform="huawei_vrp", username="admin", password=password, secret=secret,
+                region=f"region-{i % 20}", group_name=f"group-{i % 50}",
+            ))
+        session.commit()
+
+
+def legacy_build(names):
+    """复现旧流程: 全量 load 后再按名称过滤"""
+    cache = InventoryCache()   # 每次新建，等价于不缓存
+    inventory = cache.build()
+    return [h for h in inventory.hosts if h in set(names)]
+
+
+def timed(label: str, func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:>10.1f} ms")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--targets", type=int, default=50)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"生成 {args.devices} 台设备 ...")
+    seed(args.devices)
+    names = [f"dev-{i:05d}" for i in random.sample(range(args.devices), args.targets)]
+    engine_inst = NetworkEngine()
+
+    timed("legacy (全量加载 + Python 过滤)", lambda: legacy_build(names))
+    timed("legacy InitNornir (全量)", lambda: (inventory_cache.clear(), engine_inst.build_nornir()))
+
+    inventory_cache.clear()
+    timed("cold (缓存为空, 全量)", lambda: (inventory_cache.clear(), inventory_cache.build()))
+    inventory_cache.build()
+    timed("warm (无变更, 全量)", lambda: inventory_cache.build())
+    timed(f"targeted (无变更, {args.targets} 台)", lambda: inventory_cache.build(names))
+    timed(f"targeted InitNornir ({args.targets} 台)", lambda: engine_inst.build_nornir(names))
+
+    def change_and_build():
+        with Session(engine) as session:
+            for device in session.exec(select(Device).where(Device.name.in_(names[:args.changed]))).all():
+                device.description = str(time.time())
+                device.updated_at = device.updated_at.replace(microsecond=(device.updated_at.microsecond + 1) % 1000000)
+                session.add(device)
+            session.commit()
+        inventory_cache.build(names)
+
+    timed(f"changed ({args.changed} 台变更后定向构建)", change_and_build)
+    print(f"缓存统计: {inventory_cache.stats}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
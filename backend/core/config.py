@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -13,6 +14,14 @@ class Settings(BaseSettings):
     CONFIGS_DIR: Path = STORAGE_DIR / "configs"
     UPLOADS_DIR: Path = STORAGE_DIR / "uploads"
     EXPORTS_DIR: Path = STORAGE_DIR / "exports"
+    BACKUP_DIR: Path = CONFIGS_DIR  # 自动化备份的落盘根目录 (按 区域/设备 分目录，与配置文件管理共用)
+    CONFIG_SNAPSHOT_INTERVAL: int = 10  # 配置版本存储: 每隔多少个版本保存一份全量快照 (其余为行级差异)
+    CONFIG_PLAIN_VERSIONS: int = 1  # 每台设备保留为明文文件的最新版本数，更早的版本打包压缩
+    CONFIG_WATCH_ENABLED: bool = True  # 监听配置存储目录的外部变更并增量更新索引 (需安装 watchdog，未安装时仅周期校准)
+    CONFIG_WATCH_DEBOUNCE: float = 2.0  # 文件事件防抖时间 (秒)，同一设备目录在此期间的多次变更合并为一次刷新
+    CONFIG_RECONCILE_INTERVAL: float = 1800  # 配置元数据索引的后台全量校准间隔 (秒)，0 表示只在启动时校准
+    CONFIG_RECONCILE_PAUSE: float = 0.2  # 后台校准每批设备之间的让出时间 (秒)
+    CONFIG_SEARCH_MAX_FILE_BYTES: int = 16 * 1024 * 1024  # 超过该大小的配置文件不建立全文索引
     
     # Database
     DATABASE_URL: str = f"sqlite:///{STORAGE_DIR}/netops.db"
@@ -23,6 +32,58 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ENCRYPTION_KEY: str = "" # For Nornir password encryption
     
+    # Automation
+    AUTOMATION_MAX_SESSIONS: int = 200  # 全局 SSH 会话预算 (所有作业的在途设备数 + 连接池空闲会话数的上限)
+    AUTOMATION_JOB_WORKERS: int = 4  # 同时执行的作业数
+    AUTOMATION_JOB_QUEUE_LIMIT: int = 200  # 排队作业上限 (超出时拒绝新作业)
+    AUTOMATION_PROGRESS_FLUSH_INTERVAL: float = 0.5  # 作业进度刷写间隔 (秒)
+    AUTOMATION_PROGRESS_FLUSH_EVENTS: int = 500  # 累积事件数达到该值时提前刷写
+    AUTOMATION_EVENT_BUFFER: int = 20000  # 每个作业保留的进度事件数 (用于断线续传)
+    AUTOMATION_EVENT_HEARTBEAT: float = 15  # 事件流心跳间隔 (秒)
+    AUTOMATION_EVENT_TOKEN_TTL: int = 60  # 事件流令牌有效期 (秒)，EventSource 无法携带 Authorization 头，改由 URL 参数传递短期令牌
+    # 单个作业的整体截止时间 (秒)，0 表示不限 (与引入截止时间前的行为一致)；全网备份/巡检耗时可能超过数小时，
+    # 需要整体截止时间的作业通过作业参数 job_timeout 单独设置，设备级截止时间见 AUTOMATION_HOST_TIMEOUT
+    AUTOMATION_JOB_TIMEOUT: float = 0
+    AUTOMATION_HOST_TIMEOUT: float = 600  # 单台设备的执行截止时间 (秒)，可由作业参数 host_timeout 覆盖
+    AUTOMATION_RUNNER_WORKERS: int = 100  # 单个作业的 Nornir 线程上限
+    AUTOMATION_CONCURRENCY_KEY: str = "region"  # 自适应并发的分区依据 (设备 region，缺省时退回 group)
+    # 各分区的并发下限/初始值/上限，未配置的分区使用 default；默认从原固定的 100 线程起步，
+    # 只在连接错误、认证拒绝或延迟升高时收缩 (单作业总并发仍受 AUTOMATION_RUNNER_WORKERS 限制)
+    # 例: {"default": {...}, "DC-Core": {"floor": 20, "initial": 50, "ceiling": 150}, "Branch": {"floor": 1, "initial": 3, "ceiling": 8}}
+    AUTOMATION_CONCURRENCY_LIMITS: Dict[str, Dict[str, int]] = {"default": {"floor": 2, "initial": 100, "ceiling": 100}}
+    AUTOMATION_CONCURRENCY_LATENCY_FACTOR: float = 2.0  # 设备耗时超过基线的倍数时视为拥塞并收缩并发
+    AUTOMATION_ASYNC_MAX_CONCURRENCY: int = 1000  # 异步引擎 (作业参数 engine="async") 单作业的最大并发设备数
+    AUTOMATION_POOL_MAX_IDLE: int = 200  # 连接池空闲连接总数上限 (同时受 AUTOMATION_MAX_SESSIONS 约束，授予新租约时先淘汰最久未用的空闲连接)
+    AUTOMATION_POOL_IDLE_TIMEOUT: float = 300  # 空闲连接超过该时长 (秒) 后关闭
+    AUTOMATION_POOL_KEEPALIVE: int = 30  # SSH 心跳间隔 (秒)
+    AUTOMATION_GETTER_CACHE_TTL: float = 300  # NAPALM getter 结果缓存时长 (秒)
+    AUTOMATION_GETTER_CACHE_SIZE: int = 5000  # getter 缓存条目上限 (LRU 淘汰)
+    AUTOMATION_VENDOR_COLLECTORS: bool = True  # 华为/H3C 巡检使用厂商原生命令集 (一个会话内流水线采集并本地解析)，关闭时走 NAPALM getter
+    AUTOMATION_QUERY_PIPELINE: bool = True  # 查询作业在同一会话内一次写入全部命令并按提示符切分输出 (无法切分的命令逐条重试)
+    AUTOMATION_QUERY_READ_TIMEOUT: float = 120  # 流水线读取全部命令输出的整体超时 (秒，设备持续输出时同样生效)
+    AUTOMATION_TEMPLATES_DIR: Path = STORAGE_DIR / "templates"  # 自定义解析模板目录 (<平台>_<命令>.textfsm / .ttp，优先于 ntc-templates)
+    AUTOMATION_PREFLIGHT: bool = False  # 执行前并发 TCP 拨测设备管理端口，不可达设备直接标记 unreachable 不再分派 (默认关闭，作业参数 preflight 可按作业开启)
+    AUTOMATION_PREFLIGHT_TIMEOUT: float = 1.0  # 预检 TCP 握手超时 (秒)
+    AUTOMATION_PREFLIGHT_CONCURRENCY: int = 500  # 预检同时进行的 TCP 握手数
+    AUTOMATION_EXECUTION_MODE: str = "local"  # local: API 进程内执行；distributed: 拆分为分片由 worker 进程 (python -m backend.worker) 执行，可由作业参数 distributed 覆盖
+    AUTOMATION_SHARD_SIZE: int = 200  # 每个分片的设备数上限
+    AUTOMATION_SHARD_BY: str = "region"  # 分片分组依据: region 先按区域分组再切分；none 仅按设备数切分
+    AUTOMATION_SHARD_HEARTBEAT_TIMEOUT: float = 120  # worker 心跳超时 (秒)，超时的分片重新入队
+    AUTOMATION_SHARD_MAX_ATTEMPTS: int = 3  # 分片最多被领取的次数
+    AUTOMATION_LEADER_LEASE_TTL: float = 10  # 调度领导者租约时长 (秒)，领导者进程退出后最迟在该时长后由其他进程接管
+    AUTOMATION_LEADER_RENEW_INTERVAL: float = 2  # 领导者续约 / 候选者抢占的间隔 (秒)
+    HEALTH_RETENTION_DAYS: int = 180  # 健康指标时序的保留天数 (启动时清理更早的采样)
+    HEALTH_MAX_POINTS: int = 2000  # 单次趋势查询返回的最大点数 (超出时自动放大降采样粒度)
+    INTERFACE_TOP_N: int = 10  # 巡检汇总中展示的异常接口数量 (按错误增量排序)
+    AUTOMATION_INSPECT_COLLECTOR: str = "ssh"  # 巡检采集方式: ssh；snmp 先走 SNMP，失败或未配置凭据的设备回退 SSH (作业参数 collector 可覆盖)
+    SNMP_DEFAULT_COMMUNITY: Optional[str] = None  # 设备未单独配置 SNMP 时使用的 v2c 团体字，为空则这些设备直接走 SSH
+    SNMP_PORT: int = 161
+    SNMP_TIMEOUT: float = 2.0  # 单个 SNMP 请求的超时 (秒)
+    SNMP_RETRIES: int = 1  # 超时重试次数
+    SNMP_MAX_INFLIGHT: int = 2000  # 同时在途的 SNMP 请求数上限
+    SNMP_MAX_REPETITIONS: int = 25  # GetBulk 的 max-repetitions
+    SNMP_TEMP_ALERT: float = 75  # 设备未提供温度阈值时的告警温度 (摄氏度)
+    
     # App Info
     PROJECT_NAME: str = "NetOps Platform"
     VERSION: str = "1.0.0"
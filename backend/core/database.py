@@ -1,4 +1,6 @@
-﻿from sqlalchemy.orm import sessionmaker
+﻿from enum import Enum
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel, create_engine, Session
 from backend.core.config import settings
 
@@ -12,6 +14,50 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, clas
 def init_db():
     """初始化数据库表结构"""
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+
+def _column_default(column):
+    """字段的缺省值 (模型 default / default_factory)，没有缺省值时返回 None"""
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    # 可调用缺省值由 SQLAlchemy 包装为接受执行上下文的函数
+    return default.arg(None) if default.is_callable else default.arg
+
+def _default_clause(column, dialect) -> str:
+    """ADD COLUMN 的 DEFAULT 子句: 只为简单标量 (数值 / 字符串 / 布尔) 生成字面量"""
+    if column.server_default is not None:
+        return f" DEFAULT {column.server_default.arg}"
+    default = column.default
+    if default is None or not default.is_scalar or isinstance(default.arg, Enum):
+        return ""
+    if not isinstance(default.arg, (bool, int, float, str)):
+        return ""
+    literal = column.type.literal_processor(dialect)
+    return f" DEFAULT {literal(default.arg) if literal else default.arg}"
+
+def _add_missing_columns(bind=None):
+    """为已存在的表补齐模型新增的字段 (create_all 不会修改已有表结构)
+
+    新字段带 DEFAULT 子句，并按模型缺省值回填已有行: 否则旧数据该列为 NULL，
+    非 Optional 字段在读取模型校验时失败 (如设备列表接口返回 500)
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                default = _default_clause(column, bind.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}{default}')
+                value = _column_default(column)
+                if value is not None:
+                    conn.execute(update(table).where(column.is_(None)).values({column.name: value}))
 
 def get_session():
     """获取数据库会话的依赖项"""
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 from typing import Any, Optional
 
 from cryptography.fernet import Fernet
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from backend.core.config import settings
@@ -28,6 +28,22 @@ def create_access_token(subject: str | Any, expires_delta: Optional[timedelta] =
     )
     return encoded_jwt
 
+def create_stream_token(subject: str, log_id: int) -> str:
+    """创建只能订阅指定作业日志事件流的短期令牌 (通过 URL 参数传递)"""
+    expire = datetime.utcnow() + timedelta(seconds=settings.AUTOMATION_EVENT_TOKEN_TTL)
+    to_encode = {"exp": expire, "sub": str(subject), "scope": f"job_events:{log_id}"}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def verify_stream_token(token: str, log_id: int) -> Optional[str]:
+    """校验事件流令牌，返回用户名；令牌无效、过期或不属于该作业日志时返回 None"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("scope") != f"job_events:{log_id}":
+        return None
+    return payload.get("sub")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证明文密码与哈希值是否匹配"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -44,13 +44,39 @@ async def startup_event():
     logger.info("NetOps Backend 启动中...")
     
     # Initialize DB
-    from backend.core.database import init_db
+    from backend.core.database import init_db, engine
     init_db()
 
+    # 历史作业结果迁移至明细表 (已迁移的日志会被跳过)
+    from backend.services.automation.job_results import JobResultService
+    JobResultService.migrate_legacy_results(engine)
+
+    # 健康指标时序：首次启动时从历史巡检结果回填，并清理超出保留期的采样
+    from backend.core.database import SessionLocal
+    from backend.services.automation.health_store import HealthStore
+    from backend.services.automation.interface_counters import InterfaceCounterStore
+    HealthStore.backfill_from_results(engine)
+    with SessionLocal() as session:
+        HealthStore(session).prune(settings.HEALTH_RETENTION_DAYS)
+        InterfaceCounterStore(session).prune(settings.HEALTH_RETENTION_DAYS)
+
+    # 配置元数据索引：后台校准存储目录 (首次建立时需读取全部文件，完成前文件树按目录遍历生成)，
+    # 之后监听目录的外部变更并周期校准
+    from backend.services.configs.config_watcher import config_watcher
+    config_watcher.start()
+
     # 自动化调度器初始化
     from backend.services.automation.scheduler import scheduler_service
     scheduler_service.setup_scheduled_tasks()
-    logger.info("APScheduler 任务已恢复")
+    logger.info("已加入调度领导者选举，当选后恢复周期任务")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # 释放调度领导者租约，其他 worker 进程无需等待租约过期即可接管
+    from backend.services.automation.scheduler import scheduler_service
+    scheduler_service.shutdown()
+    from backend.services.configs.config_watcher import config_watcher
+    config_watcher.stop()
 
 app.include_router(login.router, prefix="/api/auth", tags=["auth"])
 app.include_router(device_manager.router, prefix="/api/devices", tags=["devices"])
@@ -1,6 +1,7 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field, JSON
 
 class TaskType(str, Enum):
@@ -25,6 +26,7 @@ class JobStatus(str, Enum):
     PARTIAL = "partial"         # 部分成功
     FAILED = "failed"           # 全部失败
     CANCELLED = "cancelled"     # 已取消
+    TIMEOUT = "timeout"         # 超出作业截止时间
 
 class AutomationJob(SQLModel, table=True):
     """自动化作业逻辑配置（主表）"""
@@ -60,13 +62,93 @@ class JobLog(SQLModel, table=True):
     total_devices: int = Field(default=0)
     success_count: int = Field(default=0)
     failed_count: int = Field(default=0)
+    unreachable_count: int = Field(default=0, description="预检不可达的设备数 (计入 failed_count)")
     
-    # 详细结果 (JSON 存储每个主机的输出和失败原因)
+    # 详细结果已拆分至 JobHostResult / JobStepResult，此处仅保留系统级错误 (system_error) 与历史数据
     # 格式: { "host1": { "success": true, "result": "...", "error": null }, ... }
     results: Optional[Dict[str, Any]] = Field(default={}, sa_type=JSON)
     
+    # 执行指标 (设备租约排队、等待时长等)
+    metrics: Optional[Dict[str, Any]] = Field(default={}, sa_type=JSON)
+    
     start_time: datetime = Field(default_factory=datetime.now)
     end_time: Optional[datetime] = Field(None)
     duration: Optional[float] = Field(None, description="执行耗时 (秒)")
     
     trigger_type: str = Field(default="manual", description="触发方式: manual/auto")
+
+class JobHostResult(SQLModel, table=True):
+    """作业执行结果 - 设备维度 (每个作业日志每台设备一行)"""
+    __table_args__ = (UniqueConstraint("log_id", "host", name="uq_jobhostresult_log_host"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    log_id: int = Field(index=True, description="关联的执行日志ID")
+    host: str = Field(index=True, description="设备名称")
+    
+    success: bool = Field(default=False)
+    status: str = Field(default="running", description="running/success/failed")
+    error: Optional[str] = Field(None, description="失败原因")
+    
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class JobStepResult(SQLModel, table=True):
+    """作业执行结果 - 步骤维度 (每台设备每个子任务一行)"""
+    __table_args__ = (UniqueConstraint("log_id", "host", "step", name="uq_jobstepresult_log_host_step"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    log_id: int = Field(index=True, description="关联的执行日志ID")
+    host: str = Field(description="设备名称")
+    step: str = Field(description="步骤名称 (Nornir 子任务名)")
+    seq: int = Field(default=0, description="步骤在设备内的展示顺序")
+    
+    success: bool = Field(default=True)
+    status: str = Field(default="pending", description="pending/running/success/failed")
+    result: Optional[Any] = Field(None, sa_type=JSON, description="子任务返回内容")
+    exception: Optional[str] = Field(None)
+    
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class ShardStatus(str, Enum):
+    """作业分片状态枚举"""
+    PENDING = "pending"         # 等待 worker 领取
+    CLAIMED = "claimed"         # 已被 worker 领取并执行中
+    CANCELLING = "cancelling"   # 执行中被请求取消 (worker 心跳时感知)
+    DONE = "done"               # 执行完成 (设备级成败见明细表)
+    FAILED = "failed"           # 引擎崩溃或重试次数耗尽
+    CANCELLED = "cancelled"     # 已取消
+    TIMEOUT = "timeout"         # 超出作业截止时间
+
+class JobShard(SQLModel, table=True):
+    """分布式执行的作业分片 (持久化队列：API 进程入队，worker 进程领取执行，结果写回同一 JobLog 的明细表)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    log_id: int = Field(index=True, description="关联的执行日志ID")
+    job_id: int = Field(description="关联的任务ID")
+    shard_key: str = Field(default="default", description="分片依据 (区域名或 default)")
+    hosts: List[str] = Field(default=[], sa_type=JSON, description="分片包含的设备名")
+
+    status: ShardStatus = Field(default=ShardStatus.PENDING, index=True)
+    worker_id: Optional[str] = Field(None, description="领取该分片的 worker 标识")
+    attempts: int = Field(default=0, description="已领取次数 (worker 心跳超时后重新入队)")
+    error: Optional[str] = Field(None)
+    metrics: Optional[Dict[str, Any]] = Field(default={}, sa_type=JSON, description="分片执行指标")
+
+    created_at: datetime = Field(default_factory=datetime.now)
+    claimed_at: Optional[datetime] = Field(None)
+    heartbeat_at: Optional[datetime] = Field(None)
+    finished_at: Optional[datetime] = Field(None)
+
+class SchedulerLease(SQLModel, table=True):
+    """调度领导者租约 (多进程部署时仅持有未过期租约的进程运行周期调度)"""
+    name: str = Field(primary_key=True, description="租约名称")
+    holder: Optional[str] = Field(None, description="当前持有者标识 (主机名-进程号-随机后缀)")
+    acquired_at: Optional[datetime] = Field(None, description="本任持有者当选时间")
+    expires_at: datetime = Field(default_factory=datetime.now, description="租约到期时间，持有者需在此之前续约")
+
+class ConfigBackupState(SQLModel, table=True):
+    """设备配置备份状态 (规范化配置的内容哈希，用于跳过未变更的备份)"""
+    device: str = Field(primary_key=True, description="设备名称")
+    config_hash: str = Field(description="规范化后运行配置的 SHA-256")
+    last_path: Optional[str] = Field(None, description="最近一次写入的备份文件路径")
+    changed_at: datetime = Field(default_factory=datetime.now, description="最近一次检测到变更 (写入文件) 的时间")
+    verified_at: datetime = Field(default_factory=datetime.now, description="最近一次校验 (含未变更) 的时间")
+    verify_count: int = Field(default=0, description="自上次变更以来确认未变更的次数")
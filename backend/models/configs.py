@@ -0,0 +1,48 @@
+from typing import Optional
+from sqlalchemy import Index, UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+class ConfigRegionEntry(SQLModel, table=True):
+    """配置存储元数据索引: 区域目录及其统计"""
+    name: str = Field(primary_key=True, description="区域名称 (存储根目录下的一级目录)")
+    # 统计计数随索引增量维护 (全量校准时重新汇总纠偏)，统计接口只读区域行
+    devices: int = Field(default=0, description="设备目录数")
+    files: int = Field(default=0, description="配置文件数 (含已打包版本)")
+    total_bytes: int = Field(default=0, description="配置内容总大小 (字节，已打包版本按还原后大小计)")
+    newest_mtime: Optional[float] = Field(None, description="最新配置文件的修改时间 (Unix 秒)")
+
+class ConfigDeviceEntry(SQLModel, table=True):
+    """配置存储元数据索引: 设备目录 (缓存设备类型识别结果)"""
+    region: str = Field(primary_key=True, description="区域名称")
+    device: str = Field(primary_key=True, description="设备名称 (区域目录下的二级目录)")
+    device_type: str = Field(default="unknown", description="由最新明文配置识别的设备类型")
+    detected_from: Optional[str] = Field(None, description="识别设备类型所用的文件名 (最新文件变化时重新识别)")
+
+class ConfigFileEntry(SQLModel, table=True):
+    """配置存储元数据索引: 配置文件 (明文文件与已打包的历史版本各一行)，文件树接口直接由索引生成"""
+    __table_args__ = (
+        UniqueConstraint("region", "device", "name", name="uq_configfileentry_path"),
+        Index("ix_configfileentry_device_mtime", "region", "device", "mtime"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    region: str = Field(description="区域名称")
+    device: str = Field(description="设备名称")
+    name: str = Field(description="文件名")
+    size: int = Field(default=0, description="文件大小 (字节，已打包版本为还原后的大小)")
+    mtime: float = Field(description="修改时间 (Unix 秒)")
+    hash: Optional[str] = Field(None, description="文件内容 SHA-256 (已打包版本在建立全文索引时补齐)")
+    packed: bool = Field(default=False, description="是否为已打包进版本存储的历史版本")
+    doc_id: Optional[int] = Field(None, index=True, description="全文索引文档ID (内容相同的文件共用；为空表示待索引，0 表示不索引)")
+
+class ConfigIndexState(SQLModel, table=True):
+    """配置存储元数据索引的状态 (单行): 每次索引变更递增版本号，各进程据此判断缓存的文件树是否过期"""
+    id: int = Field(default=1, primary_key=True)
+    generation: int = Field(default=0, description="索引版本号")
+    reconciled_at: Optional[float] = Field(None, description="最近一次全量校准完成的时间 (Unix 秒)，为空表示索引尚未建立")
+
+class ConfigContentDoc(SQLModel, table=True):
+    """配置全文索引文档: 按内容哈希去重，id 即 FTS5 表 config_fts 的 rowid"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    hash: str = Field(unique=True, description="内容 SHA-256")
+    size: int = Field(default=0, description="内容大小 (字节)")
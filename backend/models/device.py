@@ -31,6 +31,16 @@ class DeviceBase(SQLModel):
     secret: Optional[str] = Field(None, description="特权密码 (enable password)")
     port: int = Field(default=22, description="SSH/Telnet 端口")
     connection_type: str = Field(default="ssh", description="连接方式: ssh 或 telnet")
+
+    # SNMP 采集 (巡检快速通道)
+    snmp_version: Optional[str] = Field(None, description="SNMP 版本: 2c 或 3，为空时使用全局缺省团体字")
+    snmp_port: int = Field(default=161, description="SNMP 端口")
+    snmp_community: Optional[str] = Field(None, description="SNMPv2c 团体字 (加密存储)")
+    snmp_user: Optional[str] = Field(None, description="SNMPv3 用户名")
+    snmp_auth_protocol: Optional[str] = Field(None, description="SNMPv3 认证算法: md5 / sha / sha256 ...")
+    snmp_auth_key: Optional[str] = Field(None, description="SNMPv3 认证密钥 (加密存储)")
+    snmp_priv_protocol: Optional[str] = Field(None, description="SNMPv3 加密算法: des / aes / aes256 ...")
+    snmp_priv_key: Optional[str] = Field(None, description="SNMPv3 加密密钥 (加密存储)")
     
     description: Optional[str] = Field(None, description="备注描述")
     
@@ -56,6 +66,9 @@ class DeviceRead(DeviceBase):
     # 彻底杜绝凭据返回前端
     password: Optional[str] = Field(None, exclude=True)
     secret: Optional[str] = Field(None, exclude=True)
+    snmp_community: Optional[str] = Field(None, exclude=True)
+    snmp_auth_key: Optional[str] = Field(None, exclude=True)
+    snmp_priv_key: Optional[str] = Field(None, exclude=True)
 
 class DeviceUpdate(SQLModel):
     """设备更新模型"""
@@ -75,6 +88,14 @@ class DeviceUpdate(SQLModel):
     secret: Optional[str] = None
     port: Optional[int] = None
     connection_type: Optional[str] = None
+    snmp_version: Optional[str] = None
+    snmp_port: Optional[int] = None
+    snmp_community: Optional[str] = None
+    snmp_user: Optional[str] = None
+    snmp_auth_protocol: Optional[str] = None
+    snmp_auth_key: Optional[str] = None
+    snmp_priv_protocol: Optional[str] = None
+    snmp_priv_key: Optional[str] = None
     description: Optional[str] = None
     metadata_info: Optional[Dict[str, Any]] = None
 
@@ -0,0 +1,116 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+class HealthSample(SQLModel, table=True):
+    """设备健康指标时序 (巡检时每台设备写入一行，ts 为 Unix 秒，按 (device, ts) 建索引供趋势查询)"""
+    __table_args__ = (Index("ix_healthsample_device_ts", "device", "ts"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    device: str = Field(description="设备名称")
+    ts: int = Field(index=True, description="采样时间 (Unix 秒)")
+    log_id: Optional[int] = Field(None, description="来源执行日志ID")
+
+    success: bool = Field(default=True, description="该次巡检是否成功")
+    cpu: Optional[float] = Field(None, description="CPU 利用率 (%)")
+    mem: Optional[float] = Field(None, description="内存利用率 (%)")
+    max_temp: Optional[float] = Field(None, description="最高温度 (℃)")
+    fans_ok: bool = Field(default=True)
+    pwr_ok: bool = Field(default=True)
+    temp_ok: bool = Field(default=True)
+    if_total: int = Field(default=0, description="接口总数")
+    if_up: int = Field(default=0, description="up 接口数")
+    if_errors: int = Field(default=0, description="接口错误计数合计")
+
+class HealthLatest(SQLModel, table=True):
+    """每台设备最近一次健康采样 (写入时间序列时同步 upsert，看板无需扫描历史)"""
+    device: str = Field(primary_key=True, description="设备名称")
+    ts: int = Field(description="采样时间 (Unix 秒)")
+    log_id: Optional[int] = Field(None)
+
+    success: bool = Field(default=True)
+    cpu: Optional[float] = Field(None)
+    mem: Optional[float] = Field(None)
+    max_temp: Optional[float] = Field(None)
+    fans_ok: bool = Field(default=True)
+    pwr_ok: bool = Field(default=True)
+    temp_ok: bool = Field(default=True)
+    if_total: int = Field(default=0)
+    if_up: int = Field(default=0)
+    if_errors: int = Field(default=0)
+    model: Optional[str] = Field(None, description="设备型号 (巡检 facts)")
+    version: Optional[str] = Field(None, description="软件版本 (巡检 facts)")
+
+class HealthRollup(SQLModel, table=True):
+    """全网健康指标小时汇总 (写入采样时累加，全网趋势按小时及以上粒度查询时无需扫描原始采样)"""
+    bucket: int = Field(primary_key=True, description="小时起点 (Unix 秒)")
+    samples: int = Field(default=0)
+    cpu_sum: float = Field(default=0)
+    cpu_count: int = Field(default=0)
+    cpu_max: Optional[float] = Field(None)
+    mem_sum: float = Field(default=0)
+    mem_count: int = Field(default=0)
+    mem_max: Optional[float] = Field(None)
+    temp_max: Optional[float] = Field(None)
+    fans_fail: int = Field(default=0, description="风扇异常的采样数")
+    pwr_fail: int = Field(default=0, description="电源异常的采样数")
+    if_up_sum: int = Field(default=0)
+    if_errors_max: int = Field(default=0)
+
+class InterfaceCounterSample(SQLModel, table=True):
+    """接口计数器时序 (巡检时每个接口一行：原始计数 + 相对上一采样的速率与错误增量，ts 为 Unix 秒)"""
+    __table_args__ = (Index("ix_ifcountersample_device_if_ts", "device", "interface", "ts"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    device: str = Field(description="设备名称")
+    interface: str = Field(description="接口名称")
+    ts: int = Field(index=True, description="采样时间 (Unix 秒)")
+    log_id: Optional[int] = Field(None, description="来源执行日志ID")
+
+    rx_octets: Optional[int] = Field(None)
+    tx_octets: Optional[int] = Field(None)
+    rx_packets: Optional[int] = Field(None)
+    tx_packets: Optional[int] = Field(None)
+    rx_errors: Optional[int] = Field(None)
+    tx_errors: Optional[int] = Field(None)
+    rx_discards: Optional[int] = Field(None)
+    tx_discards: Optional[int] = Field(None)
+
+    interval: Optional[float] = Field(None, description="增量对应的时长 (秒)，无可用的上一采样时为空")
+    rx_bps: Optional[float] = Field(None)
+    tx_bps: Optional[float] = Field(None)
+    rx_pps: Optional[float] = Field(None)
+    tx_pps: Optional[float] = Field(None)
+    util: Optional[float] = Field(None, description="收/发方向较大者占接口速率的百分比")
+    error_delta: Optional[int] = Field(None, description="收发错误包增量")
+    discard_delta: Optional[int] = Field(None, description="收发丢弃包增量")
+    reset: bool = Field(default=False, description="检测到设备重启或计数器被清零")
+
+class InterfaceCounterLatest(SQLModel, table=True):
+    """每个接口最近一次计数器采样 (计算下一次增量的基准，同时供全网 Top N 查询)"""
+    device: str = Field(primary_key=True)
+    interface: str = Field(primary_key=True)
+    ts: int = Field(description="采样时间 (Unix 秒)")
+    log_id: Optional[int] = Field(None)
+    uptime: Optional[float] = Field(None, description="采样时设备运行时长 (秒)，用于识别重启")
+    speed: Optional[float] = Field(None, description="接口速率 (Mbps)")
+
+    rx_octets: Optional[int] = Field(None)
+    tx_octets: Optional[int] = Field(None)
+    rx_packets: Optional[int] = Field(None)
+    tx_packets: Optional[int] = Field(None)
+    rx_errors: Optional[int] = Field(None)
+    tx_errors: Optional[int] = Field(None)
+    rx_discards: Optional[int] = Field(None)
+    tx_discards: Optional[int] = Field(None)
+
+    interval: Optional[float] = Field(None)
+    rx_bps: Optional[float] = Field(None)
+    tx_bps: Optional[float] = Field(None)
+    rx_pps: Optional[float] = Field(None)
+    tx_pps: Optional[float] = Field(None)
+    util: Optional[float] = Field(None, index=True)
+    error_delta: Optional[int] = Field(None, index=True)
+    discard_delta: Optional[int] = Field(None, index=True)
+    reset: bool = Field(default=False)
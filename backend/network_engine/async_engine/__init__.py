@@ -0,0 +1,10 @@
+"""
+异步执行引擎
+基于 asyncio + asyncssh，在单个事件循环中并发驱动数千台设备，
+作为线程模型 Nornir 运行器之外的可选后端 (作业参数 engine="async" 启用)。
+asyncssh 为可选依赖，未安装时 HAS_ASYNCSSH 为 False。
+"""
+from backend.network_engine.async_engine.session import HAS_ASYNCSSH, AsyncCliSession, CliError
+from backend.network_engine.async_engine.engine import AsyncEngine
+
+__all__ = ["HAS_ASYNCSSH", "AsyncCliSession", "CliError", "AsyncEngine"]
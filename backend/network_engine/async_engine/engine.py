@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+from backend.network_engine.async_engine.session import AsyncCliSession
+from backend.network_engine.async_engine.tasks import TASKS, StepReporter
+from backend.network_engine.job_control import ABORT_TIMEOUT, JobAbortedError, JobControl
+
+logger = logging.getLogger("automation")
+
+class AsyncEngine:
+    """
+    异步执行引擎
+    每台设备是事件循环中的一个协程而不是一个线程，内存只随会话缓冲增长，
+    单进程即可同时驱动数千台设备。输入沿用 Nornir Inventory 的 Host 对象，
+    进度通过 StepReporter 上报，因此结果与线程模型写入完全相同的 JobLog 明细结构。
+    """
+
+    def __init__(self, max_concurrency: int = 1000, connect_timeout: float = 15, read_timeout: float = 60):
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.stats: Dict[str, Any] = {}
+
+    def run(self, hosts: List[Any], task_name: str, reporter: StepReporter, run_name: Optional[str] = None,
+            control: Optional[JobControl] = None, leases: Any = None, lease_owner: Any = None, **kwargs) -> Dict[str, Any]:
+        """在当前线程中启动事件循环执行任务 (由作业执行线程调用)，返回执行统计"""
+        return asyncio.run(self.run_async(hosts, task_name, reporter, run_name, control, leases, lease_owner, **kwargs))
+
+    async def run_async(self, hosts: List[Any], task_name: str, reporter: StepReporter, run_name: Optional[str] = None,
+                        control: Optional[JobControl] = None, leases: Any = None, lease_owner: Any = None,
+                        **kwargs) -> Dict[str, Any]:
+        task_func = TASKS.get(task_name)
+        if task_func is None:
+            raise ValueError(f"异步引擎暂不支持的任务: {task_name}")
+        run_name = run_name or task_name
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.stats = {"engine": "async", "hosts": len(hosts), "success": 0, "failed": 0, "peak_inflight": 0}
+        inflight = 0
+        started = time.monotonic()
+
+        async def run_host(host: Any) -> None:
+            nonlocal inflight
+            async with semaphore:
+                reporter.record_step_started(host.name, run_name)
+                try:
+                    # 设备租约：轮询而不是阻塞，等待期间不占用线程
+                    lease = (leases.lease_async(lease_owner, host.name, abort_check=control.check if control else None)
+                             if leases is not None else contextlib.nullcontext())
+                    async with lease:
+                        if control:
+                            control.check()
+                        inflight += 1
+                        self.stats["peak_inflight"] = max(self.stats["peak_inflight"], inflight)
+                        host_timeout = control.host_timeout if control else None
+                        try:
+                            result = await asyncio.wait_for(self._execute(host, task_func, reporter, **kwargs), timeout=host_timeout)
+                        except asyncio.TimeoutError:
+                            # 记入执行控制，作业指标 (abort) 与线程引擎一致地统计超时设备
+                            control.abort_host(host.name, ABORT_TIMEOUT)
+                            raise JobAbortedError(ABORT_TIMEOUT, f"设备执行超过 {host_timeout}s 截止时间")
+                        finally:
+                            inflight -= 1
+                    reporter.record_step_completed(host.name, run_name, False, result, None)
+                    self.stats["success"] += 1
+                except asyncio.CancelledError:
+                    # 作业被取消或整体超时，由监视协程取消
+                    reason = control.reason if control and control.reason else ABORT_TIMEOUT
+                    if control:
+                        control.abort_host(host.name, reason)
+                    reporter.record_step_completed(host.name, run_name, True, None, JobAbortedError(reason))
+                    self.stats["failed"] += 1
+                except Exception as e:
+                    reporter.record_step_completed(host.name, run_name, True, str(e), e)
+                    self.stats["failed"] += 1
+
+        tasks = [asyncio.create_task(run_host(host)) for host in hosts]
+        monitor = asyncio.create_task(self._watch(control, tasks)) if control else None
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if monitor:
+            monitor.cancel()
+        self.stats["elapsed"] = round(time.monotonic() - started, 3)
+        return self.stats
+
+    async def _execute(self, host: Any, task_func, reporter: StepReporter, **kwargs) -> Any:
+        async with AsyncCliSession(
+            host.hostname, port=host.port or 22, username=host.username, password=host.password,
+            platform=host.platform, connect_timeout=self.connect_timeout, read_timeout=self.read_timeout,
+        ) as session:
+            return await task_func(session, host, reporter, **kwargs)
+
+    @staticmethod
+    async def _watch(control: JobControl, tasks: List[asyncio.Task]) -> None:
+        """监视取消与作业整体截止时间，触发时取消所有未完成的设备协程"""
+        while True:
+            await asyncio.sleep(0.5)
+            try:
+                control.check()
+            except JobAbortedError:
+                for t in tasks:
+                    if not t.done():
+                        t.cancel()
+                return
@@ -0,0 +1,169 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.network_engine.cli_output import platform_family, split_pipelined_output
+
+logger = logging.getLogger("automation")
+
+# asyncssh 为可选依赖
+try:
+    import asyncssh
+    HAS_ASYNCSSH = True
+except ImportError:
+    asyncssh = None
+    HAS_ASYNCSSH = False
+
+# 通用提示符: <HUAWEI>  [~HUAWEI]  Switch#  Router>  (H3C 与华为同为尖括号/方括号)
+PROMPT_PATTERN = re.compile(r"(?:^|[\r\n])([<\[][~*]?[\w\-.:/@()]+[>\]]|[\w\-.:/@()]+[>#])\s*$")
+# 分页提示 (未成功关闭分页时兜底)
+MORE_PATTERN = re.compile(r"(-+\s*More\s*-+|--More--)\s*$", re.IGNORECASE)
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# 各平台关闭分页的命令
+PAGING_COMMANDS = {
+    "huawei": "screen-length 0 temporary",
+    "h3c": "screen-length disable",
+    "default": "terminal length 0",
+}
+
+class CliError(Exception):
+    """异步会话层错误 (连接、认证、读取超时)"""
+    pass
+
+class AsyncCliSession:
+    """
+    基于 asyncssh 交互式 Shell 的设备 CLI 会话
+    登录后识别提示符并关闭分页，之后每条命令读取到提示符重新出现为止。
+    """
+
+    def __init__(self, host: str, port: int = 22, username: Optional[str] = None, password: Optional[str] = None,
+                 platform: Optional[str] = None, connect_timeout: float = 15, read_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.family = platform_family(platform)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.prompt: Optional[str] = None
+        self.connect_latency: Optional[float] = None
+        self._conn: Any = None
+        self._process: Any = None
+
+    async def __aenter__(self) -> "AsyncCliSession":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        if not HAS_ASYNCSSH:
+            raise CliError("未安装 asyncssh，无法使用异步执行引擎 (pip install asyncssh)")
+        start = time.monotonic()
+        try:
+            self._conn = await asyncio.wait_for(
+                asyncssh.connect(
+                    self.host, port=self.port, username=self.username, password=self.password,
+                    known_hosts=None, agent_path=None, client_keys=None,
+                ),
+                timeout=self.connect_timeout,
+            )
+            self._process = await self._conn.create_process(term_type="vt100", term_size=(511, 24))
+        except asyncssh.PermissionDenied as e:
+            raise CliError(f"Authentication failed: {e}") from e
+        except (OSError, asyncssh.Error, asyncio.TimeoutError) as e:
+            raise CliError(f"连接 {self.host}:{self.port} 失败: {e or type(e).__name__}") from e
+
+        banner = await self._read_until_prompt()
+        self.prompt = self._extract_prompt(banner)
+        self.connect_latency = time.monotonic() - start
+        await self.send_command(PAGING_COMMANDS[self.family])
+
+    async def close(self) -> None:
+        if self._process is not None:
+            self._process.close()
+        if self._conn is not None:
+            self._conn.close()
+            try:
+                await asyncio.wait_for(self._conn.wait_closed(), timeout=5)
+            except Exception:
+                pass
+        self._conn = None
+        self._process = None
+
+    @staticmethod
+    def _extract_prompt(text: str) -> Optional[str]:
+        match = PROMPT_PATTERN.search(text)
+        return match.group(1) if match else None
+
+    async def _read_until_prompt(self, count: int = 1) -> str:
+        """读取输出直到出现提示符 (自动翻页)；count > 1 时读取到第 count 个行首提示符 (流水线命令)"""
+        prompt_line = re.compile(r"(?m)^[ \t]*" + re.escape(self.prompt)) if self.prompt and count > 1 else None
+        buffer = ""
+        deadline = time.monotonic() + self.read_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CliError(f"读取 {self.host} 输出超时 ({self.read_timeout}s)")
+            try:
+                chunk = await asyncio.wait_for(self._process.stdout.read(65536), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise CliError(f"读取 {self.host} 输出超时 ({self.read_timeout}s)")
+            if not chunk:
+                raise CliError(f"设备 {self.host} 关闭了会话 (EOF)")
+            buffer += ANSI_PATTERN.sub("", chunk)
+            tail = buffer[-256:]
+            if MORE_PATTERN.search(tail):
+                buffer = MORE_PATTERN.sub("", buffer)
+                self._process.stdin.write(" ")
+                continue
+            if self.prompt:
+                if tail.rstrip().endswith(self.prompt) and (prompt_line is None or len(prompt_line.findall(buffer)) >= count):
+                    return buffer
+            elif PROMPT_PATTERN.search(tail):
+                return buffer
+
+    async def send_command(self, command: str) -> str:
+        """发送一条命令并返回去掉回显与提示符后的输出"""
+        self._process.stdin.write(command + "\n")
+        raw = await self._read_until_prompt()
+        lines = raw.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        # 去掉首行命令回显与末行提示符
+        if lines and command.strip() and lines[0].strip().endswith(command.strip()):
+            lines = lines[1:]
+        if lines and self.prompt and lines[-1].strip().endswith(self.prompt):
+            lines = lines[:-1]
+        return "\n".join(lines).strip("\n")
+
+    async def send_commands(self, commands: Any) -> Dict[str, str]:
+        return {cmd: await self.send_command(cmd) for cmd in commands}
+
+    async def send_commands_pipelined(self, commands: List[str]) -> List[str]:
+        """一次写入全部命令，读取到最后一个提示符后按提示符切分；返回能切分出的前若干条命令的输出 (提示符未识别时为空)"""
+        if not self.prompt:
+            return []
+        self._process.stdin.write("".join(cmd + "\n" for cmd in commands))
+        raw = await self._read_until_prompt(count=len(commands))
+        return split_pipelined_output(raw, self.prompt, commands)
+
+    async def send_batch(self, commands: List[str], pipeline: bool = True) -> Tuple[List[str], str]:
+        """
+        发送命令集 (与 Nornir send_batch 一致): 优先流水线发送，输出无法切分的命令逐条补发；
+        返回 (各命令输出, 模式: pipelined / partial / sequential)
+        """
+        outputs: List[str] = []
+        mode = "sequential"
+        if pipeline and len(commands) > 1:
+            outputs = await self.send_commands_pipelined(commands)
+            if len(outputs) == len(commands):
+                return outputs, "pipelined"
+            logger.warning(f"设备 {self.host} 的流水线输出中 {len(commands) - len(outputs)} 条命令无法按提示符切分，改为逐条执行")
+            if outputs:
+                mode = "partial"
+        for cmd in commands[len(outputs):]:
+            outputs.append(await self.send_command(cmd))
+        return outputs, mode
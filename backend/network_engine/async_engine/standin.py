@@ -0,0 +1,169 @@
+"""
+本地 SSH 模拟设备 (用于异步引擎联调与压测)
+
+以华为 VRP 风格的 CLI 响应常见的查看命令，所有设备可指向同一个监听端口。
+用法: python -m backend.network_engine.async_engine.standin --port 8022 --username admin --password admin
+可选 --delay 为每条命令增加固定时延，--fail-auth 模拟 AAA 拒绝。
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from typing import Dict, Optional
+
+from backend.network_engine.async_engine.session import HAS_ASYNCSSH, asyncssh
+
+SYSNAME = "StandIn"
+
+RESPONSES: Dict[str, str] = {
+    "screen-length 0 temporary": "Info: The configuration takes effect on the current user terminal interface only.",
+    "display version": (
+        "Huawei Versatile Routing Platform Software\n"
+        "VRP (R) software, Version 5.170 (S5735 V200R021C10SPC600)\n"
+        "Copyright (C) 2000-2023 HUAWEI TECH Co., Ltd.\n"
+        "HUAWEI S5735-L48T4X-A1 Routing Switch uptime is 1 week, 2 days, 3 hours, 4 minutes"
+    ),
+    "display cpu-usage": "CPU Usage Stat. Cycle: 60 (Second)\nCPU Usage            : 12% Max: 35%",
+    "display memory-usage": (
+        "Memory utilization statistics at 2024-01-01 00:00:00+08:00\n"
+        "System Total Memory Is: 536870912 bytes\n"
+        "Total Memory Used Is: 161061273 bytes\n"
+        "Memory Using Percentage Is: 30%"
+    ),
+    "display interface brief": (
+        "Interface                   PHY   Protocol  InUti OutUti   inErrors  outErrors\n"
+        "GigabitEthernet0/0/1        up    up           0%     0%          0          0\n"
+        "GigabitEthernet0/0/2        down  down         0%     0%          0          0\n"
+        "GigabitEthernet0/0/3        up    up           0%     0%          0          0\n"
+        "Vlanif1                     up    up           --     --          0          0"
+    ),
+    "display esn": "ESN of slot 0: 2102353171DMK9000123",
+    "display device": (
+        "S5735-L48T4X-A1's Device status:\n"
+        "Slot Sub  Type                   Online    Power    Register     Status   Role\n"
+        "-------------------------------------------------------------------------------\n"
+        "0    -    S5735-L48T4X-A1        Present   PowerOn  Registered   Normal   Master\n"
+        "     PWR1 POWER                  Present   PowerOn  Registered   Normal   NA\n"
+        "     FAN1 FAN                    Present   PowerOn  Registered   Normal   NA"
+    ),
+    "display temperature all": (
+        "-------------------------------------------------------------------------------\n"
+        "Slot  Card  Sensor Status  Current(C)  Lower(C)  Lower        Upper(C)  Upper\n"
+        "                                                 Resume(C)              Resume(C)\n"
+        "-------------------------------------------------------------------------------\n"
+        "0     -     1      NORMAL  39          0         4            70        65"
+    ),
+    "display fan": (
+        "Slot  FanID   FanNum  Online    Status    Speed   Mode     Airflow\n"
+        "-------------------------------------------------------------------------------\n"
+        "0     1       [1-2]   Present   Normal    45%     Auto     Side-to-Back"
+    ),
+    "display power": (
+        "Slot    PowerID  Online   Mode    State      Power(W)\n"
+        "-------------------------------------------------------------------------------\n"
+        "0       PWR1     Present  AC      Supply     150.00"
+    ),
+    "display interface": "\n".join(
+        f"GigabitEthernet0/0/{i} current state : {state}\n"
+        "Line protocol current state : " + state + "\n"
+        "Description:\n"
+        "Switch Port, PVID :    1, TPID : 8100(Hex), The Maximum Frame Length is 9216\n"
+        "Speed :  1000,  Loopback: NONE\n"
+        "Duplex: FULL,   Negotiation: ENABLE\n"
+        "Statistics last cleared:never\n"
+        "    Last 300 seconds input rate: 1234 bits/sec, 2 packets/sec\n"
+        "    Last 300 seconds output rate: 5678 bits/sec, 3 packets/sec\n"
+        f"Input:  {123456 * i} packets, {98765432 * i} bytes\n"
+        "  Unicast:                  100000,  Multicast:                   20000\n"
+        "  Broadcast:                  3456,  Jumbo:                           0\n"
+        f"  Discard:                      {i},  Pause:                           0\n"
+        "  Frames:                        0\n\n"
+        f"  Total Error:                  {7 * (i == 3)}\n"
+        f"  CRC:                          {7 * (i == 3)},  Giants:                          0\n"
+        f"Output:  {234567 * i} packets, {87654321 * i} bytes\n"
+        "  Unicast:                  200000,  Multicast:                   30000\n"
+        "  Broadcast:                  4567,  Jumbo:                           0\n"
+        "  Discard:                       0,  Pause:                           0\n\n"
+        "  Total Error:                   0\n"
+        "    Input bandwidth utilization  :    0.01%\n"
+        "    Output bandwidth utilization :    0.01%\n"
+        for i, state in ((1, "UP"), (2, "DOWN"), (3, "UP"))
+    ) + "Vlanif1 current state : UP\nLine protocol current state : UP\nRoute Port,The Maximum Transmit Unit is 1500",
+    "display current-configuration": (
+        "!Software Version V200R021C10SPC600\n"
+        f"#\n sysname {SYSNAME}\n#\nvlan batch 10 20\n#\n"
+        "interface GigabitEthernet0/0/1\n port link-type access\n port default vlan 10\n#\nreturn"
+    ),
+}
+
+def _make_server(username: str, password: str, fail_auth: bool):
+    class StandInServer(asyncssh.SSHServer):
+        def begin_auth(self, user: str) -> bool:
+            return True
+
+        def password_auth_supported(self) -> bool:
+            return True
+
+        def validate_password(self, user: str, pw: str) -> bool:
+            return not fail_auth and user == username and pw == password
+    return StandInServer
+
+async def _handle_session(process, delay: float) -> None:
+    prompt = f"<{SYSNAME}>"
+    process.stdout.write(f"Info: The max number of VTY users is 5.\r\n{prompt}")
+    try:
+        while True:
+            line = await process.stdin.readline()
+            if not line:
+                break
+            cmd = line.strip()
+            if cmd in ("quit", "exit"):
+                break
+            if delay:
+                await asyncio.sleep(delay)
+            output = RESPONSES.get(cmd, "" if not cmd else f"Error: Unrecognized command found at '^' position.")
+            body = f"{cmd}\r\n" + (output.replace("\n", "\r\n") + "\r\n" if output else "")
+            process.stdout.write(body + prompt)
+    except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, ConnectionError):
+        pass
+    finally:
+        process.exit(0)
+
+async def start_server(host: str = "127.0.0.1", port: int = 8022, username: str = "admin", password: str = "admin",
+                       delay: float = 0.0, fail_auth: bool = False, host_key_path: Optional[str] = None):
+    """启动模拟设备并返回 asyncssh 服务器对象 (调用方负责 close)"""
+    if not HAS_ASYNCSSH:
+        raise RuntimeError("未安装 asyncssh (pip install asyncssh)")
+    if host_key_path is None:
+        host_key_path = os.path.join(tempfile.gettempdir(), "netops_standin_host_key")
+    if not os.path.exists(host_key_path):
+        asyncssh.generate_private_key("ssh-ed25519").write_private_key(host_key_path)
+    return await asyncssh.create_server(
+        _make_server(username, password, fail_auth), host, port,
+        server_host_keys=[host_key_path],
+        process_factory=lambda p: _handle_session(p, delay),
+        line_editor=False,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8022)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--delay", type=float, default=0.0, help="每条命令的模拟时延 (秒)")
+    parser.add_argument("--fail-auth", action="store_true", help="拒绝所有登录")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await start_server(args.host, args.port, args.username, args.password, args.delay, args.fail_auth)
+        print(f"模拟设备已监听 {args.host}:{args.port}")
+        await server.wait_closed()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import asyncio
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol
+import logging
+
+from backend.core.config import settings
+from backend.network_engine.async_engine.session import AsyncCliSession
+from backend.network_engine.cli_output import command_result
+from backend.network_engine.config_state import config_states
+from backend.network_engine.vendors import VendorCollector, collector_for
+
+logger = logging.getLogger("automation")
+
+class StepReporter(Protocol):
+    """步骤进度接收方 (NornirProgressProcessor 即满足该接口)"""
+    def record_step_started(self, host_name: str, step_name: str) -> None: ...
+    def record_step_completed(self, host_name: str, step_name: str, failed: bool, result: Any, exception: Optional[BaseException]) -> None: ...
+
+# 各平台的采集命令
+PLATFORM_COMMANDS = {
+    "huawei": {
+        "config": "display current-configuration",
+        "version": "display version",
+        "cpu": "display cpu-usage",
+        "memory": "display memory-usage",
+        "interfaces": "display interface brief",
+    },
+    "h3c": {
+        "config": "display current-configuration",
+        "version": "display version",
+        "cpu": "display cpu-usage",
+        "memory": "display memory",
+        "interfaces": "display interface brief",
+    },
+    "default": {
+        "config": "show running-config",
+        "version": "show version",
+        "cpu": "show processes cpu | include CPU utilization",
+        "memory": "show processes memory | include Processor Pool",
+        "interfaces": "show ip interface brief",
+    },
+}
+
+# 与 Nornir 巡检任务保持一致的步骤名 (前端与预置步骤按名称对应)
+INSPECT_STEPS = (
+    "1. 建立 SSH 通信并执行 Version 采集",
+    "2. 采集 CPU 与内存利用率指标",
+    "3. 采集接口状态与流量计数器",
+)
+
+async def _step(reporter: StepReporter, host_name: str, step_name: str, coro) -> Any:
+    """执行单个步骤并上报开始/完成"""
+    reporter.record_step_started(host_name, step_name)
+    try:
+        result = await coro
+    except Exception as e:
+        reporter.record_step_completed(host_name, step_name, True, str(e), e)
+        raise
+    reporter.record_step_completed(host_name, step_name, False, result, None)
+    return result
+
+# --- 任务实现 ---
+
+async def run_commands(session: AsyncCliSession, host: Any, reporter: StepReporter, commands: List[str], parse: bool = False, **kwargs) -> Dict[str, Any]:
+    """执行 show 命令集 (与 Nornir run_commands 一致: 多条命令流水线发送，每条命令作为一个步骤，可按模板解析)"""
+    for cmd in commands:
+        reporter.record_step_started(host.name, cmd)
+    try:
+        outputs, mode = await session.send_batch(commands, pipeline=settings.AUTOMATION_QUERY_PIPELINE)
+    except Exception as e:
+        for cmd in commands:
+            reporter.record_step_completed(host.name, cmd, True, str(e), e)
+        raise
+
+    parsed = 0
+    for cmd, output in zip(commands, outputs):
+        result = command_result(host.platform, cmd, output, parse)
+        parsed += isinstance(result, dict)
+        reporter.record_step_completed(host.name, cmd, False, result, None)
+    return {"mode": mode, "commands": len(commands), "parsed": parsed}
+
+async def backup_config(session: AsyncCliSession, host: Any, reporter: StepReporter, backup_path: str, force: bool = False, **kwargs) -> str:
+    """备份设备配置，与 Nornir backup_config 一致: 按内容哈希跳过未变更的配置，目录为 backup_path / region / device_name / 时间戳.cfg"""
+    cmd = PLATFORM_COMMANDS[session.family]["config"]
+    config_content = await _step(reporter, host.name, "获取运行配置", session.send_command(cmd))
+
+    region = host.data.get("region") or "default"
+    # 两次 SQLite 事务加文件写入，放到线程中执行，避免阻塞事件循环上的其他设备会话
+    changed, path = await asyncio.to_thread(
+        config_states.save_backup, host.name, region, config_content, backup_path, force=force)
+    if not changed:
+        return f"配置未变更 (已校验)，最近备份: {path}"
+    return path
+
+async def inspect_health(session: AsyncCliSession, host: Any, reporter: StepReporter, native: bool = True, **kwargs) -> Dict[str, Any]:
+    """深度健康巡检，返回与 Nornir inspect_health 相同的 HealthData 结构 (华为 / H3C 默认使用原生采集器)"""
+    collector = collector_for(host.platform) if native else None
+    if collector is not None:
+        return await _inspect_native(session, host, reporter, collector)
+    cmds = PLATFORM_COMMANDS[session.family]
+    t0 = time.monotonic()
+    version = await _step(reporter, host.name, INSPECT_STEPS[0], session.send_command(cmds["version"]))
+    t1 = time.monotonic()
+    resources = await _step(reporter, host.name, INSPECT_STEPS[1], session.send_commands([cmds["cpu"], cmds["memory"]]))
+    t2 = time.monotonic()
+    interfaces = await _step(reporter, host.name, INSPECT_STEPS[2], session.send_command(cmds["interfaces"]))
+    t3 = time.monotonic()
+
+    intf_total, intf_up = parse_interface_brief(interfaces)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "performance": {
+            "connect_latency": round((session.connect_latency or 0) + (t1 - t0), 3),
+            "env_gather_latency": round(t2 - t1, 3),
+            "intf_gather_latency": round(t3 - t2, 3),
+            "total_processing": round(time.monotonic() - t0 + (session.connect_latency or 0), 3),
+        },
+        "audit_trail": {
+            "commands_executed": [cmds["version"], cmds["cpu"], cmds["memory"], cmds["interfaces"]],
+        },
+        "basic": {
+            "hostname": (session.prompt or host.name).strip("<>[]#~* "),
+            "model": _search(r"(?:HUAWEI|H3C)\s+(\S+)\s+(?:Routing Switch|uptime)|cisco\s+(\S+)\s+\(", version) or "Unknown",
+            "version": _search(r"Version\s+([\w.()\-]+)", version) or "Unknown",
+            "uptime": parse_uptime(version),
+            "sn": "Unknown",
+        },
+        "resources": {
+            "cpu_avg": parse_cpu(resources[cmds["cpu"]]),
+            "memory_usage": parse_memory(resources[cmds["memory"]]),
+        },
+        "hardware": {
+            # CLI 快速巡检不采集环境信息，保持与 NAPALM 无数据时一致的默认值
+            "fans_ok": True,
+            "pwr_ok": True,
+            "temp_ok": True,
+            "max_temp": None,
+        },
+        "interface_stats": {
+            "total": intf_total,
+            "up_count": intf_up,
+            "error_total": 0,
+        },
+    }
+
+async def _inspect_native(session: AsyncCliSession, host: Any, reporter: StepReporter, collector: VendorCollector) -> Dict[str, Any]:
+    """原生采集器巡检: 全部命令一次流水线发送，步骤划分与 Nornir 原生巡检一致"""
+    commands = collector.command_list()
+    t0 = time.monotonic()
+    reporter.record_step_started(host.name, INSPECT_STEPS[0])
+    try:
+        outputs, _ = await session.send_batch(commands)
+    except Exception as e:
+        reporter.record_step_completed(host.name, INSPECT_STEPS[0], True, str(e), e)
+        raise
+    t1 = time.monotonic()
+    # 会话建立耗时计入连接阶段
+    health = collector.build_health(dict(zip(commands, outputs)), (session.prompt or host.name).strip("<>[]#~* "),
+                                    t0 - (session.connect_latency or 0), t0, t1)
+    reporter.record_step_completed(host.name, INSPECT_STEPS[0], False, health["basic"], None)
+    for step, result in ((INSPECT_STEPS[1], {**health["resources"], **health["hardware"]}),
+                         (INSPECT_STEPS[2], health["interface_stats"])):
+        reporter.record_step_started(host.name, step)
+        reporter.record_step_completed(host.name, step, False, result, None)
+    return health
+
+TASKS = {
+    "run_commands": run_commands,
+    "backup_config": backup_config,
+    "inspect_health": inspect_health,
+}
+
+# --- 输出解析 ---
+
+def _search(pattern: str, text: str) -> Optional[str]:
+    match = re.search(pattern, text or "", re.IGNORECASE)
+    if not match:
+        return None
+    return next((g for g in match.groups() if g), None)
+
+def parse_cpu(output: str) -> float:
+    """华为/H3C: CPU Usage : 12% / 5% in last 5 seconds；Cisco: five seconds: 7%/0%"""
+    value = _search(r"CPU [Uu]sage\s*:?\s*(\d+(?:\.\d+)?)%|(\d+(?:\.\d+)?)% in last 5 seconds|five seconds:\s*(\d+)%", output)
+    return float(value) if value else 0
+
+def parse_memory(output: str) -> float:
+    """优先匹配现成百分比，否则由总量与已用量计算"""
+    value = _search(r"Memory Using Percentage Is:\s*(\d+)%|Used Rate:\s*(\d+(?:\.\d+)?)%", output)
+    if value:
+        return float(value)
+    total = _search(r"System Total Memory Is:\s*(\d+)|Processor Pool Total:\s*(\d+)", output)
+    used = _search(r"Total Memory Used Is:\s*(\d+)|Used:\s*(\d+)", output)
+    if total and used and float(total) > 0:
+        return round(float(used) / float(total) * 100, 2)
+    return 0
+
+def parse_uptime(output: str) -> int:
+    """将 'uptime is 1 week, 2 days, 3 hours, 4 minutes' 换算为秒"""
+    text = _search(r"uptime is\s+(.+)", output) or ""
+    units = {"year": 31536000, "week": 604800, "day": 86400, "hour": 3600, "minute": 60}
+    return sum(int(n) * units[u] for n, u in re.findall(r"(\d+)\s+(year|week|day|hour|minute)", text))
+
+def parse_interface_brief(output: str) -> tuple:
+    """统计接口总数与 up 数量 (华为 PHY 列为 up / *down；Cisco Status 列为 up)"""
+    total = up = 0
+    for line in (output or "").splitlines():
+        parts = line.split()
+        if len(parts) < 3 or not re.match(r"^[A-Za-z\-]+[\d/.:]+$", parts[0]):
+            continue
+        total += 1
+        if parts[1].lower() == "up" or (len(parts) > 4 and parts[4].lower() == "up"):
+            up += 1
+    return total, up
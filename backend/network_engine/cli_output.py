@@ -0,0 +1,216 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.core.config import settings
+
+logger = logging.getLogger("automation")
+
+# TextFSM / ntc-templates / TTP 均为可选依赖，缺失时命令输出保持原始文本
+try:
+    import textfsm
+    from textfsm import clitable
+    HAS_TEXTFSM = True
+except ImportError:
+    HAS_TEXTFSM = False
+
+try:
+    import ntc_templates
+    NTC_TEMPLATES_DIR: Optional[str] = os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
+except ImportError:
+    NTC_TEMPLATES_DIR = None
+
+try:
+    from ttp import ttp
+    HAS_TTP = True
+except ImportError:
+    HAS_TTP = False
+
+# 设备平台名 (Netmiko/NAPALM) -> 模板平台名 (ntc-templates 命名)
+PLATFORM_ALIASES = {
+    "huawei": "huawei_vrp",
+    "huawei_vrpv8": "huawei_vrp",
+    "vrp": "huawei_vrp",
+    "h3c": "hp_comware",
+    "comware": "hp_comware",
+    "ios": "cisco_ios",
+    "iosxe": "cisco_ios",
+    "cisco_xe": "cisco_ios",
+    "nxos": "cisco_nxos",
+    "iosxr": "cisco_xr",
+    "eos": "arista_eos",
+    "junos": "juniper_junos",
+}
+
+def template_platform(platform: Optional[str]) -> str:
+    p = str(platform or "").lower()
+    for suffix in ("_ssh", "_telnet", "_serial"):
+        if p.endswith(suffix):
+            p = p[:-len(suffix)]
+    return PLATFORM_ALIASES.get(p, p)
+
+def platform_family(platform: Optional[str]) -> str:
+    """将 Nornir/NAPALM 平台名归类为 huawei / h3c / default"""
+    p = str(platform or "").lower()
+    if "huawei" in p or "vrp" in p:
+        return "huawei"
+    if "h3c" in p or "comware" in p or "hp_comware" in p:
+        return "h3c"
+    return "default"
+
+def split_pipelined_output(raw: str, prompt: str, commands: List[str]) -> List[str]:
+    """
+    切分流水线输出
+    全部命令一次写入后，设备按顺序输出 "回显 + 结果 + 提示符"；按行首提示符切段并去掉回显。
+    返回从第一条命令起能逐段对齐的命令输出 (可能少于命令数)：命令改变了提示符、输出中含提示符样式的行、
+    设备丢弃了预输入等情况下，对不齐的命令及其后的命令不返回，由调用方逐条重试。
+    """
+    text = raw.replace("\r\n", "\n").replace("\r", "\n")
+    parts = re.split(r"(?m)^[ \t]*" + re.escape(prompt), text)
+    outputs = []
+    for cmd, part in zip(commands, parts):
+        lines = part.split("\n")
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        if not lines or not lines[0].strip().endswith(cmd.strip()):
+            break
+        outputs.append("\n".join(lines[1:]).strip("\n"))
+    if len(outputs) == len(commands) and len(parts) == len(commands) + 1 and not parts[-1].strip():
+        return outputs
+    # 一段输出只有在下一段以下一条命令的回显开头时才确定完整 (末段之后没有提示符，本身也不完整)；
+    # 否则该命令的输出可能被其中的提示符样式行截断
+    return outputs[:-1]
+
+
+class _Template:
+    __slots__ = ("name", "kind", "fsm", "text", "lock")
+
+    def __init__(self, name: str, kind: str, fsm: Any = None, text: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.fsm = fsm              # 已编译的 TextFSM 状态机 (有状态，解析时加锁并 Reset)
+        self.text = text            # TTP 模板文本
+        self.lock = threading.Lock()
+
+
+class TemplateCache:
+    """
+    解析模板缓存
+    以 (模板平台, 命令) 为键缓存已编译的模板：首次遇到时定位模板 (自定义目录优先，其次 ntc-templates 索引) 并编译，
+    之后同平台同命令的输出直接复用状态机；未找到模板的组合同样缓存，避免重复查索引。
+    1000 台设备的 display interface brief 只需编译一次。
+    """
+
+    def __init__(self, templates_dir: Optional[Path], max_entries: int = 1024):
+        self.templates_dir = Path(templates_dir) if templates_dir else None
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Optional[_Template]]" = OrderedDict()
+        self._ntc_index: Any = None
+        self.stats = {"hits": 0, "misses": 0, "compiled": 0, "parsed": 0, "errors": 0}
+
+    @staticmethod
+    def _command_key(command: str) -> str:
+        return " ".join(command.split()).lower()
+
+    def _load_ntc_index(self) -> Any:
+        if self._ntc_index is None and NTC_TEMPLATES_DIR:
+            self._ntc_index = clitable.CliTable("index", NTC_TEMPLATES_DIR)
+        return self._ntc_index
+
+    def _locate(self, platform: str, command: str) -> Optional[Tuple[str, str]]:
+        """返回 (模板文件路径, 类型)"""
+        slug = f"{platform}_{command.replace(' ', '_')}"
+        if self.templates_dir is not None:
+            for kind in ("textfsm", "ttp"):
+                path = self.templates_dir / f"{slug}.{kind}"
+                if path.is_file():
+                    return str(path), kind
+        index = self._load_ntc_index()
+        if index is None:
+            return None
+        # clitable 的命令正则只做前缀匹配，这里要求整条命令 (含缩写) 完全匹配
+        for row in index.index.compiled[1:]:
+            if row["Platform"].fullmatch(platform) and row["Command"].fullmatch(command):
+                template = index.index.index[row.row]["Template"].split(":")[0]
+                return os.path.join(NTC_TEMPLATES_DIR, template), "textfsm"
+        return None
+
+    def _compile(self, platform: str, command: str) -> Optional[_Template]:
+        located = self._locate(platform, command)
+        if located is None:
+            return None
+        path, kind = located
+        if kind == "ttp":
+            if not HAS_TTP:
+                logger.warning(f"模板 {path} 需要 ttp，但服务器未安装")
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return _Template(os.path.basename(path), kind, text=f.read())
+        with open(path, "r", encoding="utf-8") as f:
+            fsm = textfsm.TextFSM(f)
+        self.stats["compiled"] += 1
+        return _Template(os.path.basename(path), kind, fsm=fsm)
+
+    def get(self, platform: str, command: str) -> Optional[_Template]:
+        key = (template_platform(platform), self._command_key(command))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+            self.stats["misses"] += 1
+            try:
+                template = self._compile(*key)
+            except Exception as e:
+                logger.warning(f"加载解析模板失败 {key}: {e}")
+                template = None
+            self._entries[key] = template
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return template
+
+    def parse(self, platform: str, command: str, output: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """按模板解析命令输出，返回 (模板名, 记录列表)；无模板、依赖缺失或解析失败时返回 None"""
+        if not HAS_TEXTFSM and not HAS_TTP:
+            return None
+        template = self.get(platform, command)
+        if template is None:
+            return None
+        try:
+            if template.kind == "ttp":
+                parser = ttp(data=output, template=template.text)
+                parser.parse()
+                records = parser.result(structure="flat_list")
+            else:
+                with template.lock:
+                    template.fsm.Reset()
+                    records = [{k.lower(): v for k, v in row.items()} for row in template.fsm.ParseTextToDicts(output)]
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"模板 {template.name} 解析失败: {e}")
+            return None
+        self.stats["parsed"] += 1
+        return template.name, records
+
+    def clear(self) -> None:
+        """清空缓存 (自定义模板更新后调用)"""
+        with self._lock:
+            self._entries.clear()
+
+
+def command_result(platform: Optional[str], command: str, output: str, parse: bool) -> Any:
+    """单条命令的步骤结果: 有匹配模板时为 {output, records, template}，否则为原始输出文本"""
+    if parse:
+        parsed = template_cache.parse(platform, command, output)
+        if parsed is not None:
+            return {"output": output, "records": parsed[1], "template": parsed[0]}
+    return output
+
+
+# 全局单例
+template_cache = TemplateCache(settings.AUTOMATION_TEMPLATES_DIR)
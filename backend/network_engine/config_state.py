@@ -0,0 +1,117 @@
+import hashlib
+import os
+import re
+from datetime import datetime
+from typing import Optional, Tuple
+import logging
+
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+
+from backend.core.database import engine
+from backend.models.automation import ConfigBackupState
+
+logger = logging.getLogger("automation")
+
+# 每次取配置都会变化、但不代表配置变更的行 (时间戳头、时钟漂移校准值等)
+VOLATILE_LINE_PATTERNS = [re.compile(p) for p in (
+    # Cisco IOS / IOS-XE / NX-OS
+    r"^Building configuration\.\.\.",
+    r"^Current configuration\s*:\s*\d+ bytes",
+    r"^!\s*Last configuration change at ",
+    r"^!\s*NVRAM config last updated at ",
+    r"^!\s*No configuration change since last restart",
+    r"^!\s*Time:\s",
+    r"^!Command: show running-config",
+    r"^\s*ntp clock-period \d+",
+    # Cisco ASA
+    r"^:\s*Written by .* at ",
+    r"^Cryptochecksum:",
+    # Huawei / H3C
+    r"^!\s*Last configuration was (updated|saved) at ",
+    # Juniper
+    r"^## Last (commit|changed):",
+)]
+
+def normalize_config(text: str) -> str:
+    """去除易变行、统一换行符与行尾空白，得到可用于比较的规范化配置"""
+    lines = []
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = line.rstrip()
+        if any(p.match(line) for p in VOLATILE_LINE_PATTERNS):
+            continue
+        lines.append(line)
+    return "\n".join(lines).strip("\n")
+
+def config_fingerprint(text: str) -> str:
+    """规范化配置的 SHA-256"""
+    return hashlib.sha256(normalize_config(text).encode("utf-8")).hexdigest()
+
+
+class ConfigStateStore:
+    """
+    配置备份状态存储
+    每台设备记录最近一次落盘配置的规范化哈希；备份时哈希一致且文件仍在则只更新校验时间，
+    不再重复写入内容相同的备份文件。
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get(self, device: str) -> Optional[ConfigBackupState]:
+        with Session(self.engine) as session:
+            return session.get(ConfigBackupState, device)
+
+    def record_changed(self, device: str, config_hash: str, path: str) -> None:
+        now = datetime.now()
+        stmt = insert(ConfigBackupState).values(
+            device=device, config_hash=config_hash, last_path=path, changed_at=now, verified_at=now, verify_count=0
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device"],
+            set_={"config_hash": config_hash, "last_path": path, "changed_at": now, "verified_at": now, "verify_count": 0},
+        )
+        with Session(self.engine) as session:
+            session.exec(stmt)
+            session.commit()
+
+    def record_verified(self, device: str) -> None:
+        with Session(self.engine) as session:
+            session.exec(
+                update(ConfigBackupState)
+                .where(ConfigBackupState.device == device)
+                .values(verified_at=datetime.now(), verify_count=ConfigBackupState.verify_count + 1)
+            )
+            session.commit()
+
+    def save_backup(self, device: str, region: str, content: str, backup_path: str, force: bool = False) -> Tuple[bool, str]:
+        """
+        按内容哈希保存设备配置备份
+        目录结构: backup_path / region / device / device_时间戳.cfg
+        返回 (是否写入了新文件, 备份文件路径)；未变更时返回最近一次备份的路径
+        """
+        digest = config_fingerprint(content)
+        state = self.get(device)
+        save_dir = os.path.join(backup_path, region, device)
+        # 最近备份须仍在当前区域目录下：设备换区域 (或备份根目录变更) 后即使配置未变也要在新目录写入一份
+        if (not force and state is not None and state.config_hash == digest
+                and state.last_path and os.path.exists(state.last_path)
+                and os.path.normcase(os.path.abspath(os.path.dirname(state.last_path)))
+                == os.path.normcase(os.path.abspath(save_dir))):
+            self.record_verified(device)
+            logger.info(f"设备 {device} 配置未变更，已校验 (最近备份 {state.last_path})")
+            return False, state.last_path
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(save_dir, exist_ok=True)
+        full_path = os.path.join(save_dir, f"{device}_{timestamp}.cfg")
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.record_changed(device, digest, full_path)
+        logger.info(f"设备 {device} 配置已备份至 {full_path}")
+        return True, full_path
+
+
+# 全局单例
+config_states = ConfigStateStore(engine)
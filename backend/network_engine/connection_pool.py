@@ -0,0 +1,211 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.core.config import settings
+
+logger = logging.getLogger("automation")
+
+class _PooledConnection:
+    __slots__ = ("name", "plugin", "idle_since")
+
+    def __init__(self, name: str, plugin: Any):
+        self.name = name            # 连接类型，如 napalm / netmiko
+        self.plugin = plugin        # Nornir ConnectionPlugin 实例
+        self.idle_since = time.monotonic()
+
+def _is_alive(plugin: Any) -> bool:
+    """健康检查：NAPALM 返回 {"is_alive": bool}，Netmiko 返回 bool；不支持检查的连接视为存活"""
+    conn = getattr(plugin, "connection", None)
+    check = getattr(conn, "is_alive", None)
+    if check is None:
+        return conn is not None
+    try:
+        alive = check()
+    except Exception:
+        return False
+    return bool(alive.get("is_alive")) if isinstance(alive, dict) else bool(alive)
+
+def _close(plugin: Any) -> None:
+    try:
+        plugin.close()
+    except Exception as e:
+        logger.debug(f"关闭池化连接失败: {e}")
+
+class ConnectionPool:
+    """
+    设备 SSH 连接池
+    每个作业都会新建 Nornir Host 对象，原本每次执行都要重新协商 SSH、经过 AAA 认证并等待提示符。
+    连接池在设备执行结束后收回其已打开的连接，下一个作业 (或同一作业的后续任务) 借出时先做存活检查再注入 Host，
+    空闲超时的连接由后台线程关闭，池内空闲连接总数受全局上限约束 (超出时淘汰最久未用的连接)。
+    空闲连接同样是设备上打开的会话，租约管理器授予新租约前通过 trim 让 "在途 + 空闲" 不超出全局会话预算。
+    """
+
+    def __init__(self, max_idle: int, idle_timeout: float, sweep_interval: float = 30):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        # 设备键 -> 空闲连接列表；OrderedDict 维护最近使用顺序，用于全局上限淘汰
+        self._idle: "OrderedDict[Tuple, List[_PooledConnection]]" = OrderedDict()
+        self._idle_count = 0
+        self._owners: Dict[Any, Dict[str, int]] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "misses": 0, "checkins": 0, "evicted_idle": 0, "evicted_cap": 0,
+                      "evicted_budget": 0, "health_failures": 0}
+
+    @staticmethod
+    def _key(host: Any) -> Tuple:
+        """以设备名 + 连接参数指纹为键，凭据或地址变更后旧连接自然失效"""
+        secret = hashlib.sha256(f"{host.username}\0{host.password}".encode()).hexdigest()[:16]
+        return (host.name, host.hostname, host.port, host.platform, secret)
+
+    # --- 作业级统计 ---
+
+    def register(self, owner: Any) -> None:
+        with self._lock:
+            self._owners[owner] = {"hits": 0, "misses": 0}
+
+    def unregister(self, owner: Any) -> Dict[str, int]:
+        with self._lock:
+            return self._owners.pop(owner, None) or {"hits": 0, "misses": 0}
+
+    # --- 借出 / 归还 ---
+
+    def checkout(self, host: Any, owner: Any = None) -> bool:
+        """将该设备的空闲连接注入 Host.connections，返回是否命中"""
+        with self._lock:
+            pooled = self._idle.pop(self._key(host), [])
+            self._idle_count -= len(pooled)
+        alive = []
+        for conn in pooled:
+            if _is_alive(conn.plugin):
+                alive.append(conn)
+            else:
+                _close(conn.plugin)
+        for conn in alive:
+            host.connections[conn.name] = conn.plugin
+        hit = bool(alive)
+        with self._lock:
+            self.stats["health_failures"] += len(pooled) - len(alive)
+            self.stats["hits" if hit else "misses"] += 1
+            if owner in self._owners:
+                self._owners[owner]["hits" if hit else "misses"] += 1
+        self._ensure_sweeper()
+        return hit
+
+    def checkin(self, host: Any) -> None:
+        """收回设备执行结束后仍打开的连接 (从 Host 上摘下，避免随 Host 一起丢弃)"""
+        conns = [_PooledConnection(name, plugin) for name, plugin in list(host.connections.items())]
+        host.connections.clear()
+        if not conns:
+            return
+        evicted: List[_PooledConnection] = []
+        with self._lock:
+            key = self._key(host)
+            self._idle.setdefault(key, []).extend(conns)
+            self._idle.move_to_end(key)
+            self._idle_count += len(conns)
+            self.stats["checkins"] += len(conns)
+            # 超出全局上限：从最久未用的设备开始淘汰
+            while self._idle_count > self.max_idle and self._idle:
+                _, oldest = self._idle.popitem(last=False)
+                self._idle_count -= len(oldest)
+                self.stats["evicted_cap"] += len(oldest)
+                evicted.extend(oldest)
+        for conn in evicted:
+            _close(conn.plugin)
+
+    def discard(self, host: Any) -> None:
+        """设备执行异常时直接关闭其连接，不放回池中"""
+        try:
+            host.close_connections()
+        except Exception as e:
+            logger.debug(f"关闭设备 {host.name} 连接失败: {e}")
+
+    def trim(self, limit: int, keep: Optional[str] = None) -> int:
+        """
+        淘汰最久未用的空闲连接，直到空闲连接数 (不含设备 keep 的连接，它们即将被借出) 不超过 limit，返回关闭数量。
+        """
+        limit = max(0, limit)
+        evicted: List[_PooledConnection] = []
+        with self._lock:
+            kept = sum(len(conns) for key, conns in self._idle.items() if key[0] == keep) if keep is not None else 0
+            for key in list(self._idle.keys()):
+                if self._idle_count - kept <= limit:
+                    break
+                if key[0] == keep:
+                    continue
+                conns = self._idle.pop(key)
+                self._idle_count -= len(conns)
+                evicted.extend(conns)
+            self.stats["evicted_budget"] += len(evicted)
+        for conn in evicted:
+            _close(conn.plugin)
+        return len(evicted)
+
+    # --- 空闲淘汰 ---
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._sweep_loop, name="connection-pool-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def evict_idle(self) -> int:
+        """关闭空闲超过 idle_timeout 的连接，返回关闭数量"""
+        now = time.monotonic()
+        expired: List[_PooledConnection] = []
+        with self._lock:
+            for key in list(self._idle.keys()):
+                conns = self._idle[key]
+                keep = [c for c in conns if now - c.idle_since <= self.idle_timeout]
+                expired.extend(c for c in conns if now - c.idle_since > self.idle_timeout)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+            self._idle_count -= len(expired)
+            self.stats["evicted_idle"] += len(expired)
+        for conn in expired:
+            _close(conn.plugin)
+        return len(expired)
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"连接池空闲淘汰异常: {e}", exc_info=True)
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns = [c for group in self._idle.values() for c in group]
+            self._idle.clear()
+            self._idle_count = 0
+        for conn in conns:
+            _close(conn.plugin)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "idle_connections": self._idle_count,
+                "idle_devices": len(self._idle),
+                "max_idle": self.max_idle,
+                "idle_timeout": self.idle_timeout,
+            }
+
+
+# 全局单例
+connection_pool = ConnectionPool(
+    max_idle=settings.AUTOMATION_POOL_MAX_IDLE,
+    idle_timeout=settings.AUTOMATION_POOL_IDLE_TIMEOUT,
+)
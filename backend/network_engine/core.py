@@ -1,4 +1,5 @@
 ﻿from typing import List, Dict, Any, Optional
+import threading
 from nornir import InitNornir
 from nornir.core import Nornir
 import logging
@@ -13,6 +14,7 @@ class NetworkEngine:
     """
     _instance = None
     _nornir: Optional[Nornir] = None
+    _reload_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -23,30 +25,40 @@ class NetworkEngine:
         if not self._nornir:
             self._init_nornir()
 
+    def _create_nornir(self, names: Optional[List[str]] = None) -> Nornir:
+        """创建 Nornir 对象，names 非空时只加载指定设备"""
+        # 引入动态库存插件与自适应并发运行器
+        from backend.network_engine.inventory import DatabaseInventory
+        from backend.network_engine.runner import AdaptiveRunner
+        from nornir.core.plugins.inventory import InventoryPluginRegister
+        from nornir.core.plugins.runners import RunnersPluginRegister
+        
+        # 注册自定义插件 (Nornir 3.0+ 规范)
+        InventoryPluginRegister.register("DatabaseInventory", DatabaseInventory)
+        RunnersPluginRegister.register("adaptive", AdaptiveRunner)
+        
+        # 按区域动态调整在途会话数，num_workers 仅为线程上限
+        runner = {
+            "plugin": "adaptive",
+            "options": {
+                "num_workers": settings.AUTOMATION_RUNNER_WORKERS,
+                "partition_key": settings.AUTOMATION_CONCURRENCY_KEY,
+            },
+        }
+        
+        return InitNornir(
+            runner=runner,
+            inventory={
+                "plugin": "DatabaseInventory",
+                "options": {"names": names} if names else {},
+            },
+            logging={"enabled": False} 
+        )
+
     def _init_nornir(self):
         """初始化 Nornir 对象，使用数据库动态库存"""
         try:
-            # 引入动态库存插件
-            from backend.network_engine.inventory import DatabaseInventory
-            from nornir.core.plugins.inventory import InventoryPluginRegister
-            
-            # 注册自定义插件 (Nornir 3.0+ 规范)
-            InventoryPluginRegister.register("DatabaseInventory", DatabaseInventory)
-            
-            runner = {
-                "plugin": "threaded",
-                "options": {
-                    "num_workers": 100,
-                },
-            }
-            
-            self._nornir = InitNornir(
-                runner=runner,
-                inventory={
-                    "plugin": "DatabaseInventory",
-                },
-                logging={"enabled": False} 
-            )
+            self._nornir = self._create_nornir()
             logger.info("Nornir 引擎初始化成功 (动态数据库模式)")
             
         except Exception as e:
@@ -61,11 +73,18 @@ class NetworkEngine:
         return self._nornir
 
     def reload_inventory(self):
-        """强制重新加载 Inventory (适用于设备变更后)"""
+        """重新加载 Inventory (适用于设备变更后)，未变更的设备直接复用缓存"""
         logger.info("正在重新加载 Nornir Inventory...")
-        self._nornir = None
-        # 触发重新初始化
-        self.nornir
+        # 多个作业可能并发触发重载：先构建新对象再整体替换，避免出现 _nornir 为空的窗口
+        with self._reload_lock:
+            self._init_nornir()
+
+    def build_nornir(self, names: Optional[List[str]] = None) -> Nornir:
+        """
+        为单个作业构建只包含目标设备的 Nornir 对象 (SQL IN 定向加载)。
+        不修改共享的 _nornir，各作业互不影响；names 为空时加载全量设备。
+        """
+        return self._create_nornir(names)
 
     def filter_inventory(self, **kwargs) -> Nornir:
         """
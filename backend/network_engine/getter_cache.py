@@ -0,0 +1,115 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from nornir.core.task import Task, Result
+from nornir_napalm.plugins.tasks import napalm_get
+
+from backend.core.config import settings
+
+logger = logging.getLogger("automation")
+
+class GetterCache:
+    """
+    设备 Getter 结果缓存
+    以 (设备, getter) 为键缓存 NAPALM getter 结果，带 TTL 与条目数上限 (LRU 淘汰)。
+    变更窗口内巡检与快速查询相继访问同一台设备时，避免重复的 CLI 往返 (配置备份始终直接向设备读取)。
+    存取均做深拷贝，调用方修改返回值不会影响缓存中的数据。
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "evicted": 0, "invalidated": 0}
+
+    def get(self, host: str, getter: str) -> Tuple[bool, Any]:
+        """返回 (是否命中, 值)"""
+        key = (host, getter)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            value = entry[1]
+        return True, copy.deepcopy(value)
+
+    def put(self, host: str, getter: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[(host, getter)] = (expires, value)
+            self._entries.move_to_end((host, getter))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def invalidate(self, host: str, getters: Optional[Iterable[str]] = None) -> int:
+        """清除设备的缓存 (配置变更后调用)，getters 为空时清除该设备全部条目"""
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == host and (getters is None or k[1] in getters)]
+            for k in keys:
+                del self._entries[k]
+            self.stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+
+def cached_napalm_get(task: Task, getters: List[str], bypass_cache: bool = False, **kwargs) -> Result:
+    """
+    Nornir 任务: 带缓存的 napalm_get
+    命中的 getter 直接取缓存，仅对未命中的 getter 发起一次 napalm_get；bypass_cache=True 时强制向设备取数并刷新缓存。
+    直接在当前任务上下文中调用 napalm_get，不额外产生子任务步骤。
+    """
+    host = task.host.name
+    merged: Dict[str, Any] = {}
+    missing: List[str] = []
+    if bypass_cache:
+        getter_cache.record_bypass()
+        missing = list(getters)
+    else:
+        for getter in getters:
+            hit, value = getter_cache.get(host, getter)
+            if hit:
+                merged[getter] = value
+            else:
+                missing.append(getter)
+
+    if missing:
+        fresh = napalm_get(task, getters=missing, **kwargs)
+        for getter, value in fresh.result.items():
+            getter_cache.put(host, getter, value)
+            merged[getter] = value
+
+    return Result(host=task.host, result=merged)
+
+
+# 全局单例
+getter_cache = GetterCache(ttl=settings.AUTOMATION_GETTER_CACHE_TTL, max_entries=settings.AUTOMATION_GETTER_CACHE_SIZE)
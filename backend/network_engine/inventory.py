@@ -1,6 +1,10 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+import copy
+import threading
+from datetime import datetime
 from nornir.core.inventory import Inventory, Hosts, Groups, Defaults, Host, Group, ConnectionOptions
 from sqlmodel import Session, select
+from backend.core.config import settings
 from backend.core.database import engine
 from backend.models.device import Device, DeviceStatus
 from backend.core.security import decrypt_password
@@ -8,85 +12,176 @@ import logging
 
 logger = logging.getLogger("automation")
 
+def _connection_options() -> Dict[str, ConnectionOptions]:
+    """
+    配置连接参数，显著增加超时容忍度，解决华为等设备响应慢导致的 Pattern not detected 问题
+    """
+    return {
+        "napalm": ConnectionOptions(
+            extras={
+                "optional_args": {
+                    "global_delay_factor": 1, 
+                    "read_timeout": 60,
+                    "use_keys": False,
+                    "allow_agent": False,
+                    # 连接会被连接池跨作业复用，保持 SSH 心跳避免空闲期间被设备或防火墙断开
+                    "keepalive": settings.AUTOMATION_POOL_KEEPALIVE
+                }
+            }
+        ),
+        "netmiko": ConnectionOptions(
+            extras={
+                "global_delay_factor": 1,
+                # Netmiko 4 的构造参数为 read_timeout_override (read_timeout 仅用于 send_command)
+                "read_timeout_override": 60,
+                "fast_cli": True,
+                "use_keys": False,
+                "allow_agent": False,
+                "keepalive": settings.AUTOMATION_POOL_KEEPALIVE
+            }
+        )
+    }
+
+def _snmp_data(db_device: Device) -> Optional[Dict[str, Any]]:
+    """设备的 SNMP 凭据 (已解密)，未配置 SNMP 版本时为 None"""
+    if not db_device.snmp_version:
+        return None
+    return {
+        "version": db_device.snmp_version,
+        "port": db_device.snmp_port,
+        "community": decrypt_password(db_device.snmp_community),
+        "user": db_device.snmp_user,
+        "auth_protocol": db_device.snmp_auth_protocol,
+        "auth_key": decrypt_password(db_device.snmp_auth_key),
+        "priv_protocol": db_device.snmp_priv_protocol,
+        "priv_key": decrypt_password(db_device.snmp_priv_key),
+    }
+
+class InventoryCache:
+    """
+    设备库存缓存
+    以 Device.updated_at 作为版本号缓存已解密的主机参数：刷新时只查询 (id, updated_at) 轻量列，
+    仅对新增或变更的设备读取整行并解密，已删除的设备从缓存中剔除。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 设备 ID -> (updated_at, 设备名, 分组, 主机参数)
+        self._entries: Dict[int, Tuple[datetime, str, Optional[str], Optional[Dict[str, Any]]]] = {}
+        self.stats = {"refreshes": 0, "decrypted": 0, "evicted": 0}
+
+    @staticmethod
+    def _host_data(db_device: Device) -> Optional[Dict[str, Any]]:
+        """转换数据库模型到 Nornir Host 参数，信息不全时返回 None"""
+        host_data = {
+            "hostname": db_device.ip,
+            "username": db_device.username,
+            "password": decrypt_password(db_device.password),
+            "port": db_device.port,
+            "platform": db_device.platform,
+            "data": {
+                "db_id": db_device.id,
+                "name": db_device.name,
+                "vendor": db_device.vendor,
+                "model": db_device.model,
+                "region": db_device.region,
+                "group": db_device.group_name,
+                "secret": decrypt_password(db_device.secret), # enable password
+                "connection_type": db_device.connection_type,
+                "metadata": db_device.metadata_info or {},
+                "snmp": _snmp_data(db_device)
+            }
+        }
+        # 过滤掉不完整的条目
+        if not host_data["hostname"] or not host_data["platform"]:
+            logger.warning(f"跳过信息不全的设备: {db_device.name}")
+            return None
+        return host_data
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> List[int]:
+        """
+        同步缓存并返回本次涉及的设备 ID。
+        names 为空时同步全量设备；否则以 SQL IN 只同步指定名称的设备。
+        """
+        name_list = list(dict.fromkeys(names)) if names else None
+        with Session(engine) as session, self._lock:
+            versions: Dict[int, datetime] = {}
+            if name_list is None:
+                versions.update(session.exec(select(Device.id, Device.updated_at)).all())
+            else:
+                for i in range(0, len(name_list), 500):
+                    versions.update(session.exec(
+                        select(Device.id, Device.updated_at).where(Device.name.in_(name_list[i:i + 500]))
+                    ).all())
+
+            stale = [
+                device_id for device_id, updated_at in versions.items()
+                if device_id not in self._entries or self._entries[device_id][0] != updated_at
+            ]
+            if stale:
+                # 分批读取变更行，避免超出 SQLite 单条语句的参数上限
+                for i in range(0, len(stale), 500):
+                    for db_device in session.exec(select(Device).where(Device.id.in_(stale[i:i + 500]))).all():
+                        self._entries[db_device.id] = (
+                            db_device.updated_at, db_device.name, db_device.group_name, self._host_data(db_device)
+                        )
+                self.stats["decrypted"] += len(stale)
+
+            if name_list is None:
+                removed = [device_id for device_id in self._entries if device_id not in versions]
+            else:
+                # 定向刷新时，只剔除请求了但已不存在 (或已改名) 的设备
+                wanted = set(name_list)
+                removed = [
+                    device_id for device_id, entry in self._entries.items()
+                    if entry[1] in wanted and device_id not in versions
+                ]
+            for device_id in removed:
+                del self._entries[device_id]
+            self.stats["evicted"] += len(removed)
+            self.stats["refreshes"] += 1
+
+            if stale or removed:
+                logger.debug(f"Inventory 缓存刷新: 更新 {len(stale)} 台，移除 {len(removed)} 台")
+            return list(versions.keys())
+
+    def build(self, names: Optional[Iterable[str]] = None) -> Inventory:
+        """刷新缓存并构建 Inventory；每次都创建新的 Host 对象，避免作业之间共享连接状态"""
+        device_ids = self.refresh(names)
+        hosts = Hosts()
+        groups = Groups()
+        with self._lock:
+            entries = [self._entries[i] for i in device_ids if i in self._entries]
+        for _, name, group_name, host_data in entries:
+            if host_data is None:
+                continue
+            # 主机参数深拷贝: 任务对 host.data 的修改不回写缓存，也不影响其他作业
+            hosts[name] = Host(name=name, connection_options=_connection_options(), **copy.deepcopy(host_data))
+            # 自动根据分组建立 Group (暂不深挖继承，仅做标记)
+            if group_name and group_name not in groups:
+                groups[group_name] = Group(name=group_name)
+        return Inventory(hosts=hosts, groups=groups, defaults=Defaults())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局单例
+inventory_cache = InventoryCache()
+
 class DatabaseInventory:
     """
     Nornir 动态库存插件: 从 SQLModel 数据库加载设备
+    通过 inventory options 传入 names 时只加载指定设备 (SQL IN)，否则加载全量设备；
+    两种方式都经过 inventory_cache，未变更的设备不会重复读取与解密。
     """
-    def __init__(self, **kwargs):
+    def __init__(self, names: Optional[List[str]] = None, **kwargs):
+        self.names = names
         self.kwargs = kwargs
 
     def load(self) -> Inventory:
-        hosts = Hosts()
-        groups = Groups()
-        defaults = Defaults()
-
-        with Session(engine) as session:
-            # 1. 加载所有设备
-            statement = select(Device)
-            db_devices = session.exec(statement).all()
-            
-            for db_device in db_devices:
-                # 转换数据库模型到 Nornir Host
-                # 注意：目前为了简化，直接映射。实际生产中应该增加解密逻辑
-                host_data = {
-                    "hostname": db_device.ip,
-                    "username": db_device.username,
-                    "password": decrypt_password(db_device.password),
-                    "port": db_device.port,
-                    "platform": db_device.platform,
-                    "data": {
-                        "db_id": db_device.id,
-                        "name": db_device.name,
-                        "vendor": db_device.vendor,
-                        "model": db_device.model,
-                        "region": db_device.region,
-                        "group": db_device.group_name,
-                        "secret": decrypt_password(db_device.secret), # enable password
-                        "connection_type": db_device.connection_type,
-                        "metadata": db_device.metadata_info or {}
-                    }
-                }
-                
-                # 过滤掉不完整的条目
-                if not host_data["hostname"] or not host_data["platform"]:
-                    logger.warning(f"跳过信息不全的设备: {db_device.name}")
-                    continue
-                
-                # 配置连接参数，显著增加超时容忍度，解决华为等设备响应慢导致的 Pattern not detected 问题
-                # 设置 global_delay_factor 为 4 以确保极其保守的等待时间
-                options = {
-                    "napalm": ConnectionOptions(
-                        extras={
-                            "optional_args": {
-                                "global_delay_factor": 1, 
-                                "read_timeout": 60,
-                                "use_keys": False,
-                                "allow_agent": False
-                            }
-                        }
-                    ),
-                    "netmiko": ConnectionOptions(
-                        extras={
-                            "global_delay_factor": 1,
-                            "read_timeout": 60,
-                            "fast_cli": True,
-                            "use_keys": False,
-                            "allow_agent": False
-                        }
-                    )
-                }
-                    
-                hosts[db_device.name] = Host(
-                    name=db_device.name, 
-                    connection_options=options,
-                    **host_data
-                )
-                
-                # 2. 自动根据分组建立 Group (暂不深挖继承，仅做标记)
-                if db_device.group_name and db_device.group_name not in groups:
-                    groups[db_device.group_name] = Group(name=db_device.group_name)
-
-        return Inventory(hosts=hosts, groups=groups, defaults=defaults)
+        return inventory_cache.build(self.names)
 
 def get_inventory():
     """工厂函数提供给 Nornir 调用"""
@@ -0,0 +1,196 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger("automation")
+
+ABORT_CANCELLED = "cancelled"
+ABORT_TIMEOUT = "timeout"
+
+class JobAbortedError(Exception):
+    """作业被取消或超出截止时间 (reason 为 cancelled / timeout)"""
+    def __init__(self, reason: str, message: Optional[str] = None):
+        self.reason = reason
+        super().__init__(message or ("作业已被取消" if reason == ABORT_CANCELLED else "执行超时"))
+
+class _ActiveHost:
+    __slots__ = ("host", "deadline", "aborted")
+
+    def __init__(self, host: Any, deadline: Optional[float]):
+        self.host = host
+        self.deadline = deadline
+        self.aborted: Optional[str] = None
+
+_local = threading.local()
+
+class JobControl:
+    """
+    单次作业的执行控制句柄
+    记录取消标记、整体截止时间以及每台设备的截止时间。
+    任务函数在子任务之间调用 checkpoint() 协作式退出；设备卡在单条命令上时，
+    由看门狗线程关闭其连接，使阻塞的读取立即出错并释放 Nornir 工作线程。
+    """
+
+    def __init__(self, log_id: int, job_timeout: Optional[float] = None, host_timeout: Optional[float] = None):
+        self.log_id = log_id
+        self.host_timeout = host_timeout
+        self.job_deadline = time.monotonic() + job_timeout if job_timeout else None
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._active: Dict[str, _ActiveHost] = {}
+        self._aborted_hosts: Dict[str, str] = {}
+
+    # --- 状态检查 ---
+
+    def check(self, host_name: Optional[str] = None) -> None:
+        """作业或指定设备已被取消/超时则抛出 JobAbortedError"""
+        if self.reason is None and self.job_deadline and time.monotonic() > self.job_deadline:
+            self._abort_job(ABORT_TIMEOUT)
+        if self.reason:
+            raise JobAbortedError(self.reason)
+        if host_name is None:
+            return
+        reason = self.host_abort_reason(host_name)
+        if reason is None:
+            active = self._active.get(host_name)
+            if active and active.deadline and time.monotonic() > active.deadline:
+                self._abort_host(host_name, ABORT_TIMEOUT)
+                reason = ABORT_TIMEOUT
+        if reason:
+            raise JobAbortedError(reason, f"设备执行超过 {self.host_timeout}s 截止时间" if reason == ABORT_TIMEOUT else None)
+
+    def host_abort_reason(self, host_name: str) -> Optional[str]:
+        with self._lock:
+            return self._aborted_hosts.get(host_name) or self.reason
+
+    def aborted_hosts(self) -> Dict[str, int]:
+        """按中止原因统计设备数"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for reason in self._aborted_hosts.values():
+                counts[reason] = counts.get(reason, 0) + 1
+            return counts
+
+    # --- 中止 ---
+
+    def cancel(self) -> None:
+        """请求取消：立即中止所有执行中的设备"""
+        self._abort_job(ABORT_CANCELLED)
+
+    def abort_host(self, host_name: str, reason: str) -> None:
+        """记录设备被中止 (异步引擎自行执行设备级截止时间与取消，不经过 host_scope)"""
+        self._abort_host(host_name, reason)
+
+    def _abort_job(self, reason: str) -> None:
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            names = list(self._active.keys())
+        logger.warning(f"作业日志 {self.log_id} 中止 ({self.reason})，正在释放 {len(names)} 台执行中的设备")
+        for name in names:
+            self._abort_host(name, self.reason)
+
+    def _abort_host(self, host_name: str, reason: str) -> None:
+        with self._lock:
+            active = self._active.get(host_name)
+            self._aborted_hosts.setdefault(host_name, reason)
+            if active is None or active.aborted:
+                return
+            active.aborted = reason
+        # 关闭连接使阻塞中的读取立即失败 (Nornir 无法从外部中断线程)
+        try:
+            active.host.close_connections()
+        except Exception as e:
+            logger.debug(f"关闭设备 {host_name} 连接时出错: {e}")
+
+    def sweep(self) -> None:
+        """由看门狗周期调用：处理作业整体超时与设备级超时"""
+        now = time.monotonic()
+        if self.reason is None and self.job_deadline and now > self.job_deadline:
+            self._abort_job(ABORT_TIMEOUT)
+            return
+        with self._lock:
+            expired = [name for name, a in self._active.items() if a.deadline and now > a.deadline and not a.aborted]
+        for name in expired:
+            logger.warning(f"作业日志 {self.log_id} 设备 {name} 执行超时，强制释放")
+            self._abort_host(name, ABORT_TIMEOUT)
+
+    # --- 设备执行上下文 ---
+
+    @contextmanager
+    def host_scope(self, host: Any):
+        """标记设备开始执行 (开始计算设备级截止时间)，并绑定到当前线程供 checkpoint() 使用"""
+        deadline = time.monotonic() + self.host_timeout if self.host_timeout else None
+        with self._lock:
+            self._active[host.name] = _ActiveHost(host, deadline)
+        previous = getattr(_local, "scope", None)
+        _local.scope = (self, host.name)
+        try:
+            yield
+        finally:
+            _local.scope = previous
+            with self._lock:
+                self._active.pop(host.name, None)
+
+
+def checkpoint() -> None:
+    """
+    协作式取消检查点：在子任务之间调用。
+    当前线程不属于受控作业时为空操作，因此任务函数在任何场景下都可以安全调用。
+    """
+    scope = getattr(_local, "scope", None)
+    if scope:
+        control, host_name = scope
+        control.check(host_name)
+
+
+class JobControlRegistry:
+    """执行中作业的控制句柄登记表，附带一个看门狗线程负责截止时间巡检"""
+
+    def __init__(self, sweep_interval: float = 1.0):
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._controls: Dict[int, JobControl] = {}
+        self._watchdog: Optional[threading.Thread] = None
+
+    def register(self, log_id: int, job_timeout: Optional[float] = None, host_timeout: Optional[float] = None) -> JobControl:
+        control = JobControl(log_id, job_timeout, host_timeout)
+        with self._lock:
+            self._controls[log_id] = control
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name="job-watchdog", daemon=True)
+                self._watchdog.start()
+        return control
+
+    def unregister(self, log_id: int) -> None:
+        with self._lock:
+            self._controls.pop(log_id, None)
+
+    def get(self, log_id: int) -> Optional[JobControl]:
+        with self._lock:
+            return self._controls.get(log_id)
+
+    def cancel(self, log_id: int) -> bool:
+        """取消本进程中正在执行的作业，返回是否找到该作业"""
+        control = self.get(log_id)
+        if control is None:
+            return False
+        control.cancel()
+        return True
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            with self._lock:
+                controls = list(self._controls.values())
+            for control in controls:
+                try:
+                    control.sweep()
+                except Exception as e:
+                    logger.error(f"作业看门狗巡检异常: {e}", exc_info=True)
+
+
+# 全局单例
+job_controls = JobControlRegistry()
@@ -1,18 +1,19 @@
 ﻿from nornir.core.task import Task, Result
 from nornir_napalm.plugins.tasks import napalm_get
 import logging
+from backend.network_engine.job_control import JobAbortedError, checkpoint
+from backend.network_engine.config_state import config_states
 
 logger = logging.getLogger("automation")
-from datetime import datetime
-import os
 
-def backup_config(task: Task, backup_path: str) -> Result:
+def backup_config(task: Task, backup_path: str, force: bool = False) -> Result:
     """
     Nornir 任务: 备份设备配置
     
     Args:
         task: Nornir 任务对象
         backup_path: 备份根目录
+        force: 为 True 时即使配置未变更也写入新的备份文件
         
     Returns:
         Result: 任务结果
@@ -20,32 +21,26 @@ def backup_config(task: Task, backup_path: str) -> Result:
     try:
         # 使用 NAPALM 获取配置
         # getters=['config'] 会返回 running 和 startup 配置
+        # 备份必须反映设备当前配置 (未变更判定也以此为准)，直接向设备读取；
+        # 运行配置体积大且没有任务从缓存读取，不写入 getter 缓存，避免挤掉 facts / interfaces 等常用条目
         result = task.run(task=napalm_get, getters=["config"])
         
         if result.failed:
             return Result(host=task.host, result=f"获取配置失败: {result.exception}", failed=True)
             
         config_content = result.result["config"]["running"]
+        # 配置已取回，落盘前再确认一次作业未被取消
+        checkpoint()
         
-        # 构建保存路径: backup_path / region / device_name / date / config.cfg
-        # 这里简化为: backup_path / device_name / timestamp.cfg
-        # 实际应从 inventory data 获取 region
-        region = task.host.data.get("region", "default")
-        device_name = task.host.name
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        save_dir = os.path.join(backup_path, region, device_name)
-        os.makedirs(save_dir, exist_ok=True)
-        
-        filename = f"{device_name}_{timestamp}.cfg"
-        full_path = os.path.join(save_dir, filename)
-        
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(config_content)
-            
-        logger.info(f"设备 {device_name} 配置已备份至 {full_path}")
-        return Result(host=task.host, result=full_path)
+        # 规范化后与最近一次备份的哈希比较，未变更时只记录校验，不重复落盘
+        region = task.host.data.get("region") or "default"
+        changed, path = config_states.save_backup(task.host.name, region, config_content, backup_path, force=force)
+        if not changed:
+            return Result(host=task.host, result=f"配置未变更 (已校验)，最近备份: {path}")
+        return Result(host=task.host, result=path)
         
+    except JobAbortedError:
+        raise
     except Exception as e:
         logger.error(f"设备 {task.host.name} 备份异常: {e}")
         return Result(host=task.host, result=str(e), failed=True)
@@ -1,19 +1,82 @@
+import re
+import time
+from typing import Any, List, Tuple
 from nornir.core.task import Task, Result
-from nornir_netmiko.tasks import netmiko_send_command, netmiko_send_config
+from nornir_netmiko.tasks import netmiko_send_config
 import logging
+from backend.core.config import settings
+from backend.network_engine.cli_output import command_result, split_pipelined_output
+from backend.network_engine.getter_cache import getter_cache
+from backend.network_engine.job_control import checkpoint
 
 logger = logging.getLogger("automation")
 
-def run_commands(task: Task, commands: list) -> Result:
-    """执行 show 命令集"""
-    results = []
-    for cmd in commands:
-        res = task.run(task=netmiko_send_command, command_string=cmd)
-        results.append(f"--- {cmd} ---\n{res.result}")
-    
-    return Result(host=task.host, result="\n".join(results))
+def _send_pipelined(conn: Any, commands: List[str], timeout: float) -> List[str]:
+    """在同一通道内一次写入全部命令，读取到第 N 个提示符后按提示符切分输出；返回能切分出的前若干条命令的输出"""
+    prompt = conn.find_prompt()
+    prompt_line = re.compile(r"(?m)^[ \t]*" + re.escape(prompt))
+    conn.write_channel("".join(cmd + conn.RETURN for cmd in commands))
+    buffer = ""
+    deadline = time.monotonic() + timeout
+    while True:
+        # 读取期间检查取消与截止时间；设备持续输出时同样受整体超时约束
+        checkpoint()
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"等待命令输出超时 ({timeout}s)")
+        chunk = conn.read_channel()
+        if chunk:
+            buffer += chunk
+            if buffer.rstrip().endswith(prompt) and len(prompt_line.findall(buffer)) >= len(commands):
+                break
+            continue
+        time.sleep(0.02)
+    return split_pipelined_output(conn.strip_ansi_escape_codes(buffer), prompt, commands)
+
+def send_batch(conn: Any, commands: List[str], host_name: str) -> Tuple[List[str], str]:
+    """
+    在同一会话内发送命令集: 优先流水线发送，输出无法切分的命令清空缓冲区后逐条补发；
+    返回 (各命令输出, 模式: pipelined / partial / sequential)
+    """
+    outputs: List[str] = []
+    mode = "sequential"
+    if settings.AUTOMATION_QUERY_PIPELINE and len(commands) > 1:
+        outputs = _send_pipelined(conn, commands, settings.AUTOMATION_QUERY_READ_TIMEOUT)
+        if len(outputs) == len(commands):
+            return outputs, "pipelined"
+        logger.warning(f"设备 {host_name} 的流水线输出中 {len(commands) - len(outputs)} 条命令无法按提示符切分，改为逐条执行")
+        conn.clear_buffer()
+        if outputs:
+            mode = "partial"
+    for cmd in commands[len(outputs):]:
+        # 每条命令之间检查取消与截止时间
+        checkpoint()
+        outputs.append(conn.send_command(cmd))
+    return outputs, mode
+
+def _command_output(task: Task, command: str, output: str, parse: bool = False) -> Result:
+    """单条命令的输出，作为独立步骤记录 (parse=True 且有匹配模板时附带结构化记录)"""
+    return Result(host=task.host, result=command_result(task.host.platform, command, output, parse))
+
+def run_commands(task: Task, commands: list, parse: bool = False) -> Result:
+    """
+    执行 show 命令集
+    多条命令在同一会话内流水线发送 (一次写入、按提示符切分)，省去逐条等待提示符的往返；
+    每条命令的输出记录为一个步骤，parse=True 时按平台模板 (TextFSM / TTP) 解析为结构化记录。
+    """
+    checkpoint()
+    conn = task.host.get_connection("netmiko", task.nornir.config)
+    outputs, mode = send_batch(conn, commands, task.host.name)
+
+    parsed = 0
+    for cmd, output in zip(commands, outputs):
+        res = task.run(task=_command_output, name=cmd, command=cmd, output=output, parse=parse)
+        parsed += isinstance(res.result, dict)
+    return Result(host=task.host, result={"mode": mode, "commands": len(commands), "parsed": parsed})
 
 def apply_config(task: Task, config_commands: list) -> Result:
     """下发配置命令集"""
+    checkpoint()
     res = task.run(task=netmiko_send_config, config_commands=config_commands)
+    # 配置已变更，缓存的 getter 结果 (config/interfaces 等) 不再可信
+    getter_cache.invalidate(task.host.name)
     return Result(host=task.host, result=res.result)
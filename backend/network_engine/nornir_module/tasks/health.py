@@ -1,32 +1,45 @@
+import time
+from typing import Any, Dict
 from nornir.core.task import Task, Result
-from nornir_napalm.plugins.tasks import napalm_get
+from backend.network_engine.getter_cache import cached_napalm_get
 import logging
 from datetime import datetime
+from backend.network_engine.job_control import JobAbortedError, checkpoint
+from backend.network_engine.nornir_module.tasks.commands import send_batch
+from backend.network_engine.vendors import VendorCollector, collector_for
 
 logger = logging.getLogger("automation")
 
-def inspect_health(task: Task) -> Result:
+def inspect_health(task: Task, bypass_cache: bool = False, native: bool = True) -> Result:
     """
     Nornir 任务: 深度健康巡检
     覆盖: 硬件状态、资源利用率、接口质量
     该函数会返回标准化的 HealthData 结构。
+    facts 经由 getter 缓存读取 (bypass_cache=True 时强制向设备重新采集)；资源利用率与接口计数器总是直接向设备采集，
+    否则 TTL 内的重复巡检会以新的时间戳写入相同的计数器，算出 0 速率并覆盖最新计数器与健康采样。
+    native=True 且设备平台有原生采集器 (华为 / H3C) 时，改为在一个会话内流水线发送厂商命令集并本地解析。
     """
+    collector = collector_for(task.host.platform) if native else None
+    if collector is not None:
+        return _inspect_native(task, collector)
     try:
         # 每个阶段开始前记录时间，用于性能分析
         t0 = datetime.now()
         
         # 1. 阶段一：建立通信链路并采集基础信息 (Facts)
-        res_facts = task.run(task=napalm_get, getters=["facts"], name="1. 建立 SSH 通信并执行 Version 采集")
+        res_facts = task.run(task=cached_napalm_get, getters=["facts"], bypass_cache=bypass_cache, name="1. 建立 SSH 通信并执行 Version 采集")
         t1 = datetime.now()
         if res_facts.failed:
             return Result(host=task.host, result=f"设备连接失败: {res_facts.exception}", failed=True)
             
         # 2. 阶段二：采集资源指标 (CPU/Memory/Hw)
-        res_env = task.run(task=napalm_get, getters=["environment"], name="2. 采集 CPU 与内存利用率指标")
+        checkpoint()
+        res_env = task.run(task=cached_napalm_get, getters=["environment"], bypass_cache=True, name="2. 采集 CPU 与内存利用率指标")
         t2 = datetime.now()
         
         # 3. 阶段三：采集端口运行数据
-        res_intf = task.run(task=napalm_get, getters=["interfaces", "interfaces_counters"], name="3. 采集接口状态与流量计数器")
+        checkpoint()
+        res_intf = task.run(task=cached_napalm_get, getters=["interfaces", "interfaces_counters"], bypass_cache=True, name="3. 采集接口状态与流量计数器")
         t3 = datetime.now()
 
         # 整理原始数据映射
@@ -74,6 +87,7 @@ def inspect_health(task: Task) -> Result:
         
         # 华为设备终极兜底：如果解析结果还是 0%，直接通过 CLI 命令抓取
         if mem_usage == 0 and ("huawei" in str(task.host.platform).lower() or "vrp" in str(task.host.platform).lower()):
+            checkpoint()
             try:
                 from nornir_napalm.plugins.tasks import napalm_cli
                 cli_res = task.run(task=napalm_cli, commands=["display memory-usage"], name="华为内存指令采集 (兜底)").result
@@ -141,15 +155,73 @@ def inspect_health(task: Task) -> Result:
                 "total": len(interfaces),
                 "up_count": sum(1 for i in interfaces.values() if i.get("is_up")),
                 "error_total": sum(max(0, c.get("rx_errors", 0)) + max(0, c.get("tx_errors", 0)) for c in counters.values())
-            }
+            },
+            # 各接口原始计数器与速率 (Mbps)，由进度处理器写入接口计数器时序并计算速率/错误增量
+            "interface_counters": {name: _counter_vector(c) for name, c in counters.items()},
+            "interface_speeds": {name: i["speed"] for name, i in interfaces.items() if (i.get("speed") or 0) > 0}
         }
         return Result(host=task.host, result=health_data)
         
+    except JobAbortedError:
+        raise
     except Exception as e:
         logger.error(f"设备 {task.host.name} 健康巡检崩溃: {str(e)}")
         # 即使处理数据失败，也尽量返回错误信息，而不是导致整个 Nornir 任务结果丢失
         return Result(host=task.host, result=f"数据解析错误: {str(e)}", failed=True)
 
+def _inspect_native(task: Task, collector: VendorCollector) -> Result:
+    """原生采集器巡检: 步骤 1 完成全部采集与解析，步骤 2、3 只记录对应部分的解析结果 (与 NAPALM 巡检的步骤一致)"""
+    try:
+        sink: Dict[str, Any] = {}
+        task.run(task=_collect_native, collector=collector, sink=sink,
+                 name="1. 建立 SSH 通信并执行 Version 采集")
+        health = sink["health"]
+        # 步骤结果不带 resources 键，避免被当作完整巡检结果重复写入健康采样
+        task.run(task=_native_step, data={**health["resources"], **health["hardware"]}, name="2. 采集 CPU 与内存利用率指标")
+        task.run(task=_native_step, data=health["interface_stats"], name="3. 采集接口状态与流量计数器")
+        return Result(host=task.host, result=health)
+    except JobAbortedError:
+        raise
+    except Exception as e:
+        logger.error(f"设备 {task.host.name} 健康巡检崩溃: {str(e)}")
+        return Result(host=task.host, result=f"数据解析错误: {str(e)}", failed=True)
+
+def _collect_native(task: Task, collector: VendorCollector, sink: Dict[str, Any]) -> Result:
+    """
+    一次会话内流水线发送厂商命令集并解析为 HealthData (写入 sink)，步骤结果只保留基础信息。
+    命令集以资源与接口计数器为主，每次巡检都直接向设备采集，不经 getter 缓存。
+    """
+    checkpoint()
+    started = time.monotonic()
+    conn = task.host.get_connection("netmiko", task.nornir.config)
+    connected = time.monotonic()
+    commands = collector.command_list()
+    outputs, _ = send_batch(conn, commands, task.host.name)
+    collected = time.monotonic()
+    hostname = conn.base_prompt or task.host.name
+    sink["health"] = collector.build_health(dict(zip(commands, outputs)), hostname, started, connected, collected)
+    return Result(host=task.host, result=sink["health"]["basic"])
+
+def _native_step(task: Task, data: Dict[str, Any]) -> Result:
+    return Result(host=task.host, result=data)
+
+def _counter_vector(counters: dict) -> list:
+    """
+    NAPALM interfaces_counters 单个接口 -> 计数器列表
+    顺序: rx/tx 字节, rx/tx 包 (单播+组播+广播), rx/tx 错误, rx/tx 丢弃；-1 表示设备不支持
+    """
+    def packets(direction: str) -> int:
+        values = [counters.get(f"{direction}_{kind}_packets", -1) for kind in ("unicast", "multicast", "broadcast")]
+        supported = [v for v in values if v is not None and v >= 0]
+        return sum(supported) if supported else -1
+
+    return [
+        counters.get("rx_octets", -1), counters.get("tx_octets", -1),
+        packets("rx"), packets("tx"),
+        counters.get("rx_errors", -1), counters.get("tx_errors", -1),
+        counters.get("rx_discards", -1), counters.get("tx_discards", -1),
+    ]
+
 def _check_hardware_status(component_dict: dict) -> bool:
     """辅助函数：检查硬件组件状态"""
     if not component_dict:
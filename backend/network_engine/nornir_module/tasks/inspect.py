@@ -1,18 +1,18 @@
 ﻿from nornir.core.task import Task, Result
-from nornir_napalm.plugins.tasks import napalm_get
+from backend.network_engine.getter_cache import cached_napalm_get
 import logging
 
 logger = logging.getLogger("automation")
 
-def inspect_device(task: Task) -> Result:
+def inspect_device(task: Task, bypass_cache: bool = False) -> Result:
     """
     Nornir 任务: 设备基础巡检
-    获取 facts, interfaces, environment 等信息
+    获取 facts, interfaces, environment 等信息 (经由 getter 缓存，bypass_cache=True 时强制刷新)
     """
     try:
         # 获取多项信息
         getters = ["facts", "interfaces", "environment"]
-        result = task.run(task=napalm_get, getters=getters)
+        result = task.run(task=cached_napalm_get, getters=getters, bypass_cache=bypass_cache)
         
         if result.failed:
             return Result(host=task.host, result=f"巡检失败: {result.exception}", failed=True)
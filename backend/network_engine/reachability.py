@@ -0,0 +1,64 @@
+import asyncio
+import errno
+import socket
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger("automation")
+
+# 设备状态：预检阶段 TCP 端口不可达 (区别于连接后执行失败的 failed)
+UNREACHABLE = "unreachable"
+
+def _reason(error: BaseException, timeout: float) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return f"TCP 连接超时 ({timeout:g}s 内无响应)"
+    if isinstance(error, ConnectionRefusedError):
+        return "TCP 连接被拒绝 (端口未开放)"
+    if isinstance(error, OSError) and error.errno in (errno.EHOSTUNREACH, errno.ENETUNREACH):
+        return "网络不可达 (无路由)"
+    if isinstance(error, socket.gaierror):
+        return f"地址解析失败: {error}"
+    return f"TCP 连接失败: {error}"
+
+async def _probe(address: str, port: int, timeout: float, limiter: asyncio.Semaphore) -> Optional[str]:
+    """对单个地址发起 TCP 握手，可达返回 None，否则返回原因"""
+    async with limiter:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout=timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            return _reason(e, timeout)
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), timeout=timeout)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        return None
+
+async def _sweep(targets: Dict[str, Tuple[str, int]], timeout: float, concurrency: int) -> Dict[str, Optional[str]]:
+    limiter = asyncio.Semaphore(max(concurrency, 1))
+    names = list(targets)
+    results = await asyncio.gather(*(_probe(*targets[name], timeout, limiter) for name in names))
+    return dict(zip(names, results))
+
+def probe_hosts(hosts: Iterable[Any], timeout: float = 1.0, concurrency: int = 500) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    可达性预检
+    并发对每台设备的管理端口 (Host.port，缺省 22) 做一次 TCP 握手，只建立连接不做 SSH 协商。
+    不可达的设备无需再占用执行线程等待 SSH 连接与读取超时，整批预检耗时约为一个 timeout。
+    返回 ({不可达设备名: 原因}, 预检统计)。
+    """
+    targets = {host.name: (host.hostname, host.port or 22) for host in hosts}
+    start = time.perf_counter()
+    results = asyncio.run(_sweep(targets, timeout, concurrency)) if targets else {}
+    unreachable = {name: reason for name, reason in results.items() if reason is not None}
+    stats = {
+        "checked": len(targets),
+        "reachable": len(targets) - len(unreachable),
+        "unreachable": len(unreachable),
+        "timeout": timeout,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+    if unreachable:
+        logger.info(f"可达性预检: {len(unreachable)}/{len(targets)} 台设备不可达，已跳过执行 ({stats['elapsed']}s)")
+    return unreachable, stats
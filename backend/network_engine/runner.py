@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+from backend.core.config import settings
+from backend.network_engine.job_control import JobAbortedError
+
+logger = logging.getLogger("automation")
+
+# 单个分区保留的并发变化采样点上限 (超出后按间隔抽稀)
+MAX_SAMPLES = 120
+
+# 工作线程内记录设备真正开始执行的时刻 (获得设备租约之后)
+_local = threading.local()
+
+def mark_device_started() -> None:
+    """
+    由租约包装器在获得设备租约后调用。
+    设备延迟从此刻起算，租约排队时间 (其他作业占用设备、会话预算不足) 不计入，避免误判为设备拥塞。
+    """
+    _local.started = time.monotonic()
+
+def _classify(result: MultiResult) -> str:
+    """
+    根据设备执行结果归类反馈信号:
+    aaa (认证被拒，通常是 TACACS/RADIUS 过载) / error (连接超时、拒绝) / aborted / ok
+    """
+    for r in result:
+        exc = r.exception
+        if exc is None:
+            continue
+        if isinstance(exc, JobAbortedError):
+            return "aborted"
+        chain = []
+        while exc is not None and len(chain) < 5:
+            chain.append(exc)
+            exc = exc.__cause__ or exc.__context__
+        text = " ".join(f"{type(e).__name__} {e}" for e in chain).lower()
+        if "authentication" in text or "auth failed" in text or "permission denied" in text:
+            return "aaa"
+        if any(k in text for k in ("timeout", "timed out", "refused", "unreachable", "reset by peer", "eof")):
+            return "error"
+    return "ok" if not result.failed else "failed"
+
+class ConcurrencyLimiter:
+    """
+    单个分区 (区域/分组) 的 AIMD 并发限制器
+    成功且延迟正常时逐步加性增大并发；连接错误按比例收缩，认证被拒收缩更快；
+    延迟显著高于基线时减一。并发始终保持在 [floor, ceiling] 之间。
+    """
+
+    def __init__(self, key: str, floor: int, initial: int, ceiling: int):
+        self.key = key
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = float(min(max(initial, self.floor), self.ceiling))
+        self.inflight = 0
+        self.latency_ewma: Optional[float] = None
+        self.latency_baseline: Optional[float] = None
+        self._successes = 0
+        self._last_decrease = 0.0
+        self.counters = {"ok": 0, "failed": 0, "error": 0, "aaa": 0, "aborted": 0}
+
+    def available(self) -> bool:
+        return self.inflight < int(self.limit)
+
+    def observe(self, outcome: str, latency: Optional[float]) -> bool:
+        """记录一台设备的执行结果 (latency 为空时只按结果调整)，返回并发上限是否发生变化"""
+        self.counters[outcome] = self.counters.get(outcome, 0) + 1
+        before = int(self.limit)
+        now = time.monotonic()
+
+        if outcome == "ok" and latency is not None:
+            alpha = 0.2
+            self.latency_ewma = latency if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * latency
+            if self.latency_baseline is None or self.latency_ewma < self.latency_baseline:
+                self.latency_baseline = self.latency_ewma
+            else:
+                # 基线缓慢上漂，避免一次偶然的极快样本让分区永久停留在下限
+                self.latency_baseline += 0.01 * (self.latency_ewma - self.latency_baseline)
+            if self.latency_ewma > self.latency_baseline * settings.AUTOMATION_CONCURRENCY_LATENCY_FACTOR:
+                # 链路或设备开始变慢：温和回退
+                self.limit = max(self.floor, self.limit - 1)
+                self._successes = 0
+            else:
+                # 每成功 limit 台增加 1 个并发
+                self._successes += 1
+                if self._successes >= int(self.limit):
+                    self._successes = 0
+                    self.limit = min(self.ceiling, self.limit + 1)
+        elif outcome in ("error", "aaa"):
+            # 同一批在途会话的连锁失败只收缩一次
+            if now - self._last_decrease > 1.0:
+                factor = 0.5 if outcome == "aaa" else 0.7
+                self.limit = max(self.floor, self.limit * factor)
+                self._last_decrease = now
+            self._successes = 0
+        return int(self.limit) != before
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "inflight": self.inflight,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "latency_baseline": round(self.latency_baseline, 3) if self.latency_baseline is not None else None,
+            "counters": dict(self.counters),
+        }
+
+class ConcurrencyRegistry:
+    """
+    各分区并发限制器的登记表 (进程级共享)
+    同一区域的多个作业共享一个限制器，学习到的并发上限在作业之间延续。
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    def get(self, key: str) -> ConcurrencyLimiter:
+        """获取分区限制器 (调用方需持有 cond)"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limits = settings.AUTOMATION_CONCURRENCY_LIMITS
+            conf = {**limits.get("default", {}), **limits.get(key, {})}
+            limiter = self._limiters[key] = ConcurrencyLimiter(
+                key, conf.get("floor", 2), conf.get("initial", 100), conf.get("ceiling", 100)
+            )
+        return limiter
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.cond:
+            return {key: limiter.snapshot() for key, limiter in self._limiters.items()}
+
+
+class AdaptiveRunner:
+    """
+    自适应并发 Nornir 运行器
+    按分区 (默认取 host.data 中的 region，其次 group) 分别排队，每个分区的在途会话数
+    由 ConcurrencyLimiter 根据连接延迟、错误率与认证拒绝动态调整；num_workers 仅作为全局线程上限。
+    """
+
+    def __init__(self, num_workers: int = 100, partition_key: str = "region"):
+        self.num_workers = num_workers
+        self.partition_key = partition_key
+        self.timeline: Dict[str, List[Tuple[float, int, int]]] = {}
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+        self._started = 0.0
+
+    def _partition(self, host: Host) -> str:
+        return host.data.get(self.partition_key) or host.data.get("group") or "default"
+
+    def _record(self, limiter: ConcurrencyLimiter) -> None:
+        """记录并发上限变化 (调用方需持有 cond)"""
+        samples = self.timeline.setdefault(limiter.key, [])
+        samples.append((round(time.monotonic() - self._started, 2), int(limiter.limit), limiter.inflight))
+        if len(samples) > MAX_SAMPLES:
+            # 保留首尾，中间隔一抽一
+            self.timeline[limiter.key] = samples[:1] + samples[1:-1:2] + samples[-1:]
+
+    def run(self, task: Task, hosts: List[Host]) -> AggregatedResult:
+        registry = concurrency_registry
+        cond = registry.cond
+        self._started = time.monotonic()
+        self.timeline = {}
+        self.outcomes = {}
+
+        pending: Dict[str, deque] = {}
+        for host in hosts:
+            pending.setdefault(self._partition(host), deque()).append(host)
+
+        result = AggregatedResult(task.name)
+        futures = []
+
+        def execute(host: Host, limiter: ConcurrencyLimiter) -> MultiResult:
+            _local.started = None
+            outcome = "failed"
+            try:
+                worker_result = task.copy().start(host)
+                outcome = _classify(worker_result)
+                return worker_result
+            finally:
+                with cond:
+                    limiter.inflight -= 1
+                    counts = self.outcomes.setdefault(limiter.key, {})
+                    counts[outcome] = counts.get(outcome, 0) + 1
+                    # 未获得租约即中止的设备不计延迟
+                    started = _local.started
+                    if limiter.observe(outcome, time.monotonic() - started if started is not None else None):
+                        self._record(limiter)
+                    cond.notify_all()
+
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            with cond:
+                for key in pending:
+                    self._record(registry.get(key))
+                while pending:
+                    dispatched = False
+                    for key in list(pending):
+                        limiter = registry.get(key)
+                        queue = pending[key]
+                        while queue and limiter.available():
+                            limiter.inflight += 1
+                            futures.append(pool.submit(execute, queue.popleft(), limiter))
+                            dispatched = True
+                        if not queue:
+                            del pending[key]
+                    if pending and not dispatched:
+                        cond.wait(timeout=1.0)
+
+        for future in futures:
+            worker_result = future.result()
+            result[worker_result.host.name] = worker_result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """本次运行各分区的并发变化曲线 ([相对秒数, 并发上限, 在途数], ...) 与限制器当前状态"""
+        limiters = concurrency_registry.snapshot()
+        return {
+            key: {
+                "samples": [list(s) for s in samples],
+                "min": min(s[1] for s in samples),
+                "max": max(s[1] for s in samples),
+                "final": limiters.get(key, {}).get("limit"),
+                "latency_ewma": limiters.get(key, {}).get("latency_ewma"),
+                "outcomes": self.outcomes.get(key, {}),
+            }
+            for key, samples in self.timeline.items() if samples
+        }
+
+
+# 全局单例
+concurrency_registry = ConcurrencyRegistry()
@@ -0,0 +1,10 @@
+"""
+SNMP 巡检采集
+基于 asyncio UDP 的 SNMP 客户端 (v2c 内置 BER 编解码，v3 需要可选依赖 pysnmp)，
+按厂商 OID 映射采集 CPU、内存、环境与接口计数器，产出与 SSH 巡检相同的 HealthData 结构。
+作业参数 collector="snmp" 时巡检先走 SNMP，失败或未配置凭据的设备回退 SSH。
+"""
+from backend.network_engine.snmp.client import HAS_PYSNMP, SnmpClient, SnmpError, SnmpTimeout
+from backend.network_engine.snmp.collector import SnmpCollector, collect_health, snmp_credentials
+
+__all__ = ["HAS_PYSNMP", "SnmpClient", "SnmpError", "SnmpTimeout", "SnmpCollector", "collect_health", "snmp_credentials"]
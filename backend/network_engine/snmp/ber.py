@@ -0,0 +1,233 @@
+"""
+SNMP v1/v2c 报文的 BER 编解码 (RFC 3416)
+只覆盖采集所需的类型与 PDU，客户端与本地模拟器共用。
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+OID_CACHE_SIZE = 65536
+
+# 基本类型
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+# 应用类型
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+# varbind 异常值
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+# PDU
+GET_REQUEST = 0xA0
+GET_NEXT_REQUEST = 0xA1
+RESPONSE = 0xA2
+SET_REQUEST = 0xA3
+GET_BULK_REQUEST = 0xA5
+
+VERSION_1 = 0
+VERSION_2C = 1
+
+ERROR_NAMES = {
+    0: "noError", 1: "tooBig", 2: "noSuchName", 3: "badValue", 4: "readOnly", 5: "genErr",
+    6: "noAccess", 7: "wrongType", 8: "wrongLength", 9: "wrongEncoding", 10: "wrongValue",
+    11: "noCreation", 12: "inconsistentValue", 13: "resourceUnavailable", 14: "commitFailed",
+    15: "undoFailed", 16: "authorizationError", 17: "notWritable", 18: "inconsistentName",
+}
+
+
+class BerError(ValueError):
+    """报文格式错误"""
+
+
+class VarBindException:
+    """varbind 异常值 (noSuchObject / noSuchInstance / endOfMibView)，解码结果中以单例表示"""
+    __slots__ = ("tag", "name")
+
+    def __init__(self, tag: int, name: str):
+        self.tag = tag
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+NO_SUCH_OBJECT_VALUE = VarBindException(NO_SUCH_OBJECT, "noSuchObject")
+NO_SUCH_INSTANCE_VALUE = VarBindException(NO_SUCH_INSTANCE, "noSuchInstance")
+END_OF_MIB_VIEW_VALUE = VarBindException(END_OF_MIB_VIEW, "endOfMibView")
+_EXCEPTIONS = {e.tag: e for e in (NO_SUCH_OBJECT_VALUE, NO_SUCH_INSTANCE_VALUE, END_OF_MIB_VIEW_VALUE)}
+
+
+class Message:
+    """解码后的 SNMP 报文"""
+    __slots__ = ("version", "community", "pdu_type", "request_id", "error_status", "error_index", "varbinds")
+
+    def __init__(self, version: int, community: bytes, pdu_type: int, request_id: int,
+                 error_status: int, error_index: int, varbinds: List[Tuple[str, Any]]):
+        self.version = version
+        self.community = community
+        self.pdu_type = pdu_type
+        self.request_id = request_id
+        self.error_status = error_status      # GetBulk 请求中为 non-repeaters
+        self.error_index = error_index        # GetBulk 请求中为 max-repetitions
+        self.varbinds = varbinds
+
+
+# --- 编码 ---
+
+def _length(n: int) -> bytes:
+    if n < 0x80:
+        return bytes((n,))
+    raw = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(raw),)) + raw
+
+def tlv(tag: int, payload: bytes) -> bytes:
+    return bytes((tag,)) + _length(len(payload)) + payload
+
+def encode_integer(value: int, tag: int = INTEGER) -> bytes:
+    size = (value if value >= 0 else ~value).bit_length() // 8 + 1
+    return tlv(tag, value.to_bytes(size, "big", signed=True))
+
+# 同型号设备的 OID 集合高度重复，OID 编解码结果按值缓存
+@lru_cache(maxsize=OID_CACHE_SIZE)
+def encode_oid(oid: str) -> bytes:
+    arcs = list(map(int, oid.strip(".").split(".")))
+    if len(arcs) < 2:
+        raise BerError(f"OID 至少需要两段: {oid}")
+    out = bytearray()
+    for arc in [arcs[0] * 40 + arcs[1]] + arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        out.extend(reversed(chunk))
+    return tlv(OBJECT_IDENTIFIER, bytes(out))
+
+def encode_value(value: Any) -> bytes:
+    """
+    Python 值 -> BER: None 为 NULL，int 为 INTEGER，str/bytes 为 OCTET STRING，
+    (类型标签, 值) 元组用于显式指定应用类型 (如 (COUNTER64, 123))，VarBindException 为 varbind 异常值
+    """
+    if value is None:
+        return tlv(NULL, b"")
+    if isinstance(value, VarBindException):
+        return tlv(value.tag, b"")
+    if isinstance(value, tuple):
+        tag, raw = value
+        if tag == OBJECT_IDENTIFIER:
+            return encode_oid(raw)
+        if tag == IP_ADDRESS:
+            return tlv(tag, bytes(int(p) for p in raw.split(".")))
+        if tag == OCTET_STRING:
+            return encode_value(raw)
+        return encode_integer(int(raw), tag)
+    if isinstance(value, bool):
+        raise BerError("不支持布尔值")
+    if isinstance(value, int):
+        return encode_integer(value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return tlv(OCTET_STRING, bytes(value))
+    raise BerError(f"不支持的值类型: {type(value).__name__}")
+
+def encode_message(version: int, community: bytes, pdu_type: int, request_id: int,
+                   varbinds: List[Tuple[str, Any]], error_status: int = 0, error_index: int = 0) -> bytes:
+    body = b"".join(tlv(SEQUENCE, encode_oid(oid) + encode_value(value)) for oid, value in varbinds)
+    pdu = tlv(pdu_type, encode_integer(request_id) + encode_integer(error_status) + encode_integer(error_index)
+              + tlv(SEQUENCE, body))
+    return tlv(SEQUENCE, encode_integer(version) + tlv(OCTET_STRING, community) + pdu)
+
+
+# --- 解码 ---
+
+def _read_tlv(data: bytes, pos: int) -> Tuple[int, int, int]:
+    """返回 (标签, 值起始位置, 值结束位置)"""
+    if pos + 2 > len(data):
+        raise BerError("报文被截断")
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        n = length & 0x7F
+        if n == 0 or n > 4 or pos + n > len(data):
+            raise BerError("非法长度字段")
+        length = int.from_bytes(data[pos:pos + n], "big")
+        pos += n
+    end = pos + length
+    if end > len(data):
+        raise BerError("报文被截断")
+    return tag, pos, end
+
+@lru_cache(maxsize=OID_CACHE_SIZE)
+def decode_oid(raw: bytes) -> str:
+    if not raw:
+        raise BerError("空 OID")
+    arcs: List[int] = []
+    value = 0
+    for byte in raw:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+    first = arcs[0]
+    head = [min(first // 40, 2), first - min(first // 40, 2) * 40]
+    return ".".join(map(str, head + arcs[1:]))
+
+def decode_value(tag: int, raw: bytes) -> Any:
+    if tag == INTEGER:
+        return int.from_bytes(raw, "big", signed=True) if raw else 0
+    if tag in (COUNTER32, GAUGE32, TIMETICKS, COUNTER64):
+        return int.from_bytes(raw, "big", signed=False) if raw else 0
+    if tag in (OCTET_STRING, OPAQUE):
+        return bytes(raw)
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(raw)
+    if tag == IP_ADDRESS:
+        return ".".join(str(b) for b in raw)
+    if tag == NULL:
+        return None
+    if tag in _EXCEPTIONS:
+        return _EXCEPTIONS[tag]
+    return bytes(raw)
+
+def _expect(data: bytes, pos: int, tag: Optional[int]) -> Tuple[int, int, int]:
+    actual, start, end = _read_tlv(data, pos)
+    if tag is not None and actual != tag:
+        raise BerError(f"期望标签 0x{tag:02x}，实际为 0x{actual:02x}")
+    return actual, start, end
+
+def _read_int(data: bytes, pos: int) -> Tuple[int, int]:
+    _, start, end = _expect(data, pos, INTEGER)
+    return int.from_bytes(data[start:end], "big", signed=True) if end > start else 0, end
+
+def decode_message(data: bytes) -> Message:
+    _, pos, end = _expect(data, 0, SEQUENCE)
+    version, pos = _read_int(data, pos)
+    _, start, pos = _expect(data, pos, OCTET_STRING)
+    community = bytes(data[start:pos])
+    pdu_type, pos, _ = _read_tlv(data, pos)
+    request_id, pos = _read_int(data, pos)
+    error_status, pos = _read_int(data, pos)
+    error_index, pos = _read_int(data, pos)
+    _, pos, list_end = _expect(data, pos, SEQUENCE)
+    varbinds = []
+    while pos < list_end:
+        _, vb_pos, vb_end = _expect(data, pos, SEQUENCE)
+        _, oid_start, oid_end = _expect(data, vb_pos, OBJECT_IDENTIFIER)
+        tag, val_start, val_end = _read_tlv(data, oid_end)
+        varbinds.append((decode_oid(data[oid_start:oid_end]), decode_value(tag, data[val_start:val_end])))
+        pos = vb_end
+    return Message(version, community, pdu_type, request_id, error_status, error_index, varbinds)
+
+@lru_cache(maxsize=OID_CACHE_SIZE)
+def oid_tuple(oid: str) -> Tuple[int, ...]:
+    """OID 比较键 (按数值逐段比较，而非字符串)"""
+    return tuple(map(int, oid.strip(".").split(".")))
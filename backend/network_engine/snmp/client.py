@@ -0,0 +1,304 @@
+import asyncio
+import ipaddress
+import itertools
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.network_engine.snmp import ber
+
+logger = logging.getLogger("automation")
+
+# SNMPv3 (USM 认证/加密) 依赖 pysnmp，为可选依赖；v2c 由内置 BER 编解码直接完成
+try:
+    from pysnmp.hlapi.v3arch import asyncio as pysnmp_hlapi
+    HAS_PYSNMP = True
+except ImportError:
+    pysnmp_hlapi = None
+    HAS_PYSNMP = False
+
+# 单个 GetBulk 请求的 varbind 上限 (列数 x max-repetitions)，避免响应超出 UDP 报文大小
+MAX_VARBINDS_PER_REQUEST = 100
+# 共享套接字的收发缓冲区：数千个在途请求的响应可能同时到达，系统默认缓冲区会直接丢包 (受 net.core.rmem_max 限制)
+SOCKET_BUFFER = 8 * 1024 * 1024
+
+
+class SnmpError(Exception):
+    """SNMP 请求失败 (设备返回错误状态、报文异常或不支持的版本)"""
+
+
+class SnmpTimeout(SnmpError):
+    """重试耗尽仍未收到响应"""
+
+
+def _in_subtree(oid: str, root: str) -> bool:
+    return oid.startswith(root + ".")
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, pending: Dict[int, Tuple[asyncio.Future, Optional[str]]]):
+        self.pending = pending
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        try:
+            message = ber.decode_message(data)
+        except ber.BerError:
+            return
+        entry = self.pending.get(message.request_id)
+        if entry is None:
+            return
+        future, expected = entry
+        # 目标为 IP 地址时校验响应来源，防止错配其他设备的迟到响应
+        if expected is not None and addr[0] != expected:
+            return
+        if not future.done():
+            future.set_result(message)
+
+    def error_received(self, exc: Exception) -> None:
+        # 未连接的 UDP 套接字上 ICMP 端口不可达无法对应到具体请求，交给超时处理
+        pass
+
+
+class SnmpClient:
+    """
+    异步 SNMP 客户端
+    所有设备的请求共用同一个 UDP 套接字 (按地址族各一个)，以 request-id 匹配响应，
+    单个事件循环即可同时挂起数千个请求；在途请求数受 max_inflight 约束。
+    v2c 使用内置 BER 编解码；v3 需要安装 pysnmp。
+    """
+
+    def __init__(self, timeout: float = 2.0, retries: int = 1, max_inflight: int = 2000, max_repetitions: int = 25):
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max_repetitions
+        self._limiter = asyncio.Semaphore(max(max_inflight, 1))
+        self._pending: Dict[int, Tuple[asyncio.Future, Optional[str]]] = {}
+        self._transports: Dict[int, asyncio.DatagramTransport] = {}
+        self._request_ids = itertools.count(1)
+        self._v3_engine: Any = None
+        self.stats = {"requests": 0, "retries": 0, "timeouts": 0}
+
+    async def __aenter__(self) -> "SnmpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        if self._v3_engine is not None:
+            try:
+                self._v3_engine.close_dispatcher()
+            except Exception:
+                pass
+            self._v3_engine = None
+
+    async def _transport(self, family: int) -> asyncio.DatagramTransport:
+        transport = self._transports.get(family)
+        if transport is None:
+            loop = asyncio.get_running_loop()
+            local = ("::", 0) if family == socket.AF_INET6 else ("0.0.0.0", 0)
+            transport, _ = await loop.create_datagram_endpoint(lambda: _Protocol(self._pending), local_addr=local, family=family)
+            set_buffers(transport)
+            self._transports[family] = transport
+        return transport
+
+    def _next_request_id(self) -> int:
+        while True:
+            rid = next(self._request_ids) & 0x7FFFFFFF
+            if rid and rid not in self._pending:
+                return rid
+
+    async def _request(self, host: str, port: int, community: bytes, pdu_type: int, varbinds: List[Tuple[str, Any]],
+                       non_repeaters: int = 0, max_repetitions: int = 0) -> ber.Message:
+        try:
+            address = ipaddress.ip_address(host)
+            family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+            expected: Optional[str] = str(address)
+        except ValueError:
+            family, expected = socket.AF_INET, None
+        transport = await self._transport(family)
+        loop = asyncio.get_running_loop()
+        async with self._limiter:
+            for attempt in range(self.retries + 1):
+                rid = self._next_request_id()
+                data = ber.encode_message(ber.VERSION_2C, community, pdu_type, rid, varbinds,
+                                          error_status=non_repeaters, error_index=max_repetitions)
+                future = loop.create_future()
+                self._pending[rid] = (future, expected)
+                self.stats["requests"] += 1
+                if attempt:
+                    self.stats["retries"] += 1
+                try:
+                    transport.sendto(data, (host, port))
+                    message = await asyncio.wait_for(future, timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    continue
+                finally:
+                    self._pending.pop(rid, None)
+                if message.error_status:
+                    name = ber.ERROR_NAMES.get(message.error_status, str(message.error_status))
+                    raise SnmpError(f"设备返回错误 {name} (index {message.error_index})")
+                return message
+        self.stats["timeouts"] += 1
+        raise SnmpTimeout(f"SNMP 请求超时 ({host}:{port}，{self.retries + 1} 次 x {self.timeout:g}s)")
+
+    # --- 公共接口 ---
+
+    async def get(self, host: str, port: int, credentials: Dict[str, Any], oids: List[str]) -> Dict[str, Any]:
+        """GET 标量，返回 {oid: 值}；设备不支持的 OID 不出现在结果中"""
+        if str(credentials.get("version")) == "3":
+            return await self._v3_get(host, port, credentials, oids)
+        message = await self._request(host, port, _community(credentials), ber.GET_REQUEST, [(oid, None) for oid in oids])
+        return {oid: value for oid, value in message.varbinds if not isinstance(value, ber.VarBindException)}
+
+    async def walk_columns(self, host: str, port: int, credentials: Dict[str, Any],
+                           roots: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        GetBulk 并行遍历多个表列，返回 {列 OID: {行索引: 值}}。
+        同一请求携带所有未遍历完的列，每列从上次返回的最后一个 OID 继续；
+        设备返回 tooBig 时减半 max-repetitions 重试。
+        """
+        if str(credentials.get("version")) == "3":
+            return {root: await self._v3_walk(host, port, credentials, root) for root in roots}
+        community = _community(credentials)
+        tables: Dict[str, Dict[str, Any]] = {root: {} for root in roots}
+        cursors = {root: root for root in roots}
+        repetitions = self.max_repetitions
+        while cursors:
+            active = list(cursors)
+            reps = max(1, min(repetitions, MAX_VARBINDS_PER_REQUEST // len(active)))
+            try:
+                message = await self._request(host, port, community, ber.GET_BULK_REQUEST,
+                                              [(cursors[r], None) for r in active], 0, reps)
+            except SnmpError as e:
+                if "tooBig" in str(e) and reps > 1:
+                    repetitions = reps // 2
+                    continue
+                raise
+            if not message.varbinds:
+                break
+            # 响应按行交错: 第 i 个 varbind 属于 active[i % 列数]
+            done = set()
+            progressed = False
+            for i, (oid, value) in enumerate(message.varbinds):
+                root = active[i % len(active)]
+                if root in done:
+                    continue
+                if isinstance(value, ber.VarBindException) or not _in_subtree(oid, root) \
+                        or ber.oid_tuple(oid) <= ber.oid_tuple(cursors[root]):
+                    done.add(root)
+                    continue
+                tables[root][oid[len(root) + 1:]] = value
+                cursors[root] = oid
+                progressed = True
+            for root in active:
+                if root in done or not progressed:
+                    cursors.pop(root, None)
+        return tables
+
+    # --- SNMPv3 (pysnmp) ---
+
+    def _v3_auth(self, credentials: Dict[str, Any]) -> Any:
+        if not HAS_PYSNMP:
+            raise SnmpError("SNMPv3 需要安装 pysnmp")
+        h = pysnmp_hlapi
+        auth_protocols = {
+            "md5": h.usmHMACMD5AuthProtocol, "sha": h.usmHMACSHAAuthProtocol,
+            "sha224": h.usmHMAC128SHA224AuthProtocol, "sha256": h.usmHMAC192SHA256AuthProtocol,
+            "sha384": h.usmHMAC256SHA384AuthProtocol, "sha512": h.usmHMAC384SHA512AuthProtocol,
+        }
+        priv_protocols = {
+            "des": h.usmDESPrivProtocol, "3des": h.usm3DESEDEPrivProtocol, "aes": h.usmAesCfb128Protocol,
+            "aes192": h.usmAesCfb192Protocol, "aes256": h.usmAesCfb256Protocol,
+        }
+        auth_key = credentials.get("auth_key") or None
+        priv_key = credentials.get("priv_key") or None
+        return h.UsmUserData(
+            credentials.get("user") or "",
+            authKey=auth_key,
+            privKey=priv_key,
+            authProtocol=auth_protocols.get(str(credentials.get("auth_protocol") or "sha").lower(), h.usmHMACSHAAuthProtocol)
+            if auth_key else h.usmNoAuthProtocol,
+            privProtocol=priv_protocols.get(str(credentials.get("priv_protocol") or "aes").lower(), h.usmAesCfb128Protocol)
+            if priv_key else h.usmNoPrivProtocol,
+        )
+
+    async def _v3_target(self, host: str, port: int) -> Any:
+        if self._v3_engine is None:
+            self._v3_engine = pysnmp_hlapi.SnmpEngine()
+        return await pysnmp_hlapi.UdpTransportTarget.create((host, port), timeout=self.timeout, retries=self.retries)
+
+    async def _v3_get(self, host: str, port: int, credentials: Dict[str, Any], oids: List[str]) -> Dict[str, Any]:
+        h = pysnmp_hlapi
+        auth = self._v3_auth(credentials)
+        async with self._limiter:
+            target = await self._v3_target(host, port)
+            self.stats["requests"] += 1
+            error, status, index, varbinds = await h.get_cmd(
+                self._v3_engine, auth, target, h.ContextData(), *(h.ObjectType(h.ObjectIdentity(oid)) for oid in oids)
+            )
+        if error:
+            raise SnmpTimeout(str(error)) if "timeout" in str(error).lower() else SnmpError(str(error))
+        if status:
+            raise SnmpError(f"设备返回错误 {status.prettyPrint()} (index {index})")
+        return {str(name): _from_pysnmp(value) for name, value in varbinds if _from_pysnmp(value) is not None}
+
+    async def _v3_walk(self, host: str, port: int, credentials: Dict[str, Any], root: str) -> Dict[str, Any]:
+        h = pysnmp_hlapi
+        auth = self._v3_auth(credentials)
+        rows: Dict[str, Any] = {}
+        async with self._limiter:
+            target = await self._v3_target(host, port)
+            async for error, status, index, varbinds in h.bulk_walk_cmd(
+                self._v3_engine, auth, target, h.ContextData(), 0, self.max_repetitions,
+                h.ObjectType(h.ObjectIdentity(root)), lexicographicMode=False,
+            ):
+                self.stats["requests"] += 1
+                if error:
+                    raise SnmpTimeout(str(error)) if "timeout" in str(error).lower() else SnmpError(str(error))
+                if status:
+                    raise SnmpError(f"设备返回错误 {status.prettyPrint()} (index {index})")
+                for name, value in varbinds:
+                    oid = str(name)
+                    if _in_subtree(oid, root):
+                        rows[oid[len(root) + 1:]] = _from_pysnmp(value)
+        return rows
+
+
+def set_buffers(transport: asyncio.DatagramTransport, size: int = SOCKET_BUFFER) -> None:
+    """尽量放大 UDP 套接字缓冲区 (失败时保持系统默认)"""
+    sock = transport.get_extra_info("socket")
+    for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, size)
+        except (OSError, AttributeError):
+            pass
+
+def _community(credentials: Dict[str, Any]) -> bytes:
+    community = credentials.get("community")
+    if not community:
+        raise SnmpError("未配置 SNMP 团体字")
+    return community.encode("utf-8") if isinstance(community, str) else bytes(community)
+
+def _from_pysnmp(value: Any) -> Any:
+    """pysnmp 值对象 -> 与内置解码一致的 Python 值 (整数 / bytes / 字符串 OID)"""
+    type_name = type(value).__name__
+    if type_name in ("NoSuchObject", "NoSuchInstance", "EndOfMibView", "Null"):
+        return None
+    if type_name == "ObjectIdentifier":
+        return str(value)
+    if type_name == "IpAddress":
+        return value.prettyPrint()
+    if type_name == "OctetString":
+        return bytes(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value.prettyPrint()
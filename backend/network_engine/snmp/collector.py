@@ -0,0 +1,247 @@
+import asyncio
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from backend.core.config import settings
+from backend.network_engine.async_engine.tasks import INSPECT_STEPS, StepReporter
+from backend.network_engine.job_control import JobAbortedError, JobControl
+from backend.network_engine.snmp import ber, oids
+from backend.network_engine.snmp.client import SnmpClient, SnmpError
+
+logger = logging.getLogger("automation")
+
+# 接口计数器向量的列 (与 nornir 巡检 _counter_vector 的顺序一致)
+_COUNTER_KEYS = ("rx_octets", "tx_octets", None, None, "rx_errors", "tx_errors", "rx_discards", "tx_discards")
+
+def snmp_credentials(host: Any) -> Optional[Dict[str, Any]]:
+    """设备的 SNMP 凭据 (Inventory 中的 data.snmp)，未单独配置时使用全局缺省团体字；均无则返回 None"""
+    creds = dict(host.data.get("snmp") or {})
+    if not creds.get("version"):
+        if not settings.SNMP_DEFAULT_COMMUNITY:
+            return None
+        creds.update(version="2c", community=settings.SNMP_DEFAULT_COMMUNITY)
+    creds["port"] = creds.get("port") or settings.SNMP_PORT
+    return creds
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace").strip("\x00 ").strip()
+    return str(value).strip() if value is not None else ""
+
+def _numbers(column: Dict[str, Any]) -> List[float]:
+    return [float(v) for v in column.values() if isinstance(v, int)]
+
+def _mean_positive(column: Dict[str, Any]) -> float:
+    """厂商实体表中非 CPU/内存实体的值为 0，只对有效实体取平均"""
+    values = [v for v in _numbers(column) if 0 < v <= 100]
+    return round(sum(values) / len(values), 2) if values else 0
+
+def _counter(table: Dict[str, Dict[str, Any]], key: str, index: str) -> int:
+    value = table.get(oids.IF_COLUMNS[key], {}).get(index)
+    return value if isinstance(value, int) and value >= 0 else -1
+
+def _packets(table: Dict[str, Dict[str, Any]], direction: str, index: str) -> int:
+    values = [_counter(table, f"{direction}_{kind}", index) for kind in ("unicast", "multicast", "broadcast")]
+    supported = [v for v in values if v >= 0]
+    return sum(supported) if supported else -1
+
+def build_health(host: Any, system: Dict[str, Any], vendor: Optional[str], env: Dict[str, Dict[str, Any]],
+                 interfaces: Dict[str, Dict[str, Any]], timings: Tuple[float, float, float, float]) -> Dict[str, Any]:
+    """SNMP 采集结果 -> 与 inspect_health 相同的 HealthData 结构"""
+    t0, t1, t2, t3 = timings
+    descr = _text(system.get(oids.SYS_DESCR))
+
+    # 整机信息: ENTITY-MIB 中 class=chassis 的第一行，缺失时从 sysDescr 中提取版本
+    classes = env.get(oids.ENTITY_COLUMNS["class"], {})
+    chassis = next((idx for idx in sorted(classes, key=ber.oid_tuple) if classes[idx] == oids.ENTITY_CLASS_CHASSIS), None)
+    def entity(key: str) -> str:
+        return _text(env.get(oids.ENTITY_COLUMNS[key], {}).get(chassis)) if chassis is not None else ""
+    version_match = re.search(r"Version\s+([\w.()\-]+)", descr, re.IGNORECASE)
+
+    cpu = mem = 0
+    max_temp = None
+    fans_ok = pwr_ok = temp_ok = True
+    if vendor:
+        spec = oids.VENDOR_OIDS[vendor]
+        cpu = _mean_positive(env.get(spec["cpu"], {}))
+        if "memory" in spec:
+            mem = _mean_positive(env.get(spec["memory"], {}))
+        else:
+            used = env.get(spec["memory_used"], {})
+            free = env.get(spec["memory_free"], {})
+            # Cisco: 第一个内存池为 Processor
+            first = min(used, key=ber.oid_tuple, default=None)
+            if first is not None and isinstance(free.get(first), int) and used[first] + free[first] > 0:
+                mem = round(used[first] / (used[first] + free[first]) * 100, 2)
+        temps = env.get(spec["temperature"], {})
+        thresholds = env.get(spec["temperature_threshold"], {})
+        readings = {idx: v for idx, v in temps.items() if isinstance(v, int) and 0 < v < 200}
+        if readings:
+            max_temp = float(max(readings.values()))
+            temp_ok = all(v < (thresholds.get(idx) if isinstance(thresholds.get(idx), int) and thresholds.get(idx) > 0
+                               else settings.SNMP_TEMP_ALERT) for idx, v in readings.items())
+        fan_oid, fan_bad = spec["fans"]
+        pwr_oid, pwr_bad = spec["power"]
+        fans_ok = not any(v in fan_bad for v in env.get(fan_oid, {}).values())
+        pwr_ok = not any(v in pwr_bad for v in env.get(pwr_oid, {}).values())
+
+    # 接口名统一为 SSH 巡检的写法，SNMP 与 SSH 采集的计数器落在同一条时序上
+    names = {idx: oids.interface_name(_text(name), vendor) for idx, name in interfaces.get(oids.IF_COLUMNS["name"], {}).items()}
+    oper = interfaces.get(oids.IF_COLUMNS["oper_status"], {})
+    speeds = interfaces.get(oids.IF_COLUMNS["high_speed"], {})
+    counters = {}
+    for index, name in names.items():
+        vector = []
+        for i, key in enumerate(_COUNTER_KEYS):
+            vector.append(_counter(interfaces, key, index) if key else _packets(interfaces, "rx" if i == 2 else "tx", index))
+        counters[name or index] = vector
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "performance": {
+            "connect_latency": round(t1 - t0, 3),
+            "env_gather_latency": round(t2 - t1, 3),
+            "intf_gather_latency": round(t3 - t2, 3),
+            "total_processing": round(time.monotonic() - t0, 3),
+        },
+        "audit_trail": {
+            "commands_executed": [
+                "SNMP GET: SNMPv2-MIB system",
+                f"SNMP GETBULK: ENTITY-MIB{' + ' + vendor + ' 私有 MIB (CPU/内存/温度/风扇/电源)' if vendor else ''}",
+                "SNMP GETBULK: IF-MIB ifTable/ifXTable",
+            ],
+            "collector": "snmp",
+        },
+        "basic": {
+            "hostname": _text(system.get(oids.SYS_NAME)) or host.name,
+            "model": entity("model") or "Unknown",
+            "version": entity("software_rev") or (version_match.group(1) if version_match else "Unknown"),
+            # sysUpTime 单位为 1/100 秒
+            "uptime": int(system.get(oids.SYS_UPTIME) or 0) // 100,
+            "sn": entity("serial") or "Unknown",
+        },
+        "resources": {
+            "cpu_avg": cpu,
+            "memory_usage": mem,
+        },
+        "hardware": {
+            "fans_ok": fans_ok,
+            "pwr_ok": pwr_ok,
+            "temp_ok": temp_ok,
+            "max_temp": max_temp,
+        },
+        "interface_stats": {
+            "total": len(names),
+            "up_count": sum(1 for idx in names if oper.get(idx) == 1),
+            "error_total": sum(max(0, v[4]) + max(0, v[5]) for v in counters.values()),
+        },
+        "interface_counters": counters,
+        "interface_speeds": {names[idx] or idx: s for idx, s in speeds.items() if idx in names and isinstance(s, int) and s > 0},
+    }
+
+async def collect_health(client: SnmpClient, host: Any, credentials: Dict[str, Any],
+                         reporter: Optional[StepReporter] = None) -> Dict[str, Any]:
+    """通过 SNMP 采集一台设备的巡检数据，步骤名与 SSH 巡检一致 (失败时抛出 SnmpError，由调用方回退 SSH)"""
+    address, port = host.hostname, credentials["port"]
+    def started(step: int) -> None:
+        if reporter:
+            reporter.record_step_started(host.name, INSPECT_STEPS[step])
+
+    t0 = time.monotonic()
+    started(0)
+    system = await client.get(address, port, credentials, oids.SYSTEM_OIDS)
+    if not system:
+        raise SnmpError("设备未返回 system 组")
+    vendor = oids.vendor_for(host.platform, system.get(oids.SYS_OBJECT_ID))
+    t1 = time.monotonic()
+
+    started(1)
+    env_columns = list(oids.ENTITY_COLUMNS.values()) + (list(oids.vendor_columns(vendor).values()) if vendor else [])
+    env = await client.walk_columns(address, port, credentials, env_columns)
+    t2 = time.monotonic()
+
+    started(2)
+    interfaces = await client.walk_columns(address, port, credentials, list(oids.IF_COLUMNS.values()))
+    t3 = time.monotonic()
+
+    health = build_health(host, system, vendor, env, interfaces, (t0, t1, t2, t3))
+    if reporter:
+        reporter.record_step_completed(host.name, INSPECT_STEPS[0], False, health["basic"], None)
+        # 步骤结果只放展示字段，完整 HealthData 由汇总步骤上报 (避免重复写入健康采样)
+        reporter.record_step_completed(host.name, INSPECT_STEPS[1], False, {**health["resources"], **health["hardware"]}, None)
+        reporter.record_step_completed(host.name, INSPECT_STEPS[2], False, health["interface_stats"], None)
+    return health
+
+
+class SnmpCollector:
+    """
+    SNMP 巡检快速通道
+    在一个事件循环中并发采集全部设备 (在途请求数受 max_inflight 约束)，成功的设备直接上报巡检结果；
+    未配置 SNMP 凭据、超时或报错的设备返回给调用方，改走 SSH 巡检。
+    """
+
+    def __init__(self, timeout: float = 2.0, retries: int = 1, max_inflight: int = 2000, max_repetitions: int = 25):
+        self.timeout = timeout
+        self.retries = retries
+        self.max_inflight = max_inflight
+        self.max_repetitions = max_repetitions
+
+    def run(self, hosts: List[Any], reporter: StepReporter, run_name: str,
+            control: Optional[JobControl] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """在当前线程中启动事件循环，返回 (统计, {需回退 SSH 的设备: 原因})"""
+        return asyncio.run(self.run_async(hosts, reporter, run_name, control))
+
+    async def run_async(self, hosts: List[Any], reporter: StepReporter, run_name: str,
+                        control: Optional[JobControl] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        fallback: Dict[str, str] = {}
+        started = time.monotonic()
+        async with SnmpClient(self.timeout, self.retries, self.max_inflight, self.max_repetitions) as client:
+            async def run_host(host: Any) -> None:
+                credentials = snmp_credentials(host)
+                if credentials is None:
+                    fallback[host.name] = "未配置 SNMP 凭据"
+                    return
+                try:
+                    health = await collect_health(client, host, credentials, reporter)
+                except SnmpError as e:
+                    fallback[host.name] = str(e)
+                    return
+                except Exception as e:
+                    logger.warning(f"设备 {host.name} SNMP 采集异常，回退 SSH: {e}")
+                    fallback[host.name] = f"SNMP 采集异常: {e}"
+                    return
+                reporter.record_step_started(host.name, run_name)
+                reporter.record_step_completed(host.name, run_name, False, health, None)
+
+            tasks = [asyncio.create_task(run_host(host)) for host in hosts]
+            monitor = asyncio.create_task(self._watch(control, tasks)) if control else None
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if monitor:
+                monitor.cancel()
+            stats = {
+                "collector": "snmp",
+                "hosts": len(hosts),
+                "success": len(hosts) - len(fallback),
+                "fallback": len(fallback),
+                "elapsed": round(time.monotonic() - started, 3),
+                **client.stats,
+            }
+        if fallback:
+            logger.info(f"SNMP 巡检: {stats['success']}/{len(hosts)} 台成功，{len(fallback)} 台回退 SSH ({stats['elapsed']}s)")
+        return stats, fallback
+
+    @staticmethod
+    async def _watch(control: JobControl, tasks: List[asyncio.Task]) -> None:
+        """作业取消或整体超时时取消所有未完成的采集协程 (由调用方随后 control.check() 抛出中止)"""
+        while True:
+            await asyncio.sleep(0.5)
+            try:
+                control.check()
+            except JobAbortedError:
+                for t in tasks:
+                    if not t.done():
+                        t.cancel()
+                return
@@ -0,0 +1,157 @@
+"""
+巡检采集使用的 OID
+标准 MIB (SNMPv2-MIB / IF-MIB / ENTITY-MIB) 各厂商通用；CPU、内存、温度与风扇/电源状态按厂商私有 MIB 映射。
+"""
+import re
+from typing import Any, Dict, Optional
+
+# SNMPv2-MIB system 组 (标量)
+SYS_DESCR = "1.3.6.1.2.1.1.1.0"
+SYS_OBJECT_ID = "1.3.6.1.2.1.1.2.0"
+SYS_UPTIME = "1.3.6.1.2.1.1.3.0"
+SYS_NAME = "1.3.6.1.2.1.1.5.0"
+SYSTEM_OIDS = [SYS_DESCR, SYS_OBJECT_ID, SYS_UPTIME, SYS_NAME]
+
+# 接口名: 类型 (字母，可含连字符) + 可选空格 + 编号
+_INTERFACE_NAME = re.compile(r"^([A-Za-z][A-Za-z\-]*?)\s*(\d[\w/.:\-]*)$")
+
+# IF-MIB 接口表列 (64 位计数器取自 ifXTable，错误/丢弃取自 ifTable)
+IF_COLUMNS = {
+    "name": "1.3.6.1.2.1.31.1.1.1.1",           # ifName
+    "oper_status": "1.3.6.1.2.1.2.2.1.8",       # ifOperStatus (1=up)
+    "high_speed": "1.3.6.1.2.1.31.1.1.1.15",    # ifHighSpeed (Mbps)
+    "rx_octets": "1.3.6.1.2.1.31.1.1.1.6",      # ifHCInOctets
+    "tx_octets": "1.3.6.1.2.1.31.1.1.1.10",     # ifHCOutOctets
+    "rx_unicast": "1.3.6.1.2.1.31.1.1.1.7",
+    "rx_multicast": "1.3.6.1.2.1.31.1.1.1.8",
+    "rx_broadcast": "1.3.6.1.2.1.31.1.1.1.9",
+    "tx_unicast": "1.3.6.1.2.1.31.1.1.1.11",
+    "tx_multicast": "1.3.6.1.2.1.31.1.1.1.12",
+    "tx_broadcast": "1.3.6.1.2.1.31.1.1.1.13",
+    "rx_discards": "1.3.6.1.2.1.2.2.1.13",       # ifInDiscards
+    "rx_errors": "1.3.6.1.2.1.2.2.1.14",         # ifInErrors
+    "tx_discards": "1.3.6.1.2.1.2.2.1.19",       # ifOutDiscards
+    "tx_errors": "1.3.6.1.2.1.2.2.1.20",         # ifOutErrors
+}
+
+# ENTITY-MIB entPhysicalTable (取 class=chassis(3) 的行作为整机型号/序列号/软件版本)
+ENTITY_COLUMNS = {
+    "class": "1.3.6.1.2.1.47.1.1.1.1.5",
+    "software_rev": "1.3.6.1.2.1.47.1.1.1.1.10",
+    "serial": "1.3.6.1.2.1.47.1.1.1.1.11",
+    "model": "1.3.6.1.2.1.47.1.1.1.1.13",
+}
+ENTITY_CLASS_CHASSIS = 3
+
+# 厂商私有 MIB: 各项均为表列，按实体/槽位聚合
+#   cpu / memory / temperature: 百分比或摄氏度 (0 表示该实体不适用)
+#   temperature_threshold: 告警阈值 (缺失时使用 SNMP_TEMP_ALERT)
+#   fans / power: (状态列, 异常状态值集合)
+#   memory_used / memory_free: 以字节计的内存池 (Cisco)，与 memory 二选一
+VENDOR_OIDS: Dict[str, Dict[str, Any]] = {
+    "huawei": {
+        "enterprise": "1.3.6.1.4.1.2011",
+        # HUAWEI-ENTITY-EXTENT-MIB hwEntityStateTable
+        "cpu": "1.3.6.1.4.1.2011.5.25.31.1.1.1.1.5",
+        "memory": "1.3.6.1.4.1.2011.5.25.31.1.1.1.1.7",
+        "temperature": "1.3.6.1.4.1.2011.5.25.31.1.1.1.1.11",
+        "temperature_threshold": "1.3.6.1.4.1.2011.5.25.31.1.1.1.1.12",
+        # hwFanStatusTable.hwEntityFanState (1 normal / 2 abnormal)
+        "fans": ("1.3.6.1.4.1.2011.5.25.31.1.1.10.1.7", {2}),
+        # hwPwrStatusTable.hwEntityPwrState (1 supply / 2 notSupply / 3 sleep / 4 unknown)
+        "power": ("1.3.6.1.4.1.2011.5.25.31.1.1.18.1.6", {2}),
+    },
+    "h3c": {
+        "enterprise": "1.3.6.1.4.1.25506",
+        # HH3C-ENTITY-EXT-MIB hh3cEntityExtStateTable
+        "cpu": "1.3.6.1.4.1.25506.2.6.1.1.1.1.6",
+        "memory": "1.3.6.1.4.1.25506.2.6.1.1.1.1.8",
+        "temperature": "1.3.6.1.4.1.25506.2.6.1.1.1.1.12",
+        "temperature_threshold": "1.3.6.1.4.1.25506.2.6.1.1.1.1.13",
+        # HH3C-LswDEVM-MIB 风扇/电源状态 (1 active / 2 deactive / 3 not-install / 4 unsupport)
+        "fans": ("1.3.6.1.4.1.25506.8.35.9.1.1.1.2", {2}),
+        "power": ("1.3.6.1.4.1.25506.8.35.9.1.2.1.2", {2}),
+    },
+    "cisco": {
+        "enterprise": "1.3.6.1.4.1.9",
+        # CISCO-PROCESS-MIB cpmCPUTotal1minRev
+        "cpu": "1.3.6.1.4.1.9.9.109.1.1.1.1.7",
+        # CISCO-MEMORY-POOL-MIB ciscoMemoryPoolUsed / Free
+        "memory_used": "1.3.6.1.4.1.9.9.48.1.1.1.5",
+        "memory_free": "1.3.6.1.4.1.9.9.48.1.1.1.6",
+        # CISCO-ENVMON-MIB
+        "temperature": "1.3.6.1.4.1.9.9.13.1.3.1.3",
+        "temperature_threshold": "1.3.6.1.4.1.9.9.13.1.3.1.4",
+        # ciscoEnvMon*State (1 normal / 2 warning / 3 critical / 4 shutdown / 5 notPresent / 6 notFunctioning)
+        "fans": ("1.3.6.1.4.1.9.9.13.1.4.1.3", {3, 4, 6}),
+        "power": ("1.3.6.1.4.1.9.9.13.1.5.1.3", {3, 4, 6}),
+    },
+}
+
+# ifName 中的接口类型缩写 -> SSH 巡检 (NAPALM / 原生采集器) 使用的完整名称 (键为小写)
+# Cisco 的 ifName 为缩写 (Gi1/0/1)，华为/H3C 部分型号同样上报缩写 (GE0/0/1、XGE1/0/1)；未列出的前缀保持原样
+INTERFACE_PREFIXES: Dict[str, Dict[str, str]] = {
+    "huawei": {
+        "ge": "GigabitEthernet",
+        "xge": "XGigabitEthernet",
+        "eth": "Ethernet",
+        "vlan": "Vlanif",
+    },
+    "h3c": {
+        "ge": "GigabitEthernet",
+        "xge": "Ten-GigabitEthernet",
+        "wge": "Twenty-FiveGigE",
+        "fge": "FortyGigE",
+        "hge": "HundredGigE",
+        "mge": "M-GigabitEthernet",
+        "bagg": "Bridge-Aggregation",
+        "ragg": "Route-Aggregation",
+        "vlan": "Vlan-interface",
+        "loop": "LoopBack",
+    },
+    "cisco": {
+        "fa": "FastEthernet",
+        "gi": "GigabitEthernet",
+        "te": "TenGigabitEthernet",
+        "twe": "TwentyFiveGigE",
+        "fo": "FortyGigabitEthernet",
+        "hu": "HundredGigE",
+        "eth": "Ethernet",
+        "po": "Port-channel",
+        "vl": "Vlan",
+        "lo": "Loopback",
+        "tu": "Tunnel",
+    },
+}
+
+def vendor_for(platform: Optional[str], sys_object_id: Optional[str] = None) -> Optional[str]:
+    """按 sysObjectID 企业号识别厂商，无法识别时按设备平台名推断"""
+    if sys_object_id:
+        for vendor, oids in VENDOR_OIDS.items():
+            if sys_object_id == oids["enterprise"] or sys_object_id.startswith(oids["enterprise"] + "."):
+                return vendor
+    p = str(platform or "").lower()
+    if "huawei" in p or "vrp" in p:
+        return "huawei"
+    if "h3c" in p or "comware" in p:
+        return "h3c"
+    if "cisco" in p or p.startswith(("ios", "nxos")):
+        return "cisco"
+    return None
+
+def interface_name(name: str, vendor: Optional[str]) -> str:
+    """ifName -> 与 SSH 巡检一致的接口名 (展开类型缩写、去掉类型与编号之间的空格)，保证两种采集写入同一条计数器时序"""
+    match = _INTERFACE_NAME.match(name)
+    if not match:
+        return name
+    prefix, number = match.groups()
+    return INTERFACE_PREFIXES.get(vendor or "", {}).get(prefix.lower(), prefix) + number
+
+def vendor_columns(vendor: str) -> Dict[str, str]:
+    """厂商需要遍历的表列 {键: 列 OID}"""
+    columns = {}
+    for key, value in VENDOR_OIDS[vendor].items():
+        if key == "enterprise":
+            continue
+        columns[key] = value[0] if isinstance(value, tuple) else value
+    return columns
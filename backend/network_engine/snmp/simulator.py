@@ -0,0 +1,228 @@
+"""
+本地 SNMP 模拟设备 (用于 SNMP 巡检联调与压测)
+
+以 v2c 响应 GET / GETNEXT / GETBULK，提供 SNMPv2-MIB system 组、IF-MIB 接口表 (计数器随时间增长)、
+ENTITY-MIB 整机信息，以及华为 / H3C / Cisco 私有 MIB 的 CPU、内存、温度、风扇与电源状态。
+所有设备可指向同一个监听端口。
+用法: python -m backend.network_engine.snmp.simulator --port 1161 --community public --vendor huawei --interfaces 52
+可选 --delay 为每个请求增加固定时延，--drop 按比例丢弃请求 (模拟丢包触发重试)。
+"""
+import argparse
+import asyncio
+import bisect
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.network_engine.snmp import ber, oids
+from backend.network_engine.snmp.client import set_buffers
+
+# 各厂商的 sysObjectID 与 sysDescr 样例
+PROFILES = {
+    "huawei": {
+        "object_id": "1.3.6.1.4.1.2011.2.23.422",
+        "descr": "Huawei Versatile Routing Platform Software\r\nVRP (R) software, Version 5.170 (S5735 V200R021C10SPC600)",
+        "model": "S5735-L48T4X-A1",
+        "version": "V200R021C10SPC600",
+        "interface": "GigabitEthernet0/0/{}",
+    },
+    "h3c": {
+        "object_id": "1.3.6.1.4.1.25506.1.1210",
+        "descr": "H3C Comware Platform Software, Software Version 7.1.070, Release 6615P01",
+        "model": "S6520X-30QC-EI",
+        "version": "7.1.070 Release 6615P01",
+        "interface": "Ten-GigabitEthernet1/0/{}",
+    },
+    "cisco": {
+        "object_id": "1.3.6.1.4.1.9.1.2694",
+        "descr": "Cisco IOS Software [Amsterdam], Catalyst L3 Switch Software (CAT9K_IOSXE), Version 17.3.4",
+        "model": "C9300-48P",
+        "version": "17.3.4",
+        # Cisco 的 ifName 为缩写
+        "interface": "Gi1/0/{}",
+    },
+}
+
+Value = Any  # 常量或无参可调用对象 (计数器随时间变化)
+
+def build_mib(vendor: str = "huawei", interfaces: int = 52, sysname: str = "SnmpSim", seed: int = 0) -> Dict[str, Value]:
+    """生成模拟设备的 OID -> 值 映射"""
+    profile = PROFILES[vendor]
+    rng = random.Random(seed)
+    started = time.monotonic()
+    def uptime() -> Tuple[int, int]:
+        return (ber.TIMETICKS, 864000000 + int((time.monotonic() - started) * 100))
+
+    mib: Dict[str, Value] = {
+        oids.SYS_DESCR: profile["descr"],
+        oids.SYS_OBJECT_ID: (ber.OBJECT_IDENTIFIER, profile["object_id"]),
+        oids.SYS_UPTIME: uptime,
+        oids.SYS_NAME: sysname,
+    }
+
+    def counter(base: int, rate: float) -> Callable[[], Tuple[int, int]]:
+        return lambda: (ber.COUNTER64, base + int((time.monotonic() - started) * rate))
+
+    def counter32(base: int, rate: float) -> Callable[[], Tuple[int, int]]:
+        return lambda: (ber.COUNTER32, (base + int((time.monotonic() - started) * rate)) % (1 << 32))
+
+    c = oids.IF_COLUMNS
+    for i in range(1, interfaces + 1):
+        idx = str(i)
+        up = i % 4 != 0
+        octet_rate = rng.randint(10_000, 10_000_000) if up else 0
+        mib[f"{c['name']}.{idx}"] = profile["interface"].format(i)
+        mib[f"{c['oper_status']}.{idx}"] = 1 if up else 2
+        mib[f"{c['high_speed']}.{idx}"] = (ber.GAUGE32, 1000 if vendor != "h3c" else 10000)
+        mib[f"{c['rx_octets']}.{idx}"] = counter(rng.randint(0, 1 << 40), octet_rate)
+        mib[f"{c['tx_octets']}.{idx}"] = counter(rng.randint(0, 1 << 40), octet_rate / 2)
+        for direction, share in (("rx", 1.0), ("tx", 0.5)):
+            mib[f"{c[direction + '_unicast']}.{idx}"] = counter(rng.randint(0, 1 << 32), octet_rate / 800 * share)
+            mib[f"{c[direction + '_multicast']}.{idx}"] = counter(rng.randint(0, 1 << 20), octet_rate / 80000 * share)
+            mib[f"{c[direction + '_broadcast']}.{idx}"] = counter(rng.randint(0, 1 << 20), octet_rate / 80000 * share)
+        # 少量接口持续产生错误包，便于验证 Top N
+        error_rate = 0.5 if i % 13 == 0 else 0
+        mib[f"{c['rx_errors']}.{idx}"] = counter32(rng.randint(0, 1000), error_rate)
+        mib[f"{c['tx_errors']}.{idx}"] = counter32(0, 0)
+        mib[f"{c['rx_discards']}.{idx}"] = counter32(rng.randint(0, 1000), error_rate / 2)
+        mib[f"{c['tx_discards']}.{idx}"] = counter32(0, 0)
+
+    e = oids.ENTITY_COLUMNS
+    # 实体 1 为机框，2~3 为主控/业务板 (带 CPU/内存/温度)，后续为风扇与电源
+    for idx, cls in ((1, oids.ENTITY_CLASS_CHASSIS), (2, 9), (3, 9)):
+        mib[f"{e['class']}.{idx}"] = cls
+        mib[f"{e['model']}.{idx}"] = profile["model"] if cls == oids.ENTITY_CLASS_CHASSIS else "MPU"
+        mib[f"{e['software_rev']}.{idx}"] = profile["version"]
+        mib[f"{e['serial']}.{idx}"] = f"SIM{seed:04d}{idx:02d}{sysname[:4].upper()}"
+
+    spec = oids.VENDOR_OIDS[vendor]
+    for idx in (1, 2, 3):
+        board = idx != 1
+        mib[f"{spec['cpu']}.{idx}"] = (ber.GAUGE32, rng.randint(5, 40) if board else 0)
+        if "memory" in spec:
+            mib[f"{spec['memory']}.{idx}"] = (ber.GAUGE32, rng.randint(20, 60) if board else 0)
+        mib[f"{spec['temperature']}.{idx}"] = rng.randint(35, 55) if board else 0
+        mib[f"{spec['temperature_threshold']}.{idx}"] = 75
+    if "memory_used" in spec:
+        mib[f"{spec['memory_used']}.1"] = (ber.GAUGE32, 400_000_000)
+        mib[f"{spec['memory_free']}.1"] = (ber.GAUGE32, 600_000_000)
+        mib[f"{spec['memory_used']}.2"] = (ber.GAUGE32, 10_000_000)
+        mib[f"{spec['memory_free']}.2"] = (ber.GAUGE32, 90_000_000)
+    fan_oid, _ = spec["fans"]
+    pwr_oid, _ = spec["power"]
+    for n in (1, 2):
+        mib[f"{fan_oid}.{n}"] = 1
+        mib[f"{pwr_oid}.{n}"] = 1
+    return mib
+
+
+class SnmpAgent(asyncio.DatagramProtocol):
+    """按 OID 顺序表应答 GET / GETNEXT / GETBULK (只读，仅 v1/v2c)"""
+
+    def __init__(self, mib: Dict[str, Value], community: str = "public", delay: float = 0.0, drop: float = 0.0):
+        ordered = sorted(mib.items(), key=lambda kv: ber.oid_tuple(kv[0]))
+        self.keys = [ber.oid_tuple(oid) for oid, _ in ordered]
+        self.oids = [oid for oid, _ in ordered]
+        self.values = [value for _, value in ordered]
+        self.community = community.encode("utf-8")
+        self.delay = delay
+        self.drop = drop
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.stats = {"requests": 0, "dropped": 0, "bad_community": 0}
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+
+    def _value(self, i: int) -> Any:
+        value = self.values[i]
+        return value() if callable(value) else value
+
+    def _get(self, oid: str) -> Any:
+        key = ber.oid_tuple(oid)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self._value(i)
+        return ber.NO_SUCH_OBJECT_VALUE
+
+    def _next(self, oid: str) -> Tuple[str, Any]:
+        i = bisect.bisect_right(self.keys, ber.oid_tuple(oid))
+        if i >= len(self.keys):
+            return oid, ber.END_OF_MIB_VIEW_VALUE
+        return self.oids[i], self._value(i)
+
+    def respond(self, request: ber.Message) -> List[Tuple[str, Any]]:
+        if request.pdu_type == ber.GET_REQUEST:
+            return [(oid, self._get(oid)) for oid, _ in request.varbinds]
+        if request.pdu_type == ber.GET_NEXT_REQUEST:
+            return [self._next(oid) for oid, _ in request.varbinds]
+        # GETBULK: 前 non-repeaters 个取一次 next，其余按行交错重复 max-repetitions 次
+        non_repeaters = max(request.error_status, 0)
+        repetitions = max(request.error_index, 0)
+        out = [self._next(oid) for oid, _ in request.varbinds[:non_repeaters]]
+        cursors = [oid for oid, _ in request.varbinds[non_repeaters:]]
+        for _ in range(repetitions):
+            row = [self._next(oid) for oid in cursors]
+            out.extend(row)
+            cursors = [oid for oid, _ in row]
+            if all(value is ber.END_OF_MIB_VIEW_VALUE for _, value in row):
+                break
+        return out
+
+    def datagram_received(self, data: bytes, addr: Tuple) -> None:
+        try:
+            request = ber.decode_message(data)
+        except ber.BerError:
+            return
+        self.stats["requests"] += 1
+        if request.community != self.community:
+            # 团体字错误时真实设备不应答
+            self.stats["bad_community"] += 1
+            return
+        if self.drop and random.random() < self.drop:
+            self.stats["dropped"] += 1
+            return
+        if request.pdu_type not in (ber.GET_REQUEST, ber.GET_NEXT_REQUEST, ber.GET_BULK_REQUEST):
+            return
+        reply = ber.encode_message(request.version, request.community, ber.RESPONSE, request.request_id, self.respond(request))
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, reply, addr)
+        else:
+            self.transport.sendto(reply, addr)
+
+
+async def start_simulator(host: str = "127.0.0.1", port: int = 1161, community: str = "public", vendor: str = "huawei",
+                          interfaces: int = 52, delay: float = 0.0, drop: float = 0.0) -> Tuple[asyncio.DatagramTransport, SnmpAgent]:
+    """启动模拟设备并返回 (transport, agent)，调用方负责 transport.close()"""
+    loop = asyncio.get_running_loop()
+    agent = SnmpAgent(build_mib(vendor, interfaces), community, delay, drop)
+    transport, _ = await loop.create_datagram_endpoint(lambda: agent, local_addr=(host, port))
+    set_buffers(transport)
+    return transport, agent
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1161)
+    parser.add_argument("--community", default="public")
+    parser.add_argument("--vendor", choices=sorted(PROFILES), default="huawei")
+    parser.add_argument("--interfaces", type=int, default=52)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的模拟时延 (秒)")
+    parser.add_argument("--drop", type=float, default=0.0, help="请求丢弃比例 (0~1)")
+    args = parser.parse_args()
+
+    async def serve():
+        transport, _ = await start_simulator(args.host, args.port, args.community, args.vendor,
+                                             args.interfaces, args.delay, args.drop)
+        print(f"SNMP 模拟设备 ({args.vendor}) 已监听 {args.host}:{args.port}", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            transport.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+厂商原生巡检采集器
+华为 VRP / H3C Comware 的巡检命令集在同一会话内一次流水线发送，以预编译正则解析为标准 HealthData，
+取代多次 NAPALM getter 往返；按设备平台自动选择，其他平台仍走 NAPALM。
+"""
+from typing import Optional
+
+from backend.network_engine.cli_output import platform_family
+from backend.network_engine.vendors.base import VendorCollector
+from backend.network_engine.vendors.h3c import H3cComwareCollector
+from backend.network_engine.vendors.huawei import HuaweiVrpCollector
+
+# 全局单例: 平台族 -> 采集器 (无状态，可跨线程共享)
+COLLECTORS = {
+    "huawei": HuaweiVrpCollector(),
+    "h3c": H3cComwareCollector(),
+}
+
+def collector_for(platform: Optional[str]) -> Optional[VendorCollector]:
+    """按设备平台选择原生采集器，没有对应实现时返回 None"""
+    return COLLECTORS.get(platform_family(platform))
+
+__all__ = ["VendorCollector", "HuaweiVrpCollector", "H3cComwareCollector", "COLLECTORS", "collector_for"]
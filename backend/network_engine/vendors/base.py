@@ -0,0 +1,157 @@
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 命令不被设备支持时的回显 (华为 / H3C)，此类输出按 "无数据" 处理
+UNSUPPORTED = re.compile(r"^\s*(?:Error:|% (?:Unrecognized|Wrong|Incomplete|Too many))|Unrecognized command", re.IGNORECASE)
+# 风扇 / 电源 / 单板状态表中的异常状态字
+FAULT = re.compile(r"\b(?:Abnormal|Faulty?|Failed|Failure|NotSupply|No\s+Supply)\b", re.IGNORECASE)
+UPTIME = re.compile(r"uptime is\s+(.+)", re.IGNORECASE)
+UPTIME_UNIT = re.compile(r"(\d+)\s+(year|week|day|hour|minute)")
+UPTIME_SECONDS = {"year": 31536000, "week": 604800, "day": 86400, "hour": 3600, "minute": 60}
+# display interface brief 的数据行: 接口名 + 物理状态 (华为 PHY 列 up / *down / ^down；H3C Link 列 UP / DOWN / ADM / Stby)
+BRIEF_ROW = re.compile(r"^(?P<name>[A-Za-z][\w\-]*\d[\w/.:()\-]*)\s+(?P<link>[*^]?(?:up|down)|ADM|Stby)\b(?P<rest>.*)$",
+                       re.IGNORECASE | re.MULTILINE)
+
+
+def usable(output: Optional[str]) -> str:
+    """命令输出；设备不支持该命令时返回空串"""
+    if not output or UNSUPPORTED.search(output[:200]):
+        return ""
+    return output
+
+def to_int(value: Optional[str]) -> int:
+    """计数器文本 -> 整数，'-' 或缺失 (设备不支持) 为 -1"""
+    if value is None:
+        return -1
+    try:
+        return int(value)
+    except ValueError:
+        return -1
+
+def mean(values: List[float]) -> float:
+    return round(sum(values) / len(values), 2) if values else 0
+
+def uptime_seconds(version_output: str) -> int:
+    """将 'uptime is 1 week, 2 days, 3 hours, 4 minutes' 换算为秒"""
+    match = UPTIME.search(version_output)
+    if not match:
+        return 0
+    return sum(int(n) * UPTIME_SECONDS[u] for n, u in UPTIME_UNIT.findall(match.group(1)))
+
+def split_blocks(output: str, header: "re.Pattern") -> List[Tuple[str, str]]:
+    """按接口头部正则 (第 1 组为接口名) 把 display interface 输出切成 [(接口名, 段落)]"""
+    matches = list(header.finditer(output))
+    return [(m.group(1), output[m.start():matches[i + 1].start() if i + 1 < len(matches) else len(output)])
+            for i, m in enumerate(matches)]
+
+def counter_vector(block: str, traffic: "re.Pattern", errors: Tuple["re.Pattern", "re.Pattern"],
+                   discards: Tuple["re.Pattern", "re.Pattern"]) -> Optional[List[int]]:
+    """
+    单个接口段落 -> 计数器向量 (rx/tx 字节, rx/tx 包, rx/tx 错误, rx/tx 丢弃；-1 表示设备不支持)
+    traffic 匹配 (Input|Output, 包数, 字节数) 统计行；errors / discards 为 (收, 发) 两个正则，
+    分别在以 Output 统计行为界的收、发两部分中查找。没有报文统计的逻辑接口返回 None。
+    """
+    rows = {m.group(1): m for m in traffic.finditer(block)}
+    if not rows:
+        return None
+    split = rows["Output"].start() if "Output" in rows else len(block)
+    parts = (block[:split], block[split:])
+    def count(direction: str, group: int) -> int:
+        return to_int(rows[direction].group(group)) if direction in rows else -1
+    def field(pattern: "re.Pattern", part: str) -> int:
+        match = pattern.search(part)
+        return to_int(match.group(1)) if match else -1
+    return [
+        count("Input", 3), count("Output", 3),
+        count("Input", 2), count("Output", 2),
+        field(errors[0], parts[0]), field(errors[1], parts[1]),
+        field(discards[0], parts[0]), field(discards[1], parts[1]),
+    ]
+
+
+class VendorCollector:
+    """
+    厂商原生巡检采集器
+    commands 为巡检所需的全部查看命令 (键 -> 命令)，在同一会话内一次性流水线发送；
+    各 parse_* 方法用模块级预编译的正则把输出解析为 HealthData 的对应部分。
+    子类只需声明命令集并实现解析方法，采集器对象无状态，可在线程与协程间共享。
+    """
+    name = "generic"
+    commands: Dict[str, str] = {}
+
+    def command_list(self) -> List[str]:
+        return list(self.commands.values())
+
+    def outputs_by_key(self, outputs: Dict[str, str]) -> Dict[str, str]:
+        """{命令: 输出} -> {键: 可用输出}"""
+        return {key: usable(outputs.get(cmd)) for key, cmd in self.commands.items()}
+
+    # --- 由子类实现 ---
+
+    def parse_basic(self, out: Dict[str, str], hostname: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def parse_resources(self, out: Dict[str, str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def parse_hardware(self, out: Dict[str, str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def parse_counters(self, out: Dict[str, str]) -> Tuple[Dict[str, List[int]], Dict[str, int]]:
+        """返回 ({接口: 计数器向量}, {接口: 速率 Mbps})，向量顺序与 _counter_vector 一致"""
+        raise NotImplementedError
+
+    # --- 通用部分 ---
+
+    @staticmethod
+    def parse_brief(output: str) -> Tuple[int, int, int]:
+        """display interface brief -> (接口总数, up 数, 错误包合计)；华为的 inErrors/outErrors 为末两列"""
+        total = up = errors = 0
+        for match in BRIEF_ROW.finditer(output):
+            total += 1
+            if match.group("link").lower() == "up":
+                up += 1
+            tail = match.group("rest").split()[-2:]
+            if len(tail) == 2 and tail[0].isdigit() and tail[1].isdigit():
+                errors += int(tail[0]) + int(tail[1])
+        return total, up, errors
+
+    def build_health(self, outputs: Dict[str, str], hostname: str, started: float, connected: float,
+                     collected: float) -> Dict[str, Any]:
+        """
+        {命令: 输出} -> 与 NAPALM 巡检相同的 HealthData 结构
+        started / connected / collected 为 time.monotonic() 时间点 (开始、会话就绪、全部输出到达)。
+        """
+        out = self.outputs_by_key(outputs)
+        total, up, brief_errors = self.parse_brief(out.get("interfaces", ""))
+        counters, speeds = self.parse_counters(out)
+        if counters:
+            errors = sum(max(0, v[4]) + max(0, v[5]) for v in counters.values())
+        else:
+            errors = brief_errors
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "performance": {
+                "connect_latency": round(connected - started, 3),
+                "env_gather_latency": round(collected - connected, 3),
+                # 接口数据与环境数据在同一轮往返中采集
+                "intf_gather_latency": 0.0,
+                "total_processing": round(time.monotonic() - started, 3),
+            },
+            "audit_trail": {
+                "commands_executed": self.command_list(),
+                "collector": self.name,
+            },
+            "basic": self.parse_basic(out, hostname),
+            "resources": self.parse_resources(out),
+            "hardware": self.parse_hardware(out),
+            "interface_stats": {
+                "total": total or len(counters),
+                "up_count": up,
+                "error_total": errors,
+            },
+            "interface_counters": counters,
+            "interface_speeds": speeds,
+        }
@@ -0,0 +1,96 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from backend.network_engine.vendors.base import FAULT, VendorCollector, counter_vector, mean, split_blocks, uptime_seconds
+
+# --- 预编译解析器 (模块加载时编译一次) ---
+MODEL = re.compile(r"^H3C\s+(\S+)\s+uptime is", re.IGNORECASE | re.MULTILINE)
+VERSION = re.compile(r"Comware Software,\s*Version\s+([\w.]+)(?:,\s*(Release\s+\w+))?", re.IGNORECASE)
+SERIAL = re.compile(r"DEVICE_SERIAL_NUMBER\s*:\s*(\S+)", re.IGNORECASE)
+CPU = re.compile(r"(\d+(?:\.\d+)?)%\s+in last 5 seconds", re.IGNORECASE)
+# Comware 7: Mem: Total Used Free Shared Buffers Cached FreeRatio；Comware 5: Used Rate: 45%
+MEMORY_ROW = re.compile(r"^\s*Mem:\s+(\d+)\s+(\d+)\s+.*?(\d+(?:\.\d+)?)%\s*$", re.MULTILINE)
+MEMORY_RATE = re.compile(r"Used Rate\s*:\s*(\d+(?:\.\d+)?)%", re.IGNORECASE)
+# display environment: Slot Sensor Temperature Lower Warning Alarm Shutdown (传感器名可能含空格，如 hotspot 1)
+TEMPERATURE_ROW = re.compile(
+    r"^\s*\d+\s+[A-Za-z][\w\-]*(?:\s+\d+)?\s+(?P<current>-?\d+)\s+(?:-?\d+|NA)\s+(?P<warning>-?\d+|NA)\s+"
+    r"(?P<alarm>-?\d+|NA)", re.MULTILINE)
+# display interface: 接口名独占一行，下一行为 Current state
+INTERFACE_HEADER = re.compile(r"^(\S+)\s*\r?\n\s*Current state\s*:", re.MULTILINE)
+BANDWIDTH = re.compile(r"^\s*Bandwidth\s*:\s*(\d+)\s*kbps", re.IGNORECASE | re.MULTILINE)
+SPEED_MODE = re.compile(r"(\d+)([GM])bps-speed mode", re.IGNORECASE)
+TRAFFIC = re.compile(r"^\s*(Input|Output) \(total\)\s*:\s*(\d+|-) packets,\s*(\d+|-) bytes", re.MULTILINE)
+INPUT_ERRORS = re.compile(r"(\d+) input errors")
+OUTPUT_ERRORS = re.compile(r"(\d+) output errors")
+DROPS = re.compile(r"(\d+) drops")
+
+
+class H3cComwareCollector(VendorCollector):
+    """H3C Comware 5/7 巡检命令集与解析"""
+    name = "h3c_comware"
+    commands = {
+        "version": "display version",
+        "manuinfo": "display device manuinfo",
+        "cpu": "display cpu-usage",
+        "memory": "display memory",
+        "device": "display device",
+        "temperature": "display environment",
+        "fan": "display fan",
+        "power": "display power",
+        "interfaces": "display interface brief",
+        "counters": "display interface",
+    }
+
+    def parse_basic(self, out: Dict[str, str], hostname: str) -> Dict[str, Any]:
+        version = out["version"]
+        model = MODEL.search(version)
+        release = VERSION.search(version)
+        # 框式设备的 manuinfo 中部分槽位 (如空槽、风扇框) 序列号为 NONE，取第一个有效值
+        serial = next((s for s in SERIAL.findall(out["manuinfo"]) if s.upper() != "NONE"), None)
+        return {
+            "hostname": hostname,
+            "model": model.group(1) if model else "Unknown",
+            "version": " ".join(g for g in release.groups() if g) if release else "Unknown",
+            "uptime": uptime_seconds(version),
+            "sn": serial or "Unknown",
+        }
+
+    def parse_resources(self, out: Dict[str, str]) -> Dict[str, Any]:
+        # 每个槽位 (主控 / 成员设备) 各输出一段，取平均；FreeRatio 为设备自身的空闲率口径
+        memory = [round(100 - float(ratio), 2) for _, _, ratio in MEMORY_ROW.findall(out["memory"])]
+        if not memory:
+            memory = [float(v) for v in MEMORY_RATE.findall(out["memory"])]
+        return {
+            "cpu_avg": mean([float(v) for v in CPU.findall(out["cpu"])]),
+            "memory_usage": mean(memory),
+        }
+
+    def parse_hardware(self, out: Dict[str, str]) -> Dict[str, Any]:
+        rows = [m.groupdict() for m in TEMPERATURE_ROW.finditer(out["temperature"])]
+        readings = [float(r["current"]) for r in rows]
+        def below_warning(row: Dict[str, str]) -> bool:
+            limit = row["warning"] if row["warning"] != "NA" else row["alarm"]
+            return limit == "NA" or float(row["current"]) < float(limit)
+        return {
+            "fans_ok": not FAULT.search(out["fan"]),
+            "pwr_ok": not FAULT.search(out["power"]) and not FAULT.search(out["device"]),
+            "temp_ok": all(below_warning(r) for r in rows),
+            "max_temp": max(readings) if readings else None,
+        }
+
+    def parse_counters(self, out: Dict[str, str]) -> Tuple[Dict[str, List[int]], Dict[str, int]]:
+        counters: Dict[str, List[int]] = {}
+        speeds: Dict[str, int] = {}
+        for name, block in split_blocks(out["counters"], INTERFACE_HEADER):
+            vector = counter_vector(block, TRAFFIC, (INPUT_ERRORS, OUTPUT_ERRORS), (DROPS, DROPS))
+            if vector is None:
+                continue
+            counters[name] = vector
+            bandwidth = BANDWIDTH.search(block)
+            if bandwidth and int(bandwidth.group(1)) >= 1000:
+                speeds[name] = int(bandwidth.group(1)) // 1000
+            else:
+                mode = SPEED_MODE.search(block)
+                if mode:
+                    speeds[name] = int(mode.group(1)) * (1000 if mode.group(2).upper() == "G" else 1)
+        return counters, speeds
@@ -0,0 +1,96 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from backend.network_engine.vendors.base import FAULT, VendorCollector, counter_vector, mean, split_blocks, uptime_seconds
+
+# --- 预编译解析器 (模块加载时编译一次) ---
+MODEL = re.compile(r"^HUAWEI\s+(\S+)\s+(?:[\w ]*?)uptime is", re.IGNORECASE | re.MULTILINE)
+DEVICE_MODEL = re.compile(r"^(\S+)'s Device status", re.MULTILINE)
+RELEASE = re.compile(r"\b(V\d{3}R\d{3}\w*)")
+VERSION = re.compile(r"Version\s+([\w.]+)", re.IGNORECASE)
+ESN = re.compile(r"ESN of [^:]+:\s*(\S+)", re.IGNORECASE)
+CPU = re.compile(r"CPU Usage\s*:\s*(\d+(?:\.\d+)?)%", re.IGNORECASE)
+MEMORY_PERCENT = re.compile(r"Memory Using Percentage(?: Is)?\s*:\s*(\d+(?:\.\d+)?)%", re.IGNORECASE)
+MEMORY_TOTAL = re.compile(r"System Total Memory Is:\s*(\d+)", re.IGNORECASE)
+MEMORY_USED = re.compile(r"Total Memory Used Is:\s*(\d+)", re.IGNORECASE)
+# display temperature all: Slot Card Sensor Status Current(C) Lower(C) Lower-Resume(C) Upper(C) [Upper-Resume(C)]
+TEMPERATURE_ROW = re.compile(
+    r"^\s*\d+\s+\S+\s+\S+\s+(?P<status>[A-Za-z]+)\s+(?P<current>-?\d+(?:\.\d+)?)\s+-?\d+(?:\.\d+)?\s+"
+    r"-?\d+(?:\.\d+)?\s+(?P<upper>-?\d+(?:\.\d+)?)", re.MULTILINE)
+# display interface
+INTERFACE_HEADER = re.compile(r"^(\S+) current state\s*:", re.MULTILINE)
+SPEED = re.compile(r"^\s*Speed\s*:\s*(\d+)", re.MULTILINE)
+BANDWIDTH = re.compile(r"(?:Port|Current) BW\s*:\s*(\d+)([GM])", re.IGNORECASE)
+TRAFFIC = re.compile(r"^\s*(Input|Output)\s*:\s*(\d+) packets,\s*(\d+) bytes", re.MULTILINE)
+TOTAL_ERROR = re.compile(r"Total Error\s*:\s*(\d+)")
+DISCARD = re.compile(r"Discard\s*:\s*(\d+)")
+
+
+class HuaweiVrpCollector(VendorCollector):
+    """华为 VRP (S/CE/AR 系列) 巡检命令集与解析"""
+    name = "huawei_vrp"
+    commands = {
+        "version": "display version",
+        "esn": "display esn",
+        "cpu": "display cpu-usage",
+        "memory": "display memory-usage",
+        "device": "display device",
+        "temperature": "display temperature all",
+        "fan": "display fan",
+        "power": "display power",
+        "interfaces": "display interface brief",
+        "counters": "display interface",
+    }
+
+    def parse_basic(self, out: Dict[str, str], hostname: str) -> Dict[str, Any]:
+        version = out["version"]
+        model = MODEL.search(version) or DEVICE_MODEL.search(out["device"])
+        release = RELEASE.search(version) or VERSION.search(version)
+        esn = ESN.search(out["esn"])
+        return {
+            "hostname": hostname,
+            "model": model.group(1) if model else "Unknown",
+            "version": release.group(1) if release else "Unknown",
+            "uptime": uptime_seconds(version),
+            "sn": esn.group(1) if esn else "Unknown",
+        }
+
+    def parse_resources(self, out: Dict[str, str]) -> Dict[str, Any]:
+        # 堆叠 / 框式设备每个主控各输出一段，取平均
+        memory = [float(v) for v in MEMORY_PERCENT.findall(out["memory"])]
+        if not memory:
+            totals, used = MEMORY_TOTAL.findall(out["memory"]), MEMORY_USED.findall(out["memory"])
+            memory = [round(int(u) / int(t) * 100, 2) for t, u in zip(totals, used) if int(t) > 0]
+        return {
+            "cpu_avg": mean([float(v) for v in CPU.findall(out["cpu"])]),
+            "memory_usage": mean(memory),
+        }
+
+    def parse_hardware(self, out: Dict[str, str]) -> Dict[str, Any]:
+        rows = [m.groupdict() for m in TEMPERATURE_ROW.finditer(out["temperature"])]
+        readings = [float(r["current"]) for r in rows]
+        return {
+            "fans_ok": not FAULT.search(out["fan"]),
+            # display device 中单板 / 电源 / 风扇模块的 Status 列同样反映硬件故障
+            "pwr_ok": not FAULT.search(out["power"]) and not FAULT.search(out["device"]),
+            "temp_ok": all(r["status"].upper() == "NORMAL" and float(r["current"]) < float(r["upper"]) for r in rows),
+            "max_temp": max(readings) if readings else None,
+        }
+
+    def parse_counters(self, out: Dict[str, str]) -> Tuple[Dict[str, List[int]], Dict[str, int]]:
+        counters: Dict[str, List[int]] = {}
+        speeds: Dict[str, int] = {}
+        for name, block in split_blocks(out["counters"], INTERFACE_HEADER):
+            vector = counter_vector(block, TRAFFIC, (TOTAL_ERROR, TOTAL_ERROR), (DISCARD, DISCARD))
+            if vector is None:
+                # 逻辑接口 (Vlanif / LoopBack / NULL) 没有报文统计
+                continue
+            counters[name] = vector
+            speed = SPEED.search(block)
+            if speed:
+                speeds[name] = int(speed.group(1))
+            else:
+                bandwidth = BANDWIDTH.search(block)
+                if bandwidth:
+                    speeds[name] = int(bandwidth.group(1)) * (1000 if bandwidth.group(2).upper() == "G" else 1)
+        return counters, speeds
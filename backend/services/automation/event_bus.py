@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import logging
+
+from backend.core.config import settings
+
+logger = logging.getLogger("automation")
+
+# 快照提供者: 返回 (完整进度, 该快照对应的最新事件序号)
+SnapshotProvider = Callable[[], Tuple[Dict[str, Any], int]]
+
+class _Subscriber:
+    """一个流式连接的订阅端，事件通过所属事件循环线程安全地投递"""
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            # 事件循环已关闭 (连接已断开)，忽略即可
+            pass
+
+class _Channel:
+    def __init__(self, buffer_size: int):
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.seq = 0
+        self.subscribers: Set[_Subscriber] = set()
+        self.snapshot_provider: Optional[SnapshotProvider] = None
+        self.closed_at: Optional[float] = None
+
+class JobEventBus:
+    """
+    作业进度事件总线 (进程内)
+    执行线程发布设备/步骤的增量事件，流式接口订阅并推送给前端。
+    每个作业保留最近的事件环形缓冲，客户端可携带最后收到的序号断点续传；
+    序号已滚出缓冲时，改为先推送一次完整快照。
+    """
+
+    def __init__(self, buffer_size: int = 5000, retention: float = 300):
+        self.buffer_size = buffer_size
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._channels: Dict[int, _Channel] = {}
+
+    def _channel(self, log_id: int) -> _Channel:
+        channel = self._channels.get(log_id)
+        if channel is None:
+            channel = self._channels[log_id] = _Channel(self.buffer_size)
+        return channel
+
+    @staticmethod
+    def _idle(channel: _Channel) -> bool:
+        """仅因订阅而创建的频道 (作业已结束或由其他进程执行)：无人订阅后即可丢弃"""
+        return (not channel.subscribers and channel.snapshot_provider is None
+                and channel.closed_at is None and not channel.events)
+
+    def _purge(self) -> None:
+        """清理已结束且超过保留期、无人订阅的作业频道，以及空闲频道"""
+        now = time.monotonic()
+        expired = [
+            log_id for log_id, ch in self._channels.items()
+            if self._idle(ch)
+            or (ch.closed_at is not None and not ch.subscribers and now - ch.closed_at > self.retention)
+        ]
+        for log_id in expired:
+            del self._channels[log_id]
+
+    # --- 发布端 (执行线程) ---
+
+    def attach(self, log_id: int, provider: SnapshotProvider) -> None:
+        """作业开始执行时登记实时快照提供者 (通常是进度处理器)"""
+        with self._lock:
+            self._purge()
+            channel = self._channel(log_id)
+            channel.snapshot_provider = provider
+            channel.closed_at = None
+
+    def publish(self, log_id: int, event_type: str, data: Dict[str, Any]) -> int:
+        """发布一条事件并返回其序号"""
+        with self._lock:
+            channel = self._channel(log_id)
+            channel.seq += 1
+            event = {"seq": channel.seq, "type": event_type, "data": data}
+            channel.events.append(event)
+            subscribers = list(channel.subscribers)
+        for sub in subscribers:
+            sub.push(event)
+        return event["seq"]
+
+    def close(self, log_id: int, data: Optional[Dict[str, Any]] = None) -> None:
+        """作业结束: 发布 done 事件并开始保留期计时"""
+        self.publish(log_id, "done", data or {})
+        with self._lock:
+            channel = self._channels.get(log_id)
+            if channel:
+                channel.snapshot_provider = None
+                channel.closed_at = time.monotonic()
+
+    def last_seq(self, log_id: int) -> int:
+        with self._lock:
+            channel = self._channels.get(log_id)
+            return channel.seq if channel else 0
+
+    # --- 订阅端 (事件循环) ---
+
+    def subscribe(self, log_id: int, since: Optional[int]) -> Tuple[_Subscriber, List[Dict[str, Any]], bool]:
+        """
+        订阅作业事件。
+        返回 (订阅者, since 之后仍在缓冲中的事件, 是否需要完整快照)。
+        """
+        sub = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._purge()
+            channel = self._channel(log_id)
+            channel.subscribers.add(sub)
+            backlog: List[Dict[str, Any]] = []
+            need_snapshot = since is None
+            if since is not None:
+                oldest = channel.events[0]["seq"] if channel.events else channel.seq + 1
+                if since + 1 < oldest and since < channel.seq:
+                    need_snapshot = True
+                else:
+                    backlog = [e for e in channel.events if e["seq"] > since]
+        return sub, backlog, need_snapshot
+
+    def unsubscribe(self, log_id: int, sub: _Subscriber) -> None:
+        with self._lock:
+            channel = self._channels.get(log_id)
+            if channel:
+                channel.subscribers.discard(sub)
+                if self._idle(channel):
+                    del self._channels[log_id]
+
+    def snapshot(self, log_id: int) -> Optional[Tuple[Dict[str, Any], int]]:
+        """从正在执行的作业获取实时快照；作业不在本进程执行时返回 None"""
+        with self._lock:
+            channel = self._channels.get(log_id)
+            provider = channel.snapshot_provider if channel else None
+        return provider() if provider else None
+
+    def is_live(self, log_id: int) -> bool:
+        """作业是否正在本进程执行 (已登记快照提供者)"""
+        with self._lock:
+            channel = self._channels.get(log_id)
+            return bool(channel and channel.snapshot_provider is not None)
+
+    def backlog_since(self, log_id: int, since: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            channel = self._channels.get(log_id)
+            return [e for e in channel.events if e["seq"] > since] if channel else []
+
+    def is_closed(self, log_id: int) -> bool:
+        with self._lock:
+            channel = self._channels.get(log_id)
+            return bool(channel and channel.closed_at is not None)
+
+
+# 全局单例
+job_event_bus = JobEventBus(buffer_size=settings.AUTOMATION_EVENT_BUFFER)
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger("automation")
+
+class JobPriority(IntEnum):
+    """作业优先级通道 (数值越小越先执行)"""
+    INTERACTIVE = 0     # 设备列表发起的快速任务
+    MANUAL = 1          # 手动立即执行的作业
+    SCHEDULED = 2       # 定时触发的批量作业
+
+class JobQueueFullError(Exception):
+    """执行队列已满，拒绝接纳新作业"""
+    pass
+
+class _QueuedJob:
+    __slots__ = ("job_id", "log_id", "priority", "enqueued_at")
+
+    def __init__(self, job_id: int, log_id: int, priority: JobPriority):
+        self.job_id = job_id
+        self.log_id = log_id
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+class JobExecutor:
+    """
+    有界作业执行池
+    固定数量的工作线程从优先级队列中取作业执行：交互式快速任务优先于定时批量备份，
+    同一优先级内先进先出；队列长度受准入控制，超出时直接拒绝而不是无限创建线程。
+    """
+
+    def __init__(self, runner: Callable[[int, int], Any], max_workers: int, max_queue: int,
+                 on_queue_change: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.on_queue_change = on_queue_change
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._running: Dict[int, _QueuedJob] = {}   # log_id -> 执行中的作业
+        self._workers: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程 (调用方需持有锁)"""
+        while len(self._workers) < self.max_workers:
+            t = threading.Thread(target=self._worker_loop, name=f"job-worker-{len(self._workers)}", daemon=True)
+            self._workers.append(t)
+            t.start()
+
+    def submit(self, job_id: int, log_id: int, priority: JobPriority = JobPriority.MANUAL) -> int:
+        """提交作业并返回其排队位置 (从 1 开始)"""
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                raise JobQueueFullError(f"执行队列已满 ({self.max_queue})，请稍后再试")
+            entry = _QueuedJob(job_id, log_id, priority)
+            heapq.heappush(self._heap, (int(priority), next(self._counter), entry))
+            self._ensure_workers()
+            self._cond.notify()
+            position = self._position_locked(log_id)
+            queue = self._queue_locked()
+        logger.info(f"作业 {job_id} (日志 {log_id}) 已进入 {priority.name} 队列，排队位置: {position}")
+        self._notify_queue_change(queue)
+        return position
+
+    def cancel(self, log_id: int) -> bool:
+        """从队列中移除尚未开始的作业，返回是否移除成功"""
+        with self._cond:
+            for i, (_, _, entry) in enumerate(self._heap):
+                if entry.log_id == log_id:
+                    self._heap.pop(i)
+                    heapq.heapify(self._heap)
+                    queue = self._queue_locked()
+                    break
+            else:
+                return False
+        self._notify_queue_change(queue)
+        return True
+
+    def find_queued(self, job_id: int) -> Optional[int]:
+        """若该作业已在队列中等待，返回其日志 ID (用于合并重复点击)"""
+        with self._cond:
+            for _, _, entry in self._heap:
+                if entry.job_id == job_id:
+                    return entry.log_id
+        return None
+
+    def is_running(self, log_id: int) -> bool:
+        with self._cond:
+            return log_id in self._running
+
+    def _position_locked(self, log_id: int) -> Optional[int]:
+        for pos, (_, _, entry) in enumerate(sorted(self._heap), start=1):
+            if entry.log_id == log_id:
+                return pos
+        return None
+
+    def position(self, log_id: int) -> Optional[int]:
+        """查询排队位置；已开始执行或不在队列中时返回 None"""
+        with self._cond:
+            return self._position_locked(log_id)
+
+    def _queue_locked(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "log_id": entry.log_id,
+                "job_id": entry.job_id,
+                "priority": entry.priority.name.lower(),
+                "position": pos,
+                "waited": round(now - entry.enqueued_at, 2),
+            }
+            for pos, (_, _, entry) in enumerate(sorted(self._heap), start=1)
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """执行池状态：工作线程数、执行中作业与排队明细"""
+        with self._cond:
+            queue = self._queue_locked()
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": [{"log_id": e.log_id, "job_id": e.job_id, "priority": e.priority.name.lower()} for e in self._running.values()],
+                "queued": queue,
+                "lanes": {p.name.lower(): sum(1 for q in queue if q["priority"] == p.name.lower()) for p in JobPriority},
+            }
+
+    def _notify_queue_change(self, queue: List[Dict[str, Any]]) -> None:
+        if self.on_queue_change:
+            try:
+                self.on_queue_change(queue)
+            except Exception as e:
+                logger.warning(f"推送排队位置失败: {e}")
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, entry = heapq.heappop(self._heap)
+                self._running[entry.log_id] = entry
+                queue = self._queue_locked()
+            self._notify_queue_change(queue)
+            try:
+                self.runner(entry.job_id, entry.log_id)
+            except Exception as e:
+                logger.error(f"作业 {entry.job_id} (日志 {entry.log_id}) 执行异常: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._running.pop(entry.log_id, None)
@@ -0,0 +1,295 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from backend.models.automation import JobHostResult, JobLog, JobStepResult
+from backend.models.health import HealthLatest, HealthRollup, HealthSample
+from backend.services.automation.job_results import UPSERT_CHUNK
+
+logger = logging.getLogger("automation")
+
+# 每行样本的指标列 (时序表与最新值表共用)
+METRIC_COLUMNS = ("success", "cpu", "mem", "max_temp", "fans_ok", "pwr_ok", "temp_ok", "if_total", "if_up", "if_errors")
+# 全网汇总的时间粒度 (秒)
+ROLLUP_BUCKET = 3600
+
+def _max(*values: Optional[float]) -> Optional[float]:
+    present = [v for v in values if v is not None]
+    return max(present) if present else None
+
+def _sql_max(column, excluded):
+    """SQLite 的多参数 max() 遇到 NULL 返回 NULL，先用 coalesce 补齐"""
+    return func.max(func.coalesce(column, excluded), func.coalesce(excluded, column))
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _epoch(value: Any, default: Optional[float] = None) -> int:
+    """HealthData.timestamp (ISO 字符串) / datetime -> Unix 秒"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).timestamp())
+        except ValueError:
+            pass
+    return int(default if default is not None else time.time())
+
+def sample_from_health(device: str, health: Dict[str, Any], log_id: Optional[int] = None,
+                       success: bool = True, ts: Optional[int] = None) -> Dict[str, Any]:
+    """将巡检任务返回的 HealthData 结构压缩为一行时序样本"""
+    resources = health.get("resources") or {}
+    hardware = health.get("hardware") or {}
+    interfaces = health.get("interface_stats") or {}
+    basic = health.get("basic") or {}
+    return {
+        "device": device,
+        "ts": ts if ts is not None else _epoch(health.get("timestamp")),
+        "log_id": log_id,
+        "success": success,
+        "cpu": _float(resources.get("cpu_avg")),
+        "mem": _float(resources.get("memory_usage")),
+        "max_temp": _float(hardware.get("max_temp")),
+        "fans_ok": bool(hardware.get("fans_ok", True)),
+        "pwr_ok": bool(hardware.get("pwr_ok", True)),
+        "temp_ok": bool(hardware.get("temp_ok", True)),
+        "if_total": int(interfaces.get("total") or 0),
+        "if_up": int(interfaces.get("up_count") or 0),
+        "if_errors": int(interfaces.get("error_total") or 0),
+        "model": basic.get("model"),
+        "version": basic.get("version"),
+    }
+
+class HealthStore:
+    """
+    设备健康指标时序存储
+    巡检结束的设备写入 HealthSample (一行一个采样点)，同时 upsert HealthLatest 并累加 HealthRollup 小时汇总。
+    单设备趋势走 (device, ts) 索引，全网趋势走小时汇总，最新值走主键，不再反序列化 JobLog 步骤 JSON。
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    # --- 写入 ---
+
+    def add_samples(self, samples: List[Dict[str, Any]], commit: bool = True) -> None:
+        """批量写入采样点，并把每台设备最新的一条 upsert 到 HealthLatest"""
+        if not samples:
+            return
+        sample_cols = ("device", "ts", "log_id") + METRIC_COLUMNS
+        # executemany 批量写入，避免为每批数据编译一条超长的多值 INSERT
+        conn = self.session.connection()
+        conn.execute(insert(HealthSample), [{c: s.get(c) for c in sample_cols} for s in samples])
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for s in samples:
+            if s["device"] not in latest or s["ts"] >= latest[s["device"]]["ts"]:
+                latest[s["device"]] = s
+        latest_cols = sample_cols + ("model", "version")
+        stmt = insert(HealthLatest)
+        # 仅当新样本不早于已有样本时覆盖 (历史回填不会覆盖较新的数据)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device"],
+            set_={c: stmt.excluded[c] for c in latest_cols if c != "device"},
+            where=stmt.excluded.ts >= HealthLatest.ts,
+        )
+        conn.execute(stmt, [{c: s.get(c) for c in latest_cols} for s in latest.values()])
+        self._add_rollup(conn, samples)
+        if commit:
+            self.session.commit()
+
+    @staticmethod
+    def _add_rollup(conn, samples: List[Dict[str, Any]]) -> None:
+        """按小时累加全网汇总"""
+        buckets: Dict[int, Dict[str, Any]] = {}
+        for s in samples:
+            key = s["ts"] - s["ts"] % ROLLUP_BUCKET
+            b = buckets.setdefault(key, {
+                "bucket": key, "samples": 0, "cpu_sum": 0.0, "cpu_count": 0, "cpu_max": None,
+                "mem_sum": 0.0, "mem_count": 0, "mem_max": None, "temp_max": None,
+                "fans_fail": 0, "pwr_fail": 0, "if_up_sum": 0, "if_errors_max": 0,
+            })
+            b["samples"] += 1
+            if s.get("cpu") is not None:
+                b["cpu_sum"] += s["cpu"]
+                b["cpu_count"] += 1
+                b["cpu_max"] = _max(b["cpu_max"], s["cpu"])
+            if s.get("mem") is not None:
+                b["mem_sum"] += s["mem"]
+                b["mem_count"] += 1
+                b["mem_max"] = _max(b["mem_max"], s["mem"])
+            b["temp_max"] = _max(b["temp_max"], s.get("max_temp"))
+            b["fans_fail"] += 0 if s.get("fans_ok", True) else 1
+            b["pwr_fail"] += 0 if s.get("pwr_ok", True) else 1
+            b["if_up_sum"] += s.get("if_up") or 0
+            b["if_errors_max"] = max(b["if_errors_max"], s.get("if_errors") or 0)
+
+        stmt = insert(HealthRollup)
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket"],
+            set_={
+                **{c: getattr(HealthRollup, c) + ex[c] for c in ("samples", "cpu_sum", "cpu_count", "mem_sum", "mem_count", "fans_fail", "pwr_fail", "if_up_sum")},
+                **{c: _sql_max(getattr(HealthRollup, c), ex[c]) for c in ("cpu_max", "mem_max", "temp_max", "if_errors_max")},
+            },
+        )
+        conn.execute(stmt, list(buckets.values()))
+
+    def prune(self, retention_days: int) -> int:
+        """删除超出保留期的采样点"""
+        cutoff = int(time.time()) - retention_days * 86400
+        self.session.exec(delete(HealthRollup).where(HealthRollup.bucket < cutoff - cutoff % ROLLUP_BUCKET))
+        result = self.session.exec(delete(HealthSample).where(HealthSample.ts < cutoff))
+        self.session.commit()
+        return result.rowcount or 0
+
+    # --- 查询 ---
+
+    def range(self, device: str, start: int, end: int, limit: int = 10000) -> List[Dict[str, Any]]:
+        """单台设备在 [start, end] 区间内的原始采样点 (按时间升序)"""
+        rows = self.session.exec(
+            select(HealthSample)
+            .where(HealthSample.device == device, HealthSample.ts >= start, HealthSample.ts <= end)
+            .order_by(HealthSample.ts)
+            .limit(limit)
+        ).all()
+        return [{"ts": r.ts, "log_id": r.log_id, **{c: getattr(r, c) for c in METRIC_COLUMNS}} for r in rows]
+
+    def downsample(self, start: int, end: int, bucket: int, devices: Optional[List[str]] = None,
+                   per_device: bool = True) -> List[Dict[str, Any]]:
+        """
+        按 bucket 秒对齐的时间窗聚合 (均值 / 峰值 / 是否出现过硬件告警)。
+        per_device=False 时汇总为全网曲线；devices 为空时覆盖所有设备，粒度为整小时时直接读取小时汇总表。
+        """
+        bucket = max(1, int(bucket))
+        if not per_device and not devices and bucket % ROLLUP_BUCKET == 0:
+            return self._downsample_rollup(start, end, bucket)
+        bucket_col = (HealthSample.ts - HealthSample.ts % bucket).label("bucket")
+        columns = [
+            bucket_col,
+            func.count(HealthSample.id).label("samples"),
+            func.avg(HealthSample.cpu).label("cpu_avg"),
+            func.max(HealthSample.cpu).label("cpu_max"),
+            func.avg(HealthSample.mem).label("mem_avg"),
+            func.max(HealthSample.mem).label("mem_max"),
+            func.max(HealthSample.max_temp).label("temp_max"),
+            func.min(HealthSample.fans_ok).label("fans_ok"),
+            func.min(HealthSample.pwr_ok).label("pwr_ok"),
+            func.avg(HealthSample.if_up).label("if_up_avg"),
+            func.max(HealthSample.if_errors).label("if_errors_max"),
+        ]
+        group = [bucket_col]
+        if per_device:
+            columns.insert(0, HealthSample.device)
+            group.insert(0, HealthSample.device)
+        query = select(*columns).where(HealthSample.ts >= start, HealthSample.ts <= end)
+        if devices:
+            query = query.where(HealthSample.device.in_(devices))
+        rows = self.session.exec(query.group_by(*group).order_by(*group)).all()
+
+        points = []
+        for row in rows:
+            point = dict(row._mapping)
+            for key in ("cpu_avg", "mem_avg", "if_up_avg"):
+                if point[key] is not None:
+                    point[key] = round(point[key], 2)
+            point["fans_ok"] = bool(point["fans_ok"]) if point["fans_ok"] is not None else None
+            point["pwr_ok"] = bool(point["pwr_ok"]) if point["pwr_ok"] is not None else None
+            points.append(point)
+        return points
+
+    def _downsample_rollup(self, start: int, end: int, bucket: int) -> List[Dict[str, Any]]:
+        """全网曲线：由小时汇总表再聚合 (区间边界按小时对齐)"""
+        bucket_col = (HealthRollup.bucket - HealthRollup.bucket % bucket).label("bucket")
+        rows = self.session.exec(
+            select(
+                bucket_col,
+                func.sum(HealthRollup.samples), func.sum(HealthRollup.cpu_sum), func.sum(HealthRollup.cpu_count),
+                func.max(HealthRollup.cpu_max), func.sum(HealthRollup.mem_sum), func.sum(HealthRollup.mem_count),
+                func.max(HealthRollup.mem_max), func.max(HealthRollup.temp_max), func.sum(HealthRollup.fans_fail),
+                func.sum(HealthRollup.pwr_fail), func.sum(HealthRollup.if_up_sum), func.max(HealthRollup.if_errors_max),
+            )
+            .where(HealthRollup.bucket >= start - start % ROLLUP_BUCKET, HealthRollup.bucket <= end)
+            .group_by(bucket_col)
+            .order_by(bucket_col)
+        ).all()
+        return [
+            {
+                "bucket": b, "samples": n,
+                "cpu_avg": round(cpu_sum / cpu_n, 2) if cpu_n else None, "cpu_max": cpu_max,
+                "mem_avg": round(mem_sum / mem_n, 2) if mem_n else None, "mem_max": mem_max,
+                "temp_max": temp_max, "fans_ok": not fans_fail, "pwr_ok": not pwr_fail,
+                "if_up_avg": round(if_up / n, 2) if n else None, "if_errors_max": if_err,
+            }
+            for b, n, cpu_sum, cpu_n, cpu_max, mem_sum, mem_n, mem_max, temp_max, fans_fail, pwr_fail, if_up, if_err in rows
+        ]
+
+    def latest(self, devices: Optional[Iterable[str]] = None) -> Dict[str, HealthLatest]:
+        """每台设备最近一次采样 (主键查询)"""
+        if devices is None:
+            rows = self.session.exec(select(HealthLatest)).all()
+        else:
+            devices = list(devices)
+            rows = []
+            for i in range(0, len(devices), UPSERT_CHUNK):
+                rows.extend(self.session.exec(
+                    select(HealthLatest).where(HealthLatest.device.in_(devices[i:i + UPSERT_CHUNK]))
+                ).all())
+        return {r.device: r for r in rows}
+
+    # --- 历史数据回填 ---
+
+    @staticmethod
+    def backfill_from_results(engine, batch_size: int = 50) -> int:
+        """
+        时序表为空时，从历史作业的健康数据步骤回填采样点 (启动时调用，已有数据时跳过)。
+        每个日志内每台设备取顺序最靠后的健康数据步骤，与巡检汇总的取数规则一致。
+        """
+        with Session(engine) as session:
+            if session.exec(select(HealthSample.id).limit(1)).first() is not None:
+                return 0
+            log_ids = session.exec(
+                select(JobStepResult.log_id)
+                .where(func.json_type(JobStepResult.result, "$.resources").is_not(None))
+                .distinct()
+            ).all()
+        total = 0
+        for i in range(0, len(log_ids), batch_size):
+            batch = log_ids[i:i + batch_size]
+            with Session(engine) as session:
+                logs = {l.id: l for l in session.exec(select(JobLog).where(JobLog.id.in_(batch))).all()}
+                success = {
+                    (h.log_id, h.host): h.success
+                    for h in session.exec(select(JobHostResult).where(JobHostResult.log_id.in_(batch))).all()
+                }
+                steps = session.exec(
+                    select(JobStepResult)
+                    .where(JobStepResult.log_id.in_(batch), func.json_type(JobStepResult.result, "$.resources").is_not(None))
+                    .order_by(JobStepResult.seq.desc())
+                ).all()
+                seen = set()
+                samples = []
+                for step in steps:
+                    if (step.log_id, step.host) in seen or not isinstance(step.result, dict):
+                        continue
+                    seen.add((step.log_id, step.host))
+                    log = logs.get(step.log_id)
+                    fallback = log.start_time.timestamp() if log else None
+                    samples.append(sample_from_health(
+                        step.host, step.result, log_id=step.log_id,
+                        success=success.get((step.log_id, step.host), True),
+                        ts=_epoch(step.result.get("timestamp"), fallback),
+                    ))
+                HealthStore(session).add_samples(samples)
+                total += len(samples)
+        if total:
+            logger.info(f"已从历史作业回填 {total} 条健康指标采样")
+        return total
@@ -0,0 +1,218 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from backend.models.health import InterfaceCounterLatest, InterfaceCounterSample
+from backend.services.automation.job_results import UPSERT_CHUNK
+
+logger = logging.getLogger("automation")
+
+# 原始计数器列 (顺序即矩阵的列序)
+COUNTER_COLUMNS = ("rx_octets", "tx_octets", "rx_packets", "tx_packets", "rx_errors", "tx_errors", "rx_discards", "tx_discards")
+RATE_COLUMNS = ("interval", "rx_bps", "tx_bps", "rx_pps", "tx_pps", "util", "error_delta", "discard_delta", "reset")
+# Top N 可用的排序指标
+OFFENDER_METRICS = {
+    "errors": InterfaceCounterLatest.error_delta,
+    "discards": InterfaceCounterLatest.discard_delta,
+    "utilization": InterfaceCounterLatest.util,
+}
+_COUNTERS = itemgetter(*COUNTER_COLUMNS)
+# 计算增量所需的上一采样字段
+_PREVIOUS_COLUMNS = ("device", "interface", "ts", "uptime") + COUNTER_COLUMNS
+WRAP_32 = 1 << 32
+# 设备运行时长比距上一采样的间隔还短 (扣除该容差) 即视为期间重启；部分平台 uptime 只精确到分钟
+REBOOT_TOLERANCE = 120
+# 32 位计数器回绕后的增量上限: 超过半个量程更可能是计数器被清零
+WRAP_MAX_DELTA = 1 << 31
+
+def counter_rows_from_health(device: str, health: Dict[str, Any], log_id: Optional[int], ts: int) -> List[Dict[str, Any]]:
+    """巡检 HealthData 中的 interface_counters ({接口: [计数器...], 按 COUNTER_COLUMNS 顺序}) -> 计数器样本行"""
+    counters = health.get("interface_counters") or {}
+    uptime = (health.get("basic") or {}).get("uptime")
+    speeds = health.get("interface_speeds") or {}
+    rows = []
+    for name, values in counters.items():
+        row = {"device": device, "interface": name, "ts": ts, "log_id": log_id,
+               "uptime": float(uptime) if isinstance(uptime, (int, float)) and uptime >= 0 else None,
+               "speed": speeds.get(name)}
+        for col, value in zip(COUNTER_COLUMNS, values):
+            # NAPALM 以 -1 表示设备不支持该计数器
+            row[col] = int(value) if isinstance(value, (int, float)) and value >= 0 else None
+        rows.append(row)
+    return rows
+
+def _matrix(rows: List[Optional[Dict[str, Any]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """计数器行 -> (int64 值矩阵, 有效掩码)；缺失值以 -1 占位"""
+    missing = (-1,) * len(COUNTER_COLUMNS)
+    values = [missing if row is None else _COUNTERS(row) for row in rows]
+    try:
+        matrix = np.array(values, dtype=np.int64)
+    except TypeError:
+        # 含不支持的计数器 (None) 时经对象数组替换占位
+        matrix = np.array(values, dtype=object)
+        matrix[np.equal(matrix, None)] = -1
+        matrix = matrix.astype(np.int64)
+    matrix = matrix.reshape(len(rows), len(COUNTER_COLUMNS))
+    return matrix, matrix >= 0
+
+def _column(rows: List[Optional[Dict[str, Any]]], key: str) -> np.ndarray:
+    return np.fromiter((np.nan if r is None or r.get(key) is None else r[key] for r in rows), dtype=np.float64, count=len(rows))
+
+def compute_rates(prev: List[Optional[Dict[str, Any]]], cur: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    向量化计算一批接口相对上一采样的增量与速率 (prev[i] 为 cur[i] 的上一采样，无则为 None)。
+    - 设备重启 (uptime 短于采样间隔): 计数从开机起算，增量取当前值、时长取 uptime
+    - 计数减小且符合 32 位回绕: 按回绕补偿；否则视为计数器被清零，该项增量置空
+    """
+    cur_v, cur_ok = _matrix(cur)
+    prev_v, prev_ok = _matrix(prev)
+    dt = _column(cur, "ts") - _column(prev, "ts")
+    cur_up = _column(cur, "uptime")
+    prev_up = _column(prev, "uptime")
+    speed = _column(cur, "speed")
+
+    with np.errstate(invalid="ignore"):
+        rebooted = (cur_up + REBOOT_TOLERANCE < dt) | (cur_up < prev_up - REBOOT_TOLERANCE)
+    rebooted &= ~np.isnan(dt)
+    interval = np.where(rebooted, np.maximum(cur_up, 1.0), dt)
+    interval[~(interval > 0)] = np.nan
+
+    ok = cur_ok & prev_ok & ~np.isnan(interval)[:, None]
+    delta = cur_v - prev_v
+    backwards = ok & (delta < 0) & ~rebooted[:, None]
+    wrapped = delta + WRAP_32
+    wrap_ok = backwards & (prev_v < WRAP_32) & (wrapped < WRAP_MAX_DELTA)
+    # 流量计数的回绕增量还不能超过接口速率在该时长内的理论上限
+    with np.errstate(invalid="ignore"):
+        cap = np.where(speed > 0, speed * 1e6 / 8 * interval * 1.1, np.inf)
+    wrap_ok[:, :2] &= wrapped[:, :2] <= cap[:, None]
+    delta = np.where(wrap_ok, wrapped, delta)
+    delta = np.where(rebooted[:, None], cur_v, delta)
+    cleared = backwards & ~wrap_ok
+    ok &= ~cleared
+    ok |= rebooted[:, None] & cur_ok
+
+    d = np.where(ok, delta, 0).astype(np.float64)
+    d[~ok] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rx_bps = d[:, 0] * 8 / interval
+        tx_bps = d[:, 1] * 8 / interval
+        rx_pps = d[:, 2] / interval
+        tx_pps = d[:, 3] / interval
+        util = np.where(speed > 0, np.fmax(rx_bps, tx_bps) / (speed * 1e6) * 100, np.nan)
+    # 收/发任一方向有值即可计入增量
+    errors = np.where(np.isnan(d[:, 4]) & np.isnan(d[:, 5]), np.nan, np.nansum(d[:, 4:6], axis=1))
+    discards = np.where(np.isnan(d[:, 6]) & np.isnan(d[:, 7]), np.nan, np.nansum(d[:, 6:8], axis=1))
+    return {
+        "interval": interval, "rx_bps": rx_bps, "tx_bps": tx_bps, "rx_pps": rx_pps, "tx_pps": tx_pps,
+        "util": util, "error_delta": errors, "discard_delta": discards,
+        "reset": rebooted | cleared.any(axis=1),
+    }
+
+def _to_list(values: np.ndarray, integer: bool = False) -> List[Any]:
+    """结果数组 -> 可入库的 Python 列表 (NaN -> None，速率保留两位小数)"""
+    if values.dtype == bool:
+        return values.tolist()
+    missing = np.isnan(values)
+    out = (np.where(missing, 0, values).astype(np.int64) if integer else np.round(values, 2)).astype(object)
+    out[missing] = None
+    return out.tolist()
+
+
+class InterfaceCounterStore:
+    """
+    接口计数器存储
+    每批巡检结果 (一次进度刷写，通常覆盖多台设备) 读取各接口的上一采样，用 NumPy 一次算出全部接口的
+    bps / pps / 利用率与错误、丢弃增量，写入时序表并更新每接口最新值；Top N 直接按最新值表的索引排序。
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _previous(self, devices: List[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        prev = {}
+        for i in range(0, len(devices), UPSERT_CHUNK):
+            rows = self.session.connection().execute(
+                select(*[getattr(InterfaceCounterLatest, c) for c in _PREVIOUS_COLUMNS])
+                .where(InterfaceCounterLatest.device.in_(devices[i:i + UPSERT_CHUNK]))
+            ).mappings()
+            for r in rows:
+                prev[(r["device"], r["interface"])] = dict(r)
+        return prev
+
+    def add_samples(self, rows: List[Dict[str, Any]], commit: bool = True) -> None:
+        if not rows:
+            return
+        rows = sorted(rows, key=lambda r: r["ts"])
+        prev = self._previous(sorted({r["device"] for r in rows}))
+        # 同一批内同一接口出现多次时分轮计算，后一轮以前一轮为基准
+        rounds: List[List[Dict[str, Any]]] = []
+        seen: Dict[Tuple[str, str], int] = {}
+        for row in rows:
+            key = (row["device"], row["interface"])
+            k = seen.get(key, 0)
+            seen[key] = k + 1
+            if k == len(rounds):
+                rounds.append([])
+            rounds[k].append(row)
+
+        samples = []
+        for batch in rounds:
+            rates = compute_rates([prev.get((r["device"], r["interface"])) for r in batch], batch)
+            columns = {col: _to_list(rates[col], integer=col in ("error_delta", "discard_delta")) for col in RATE_COLUMNS}
+            for i, row in enumerate(batch):
+                for col in RATE_COLUMNS:
+                    row[col] = columns[col][i]
+                prev[(row["device"], row["interface"])] = row
+                samples.append(row)
+
+        sample_cols = ("device", "interface", "ts", "log_id") + COUNTER_COLUMNS + RATE_COLUMNS
+        conn = self.session.connection()
+        conn.execute(insert(InterfaceCounterSample), [{c: s.get(c) for c in sample_cols} for s in samples])
+        latest_cols = sample_cols + ("uptime", "speed")
+        stmt = insert(InterfaceCounterLatest)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device", "interface"],
+            set_={c: stmt.excluded[c] for c in latest_cols if c not in ("device", "interface")},
+            where=stmt.excluded.ts >= InterfaceCounterLatest.ts,
+        )
+        latest = {(s["device"], s["interface"]): s for s in samples}
+        conn.execute(stmt, [{c: s.get(c) for c in latest_cols} for s in latest.values()])
+        if commit:
+            self.session.commit()
+
+    def prune(self, retention_days: int) -> int:
+        cutoff = int(time.time()) - retention_days * 86400
+        result = self.session.exec(delete(InterfaceCounterSample).where(InterfaceCounterSample.ts < cutoff))
+        self.session.commit()
+        return result.rowcount or 0
+
+    def top_offenders(self, metric: str = "errors", limit: int = 10,
+                      devices: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """按最近一次采样的指标 (errors / discards / utilization) 降序取前 N 个接口"""
+        column = OFFENDER_METRICS[metric]
+        query = select(InterfaceCounterLatest).where(column > 0)
+        if devices:
+            query = query.where(InterfaceCounterLatest.device.in_(devices))
+        rows = self.session.exec(query.order_by(column.desc()).limit(limit)).all()
+        return [
+            {"device": r.device, "interface": r.interface, "ts": r.ts, "speed": r.speed,
+             **{c: getattr(r, c) for c in RATE_COLUMNS}}
+            for r in rows
+        ]
+
+    def series(self, device: str, interface: str, start: int, end: int, limit: int = 10000) -> List[Dict[str, Any]]:
+        rows = self.session.exec(
+            select(InterfaceCounterSample)
+            .where(InterfaceCounterSample.device == device, InterfaceCounterSample.interface == interface,
+                   InterfaceCounterSample.ts >= start, InterfaceCounterSample.ts <= end)
+            .order_by(InterfaceCounterSample.ts)
+            .limit(limit)
+        ).all()
+        return [{"ts": r.ts, "log_id": r.log_id, **{c: getattr(r, c) for c in RATE_COLUMNS}} for r in rows]
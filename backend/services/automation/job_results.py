@@ -0,0 +1,269 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import case, func, update, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm.attributes import flag_modified
+from sqlmodel import Session, select
+
+from backend.models.automation import JobLog, JobHostResult, JobStepResult
+from backend.network_engine.reachability import UNREACHABLE
+
+logger = logging.getLogger("automation")
+
+# JobLog.results 中保留的非设备键
+SYSTEM_KEYS = ("system_error",)
+# 单条 upsert 语句包含的最大行数
+UPSERT_CHUNK = 500
+
+class JobResultService:
+    """
+    作业结果存储服务
+    以 (log_id, host, step) 为粒度读写执行结果：步骤更新是单行 upsert，统计是 SQL 聚合，
+    读取时再组装为前端沿用的 { host: { success, status, error, steps: [...] } } 结构。
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    # --- 写入 ---
+
+    def init_hosts(self, log_id: int, summary: Dict[str, Dict[str, Any]]) -> None:
+        """写入作业的初始设备状态与预置步骤"""
+        host_rows = []
+        step_rows = []
+        for host, data in summary.items():
+            host_rows.append(self._host_row(log_id, host, data))
+            for seq, step in enumerate(data.get("steps", [])):
+                step_rows.append(self._step_row(log_id, host, seq, step))
+        self.upsert(host_rows, step_rows)
+
+    def upsert(self, host_rows: List[Dict[str, Any]], step_rows: List[Dict[str, Any]]) -> None:
+        """批量 upsert 设备行与步骤行 (冲突时按唯一键覆盖)"""
+        # 分批提交，避免超出 SQLite 单条语句的参数上限
+        for i in range(0, len(host_rows), UPSERT_CHUNK):
+            stmt = insert(JobHostResult).values(host_rows[i:i + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["log_id", "host"],
+                set_={c: stmt.excluded[c] for c in ("success", "status", "error", "updated_at")},
+            )
+            self.session.exec(stmt)
+        for i in range(0, len(step_rows), UPSERT_CHUNK):
+            stmt = insert(JobStepResult).values(step_rows[i:i + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["log_id", "host", "step"],
+                set_={c: stmt.excluded[c] for c in ("seq", "success", "status", "result", "exception", "updated_at")},
+            )
+            self.session.exec(stmt)
+        self.session.commit()
+
+    @staticmethod
+    def _host_row(log_id: int, host: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "log_id": log_id,
+            "host": host,
+            "success": bool(data.get("success")),
+            "status": data.get("status") or "running",
+            "error": data.get("error"),
+            "updated_at": datetime.now(),
+        }
+
+    @staticmethod
+    def _step_row(log_id: int, host: str, seq: int, step: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "log_id": log_id,
+            "host": host,
+            "step": step.get("name") or "Unnamed Task",
+            "seq": seq,
+            "success": step.get("success", True) is not False,
+            "status": step.get("status") or "pending",
+            "result": step.get("result"),
+            "exception": step.get("exception"),
+            "updated_at": datetime.now(),
+        }
+
+    def finalize_hosts(self, log_id: int, hosts: Optional[List[str]] = None) -> None:
+        """作业结束：把仍处于 running 的设备转为终态 (hosts 限定范围，用于分布式分片)"""
+        stmt = (
+            update(JobHostResult)
+            .where(JobHostResult.log_id == log_id, JobHostResult.status == "running")
+            .values(status=case((JobHostResult.success == True, "success"), else_="failed"))
+        )
+        for chunk in self._host_chunks(hosts):
+            self.session.exec(stmt.where(JobHostResult.host.in_(chunk)) if chunk is not None else stmt)
+        self.session.commit()
+
+    def fail_unfinished(self, log_id: int, error_msg: str, status: str = "failed", hosts: Optional[List[str]] = None) -> None:
+        """引擎崩溃或作业中止：将所有未完成的设备与步骤标记为终态 (默认 failed)，防止前端一直显示加载中"""
+        host_stmt = (
+            update(JobHostResult)
+            .where(JobHostResult.log_id == log_id, JobHostResult.status.in_(["running", "pending"]))
+            .values(status=status, success=False, error=error_msg)
+        )
+        step_stmt = (
+            update(JobStepResult)
+            .where(JobStepResult.log_id == log_id, JobStepResult.status.in_(["running", "pending"]))
+            .values(status=status, success=False)
+        )
+        for chunk in self._host_chunks(hosts):
+            if chunk is None:
+                self.session.exec(host_stmt)
+                self.session.exec(step_stmt)
+            else:
+                self.session.exec(host_stmt.where(JobHostResult.host.in_(chunk)))
+                self.session.exec(step_stmt.where(JobStepResult.host.in_(chunk)))
+        self.session.commit()
+
+    @staticmethod
+    def _host_chunks(hosts: Optional[List[str]]) -> Iterable[Optional[List[str]]]:
+        """按 UPSERT_CHUNK 切分设备列表 (避免超出 SQLite 参数上限)；未限定设备时产出一次 None"""
+        if hosts is None:
+            yield None
+            return
+        for i in range(0, len(hosts), UPSERT_CHUNK):
+            yield hosts[i:i + UPSERT_CHUNK]
+
+    def delete_log(self, log_id: int) -> None:
+        """删除某次执行的全部明细"""
+        self.session.exec(delete(JobStepResult).where(JobStepResult.log_id == log_id))
+        self.session.exec(delete(JobHostResult).where(JobHostResult.log_id == log_id))
+
+    # --- 查询 ---
+
+    def host_counts(self, log_id: int) -> Tuple[int, int]:
+        """返回 (设备总数, 成功数)"""
+        total, success = self.session.exec(
+            select(func.count(JobHostResult.id), func.sum(case((JobHostResult.success == True, 1), else_=0)))
+            .where(JobHostResult.log_id == log_id)
+        ).one()
+        return total or 0, success or 0
+
+    def unreachable_count(self, log_id: int) -> int:
+        """预检阶段判定为不可达的设备数"""
+        return self.session.exec(
+            select(func.count(JobHostResult.id))
+            .where(JobHostResult.log_id == log_id, JobHostResult.status == UNREACHABLE)
+        ).one() or 0
+
+    def get_results(self, logs: Iterable[JobLog]) -> Dict[int, Dict[str, Any]]:
+        """按 log_id 组装兼容旧格式的 results 字典 (一次查询设备，一次查询步骤)"""
+        logs = list(logs)
+        merged: Dict[int, Dict[str, Any]] = {log.id: dict(log.results or {}) for log in logs}
+        if not logs:
+            return merged
+
+        log_ids = list(merged.keys())
+        hosts = self.session.exec(
+            select(JobHostResult).where(JobHostResult.log_id.in_(log_ids)).order_by(JobHostResult.id)
+        ).all()
+        for h in hosts:
+            merged[h.log_id][h.host] = {"success": h.success, "status": h.status, "error": h.error, "steps": []}
+
+        steps = self.session.exec(
+            select(JobStepResult)
+            .where(JobStepResult.log_id.in_(log_ids))
+            .order_by(JobStepResult.log_id, JobStepResult.host, JobStepResult.seq, JobStepResult.id)
+        ).all()
+        for s in steps:
+            entry = merged[s.log_id].get(s.host)
+            if not isinstance(entry, dict):
+                continue
+            entry["steps"].append({
+                "name": s.step,
+                "success": s.success,
+                "status": s.status,
+                "result": s.result,
+                "exception": s.exception,
+            })
+        return merged
+
+    def last_update(self, log_id: int) -> Optional[datetime]:
+        """明细最近一次写入的时间 (作为增量查询的起点)"""
+        host_ts = self.session.exec(
+            select(func.max(JobHostResult.updated_at)).where(JobHostResult.log_id == log_id)).one()
+        step_ts = self.session.exec(
+            select(func.max(JobStepResult.updated_at)).where(JobStepResult.log_id == log_id)).one()
+        return max((ts for ts in (host_ts, step_ts) if ts is not None), default=None)
+
+    def changes_since(self, log_id: int, after: Optional[datetime]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[datetime]]:
+        """
+        after 之后写入的设备行与步骤行 (只取状态列，不含步骤结果)，用于推送其他进程执行的作业进度。
+        返回 (设备增量, 步骤增量, 新的起点)
+        """
+        host_stmt = select(JobHostResult.host, JobHostResult.status, JobHostResult.success,
+                           JobHostResult.error, JobHostResult.updated_at).where(JobHostResult.log_id == log_id)
+        step_stmt = select(JobStepResult.host, JobStepResult.step, JobStepResult.status, JobStepResult.success,
+                           JobStepResult.exception, JobStepResult.updated_at).where(JobStepResult.log_id == log_id)
+        if after is not None:
+            host_stmt = host_stmt.where(JobHostResult.updated_at > after)
+            step_stmt = step_stmt.where(JobStepResult.updated_at > after)
+        host_rows = self.session.exec(host_stmt.order_by(JobHostResult.updated_at)).all()
+        step_rows = self.session.exec(step_stmt.order_by(JobStepResult.updated_at)).all()
+        latest = max((r.updated_at for r in (*host_rows, *step_rows)), default=after)
+        if after is not None:
+            latest = max(latest, after)
+        hosts = [{"host": r.host, "status": r.status, "success": r.success, "error": r.error} for r in host_rows]
+        steps = [{"host": r.host, "step": r.step, "status": r.status, "success": r.success, "exception": r.exception}
+                 for r in step_rows]
+        return hosts, steps, latest
+
+    def health_steps(self, log_ids: List[int]) -> List[JobStepResult]:
+        """查询包含健康数据 (resources 字段) 的步骤，由 SQLite JSON1 在库内过滤"""
+        if not log_ids:
+            return []
+        return self.session.exec(
+            select(JobStepResult)
+            .where(
+                JobStepResult.log_id.in_(log_ids),
+                func.json_type(JobStepResult.result, "$.resources").is_not(None),
+            )
+            .order_by(JobStepResult.seq.desc())
+        ).all()
+
+    # --- 历史数据迁移 ---
+
+    @staticmethod
+    def migrate_legacy_results(engine, batch_size: int = 50) -> int:
+        """
+        将旧版 JobLog.results 大 JSON 拆分写入明细表。
+        已拆分过的日志 (存在 JobHostResult 行) 会被跳过，可重复执行。
+        """
+        migrated = 0
+        last_id = 0
+        while True:
+            with Session(engine) as session:
+                logs = session.exec(
+                    select(JobLog).where(JobLog.id > last_id).order_by(JobLog.id).limit(batch_size)
+                ).all()
+                if not logs:
+                    break
+                last_id = logs[-1].id
+                service = JobResultService(session)
+                for log in logs:
+                    results = log.results or {}
+                    hosts = {}
+                    for k, v in results.items():
+                        if k in SYSTEM_KEYS or not isinstance(v, dict):
+                            continue
+                        # 更早期的格式没有 steps，仅有单个 result 字段
+                        if not v.get("steps") and "result" in v:
+                            v = {**v, "steps": [{"name": "result", "success": v.get("success", False),
+                                                 "status": "success" if v.get("success") else "failed",
+                                                 "result": v.get("result")}]}
+                        hosts[k] = v
+                    if not hosts:
+                        continue
+                    exists = session.exec(
+                        select(JobHostResult.id).where(JobHostResult.log_id == log.id).limit(1)
+                    ).first()
+                    if not exists:
+                        service.init_hosts(log.id, hosts)
+                    log.results = {k: v for k, v in results.items() if k in SYSTEM_KEYS}
+                    flag_modified(log, "results")
+                    session.add(log)
+                    migrated += 1
+                session.commit()
+        if migrated:
+            logger.info(f"已将 {migrated} 条历史作业日志的结果迁移至明细表")
+        return migrated
@@ -0,0 +1,559 @@
+import copy
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional, Dict, Any, Set, Tuple
+
+from sqlmodel import Session
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.models.automation import AutomationJob, JobLog, JobShard, JobStatus, ShardStatus, TaskType
+from backend.network_engine.core import NetworkEngine
+from backend.network_engine.async_engine import AsyncEngine, HAS_ASYNCSSH
+from backend.network_engine.async_engine.tasks import TASKS as ASYNC_TASKS
+from backend.network_engine.connection_pool import connection_pool
+from backend.network_engine.reachability import UNREACHABLE, probe_hosts
+from backend.network_engine.snmp import SnmpCollector
+from backend.network_engine.job_control import ABORT_CANCELLED, ABORT_TIMEOUT, JobAbortedError, JobControl, job_controls
+from backend.network_engine.nornir_module.tasks.health import inspect_health
+from backend.network_engine.nornir_module.tasks.backup import backup_config
+from backend.network_engine.nornir_module.tasks.commands import run_commands, apply_config
+from backend.services.automation.lease_manager import lease_manager, leased_task
+from backend.services.automation.job_results import JobResultService
+from backend.services.automation.health_store import HealthStore, sample_from_health
+from backend.services.automation.interface_counters import InterfaceCounterStore, counter_rows_from_health
+from backend.services.automation.event_bus import job_event_bus
+from backend.services.automation.shard_queue import shard_queue
+from backend.services.configs.version_store import config_version_store
+from backend.services.configs.config_index import config_index
+from backend.services.configs.config_search import config_search
+
+from sqlalchemy.orm.attributes import flag_modified
+logger = logging.getLogger("automation")
+
+class NornirProgressProcessor:
+    """
+    Nornir 处理器：在内存中汇总各设备子任务进度，由后台线程按时间间隔合并刷写到数据库。
+    回调本身只修改内存状态，数据库写入次数只随执行时长增长，而不随事件数量增长。
+    write_guard 返回 False 时丢弃待刷写的进度 (worker 分片已被重新分配，明细归新的持有者写入)。
+    """
+    def __init__(self, job_log_id, engine, initial: Optional[Dict[str, Any]] = None,
+                 flush_interval: float = None, flush_every: int = None,
+                 write_guard: Optional[Callable[[], bool]] = None):
+        self.job_log_id = job_log_id
+        self.engine = engine
+        self.write_guard = write_guard
+        self.flush_interval = flush_interval or settings.AUTOMATION_PROGRESS_FLUSH_INTERVAL
+        self.flush_every = flush_every or settings.AUTOMATION_PROGRESS_FLUSH_EVENTS
+        self.summary: Dict[str, Any] = initial if initial is not None else {}
+        self.flush_count = 0
+
+        self._lock = threading.Lock()          # 保护内存中的 summary
+        self._flush_lock = threading.Lock()    # 保证同一时刻只有一次刷写
+        self._pending = 0
+        self._dirty_hosts: Set[str] = set()
+        self._dirty_steps: Set[Tuple[str, str]] = set()
+        self._health_samples: List[Dict[str, Any]] = []   # 待写入时序表的健康采样
+        self._counter_rows: List[Dict[str, Any]] = []     # 待计算速率并写入的接口计数器
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def task_started(self, task: Any) -> None:
+        """整个任务开始：启动后台刷写线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name=f"progress-flush-{self.job_log_id}", daemon=True)
+            self._thread.start()
+
+    def task_completed(self, task: Any, result: Any) -> None:
+        """整个任务结束：停止刷写线程并做最后一次刷写"""
+        self.close()
+
+    def _host_entry(self, host_name: str) -> Dict[str, Any]:
+        if host_name not in self.summary:
+            self.summary[host_name] = {"success": False, "status": "running", "steps": [], "error": None}
+        return self.summary[host_name]
+
+    def _mark_dirty(self, host_name: str, step_name: Optional[str] = None) -> None:
+        self._dirty_hosts.add(host_name)
+        if step_name:
+            self._dirty_steps.add((host_name, step_name))
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._wake.set()
+
+    def task_instance_started(self, task: Any, host: Any) -> None:
+        """核心回调：当一个设备的一个子任务开始执行时触发"""
+        self.record_step_started(host.name, task.name)
+
+    def task_instance_completed(self, task: Any, host: Any, result: Any) -> None:
+        """核心回调：当一个设备的一个子任务完成时触发"""
+        self.record_step_completed(host.name, task.name, result.failed, result.result, result.exception)
+
+    def record_step_started(self, host_name: str, step_name: str) -> None:
+        """标记设备的某个步骤开始执行 (Nornir 回调与异步引擎共用)"""
+        with self._lock:
+            steps = self._host_entry(host_name).setdefault('steps', [])
+            
+            # 找到对应步骤并标记为正在执行
+            found = False
+            for s in steps:
+                if s['name'] == step_name:
+                    s['status'] = "running"
+                    found = True
+                    break
+            
+            # 如果没找到（对于非预置步骤），则新增一个正在运行的步骤
+            if not found and step_name and not step_name.startswith("NAPALM 数据采集"): 
+                # 排除通用父任务名，只记录有意义的子任务名
+                steps.append({
+                    "name": step_name,
+                    "success": True,
+                    "status": "running",
+                    "result": None
+                })
+                found = True
+            self._mark_dirty(host_name, step_name if found else None)
+            if found:
+                self._publish_step(host_name, step_name, "running", True)
+
+    def record_step_completed(self, host_name: str, step_name: str, failed: bool, result: Any, exception: Optional[BaseException]) -> None:
+        """记录设备的某个步骤执行完成 (Nornir 回调与异步引擎共用)"""
+        # 构造步骤详情 (在锁外完成，缩短临界区)
+        res_val = result
+        if not isinstance(res_val, (dict, list, str, int, float, bool, type(None))):
+            res_val = str(res_val)
+
+        # 被取消或超时的设备记录为对应的终态，而不是普通失败
+        aborted = exception.reason if isinstance(exception, JobAbortedError) else None
+        step_data = {
+            "name": step_name or "Unnamed Task",
+            "success": not failed,
+            "status": aborted or ("failed" if failed else "success"),
+            "result": str(exception) if aborted else res_val,
+            "exception": str(exception) if exception else None
+        }
+
+        with self._lock:
+            host_entry = self._host_entry(host_name)
+            steps = host_entry.setdefault('steps', [])
+
+            # 更新对应步骤
+            found = False
+            for i, s in enumerate(steps):
+                if s['name'] == step_name:
+                    steps[i] = step_data
+                    found = True
+                    break
+            if not found:
+                steps.append(step_data)
+            if aborted:
+                host_entry['status'] = aborted
+                for s in steps:
+                    if s.get('status') in ("pending", "running"):
+                        s.update(status=aborted, success=False)
+                        self._dirty_steps.add((host_name, s['name']))
+            
+            # 状态翻转判定
+            any_failed = any(s.get('success') is False for s in steps)
+            host_entry['success'] = not any_failed
+            if failed:
+                host_entry['error'] = str(exception) or "Sub-task failed"
+            # 巡检产出的健康数据同时写入时序表 (随进度一起批量刷写)
+            if not failed and isinstance(res_val, dict) and "resources" in res_val:
+                sample = sample_from_health(host_name, res_val, self.job_log_id, host_entry['success'])
+                self._health_samples.append(sample)
+                if res_val.get("interface_counters"):
+                    self._counter_rows.extend(counter_rows_from_health(host_name, res_val, self.job_log_id, sample["ts"]))
+                    # 逐接口计数器已进入计数器时序表，步骤结果中不再重复保存
+                    step_data["result"] = {k: v for k, v in res_val.items() if k not in ("interface_counters", "interface_speeds")}
+            self._mark_dirty(host_name, step_data["name"])
+            self._publish_step(host_name, step_data["name"], step_data["status"], step_data["success"], step_data["exception"])
+            job_event_bus.publish(self.job_log_id, "host", {
+                "host": host_name,
+                "status": host_entry.get("status"),
+                "success": host_entry["success"],
+                "error": host_entry.get("error"),
+            })
+
+    def record_host_unreachable(self, host_name: str, error: str) -> None:
+        """执行途中判定设备不可达 (如 SNMP 回退 SSH 前的预检)：设备与未完成步骤置为 unreachable"""
+        with self._lock:
+            host_entry = self._host_entry(host_name)
+            host_entry.update(status=UNREACHABLE, success=False, error=error)
+            for s in host_entry.setdefault('steps', []):
+                if s.get('status') in ("pending", "running"):
+                    s.update(status=UNREACHABLE, success=False)
+                    self._dirty_steps.add((host_name, s['name']))
+            self._mark_dirty(host_name)
+            job_event_bus.publish(self.job_log_id, "host", {"host": host_name, "status": UNREACHABLE, "success": False, "error": error})
+
+    def subtask_instance_started(self, task: Any, host: Any) -> None:
+        self.task_instance_started(task, host)
+
+    def subtask_instance_completed(self, task: Any, host: Any, result: Any) -> None:
+        self.task_instance_completed(task, host, result)
+
+    def _publish_step(self, host_name: str, step_name: str, status: str, success: bool, exception: Optional[str] = None) -> None:
+        """向事件总线推送步骤增量 (在 _lock 内调用，保证事件序号与内存状态一致)"""
+        job_event_bus.publish(self.job_log_id, "step", {
+            "host": host_name,
+            "step": step_name,
+            "status": status,
+            "success": success,
+            "exception": exception,
+        })
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前进度的深拷贝 (可安全地在其他线程中修改或序列化)"""
+        with self._lock:
+            return copy.deepcopy(self.summary)
+
+    def stream_snapshot(self) -> Tuple[Dict[str, Any], int]:
+        """供事件流使用的快照：同时返回快照对应的事件序号，后续只需推送更大序号的增量"""
+        with self._lock:
+            return copy.deepcopy(self.summary), job_event_bus.last_seq(self.job_log_id)
+
+    def _collect_dirty(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """在锁内把脏设备/脏步骤转换为待 upsert 的行"""
+        host_rows = [
+            JobResultService._host_row(self.job_log_id, h, self.summary[h])
+            for h in self._dirty_hosts if h in self.summary
+        ]
+        step_rows = []
+        for host_name, step_name in self._dirty_steps:
+            for seq, step in enumerate(self.summary.get(host_name, {}).get("steps", [])):
+                if step.get("name") == step_name:
+                    step_rows.append(JobResultService._step_row(self.job_log_id, host_name, seq, step))
+                    break
+        return host_rows, step_rows
+
+    def flush(self) -> None:
+        """将自上次刷写以来变化的设备与步骤以单行 upsert 的方式一次性写入数据库"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                host_rows, step_rows = self._collect_dirty()
+                dirty = (self._dirty_hosts, self._dirty_steps)
+                samples, self._health_samples = self._health_samples, []
+                counter_rows, self._counter_rows = self._counter_rows, []
+                self._pending = 0
+                self._dirty_hosts, self._dirty_steps = set(), set()
+            if self.write_guard is not None and not self.write_guard():
+                logger.warning(f"作业日志 {self.job_log_id} 的执行权已转移，丢弃本进程的 {len(host_rows)} 条设备进度")
+                return
+            try:
+                with Session(self.engine) as session:
+                    JobResultService(session).upsert(host_rows, step_rows)
+                    # 健康采样与接口计数器同一事务提交，重试时不会重复写入采样
+                    HealthStore(session).add_samples(samples, commit=False)
+                    InterfaceCounterStore(session).add_samples(counter_rows, commit=False)
+                    session.commit()
+                self.flush_count += 1
+            except Exception as e:
+                logger.warning(f"作业日志 {self.job_log_id} 进度刷写失败，将在下个周期重试: {e}")
+                with self._lock:
+                    self._dirty_hosts |= dirty[0]
+                    self._dirty_steps |= dirty[1]
+                    self._health_samples = samples + self._health_samples
+                    self._counter_rows = counter_rows + self._counter_rows
+                    self._pending += 1
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """停止后台线程并执行最终刷写 (可重复调用)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+
+class JobRunner:
+    """
+    作业执行: 选择任务函数、在本进程内对一组设备执行并写入明细表、记录失败终态、执行 worker 分片。
+    不依赖调度器单例 (APScheduler、作业执行池)，API 进程与 worker 进程共用。
+    """
+
+    @staticmethod
+    def select_task(job: AutomationJob) -> Tuple[Callable, Dict[str, Any], bool]:
+        """按任务类型选择任务函数与参数，返回 (task_func, task_args, use_async)"""
+        job_args = job.args or {}
+        task_func = None
+        task_args = {}
+    
+        # bypass_cache: 操作员要求跳过 getter 缓存、强制向设备取最新数据 (巡检的资源与接口计数器总是直接采集，不受此影响)
+        bypass_cache = bool(job_args.get("bypass_cache"))
+        if job.task_type == TaskType.INSPECT:
+            task_func = inspect_health
+            # native: 华为/H3C 使用厂商原生采集器 (置为 false 时强制走 NAPALM getter)
+            task_args = {"bypass_cache": bypass_cache,
+                         "native": bool(job_args.get("native", settings.AUTOMATION_VENDOR_COLLECTORS))}
+        elif job.task_type == TaskType.BACKUP:
+            task_func = backup_config
+            # force: 即使配置内容未变更也写入新的备份文件 (备份总是直接读取设备配置，不经 getter 缓存)
+            task_args = {"backup_path": str(settings.BACKUP_DIR), "force": bool(job_args.get("force"))}
+        elif job.task_type == TaskType.QUERY:
+            task_func = run_commands
+            # parse: 按平台模板把命令输出解析为结构化记录
+            task_args = {"commands": job.commands, "parse": bool(job_args.get("parse"))}
+        elif job.task_type == TaskType.CONFIG:
+            task_func = apply_config
+            task_args = {"config_commands": job.commands}
+
+        if not task_func:
+            raise ValueError(f"暂未实现的任务类型: {job.task_type}")
+        use_async = job_args.get("engine") == "async"
+        if use_async:
+            if not HAS_ASYNCSSH:
+                raise ValueError("作业指定了异步引擎，但服务器未安装 asyncssh")
+            if task_func.__name__ not in ASYNC_TASKS:
+                raise ValueError(f"异步引擎暂不支持该任务类型: {job.task_type}")
+        return task_func, task_args, use_async
+
+    def execute_hosts(self, session: Session, job: AutomationJob, log_id: int, control: JobControl,
+                      host_names: Optional[List[str]], write_guard: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        在本进程中对一组设备执行作业任务 (本地执行整个作业，或 worker 执行一个分片)。
+        设备与步骤结果写入明细表，返回本次执行的指标；JobLog 的终态由调用方汇总。
+        write_guard 见 NornirProgressProcessor。
+        """
+        target = NetworkEngine().build_nornir(host_names)
+
+        if not target.inventory.hosts:
+            raise ValueError("资产库中未找到匹配的目标设备，请检查设备名称是否正确。")
+
+        # 3. 选择任务函数
+        task_func, task_args, use_async = self.select_task(job)
+        control.check()
+
+        # 可达性预检：管理端口 TCP 不通的设备直接判为 unreachable，不再占用执行线程等待 SSH 超时
+        # SNMP 快速通道 (仅巡检)：SNMP 走 UDP，TCP 预检推迟到回退 SSH 的设备上执行
+        is_inspect = 'inspect' in str(job.task_type).lower()
+        snmp_first = is_inspect and (job.args or {}).get("collector", settings.AUTOMATION_INSPECT_COLLECTOR) == "snmp"
+        preflight = (job.args or {}).get("preflight", settings.AUTOMATION_PREFLIGHT)
+        unreachable: Dict[str, str] = {}
+        preflight_stats = None
+        if preflight and not snmp_first:
+            unreachable, preflight_stats = probe_hosts(
+                target.inventory.hosts.values(),
+                timeout=settings.AUTOMATION_PREFLIGHT_TIMEOUT,
+                concurrency=settings.AUTOMATION_PREFLIGHT_CONCURRENCY,
+            )
+            control.check()
+
+        # 4. 预先初始化结果状态 (让前端立即显示 "执行中")
+
+        initial_summary = {}
+        for host_name in target.inventory.hosts.keys():
+            steps = []
+            if is_inspect:
+                # 预置 Pending 步骤 (优化：移除了冗余的 SSH 拨测，由 napalm_get 自动处理连接)
+                steps = [
+                    {"name": "1. 建立 SSH 通信并执行 Version 采集", "success": True, "status": "pending", "result": None},
+                    {"name": "2. 采集 CPU 与内存利用率指标", "success": True, "status": "pending", "result": None},
+                    {"name": "3. 采集接口状态与流量计数器", "success": True, "status": "pending", "result": None},
+                    {"name": "深度健康巡检", "success": True, "status": "pending", "result": None}
+                ]
+            if host_name in unreachable:
+                # 不可达设备的预置步骤一并置为终态，避免前端一直显示等待
+                steps = [{**step, "success": False, "status": UNREACHABLE} for step in steps]
+                initial_summary[host_name] = {"success": False, "status": UNREACHABLE, "steps": steps,
+                                              "error": f"设备不可达: {unreachable[host_name]}"}
+                continue
+            initial_summary[host_name] = {
+                "success": False,
+                "status": "running",
+                "steps": steps,
+                "error": None
+            }
+        JobResultService(session).init_hosts(log_id, initial_summary)
+        if unreachable:
+            target = target.filter(filter_func=lambda h: h.name not in unreachable)
+
+        # 5. 执行任务 (使用处理器提供实时反馈，进度在内存中合并后按间隔批量刷写)
+        processor = NornirProgressProcessor(log_id, engine, initial=initial_summary, write_guard=write_guard)
+        job_event_bus.attach(log_id, processor.stream_snapshot)
+        job_event_bus.publish(log_id, "job", {"status": JobStatus.RUNNING.value, "total": len(initial_summary)})
+        for host_name in unreachable:
+            job_event_bus.publish(log_id, "host", {"host": host_name, "status": UNREACHABLE, "success": False,
+                                                   "error": initial_summary[host_name]["error"]})
+        # 按设备获取租约：不相交的作业并发执行，重叠作业仅在冲突设备上排队
+        lease_manager.register(log_id, len(target.inventory.hosts))
+        connection_pool.register(log_id)
+        lease_args = {"task_func": task_func, "lease_owner": log_id}
+        run_name = "深度健康巡检" if is_inspect else task_func.__name__
+
+        engine_stats = None
+        snmp_stats = None
+        try:
+            # 先并发 SNMP 采集，未配置凭据、超时或报错的设备再交给 SSH
+            if snmp_first and target.inventory.hosts:
+                processor.task_started(None)
+                snmp_stats, fallback = SnmpCollector(
+                    timeout=settings.SNMP_TIMEOUT, retries=settings.SNMP_RETRIES,
+                    max_inflight=settings.SNMP_MAX_INFLIGHT, max_repetitions=settings.SNMP_MAX_REPETITIONS,
+                ).run(list(target.inventory.hosts.values()), processor, run_name, control)
+                snmp_stats["fallback_hosts"] = fallback
+                control.check()
+                target = target.filter(filter_func=lambda h: h.name in fallback)
+                if preflight and target.inventory.hosts:
+                    unreachable, preflight_stats = probe_hosts(
+                        target.inventory.hosts.values(),
+                        timeout=settings.AUTOMATION_PREFLIGHT_TIMEOUT,
+                        concurrency=settings.AUTOMATION_PREFLIGHT_CONCURRENCY,
+                    )
+                    control.check()
+                    for host_name, reason in unreachable.items():
+                        processor.record_host_unreachable(host_name, f"设备不可达: {reason} (SNMP: {fallback[host_name]})")
+                    target = target.filter(filter_func=lambda h: h.name not in unreachable)
+
+            if not target.inventory.hosts:
+                if snmp_stats is None or unreachable:
+                    logger.warning(f"作业日志 {log_id} 的目标设备均不可达，跳过执行")
+            elif use_async:
+                # 异步引擎：单事件循环驱动全部设备，进度同样经由处理器汇总
+                processor.task_started(None)
+                engine_stats = AsyncEngine(max_concurrency=settings.AUTOMATION_ASYNC_MAX_CONCURRENCY).run(
+                    list(target.inventory.hosts.values()), task_func.__name__, processor, run_name=run_name,
+                    control=control, leases=lease_manager, lease_owner=log_id, **task_args
+                )
+            else:
+                # 使用 with_processors 避免 TypeError
+                target.with_processors([processor]).run(task=leased_task, name=run_name, **lease_args, **task_args)
+        finally:
+            lease_stats = lease_manager.unregister(log_id)
+            pool_stats = connection_pool.unregister(log_id)
+            processor.close()
+
+        metrics: Dict[str, Any] = {"lease": lease_stats, "progress_flushes": processor.flush_count}
+        if preflight_stats is not None:
+            metrics["preflight"] = {**preflight_stats, "hosts": unreachable}
+        if snmp_stats is not None:
+            metrics["snmp"] = snmp_stats
+        if not use_async:
+            # 连接池命中情况 (命中表示复用了之前作业留下的 SSH 会话)
+            metrics["pool"] = pool_stats
+        if engine_stats:
+            metrics["engine"] = engine_stats
+        elif hasattr(target.runner, "stats"):
+            # 各区域自适应并发的变化曲线
+            metrics["concurrency"] = target.runner.stats()
+        if job.task_type == TaskType.BACKUP:
+            # 新备份落盘后，把各设备较旧的明文版本打包为压缩快照 + 差异，并同步配置元数据索引
+            device_dirs = [settings.BACKUP_DIR / (host.data.get("region") or "default") / host.name
+                           for host in target.inventory.hosts.values()]
+            metrics["versions"] = config_version_store.compact_many(device_dirs)
+            config_index.refresh_devices(device_dirs)
+            config_search.sync()
+        aborted_hosts = control.aborted_hosts()
+        if control.reason or aborted_hosts:
+            metrics["abort"] = {"reason": control.reason, "hosts": aborted_hosts}
+        return metrics
+
+    @staticmethod
+    def fail_log(log_id: int, error: Exception) -> JobStatus:
+        """作业中止或引擎崩溃：使用独立会话写入终态，并将未完成的设备/步骤标记为终态，返回最终状态"""
+        aborted = isinstance(error, JobAbortedError)
+        with Session(engine) as err_session:
+            log_err = err_session.get(JobLog, log_id)
+            if not log_err:
+                return JobStatus.FAILED
+            if aborted:
+                log_err.status = JobStatus.CANCELLED if error.reason == ABORT_CANCELLED else JobStatus.TIMEOUT
+                error_msg = str(error)
+            else:
+                log_err.status = JobStatus.FAILED
+                error_msg = f"引擎执行崩溃: {str(error)}"
+        
+            # 确保所有正在运行或等待的设备/步骤都标记为终态，防止前端显示加载中
+            JobResultService(err_session).fail_unfinished(log_err.id, error_msg, error.reason if aborted else "failed")
+            log_err.results = {**(log_err.results or {}), "system_error": error_msg}
+            flag_modified(log_err, "results")
+            log_err.end_time = datetime.now()
+            err_session.add(log_err)
+            err_session.commit()
+            return log_err.status
+
+    def run_shard(self, shard: JobShard, worker_id: str) -> ShardStatus:
+        """
+        worker 进程执行一个作业分片，结果写入同一 JobLog 的明细表。
+        执行期间定期心跳；分片被取消 (或心跳超时后被重新分配) 时中止本分片。
+        所有分片结束后由最后完成的 worker 汇总 JobLog 终态。
+        分片被重新分配后，本进程不再写入这些设备的进度与终态 (以新的持有者为准)。
+        """
+        owned = lambda: shard_queue.owns(shard.id, worker_id)
+        with Session(engine) as session:
+            job = session.get(AutomationJob, shard.job_id)
+            log = session.get(JobLog, shard.log_id)
+            if not job or not log:
+                shard_queue.complete(shard.id, worker_id, ShardStatus.FAILED, error="作业或执行记录不存在")
+                return ShardStatus.FAILED
+
+            job_args = job.args or {}
+            job_timeout = job_args.get("job_timeout", settings.AUTOMATION_JOB_TIMEOUT)
+            # 作业整体截止时间从 API 节点开始执行时起算，分片不会因排队获得额外时长
+            if job_timeout:
+                job_timeout = max(job_timeout - (datetime.now() - log.start_time).total_seconds(), 0.001)
+            control = job_controls.register(
+                log.id, job_timeout=job_timeout,
+                host_timeout=job_args.get("host_timeout", settings.AUTOMATION_HOST_TIMEOUT),
+            )
+
+            stop = threading.Event()
+            def beat():
+                interval = max(settings.AUTOMATION_SHARD_HEARTBEAT_TIMEOUT / 4, 1)
+                while not stop.wait(interval):
+                    try:
+                        if not shard_queue.heartbeat(shard.id, worker_id):
+                            logger.warning(f"分片 {shard.id} 已被取消或重新分配，中止执行")
+                            control.cancel()
+                            return
+                    except Exception as e:
+                        logger.error(f"分片 {shard.id} 心跳失败: {e}")
+            heart = threading.Thread(target=beat, name=f"shard-heartbeat-{shard.id}", daemon=True)
+            heart.start()
+
+            status, metrics, error = ShardStatus.DONE, {}, None
+            result_service = JobResultService(session)
+            try:
+                metrics = self.execute_hosts(session, job, log.id, control, shard.hosts, write_guard=owned)
+                if owned():
+                    result_service.finalize_hosts(log.id, hosts=shard.hosts)
+                if control.reason == ABORT_CANCELLED:
+                    status = ShardStatus.CANCELLED
+                elif control.reason == ABORT_TIMEOUT:
+                    status = ShardStatus.TIMEOUT
+            except Exception as e:
+                if isinstance(e, JobAbortedError):
+                    status = ShardStatus.CANCELLED if e.reason == ABORT_CANCELLED else ShardStatus.TIMEOUT
+                    error = str(e)
+                    logger.warning(f"分片 {shard.id} (作业 [{job.name}]) 被中止: {e}")
+                else:
+                    status = ShardStatus.FAILED
+                    error = f"引擎执行崩溃: {str(e)}"
+                    logger.error(f"分片 {shard.id} (作业 [{job.name}]) 执行崩溃: {e}", exc_info=True)
+                if owned():
+                    result_service.fail_unfinished(log.id, error, status.value if status != ShardStatus.FAILED else "failed", hosts=shard.hosts)
+                else:
+                    logger.warning(f"分片 {shard.id} 已被重新分配，不再写入设备终态")
+            finally:
+                stop.set()
+                job_controls.unregister(log.id)
+                job_event_bus.close(log.id, {"status": status.value})
+
+            metrics["worker"] = worker_id
+            shard_queue.complete(shard.id, worker_id, status, metrics=metrics, error=error)
+            shard_queue.finalize_if_done(log.id)
+            return status
+
+
+# 全局单例
+job_runner = JobRunner()
@@ -0,0 +1,130 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session
+
+from backend.models.automation import SchedulerLease
+
+logger = logging.getLogger("automation")
+
+class LeaderElector:
+    """
+    基于 SQLite 租约行的领导者选举
+    uvicorn --workers N 部署时每个进程都会加载调度器；各进程以条件 UPDATE 抢占同一租约行，
+    只有持有未过期租约的进程执行 on_elected 并运行周期调度，其余进程只提供 API。
+    领导者每个间隔续约一次，进程退出 (或卡住超过 TTL) 后由其他进程在一个 TTL 内接管。
+    """
+
+    def __init__(self, engine, name: str, ttl: float, renew_interval: float,
+                 on_elected: Optional[Callable[[], None]] = None,
+                 on_demoted: Optional[Callable[[], None]] = None,
+                 on_renewed: Optional[Callable[[], None]] = None):
+        self.engine = engine
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_renewed = on_renewed
+        self.identity = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self._expires_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="scheduler-leader-election", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """停止选举并主动释放租约，使其他进程无需等待过期即可接管"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.renew_interval * 2)
+        if self.is_leader:
+            self._set_leader(False)
+            try:
+                with Session(self.engine) as session:
+                    session.exec(
+                        update(SchedulerLease)
+                        .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.identity)
+                        .values(holder=None, expires_at=datetime.now())
+                    )
+                    session.commit()
+                logger.info(f"调度领导者 {self.identity} 已释放租约")
+            except Exception as e:
+                logger.error(f"释放调度领导者租约失败: {e}")
+
+    def try_acquire(self) -> bool:
+        """抢占或续约租约，返回本进程是否持有租约"""
+        now = datetime.now()
+        with Session(self.engine) as session:
+            session.exec(
+                insert(SchedulerLease).values(name=self.name, holder=None, expires_at=now).on_conflict_do_nothing()
+            )
+            # 租约由本进程持有 (续约) 或已过期 (接管) 时更新成功
+            result = session.exec(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name,
+                       or_(SchedulerLease.holder == self.identity, SchedulerLease.expires_at <= now))
+                .values(
+                    holder=self.identity,
+                    expires_at=now + timedelta(seconds=self.ttl),
+                    acquired_at=case((SchedulerLease.holder == self.identity, SchedulerLease.acquired_at), else_=now),
+                )
+            )
+            session.commit()
+        if result.rowcount == 1:
+            self._expires_at = now + timedelta(seconds=self.ttl)
+            return True
+        return False
+
+    def _set_leader(self, leading: bool) -> None:
+        if leading == self.is_leader:
+            return
+        self.is_leader = leading
+        callback = self.on_elected if leading else self.on_demoted
+        if leading:
+            logger.info(f"进程 {self.identity} 当选调度领导者")
+        else:
+            logger.warning(f"进程 {self.identity} 失去调度领导者租约")
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"调度领导者切换回调异常: {e}", exc_info=True)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                leading = self.try_acquire()
+            except Exception as e:
+                # 数据库暂不可用：租约到期前保持现状，到期后主动退位，避免与新领导者重复调度
+                logger.error(f"调度领导者续约失败: {e}")
+                leading = self.is_leader and self._expires_at is not None and datetime.now() < self._expires_at
+            self._set_leader(leading)
+            if leading and self.on_renewed:
+                try:
+                    self.on_renewed()
+                except Exception as e:
+                    logger.error(f"调度领导者续约回调异常: {e}", exc_info=True)
+            self._stop.wait(self.renew_interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        holder = None
+        try:
+            with Session(self.engine) as session:
+                lease = session.get(SchedulerLease, self.name)
+                if lease is not None:
+                    holder = {"holder": lease.holder, "acquired_at": lease.acquired_at, "expires_at": lease.expires_at}
+        except Exception as e:
+            logger.debug(f"读取调度领导者租约失败: {e}")
+        return {"identity": self.identity, "is_leader": self.is_leader, "lease": holder}
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from nornir.core.task import Task, Result
+
+from backend.core.config import settings
+from backend.network_engine.connection_pool import connection_pool
+from backend.network_engine.job_control import JobAbortedError, job_controls
+from backend.network_engine.runner import mark_device_started
+
+
+class DeviceLeaseManager:
+    """
+    设备级租约管理器
+    替代全局作业锁：每台设备同一时刻只允许一个作业持有租约，
+    同时以全局 SSH 会话预算限制所有作业的在途会话总数。
+    目标设备不相交的作业可完全并发，存在交集的作业只在冲突设备上排队。
+    """
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._cond = threading.Condition()
+        self._holders: Dict[str, Any] = {}     # 设备名 -> 持有者 (log_id)
+        self._waiters: Dict[str, int] = {}     # 设备名 -> 排队数
+        self._sessions_in_use = 0
+        self._stats: Dict[Any, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _new_stats(total: int = 0) -> Dict[str, Any]:
+        return {
+            "total_hosts": total,
+            "queue_depth": 0,       # 当前正在等待租约的设备数
+            "active": 0,            # 当前持有租约的设备数
+            "leased": 0,            # 已获得过租约的设备数
+            "contended": 0,         # 因设备被占用而等待过的次数
+            "wait_total": 0.0,      # 累计租约等待时长 (秒)
+            "wait_max": 0.0,        # 单台设备最长等待时长 (秒)
+        }
+
+    def register(self, owner: Any, total_hosts: int = 0) -> None:
+        """登记一个作业，开始统计其租约指标"""
+        with self._cond:
+            self._stats[owner] = self._new_stats(total_hosts)
+
+    def unregister(self, owner: Any) -> Dict[str, Any]:
+        """注销作业并返回其最终租约统计"""
+        with self._cond:
+            stats = self._stats.pop(owner, None) or self._new_stats()
+        stats["wait_total"] = round(stats["wait_total"], 3)
+        stats["wait_max"] = round(stats["wait_max"], 3)
+        stats["wait_avg"] = round(stats["wait_total"] / stats["leased"], 3) if stats["leased"] else 0.0
+        return stats
+
+    def _available(self, device: str) -> bool:
+        return device not in self._holders and self._sessions_in_use < self.max_sessions
+
+    def _enqueue(self, stats: Dict[str, Any], device: str) -> None:
+        """登记一个排队者 (调用方需持有 _cond)"""
+        if device in self._holders:
+            stats["contended"] += 1
+        stats["queue_depth"] += 1
+        self._waiters[device] = self._waiters.get(device, 0) + 1
+
+    def _dequeue(self, stats: Dict[str, Any], device: str) -> None:
+        stats["queue_depth"] -= 1
+        self._waiters[device] -= 1
+        if not self._waiters[device]:
+            del self._waiters[device]
+
+    def _make_room(self, device: str) -> None:
+        """
+        会话预算同样覆盖连接池中的空闲会话: 授予租约后，淘汰其他设备最久未用的空闲会话，
+        使 "持有租约的设备 + 池中空闲会话" 不超过 max_sessions (在锁外关闭连接)。
+        """
+        with self._cond:
+            in_use = self._sessions_in_use
+        connection_pool.trim(self.max_sessions - in_use, keep=device)
+
+    def _grant(self, owner: Any, stats: Dict[str, Any], device: str, waited: float) -> None:
+        """授予租约并记录等待统计 (调用方需持有 _cond)"""
+        self._holders[device] = owner
+        self._sessions_in_use += 1
+        stats["leased"] += 1
+        stats["active"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    @contextmanager
+    def lease(self, owner: Any, device: str, abort_check: Optional[Callable[[], None]] = None):
+        """
+        获取单台设备的租约 (阻塞直到设备空闲且会话预算充足)。
+        每个工作线程同一时刻最多持有一个租约，因此不存在死锁。
+        abort_check 在等待期间周期调用，抛出异常即放弃排队 (用于作业取消/超时)。
+        """
+        start = time.monotonic()
+        with self._cond:
+            stats = self._stats.setdefault(owner, self._new_stats())
+            self._enqueue(stats, device)
+            try:
+                while not self._available(device):
+                    self._cond.wait(timeout=1.0 if abort_check else None)
+                    if abort_check:
+                        abort_check()
+            finally:
+                self._dequeue(stats, device)
+            waited = time.monotonic() - start
+            self._grant(owner, stats, device, waited)
+
+        try:
+            self._make_room(device)
+            yield waited
+        finally:
+            self.release(owner, device)
+
+    @asynccontextmanager
+    async def lease_async(self, owner: Any, device: str, abort_check: Optional[Callable[[], None]] = None,
+                          poll_interval: float = 0.2):
+        """
+        lease 的协程版本 (供异步引擎使用): 轮询等待而不是阻塞，等待期间不占用事件循环线程。
+        排队、冲突与等待时长的统计口径与 lease 相同。
+        """
+        start = time.monotonic()
+        with self._cond:
+            stats = self._stats.setdefault(owner, self._new_stats())
+            self._enqueue(stats, device)
+        granted = False
+        try:
+            while True:
+                with self._cond:
+                    if self._available(device):
+                        self._dequeue(stats, device)
+                        waited = time.monotonic() - start
+                        self._grant(owner, stats, device, waited)
+                        granted = True
+                        break
+                await asyncio.sleep(poll_interval)
+                if abort_check:
+                    abort_check()
+        finally:
+            if not granted:
+                with self._cond:
+                    self._dequeue(stats, device)
+
+        try:
+            await asyncio.to_thread(self._make_room, device)
+            yield waited
+        finally:
+            self.release(owner, device)
+
+    def release(self, owner: Any, device: str) -> None:
+        """释放设备租约"""
+        with self._cond:
+            self._holders.pop(device, None)
+            self._sessions_in_use -= 1
+            if owner in self._stats:
+                self._stats[owner]["active"] -= 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前租约与排队状态 (用于监控接口)"""
+        with self._cond:
+            return {
+                "max_sessions": self.max_sessions,
+                "sessions_in_use": self._sessions_in_use,
+                "leased_devices": len(self._holders),
+                "contended_devices": sorted(d for d in self._waiters if d in self._holders),
+                "jobs": {
+                    str(owner): {
+                        **stats,
+                        "wait_total": round(stats["wait_total"], 3),
+                        "wait_max": round(stats["wait_max"], 3),
+                    }
+                    for owner, stats in self._stats.items()
+                },
+            }
+
+
+def leased_task(task: Task, task_func: Callable[..., Result], lease_owner: Any, **kwargs) -> Result:
+    """
+    Nornir 任务包装器: 先获取设备租约，再在当前任务上下文中执行真实任务函数。
+    直接调用 task_func 而不是 task.run，保证结果层级与处理器回调和原先一致。
+    作业登记了控制句柄时，设备执行期间受取消与截止时间约束，被中止的设备以 JobAbortedError 结束。
+    持有租约期间从连接池借出该设备的空闲连接，正常结束后归还，异常或中止时关闭。
+    """
+    control = job_controls.get(lease_owner)
+    if control:
+        control.check()
+    with lease_manager.lease(lease_owner, task.host.name, abort_check=control.check if control else None):
+        mark_device_started()
+        connection_pool.checkout(task.host, lease_owner)
+        reusable = False
+        try:
+            if control is None:
+                result = task_func(task, **kwargs)
+            else:
+                with control.host_scope(task.host):
+                    result = _run_controlled(task, task_func, control, **kwargs)
+            reusable = True
+            return result
+        finally:
+            if reusable:
+                connection_pool.checkin(task.host)
+            else:
+                connection_pool.discard(task.host)
+
+
+def _run_controlled(task: Task, task_func: Callable[..., Result], control: Any, **kwargs) -> Result:
+    """在控制句柄约束下执行任务函数，将取消/超时导致的失败统一转换为 JobAbortedError"""
+    try:
+        result = task_func(task, **kwargs)
+    except JobAbortedError:
+        raise
+    except Exception as e:
+        # 连接被看门狗关闭导致的异常，统一归为取消/超时
+        reason = control.host_abort_reason(task.host.name)
+        if reason:
+            raise JobAbortedError(reason) from e
+        raise
+    # 任务函数自行捕获了异常并返回失败结果时，同样按中止原因记录
+    reason = control.host_abort_reason(task.host.name)
+    if reason and result.failed:
+        raise JobAbortedError(reason)
+    return result
+
+
+# 全局单例
+lease_manager = DeviceLeaseManager(max_sessions=settings.AUTOMATION_MAX_SESSIONS)
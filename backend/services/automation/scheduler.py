@@ -1,341 +1,277 @@
 import logging
-import threading
 import time
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlmodel import Session, select
 
+from backend.core.config import settings
 from backend.core.database import engine
-from backend.models.automation import AutomationJob, JobLog, JobStatus, TaskType
-from backend.network_engine.core import NetworkEngine
-from backend.network_engine.nornir_module.tasks.health import inspect_health
-from backend.network_engine.nornir_module.tasks.backup import backup_config
-from backend.network_engine.nornir_module.tasks.commands import run_commands, apply_config
+from backend.models.automation import AutomationJob, JobLog, JobStatus
+from backend.network_engine.job_control import ABORT_CANCELLED, ABORT_TIMEOUT, JobAbortedError, job_controls
+from backend.services.automation.job_results import JobResultService
+from backend.services.automation.job_runner import job_runner
+from backend.services.automation.event_bus import job_event_bus
+from backend.services.automation.executor import JobExecutor, JobPriority, JobQueueFullError
+from backend.services.automation.shard_queue import shard_queue
+from backend.services.automation.leader_election import LeaderElector
 
 from sqlalchemy.orm.attributes import flag_modified
 logger = logging.getLogger("automation")
 
-class NornirProgressProcessor:
-    """Nornir 处理器：用于在每个子任务完成时即时同步进度到数据库"""
-    def __init__(self, job_log_id, engine):
-        self.job_log_id = job_log_id
-        self.engine = engine
-
-    def task_started(self, task: Any) -> None:
-        # 子任务开始时，可以在这里标记状态为 running，但目前主要依赖 task_instance_completed
-        pass
-
-    def task_completed(self, task: Any, result: Any) -> None:
-        pass
-
-    def task_instance_started(self, task: Any, host: Any) -> None:
-        """核心回调：当一个设备的一个子任务开始执行时触发"""
-        from sqlalchemy.orm.attributes import flag_modified
-        with Session(self.engine) as session:
-            log = session.get(JobLog, self.job_log_id)
-            if not log: return
-
-            summary = log.results or {}
-            host_name = host.name
-            
-            if host_name not in summary:
-                summary[host_name] = {"success": False, "status": "running", "steps": [], "error": None}
-            
-            steps = summary[host_name].get('steps', [])
-            
-            # 找到对应步骤并标记为正在执行
-            found = False
-            for i, s in enumerate(steps):
-                if s['name'] == task.name:
-                    steps[i]['status'] = "running"
-                    found = True
-                    break
-            
-            # 如果没找到（对于非预置步骤），则新增一个正在运行的步骤
-            if not found and task.name and not task.name.startswith("NAPALM 数据采集"): 
-                # 排除通用父任务名，只记录有意义的子任务名
-                steps.append({
-                    "name": task.name,
-                    "success": True,
-                    "status": "running",
-                    "result": None
-                })
-
-            summary[host_name]['steps'] = steps
-            log.results = summary
-            flag_modified(log, "results")
-            session.add(log)
-            session.commit()
-
-    def task_instance_completed(self, task: Any, host: Any, result: Any) -> None:
-        """核心回调：当一个设备的一个子任务完成时触发"""
-        from sqlalchemy.orm.attributes import flag_modified
-        with Session(self.engine) as session:
-            log = session.get(JobLog, self.job_log_id)
-            if not log: return
-
-            summary = log.results or {}
-            host_name = host.name
-            
-            if host_name not in summary:
-                summary[host_name] = {"success": False, "status": "running", "steps": [], "error": None}
-            
-            steps = summary[host_name].get('steps', [])
-            
-            # 构造步骤详情
-            res_val = result.result
-            if not isinstance(res_val, (dict, list, str, int, float, bool, type(None))):
-                res_val = str(res_val)
-
-            step_data = {
-                "name": task.name or "Unnamed Task",
-                "success": not result.failed,
-                "status": "failed" if result.failed else "success",
-                "result": res_val,
-                "exception": str(result.exception) if result.exception else None
-            }
-
-            # 更新对应步骤
-            found = False
-            for i, s in enumerate(steps):
-                if s['name'] == task.name:
-                    steps[i] = step_data
-                    found = True
-                    break
-            if not found:
-                steps.append(step_data)
-
-            summary[host_name]['steps'] = steps
-            
-            # 状态翻转判定
-            any_failed = any(s.get('success') is False for s in steps)
-            summary[host_name]['success'] = not any_failed
-            if result.failed:
-                summary[host_name]['error'] = str(result.exception) or "Sub-task failed"
-
-            log.results = summary
-            flag_modified(log, "results")
-            session.add(log)
-            session.commit()
-
-    def subtask_instance_started(self, task: Any, host: Any) -> None:
-        self.task_instance_started(task, host)
-
-    def subtask_instance_completed(self, task: Any, host: Any, result: Any) -> None:
-        self.task_instance_completed(task, host, result)
+def _publish_queue_positions(queue: List[Dict[str, Any]]) -> None:
+    """排队情况变化时，向各排队作业的事件流推送最新位置"""
+    for item in queue:
+        job_event_bus.publish(item["log_id"], "queued", {"position": item["position"], "priority": item["priority"]})
 
 class AutomationScheduler:
     """自动化调度与执行服务"""
     _instance = None
     _scheduler = None
+    _elector: Optional[LeaderElector] = None
+    _cron_specs: Dict[str, str] = {}   # 已注册的周期任务: APScheduler 作业 ID -> Cron 表达式
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(AutomationScheduler, cls).__new__(cls)
             cls._scheduler = BackgroundScheduler()
             cls._scheduler.start()
-            cls._lock = threading.Lock()
-            logger.info("APScheduler 已启动，并发执行锁已就绪")
+            # 所有作业统一经由有界执行池运行 (手动、快速任务与定时触发)
+            cls._executor = JobExecutor(
+                runner=cls._instance._run_nornir_job,
+                max_workers=settings.AUTOMATION_JOB_WORKERS,
+                max_queue=settings.AUTOMATION_JOB_QUEUE_LIMIT,
+                on_queue_change=_publish_queue_positions,
+            )
+            logger.info("APScheduler 已启动，设备级租约调度已就绪")
         return cls._instance
 
-    def _run_nornir_job(self, job_id: int, log_id: Optional[int] = None):
-        """核心任务执行逻辑 (由调度器异步调用)"""
-        # 引入全局执行锁，防止多任务并发冲突
-        with self._lock:
-            with Session(engine) as session:
-                job = session.get(AutomationJob, job_id)
-                if not job:
-                    return
+    @property
+    def executor(self) -> JobExecutor:
+        return self._executor
 
-                # 1. 获取或创建执行记录
-                if log_id:
-                    log = session.get(JobLog, log_id)
-                    if not log:
-                        logger.error(f"指定的 log_id {log_id} 不存在")
-                        return
-                    # 确保状态为运行中
-                    log.status = JobStatus.RUNNING
-                    log.start_time = datetime.now()
-                else:
-                    log = JobLog(job_id=job.id, status=JobStatus.RUNNING, start_time=datetime.now())
-                    session.add(log)
-                
+    def submit_job(self, job_id: int, log_id: Optional[int] = None,
+                   priority: JobPriority = JobPriority.MANUAL, trigger_type: str = "manual") -> Tuple[int, int]:
+        """
+        提交作业到执行池，返回 (log_id, 排队位置)。
+        未提供 log_id 时先创建一条 PENDING 状态的执行记录；队列已满时记录被标记为取消并抛出 JobQueueFullError。
+        """
+        with Session(engine) as session:
+            if log_id is None:
+                job = session.get(AutomationJob, job_id)
+                log = JobLog(
+                    job_id=job_id,
+                    status=JobStatus.PENDING,
+                    start_time=datetime.now(),
+                    total_devices=len(job.target_devices) if job and job.target_devices else 0,
+                    trigger_type=trigger_type,
+                    results={}
+                )
+                session.add(log)
                 session.commit()
                 session.refresh(log)
+                log_id = log.id
 
-            start_perf_counter = time.time()
             try:
-                engine_inst = NetworkEngine()
-                # 重新加载 Inventory 以确保能找到最新的设备
-                engine_inst.reload_inventory()
-                
-                # 2. 过滤目标设备 (修正过滤逻辑)
-                if job.target_devices and len(job.target_devices) > 0:
-                    # 使用 Nornir 过滤器，匹配名称列表中的任何一个
-                    target = engine_inst.nornir.filter(filter_func=lambda h: h.name in job.target_devices)
-                else:
-                    target = engine_inst.nornir # 全量
-
-                if not target.inventory.hosts:
-                    raise ValueError("资产库中未找到匹配的目标设备，请检查设备名称是否正确。")
-
-                # 3. 选择任务函数
-                task_func = None
-                task_args = {}
-                
-                if job.task_type == TaskType.INSPECT:
-                    task_func = inspect_health
-                elif job.task_type == TaskType.BACKUP:
-                    task_func = backup_config 
-                    task_args = {"backup_path": "e:\\NetOps\\backups"}
-                elif job.task_type == TaskType.QUERY:
-                    task_func = run_commands
-                    task_args = {"commands": job.commands}
-                elif job.task_type == TaskType.CONFIG:
-                    task_func = apply_config
-                    task_args = {"config_commands": job.commands}
-
-                if not task_func:
-                    raise ValueError(f"暂未实现的任务类型: {job.task_type}")
-
-                # 4. 预先初始化结果状态 (让前端立即显示 "执行中")
-                initial_summary = {}
-                # 确保 inventory 中有 host
-                if target.inventory.hosts:
-                    for host_name in target.inventory.hosts.keys():
-                        initial_summary[host_name] = {
-                            "success": False,
-                            "status": "running",
-                            "steps": [],
-                            "error": None
-                        }
-                    log.results = initial_summary
+                position = self._executor.submit(job_id, log_id, priority)
+            except JobQueueFullError as e:
+                log = session.get(JobLog, log_id)
+                if log:
+                    log.status = JobStatus.CANCELLED
+                    log.end_time = datetime.now()
+                    log.results = {"system_error": str(e)}
                     session.add(log)
                     session.commit()
-                    # 再次刷新以确保后续操作基于最新状态
-                    session.refresh(log)
+                raise
+        return log_id, position
 
-                # 5. 执行任务 (使用处理器提供实时反馈)
-                processor = NornirProgressProcessor(log.id, engine)
-                
-                # Use string comparison to handle both Enum and raw string task types
-                requested_task_type = str(job.task_type).lower()
-                
-                if 'inspect' in requested_task_type:
-                    # 预置 Pending 步骤 (优化：移除了冗余的 SSH 拨测，由 napalm_get 自动处理连接)
-                    log.results = log.results or {}
-                    for host in list(target.inventory.hosts.keys()):
-                        log.results[host] = {
-                            "success": False, 
-                            "status": "running", 
-                            "steps": [
-                                {"name": "1. 建立 SSH 通信并执行 Version 采集", "success": True, "status": "pending", "result": None},
-                                {"name": "2. 采集 CPU 与内存利用率指标", "success": True, "status": "pending", "result": None},
-                                {"name": "3. 采集接口状态与流量计数器", "success": True, "status": "pending", "result": None},
-                                {"name": "深度健康巡检", "success": True, "status": "pending", "result": None}
-                            ], 
-                            "error": None
-                        }
-                    session.add(log)
-                    session.commit()
-                    session.refresh(log)
+    def _run_nornir_job(self, job_id: int, log_id: Optional[int] = None):
+        """核心任务执行逻辑 (由调度器异步调用)"""
+        with Session(engine) as session:
+            job = session.get(AutomationJob, job_id)
+            if not job:
+                return
+
+            # 1. 获取或创建执行记录
+            if log_id:
+                log = session.get(JobLog, log_id)
+                if not log:
+                    logger.error(f"指定的 log_id {log_id} 不存在")
+                    return
+                # 排队期间已被取消的作业直接跳过
+                if log.status == JobStatus.CANCELLED:
+                    logger.info(f"作业日志 {log_id} 已取消，跳过执行")
+                    return
+                # 确保状态为运行中
+                log.status = JobStatus.RUNNING
+                log.start_time = datetime.now()
+            else:
+                log = JobLog(job_id=job.id, status=JobStatus.RUNNING, start_time=datetime.now())
+                session.add(log)
+            
+            session.commit()
+            session.refresh(log)
 
-                    # 执行巡检 (使用 with_processors 避免 TypeError)
-                    target.with_processors([processor]).run(task=inspect_health, name="深度健康巡检")
-                    
-                else:
-                    # 其他类型任务
-                    target.with_processors([processor]).run(task=task_func, **task_args)
+            log_id = log.id
+            final_event = {"status": JobStatus.FAILED.value}
+            start_perf_counter = time.time()
+            job_args = job.args or {}
+
+            # 分布式模式：拆分为分片写入持久化队列，由 worker 进程执行并汇总终态，本进程不再参与
+            if job_args.get("distributed", settings.AUTOMATION_EXECUTION_MODE == "distributed"):
+                try:
+                    job_runner.select_task(job)
+                    shard_queue.enqueue(session, log_id, job.id, job.target_devices or None)
+                    logger.info(f"作业 [{job.name}] 已分发至 worker 分片队列")
+                    return
+                except Exception as e:
+                    logger.error(f"作业 [{job.name}] 分发失败: {e}", exc_info=True)
+                    job_runner.fail_log(log_id, e)
+                    job_event_bus.close(log_id, {"status": JobStatus.FAILED.value})
+                    return
+
+            # 登记控制句柄：取消接口与看门狗通过它中止作业 (作业级与设备级截止时间)
+            control = job_controls.register(
+                log_id,
+                job_timeout=job_args.get("job_timeout", settings.AUTOMATION_JOB_TIMEOUT),
+                host_timeout=job_args.get("host_timeout", settings.AUTOMATION_HOST_TIMEOUT),
+            )
+            try:
+                # 2~5. 按目标设备定向构建 Inventory 并执行 (未指定目标设备时加载全量)
+                metrics = job_runner.execute_hosts(session, job, log_id, control, job.target_devices or None)
 
-                # 6. 后处理：更新最终状态及统计
+                # 6. 后处理：更新最终状态及统计 (由明细表 SQL 聚合得出)
                 session.refresh(log)
-                results = log.results or {}
-                
-                final_success = 0
-                for host_name, h_data in results.items():
-                    # 修正状态：只要没有正在运行的任务，就从 running 转为终态
-                    if h_data.get('status') == 'running':
-                        h_data['status'] = 'success' if h_data.get('success') else 'failed'
-                    if h_data.get('success'):
-                        final_success += 1
-                
-                log.results = results
-                flag_modified(log, "results")
-                
-                log.total_devices = len(results)
+                log.metrics = {**(log.metrics or {}), **metrics}
+                flag_modified(log, "metrics")
+
+                result_service = JobResultService(session)
+                # 修正状态：只要没有正在运行的任务，就从 running 转为终态
+                result_service.finalize_hosts(log.id)
+                total, final_success = result_service.host_counts(log.id)
+
+                log.total_devices = total
                 log.success_count = final_success
-                log.failed_count = len(results) - final_success
-                log.status = JobStatus.SUCCESS if log.failed_count == 0 else (JobStatus.PARTIAL if final_success > 0 else JobStatus.FAILED)
+                log.failed_count = total - final_success
+                log.unreachable_count = result_service.unreachable_count(log.id)
+                if control.reason == ABORT_CANCELLED:
+                    log.status = JobStatus.CANCELLED
+                elif control.reason == ABORT_TIMEOUT:
+                    log.status = JobStatus.TIMEOUT
+                else:
+                    log.status = JobStatus.SUCCESS if log.failed_count == 0 else (JobStatus.PARTIAL if final_success > 0 else JobStatus.FAILED)
                 log.end_time = datetime.now()
                 log.duration = round(time.time() - start_perf_counter, 2)
-                
+            
                 session.add(log)
                 session.commit()
                 logger.info(f"作业 [{job.name}] 执行完毕，耗时: {log.duration}s, 成功: {final_success}")
+                final_event = {
+                    "status": log.status.value,
+                    "success": log.success_count,
+                    "failed": log.failed_count,
+                    "duration": log.duration,
+                }
 
             except Exception as e:
-                logger.error(f"作业 [{job.name}] 执行崩溃: {e}", exc_info=True)
-                with Session(engine) as err_session: # 使用独立会话处理错误状态
-                    log_err = err_session.get(JobLog, log.id)
-                    if log_err:
-                        log_err.status = JobStatus.FAILED
-                        results = log_err.results or {}
-                        error_msg = f"引擎执行崩溃: {str(e)}"
-                        
-                        # 确保所有正在运行或等待的设备/步骤都标记为失败，防止前端显示加载中
-                        if not results:
-                            results = {"system_error": error_msg}
-                        else:
-                            for h in results:
-                                if isinstance(results[h], dict):
-                                    if results[h].get("status") in ["running", "pending"]:
-                                        results[h]["status"] = "failed"
-                                        results[h]["error"] = error_msg
-                                        # 同步更新子步骤
-                                        for s in results[h].get("steps", []):
-                                            if s.get("status") in ["running", "pending"]:
-                                                s["status"] = "failed"
-                                                s["success"] = False
-                            results["system_error"] = error_msg
-                        
-                        log_err.results = results
-                        flag_modified(log_err, "results")
-                        log_err.end_time = datetime.now()
-                        err_session.add(log_err)
-                        err_session.commit()
-    
+                if isinstance(e, JobAbortedError):
+                    logger.warning(f"作业 [{job.name}] 在执行前被中止: {e}")
+                else:
+                    logger.error(f"作业 [{job.name}] 执行崩溃: {e}", exc_info=True)
+                final_event = {"status": job_runner.fail_log(log_id, e).value}
+            finally:
+                job_controls.unregister(log_id)
+                # 通知事件流订阅者作业已结束 (携带最终状态与统计)
+                job_event_bus.close(log_id, final_event)
+
     def add_job_to_scheduler(self, job: AutomationJob):
         """将定义的作业加入 APScheduler 队列"""
         if not job.is_active:
             return
 
-        # 封装执行函数
-        def run_me():
-            self._run_nornir_job(job.id)
+        # 封装执行函数 (触发时仅提交到执行池，由工作线程按优先级执行)
+        def run_me(priority: JobPriority = JobPriority.SCHEDULED):
+            try:
+                self.submit_job(job.id, priority=priority, trigger_type="auto")
+            except JobQueueFullError as e:
+                logger.warning(f"定时作业 [{job.name}] 未能入队: {e}")
         
         from backend.models.automation import JobScheduleType
         
         # 根据调度类型选择触发器
         if job.schedule_type == JobScheduleType.IMMEDIATE:
-            self._scheduler.add_job(run_me, 'date', run_date=datetime.now())
+            self._scheduler.add_job(run_me, 'date', run_date=datetime.now(), args=[JobPriority.MANUAL])
         elif job.schedule_type == "cron":
-            self._scheduler.add_job(run_me, CronTrigger.from_crontab(job.schedule_value), id=f"job_{job.id}")
+            # 周期调度只在领导者进程注册；其他进程创建的作业由领导者在下一次续约时同步
+            if not self.is_leader:
+                return
+            self._scheduler.add_job(run_me, CronTrigger.from_crontab(job.schedule_value), id=f"job_{job.id}", replace_existing=True)
+            self._cron_specs[f"job_{job.id}"] = job.schedule_value
         
+    @property
+    def is_leader(self) -> bool:
+        return self._elector is not None and self._elector.is_leader
+
+    @property
+    def elector(self) -> Optional[LeaderElector]:
+        return self._elector
+
     def setup_scheduled_tasks(self):
-        """系统启动时扫面数据库并恢复周期性任务"""
+        """
+        系统启动时参与调度领导者选举。
+        多进程部署 (uvicorn --workers N) 时只有持有租约的进程恢复并运行周期性任务，其余进程只提供 API 与作业执行；
+        领导者退出后由其他进程在租约 TTL 内接管。
+        """
+        if self._elector is None:
+            self._elector = LeaderElector(
+                engine, "automation-scheduler",
+                ttl=settings.AUTOMATION_LEADER_LEASE_TTL,
+                renew_interval=settings.AUTOMATION_LEADER_RENEW_INTERVAL,
+                on_elected=self.sync_scheduled_tasks,
+                on_demoted=self._clear_scheduled_tasks,
+                on_renewed=self.sync_scheduled_tasks,
+            )
+            self._elector.start()
+
+    def shutdown(self):
+        """进程退出时释放领导者租约，便于其他进程立即接管"""
+        if self._elector is not None:
+            self._elector.stop()
+
+    def sync_scheduled_tasks(self):
+        """领导者进程：将 APScheduler 中的周期任务与数据库对齐 (新增、删除或修改过 Cron 表达式的作业)"""
         with Session(engine) as session:
-            jobs = session.exec(select(AutomationJob).where(AutomationJob.is_active == True)).all()
-            for job in jobs:
-                if job.schedule_type == "cron":
-                    self.add_job_to_scheduler(job)
-        logger.info(f"已恢复 {len(jobs)} 个调度任务")
+            jobs = session.exec(
+                select(AutomationJob).where(AutomationJob.is_active == True, AutomationJob.schedule_type == "cron")
+            ).all()
+        wanted = {f"job_{job.id}": job for job in jobs}
+        for key in list(self._cron_specs):
+            if key not in wanted:
+                self.remove_job_from_scheduler(int(key[len("job_"):]))
+        added = 0
+        for key, job in wanted.items():
+            if self._cron_specs.get(key) == job.schedule_value:
+                continue
+            try:
+                self.add_job_to_scheduler(job)
+                added += 1
+            except Exception as e:
+                logger.error(f"作业 [{job.name}] 的 Cron 表达式无效 ({job.schedule_value}): {e}")
+                self._cron_specs[key] = job.schedule_value
+        if added:
+            logger.info(f"已同步 {added} 个调度任务 (当前共 {len(wanted)} 个)")
+
+    def _clear_scheduled_tasks(self):
+        """失去领导者租约：移除本进程的全部周期任务，避免与新领导者重复触发"""
+        for key in list(self._cron_specs):
+            self.remove_job_from_scheduler(int(key[len("job_"):]))
 
     def remove_job_from_scheduler(self, job_id: int):
         """从 APScheduler 中移除指定作业的定时调度"""
         try:
+            self._cron_specs.pop(f"job_{job_id}", None)
             self._scheduler.remove_job(f"job_{job_id}")
             logger.info(f"作业 job_{job_id} 已从调度器移除")
         except Exception as e:
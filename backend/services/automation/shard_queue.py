@@ -0,0 +1,257 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.models.automation import JobLog, JobShard, JobStatus, ShardStatus
+from backend.models.device import Device
+from backend.services.automation.job_results import JobResultService, UPSERT_CHUNK
+
+logger = logging.getLogger("automation")
+
+# 仍需 worker 处理的分片状态
+ACTIVE_STATUSES = (ShardStatus.PENDING, ShardStatus.CLAIMED, ShardStatus.CANCELLING)
+
+class ShardQueue:
+    """
+    分布式作业分片队列 (基于 SQLite 的持久化队列)
+    API 进程将作业按区域 / 设备数拆分为 JobShard 行；worker 进程以条件 UPDATE 原子领取分片，
+    执行期间定期心跳，心跳超时的分片重新入队。所有分片结束后，由最后完成的 worker 汇总写入 JobLog 终态。
+    """
+
+    def __init__(self, engine, shard_size: int, shard_by: str, heartbeat_timeout: float, max_attempts: int):
+        self.engine = engine
+        self.shard_size = max(1, shard_size)
+        self.shard_by = shard_by
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+
+    # --- 入队 (API 进程) ---
+
+    def enqueue(self, session: Session, log_id: int, job_id: int, host_names: Optional[List[str]] = None) -> int:
+        """拆分作业并写入分片队列，同时将全部设备初始化为 pending，返回分片数"""
+        rows = []
+        if host_names is None:
+            rows = session.exec(select(Device.name, Device.region)).all()
+        else:
+            for i in range(0, len(host_names), UPSERT_CHUNK):
+                rows.extend(session.exec(
+                    select(Device.name, Device.region).where(Device.name.in_(host_names[i:i + UPSERT_CHUNK]))
+                ).all())
+        if not rows:
+            raise ValueError("资产库中未找到匹配的目标设备，请检查设备名称是否正确。")
+
+        groups: Dict[str, List[str]] = {}
+        for name, region in sorted(rows):
+            key = (region or "default") if self.shard_by == "region" else "default"
+            groups.setdefault(key, []).append(name)
+
+        shards = []
+        for key, names in groups.items():
+            for i in range(0, len(names), self.shard_size):
+                shards.append(JobShard(log_id=log_id, job_id=job_id, shard_key=key, hosts=names[i:i + self.shard_size]))
+        session.add_all(shards)
+        session.commit()
+
+        # 预先写入设备行，未被领取的分片在前端同样可见
+        JobResultService(session).init_hosts(log_id, {
+            name: {"success": False, "status": "pending", "steps": [], "error": None} for name, _ in rows
+        })
+        logger.info(f"作业日志 {log_id} 已拆分为 {len(shards)} 个分片 ({len(rows)} 台设备，{len(groups)} 个分组)")
+        return len(shards)
+
+    def cancel_log(self, log_id: int) -> bool:
+        """取消作业的全部分片：排队中的直接取消，执行中的标记为 cancelling 由 worker 心跳感知。返回该作业是否为分布式执行"""
+        with Session(self.engine) as session:
+            shards = session.exec(select(JobShard).where(JobShard.log_id == log_id)).all()
+            if not shards:
+                return False
+            result_service = JobResultService(session)
+            for shard in shards:
+                # 条件更新，避免覆盖与取消同时发生的领取
+                if shard.status == ShardStatus.PENDING:
+                    cancelled = session.exec(
+                        update(JobShard)
+                        .where(JobShard.id == shard.id, JobShard.status == ShardStatus.PENDING)
+                        .values(status=ShardStatus.CANCELLED, finished_at=datetime.now())
+                    )
+                    if cancelled.rowcount == 1:
+                        result_service.fail_unfinished(log_id, "作业已取消", ShardStatus.CANCELLED.value, hosts=shard.hosts)
+                        continue
+                session.exec(
+                    update(JobShard)
+                    .where(JobShard.id == shard.id, JobShard.status == ShardStatus.CLAIMED)
+                    .values(status=ShardStatus.CANCELLING)
+                )
+            session.commit()
+        self.finalize_if_done(log_id)
+        return True
+
+    # --- 领取与心跳 (worker 进程) ---
+
+    def claim(self, worker_id: str) -> Optional[JobShard]:
+        """原子领取一个排队中的分片 (条件 UPDATE 保证多 worker 之间不会重复领取)"""
+        self.requeue_stale()
+        with Session(self.engine) as session:
+            candidates = session.exec(
+                select(JobShard.id).where(JobShard.status == ShardStatus.PENDING).order_by(JobShard.id).limit(10)
+            ).all()
+            for shard_id in candidates:
+                now = datetime.now()
+                claimed = session.exec(
+                    update(JobShard)
+                    .where(JobShard.id == shard_id, JobShard.status == ShardStatus.PENDING)
+                    .values(status=ShardStatus.CLAIMED, worker_id=worker_id, claimed_at=now,
+                            heartbeat_at=now, attempts=JobShard.attempts + 1)
+                )
+                session.commit()
+                if claimed.rowcount == 1:
+                    return session.get(JobShard, shard_id)
+        return None
+
+    def heartbeat(self, shard_id: int, worker_id: str) -> bool:
+        """刷新心跳，返回 False 表示分片已被取消或已被重新分配，worker 应中止执行"""
+        with Session(self.engine) as session:
+            alive = session.exec(
+                update(JobShard)
+                .where(JobShard.id == shard_id, JobShard.worker_id == worker_id, JobShard.status == ShardStatus.CLAIMED)
+                .values(heartbeat_at=datetime.now())
+            )
+            session.commit()
+            return alive.rowcount == 1
+
+    def owns(self, shard_id: int, worker_id: str) -> bool:
+        """分片是否仍由该 worker 持有 (含已请求取消但尚未结束的分片)；被重新分配后返回 False"""
+        with Session(self.engine) as session:
+            shard = session.get(JobShard, shard_id)
+            return (shard is not None and shard.worker_id == worker_id
+                    and shard.status in (ShardStatus.CLAIMED, ShardStatus.CANCELLING))
+
+    def complete(self, shard_id: int, worker_id: str, status: ShardStatus,
+                 metrics: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> bool:
+        """写入分片终态 (仅当仍由该 worker 持有时生效)"""
+        with Session(self.engine) as session:
+            done = session.exec(
+                update(JobShard)
+                .where(JobShard.id == shard_id, JobShard.worker_id == worker_id,
+                       JobShard.status.in_([ShardStatus.CLAIMED, ShardStatus.CANCELLING]))
+                .values(status=status, metrics=metrics or {}, error=error, finished_at=datetime.now())
+            )
+            session.commit()
+            return done.rowcount == 1
+
+    def requeue_stale(self) -> int:
+        """心跳超时的分片：重新入队，或在重试次数耗尽 / 已请求取消时直接结束"""
+        cutoff = datetime.now() - timedelta(seconds=self.heartbeat_timeout)
+        touched = set()
+        with Session(self.engine) as session:
+            stale = session.exec(
+                select(JobShard).where(
+                    JobShard.status.in_([ShardStatus.CLAIMED, ShardStatus.CANCELLING]), JobShard.heartbeat_at < cutoff
+                )
+            ).all()
+            for shard in stale:
+                if shard.status == ShardStatus.CANCELLING:
+                    values = {"status": ShardStatus.CANCELLED, "finished_at": datetime.now()}
+                elif shard.attempts >= self.max_attempts:
+                    values = {"status": ShardStatus.FAILED, "finished_at": datetime.now(),
+                              "error": f"worker {shard.worker_id} 心跳超时，已达最大重试次数 {self.max_attempts}"}
+                else:
+                    values = {"status": ShardStatus.PENDING, "worker_id": None}
+                # 以原心跳时间为条件，避免与刚恢复心跳的 worker 或其他 worker 的回收冲突
+                moved = session.exec(
+                    update(JobShard)
+                    .where(JobShard.id == shard.id, JobShard.heartbeat_at == shard.heartbeat_at, JobShard.status == shard.status)
+                    .values(**values)
+                )
+                session.commit()
+                if moved.rowcount == 1:
+                    logger.warning(f"分片 {shard.id} (作业日志 {shard.log_id}) 的 worker {shard.worker_id} 心跳超时，转为 {values['status'].value}")
+                    touched.add(shard.log_id)
+        for log_id in touched:
+            self.finalize_if_done(log_id)
+        return len(touched)
+
+    # --- 汇总 ---
+
+    def finalize_if_done(self, log_id: int) -> bool:
+        """所有分片结束后汇总设备统计并写入 JobLog 终态，返回是否由本次调用完成汇总"""
+        with Session(self.engine) as session:
+            shards = session.exec(select(JobShard).where(JobShard.log_id == log_id)).all()
+            if not shards or any(s.status in ACTIVE_STATUSES for s in shards):
+                return False
+            log = session.get(JobLog, log_id)
+            if log is None or log.status != JobStatus.RUNNING:
+                return False
+
+            result_service = JobResultService(session)
+            result_service.finalize_hosts(log_id)
+            # 重试耗尽的分片中仍未执行的设备
+            result_service.fail_unfinished(log_id, "分片执行失败")
+            total, success = result_service.host_counts(log_id)
+            unreachable = result_service.unreachable_count(log_id)
+
+            counts = Counter(s.status.value for s in shards)
+            if counts.get(ShardStatus.CANCELLED.value):
+                status = JobStatus.CANCELLED
+            elif counts.get(ShardStatus.TIMEOUT.value):
+                status = JobStatus.TIMEOUT
+            else:
+                status = JobStatus.SUCCESS if total == success else (JobStatus.PARTIAL if success > 0 else JobStatus.FAILED)
+
+            end_time = datetime.now()
+            metrics = {**(log.metrics or {}), "shards": {
+                "total": len(shards),
+                "status": dict(counts),
+                "workers": sorted({s.worker_id for s in shards if s.worker_id}),
+                "items": [
+                    {
+                        "id": s.id, "key": s.shard_key, "hosts": len(s.hosts), "worker": s.worker_id,
+                        "status": s.status.value, "attempts": s.attempts, "error": s.error,
+                        "elapsed": round((s.finished_at - s.claimed_at).total_seconds(), 3) if s.claimed_at and s.finished_at else None,
+                    }
+                    for s in shards
+                ],
+            }}
+            # 条件更新：多个 worker 同时完成最后的分片时只有一个写入终态
+            done = session.exec(
+                update(JobLog)
+                .where(JobLog.id == log_id, JobLog.status == JobStatus.RUNNING)
+                .values(status=status, total_devices=total, success_count=success, failed_count=total - success,
+                        unreachable_count=unreachable, end_time=end_time, duration=round((end_time - log.start_time).total_seconds(), 2), metrics=metrics)
+            )
+            session.commit()
+            if done.rowcount == 1:
+                logger.info(f"作业日志 {log_id} 的 {len(shards)} 个分片全部结束: {status.value}, 成功 {success}/{total}")
+            return done.rowcount == 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(JobShard.status, func.count(JobShard.id))
+                .where(JobShard.status.in_(ACTIVE_STATUSES))
+                .group_by(JobShard.status)
+            ).all()
+            workers = session.exec(
+                select(JobShard.worker_id).where(JobShard.status == ShardStatus.CLAIMED).distinct()
+            ).all()
+        return {
+            "mode": settings.AUTOMATION_EXECUTION_MODE,
+            "active": {getattr(status, "value", status): count for status, count in rows},
+            "busy_workers": sorted(w for w in workers if w),
+        }
+
+
+# 全局单例
+shard_queue = ShardQueue(
+    engine,
+    shard_size=settings.AUTOMATION_SHARD_SIZE,
+    shard_by=settings.AUTOMATION_SHARD_BY,
+    heartbeat_timeout=settings.AUTOMATION_SHARD_HEARTBEAT_TIMEOUT,
+    max_attempts=settings.AUTOMATION_SHARD_MAX_ATTEMPTS,
+)
@@ -0,0 +1,521 @@
+"""
+配置存储元数据索引
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.models.configs import ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry
+from backend.services.devices.device_detector import DeviceDetector
+from backend.services.configs.version_store import STORE_DIR_NAME, config_version_store
+
+logger = logging.getLogger("services")
+
+# 设备类型识别只读取文件开头部分
+DETECT_BYTES = 8192
+# 全量校准时每处理多少台设备提交一次
+RECONCILE_BATCH = 200
+HASH_CHUNK = 1 << 20
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _detect_type(path: Path) -> str:
+    """以文件前 8KB 识别设备类型"""
+    with open(path, "rb") as f:
+        head = f.read(DETECT_BYTES)
+    return DeviceDetector.detect(head.decode("utf-8", errors="ignore"), path.name)["device_type"]
+
+
+class ConfigIndex:
+    """
+    配置存储元数据索引
+    把 区域/设备/文件 的目录结构、文件大小、修改时间、内容哈希与设备类型识别结果保存在 SQLite 中，
+    文件树接口直接查询索引，不再遍历存储目录、逐个 stat 与读取文件。
+    文件管理的各项写操作完成后增量更新索引 (按设备目录比对，只有大小或修改时间变化的文件才重新读取)；
+    启动时做一次全量校准，修正服务停止期间在存储目录外部发生的变化。
+    """
+
+    def __init__(self, engine, root: Path, versions=config_version_store):
+        self.engine = engine
+        self.root = root
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._tree_lock = threading.Lock()
+        self._tree_cache: Optional[Tuple[int, bytes]] = None
+
+    # --- 路径 ---
+
+    def locate(self, path: Path) -> Optional[Tuple[str, ...]]:
+        """存储根目录下的路径 -> (区域, 设备, 文件名) 的前缀部分，不在根目录下时返回 None"""
+        try:
+            parts = Path(path).relative_to(self.root).parts
+        except ValueError:
+            return None
+        return parts if 0 < len(parts) <= 3 else None
+
+    # --- 扫描 ---
+
+    def _scan_device(self, region: str, device: str, known: Dict[str, Tuple[int, float, bool]],
+                     detected: Optional[Tuple[str, str]]):
+        """
+        比对一个设备目录与已索引的文件 {文件名: (大小, 修改时间, 已打包)}
+        detected 为上次识别的 (设备类型, 文件名)，最新明文文件未变时沿用，否则重新识别
+        返回 (需写入的行, 需删除的文件名, (设备类型, 识别所用文件名))
+        """
+        device_dir = self.root / region / device
+        rows: List[Dict] = []
+        seen = set()
+        newest: Optional[Tuple[float, str]] = None
+        with os.scandir(device_dir) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                seen.add(entry.name)
+                if newest is None or st.st_mtime > newest[0]:
+                    newest = (st.st_mtime, entry.name)
+                old = known.get(entry.name)
+                if old is not None and not old[2] and old[0] == st.st_size and old[1] == st.st_mtime:
+                    continue
+                try:
+                    digest = _file_hash(entry.path)
+                except OSError as e:
+                    logger.debug(f"读取配置文件失败 {entry.path}: {e}")
+                    continue
+                rows.append({"region": region, "device": device, "name": entry.name, "size": st.st_size,
+                             "mtime": st.st_mtime, "hash": digest, "packed": False})
+        if (device_dir / STORE_DIR_NAME).is_dir():
+            for version in self.versions.list_versions(device_dir):
+                name = version["name"]
+                if name in seen:
+                    # 打包后崩溃留下的重复明文，以明文为准
+                    continue
+                seen.add(name)
+                old = known.get(name)
+                if old is not None and old[2] and old[0] == version["size"] and old[1] == version["mtime"]:
+                    continue
+                rows.append({"region": region, "device": device, "name": name, "size": version["size"],
+                             "mtime": version["mtime"], "hash": None, "packed": True})
+        removed = [name for name in known if name not in seen]
+
+        if newest is None:
+            detected = ("unknown", None)
+        elif detected is None or detected[1] != newest[1] or any(r["name"] == newest[1] for r in rows):
+            try:
+                detected = (_detect_type(device_dir / newest[1]), newest[1])
+            except OSError as e:
+                logger.debug(f"检测设备类型失败 {region}/{device}: {e}")
+                detected = ("unknown", None)
+        return rows, removed, detected
+
+    @staticmethod
+    def _known(conn, region: str, device: str):
+        """已索引的文件 {文件名: (大小, 修改时间, 已打包)} 与上次的设备类型识别结果"""
+        rows = conn.execute(
+            select(ConfigFileEntry.name, ConfigFileEntry.size, ConfigFileEntry.mtime, ConfigFileEntry.packed)
+            .where(ConfigFileEntry.region == region, ConfigFileEntry.device == device)
+        )
+        known = {name: (size, mtime, packed) for name, size, mtime, packed in rows}
+        detected = conn.execute(
+            select(ConfigDeviceEntry.device_type, ConfigDeviceEntry.detected_from)
+            .where(ConfigDeviceEntry.region == region, ConfigDeviceEntry.device == device)
+        ).first()
+        return known, (tuple(detected) if detected else None)
+
+    @classmethod
+    def _write_device(cls, conn, region: str, device: str, rows: List[Dict], removed: List[str],
+                      detected: Tuple[str, Optional[str]], previous: Optional[Tuple[str, Optional[str]]],
+                      known: Dict[str, Tuple[int, float, bool]]) -> bool:
+        """写入一台设备的比对结果并累加区域统计，返回索引是否有变化"""
+        if not rows and not removed and detected == previous:
+            return False
+        replaced = [known[r["name"]][0] for r in rows if r["name"] in known]
+        cls._adjust(
+            conn, region,
+            devices=1 if previous is None else 0,
+            files=len(rows) - len(replaced) - len(removed),
+            size=sum(r["size"] for r in rows) - sum(replaced) - sum(known[name][0] for name in removed),
+            newest=max((r["mtime"] for r in rows), default=None),
+        )
+        if removed:
+            conn.execute(delete(ConfigFileEntry).where(
+                ConfigFileEntry.region == region, ConfigFileEntry.device == device, ConfigFileEntry.name.in_(removed)))
+        if rows:
+            stmt = insert(ConfigFileEntry)
+            # 大小与修改时间均未变 (明文被打包进版本存储) 视为内容未变，保留哈希与全文索引文档；
+            # 否则清空 doc_id，由全文索引重新建立
+            same = (ConfigFileEntry.size == stmt.excluded.size) & (ConfigFileEntry.mtime == stmt.excluded.mtime)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["region", "device", "name"],
+                set_={
+                    "size": stmt.excluded.size,
+                    "mtime": stmt.excluded.mtime,
+                    "packed": stmt.excluded.packed,
+                    "hash": case((same, func.coalesce(stmt.excluded.hash, ConfigFileEntry.hash)), else_=stmt.excluded.hash),
+                    "doc_id": case((same, ConfigFileEntry.doc_id), else_=None),
+                },
+            )
+            conn.execute(stmt, rows)
+        device_type, detected_from = detected
+        stmt = insert(ConfigDeviceEntry).values(region=region, device=device, device_type=device_type,
+                                                detected_from=detected_from)
+        conn.execute(stmt.on_conflict_do_update(index_elements=["region", "device"],
+                                                set_={"device_type": device_type, "detected_from": detected_from}))
+        if removed:
+            cls._recount_newest(conn, region)
+        return True
+
+    @staticmethod
+    def _adjust(conn, region: str, devices: int = 0, files: int = 0, size: int = 0,
+                newest: Optional[float] = None) -> None:
+        """累加区域统计"""
+        values = {}
+        if devices:
+            values["devices"] = ConfigRegionEntry.devices + devices
+        if files:
+            values["files"] = ConfigRegionEntry.files + files
+        if size:
+            values["total_bytes"] = ConfigRegionEntry.total_bytes + size
+        if newest is not None:
+            values["newest_mtime"] = func.max(func.coalesce(ConfigRegionEntry.newest_mtime, newest), newest)
+        if values:
+            conn.execute(update(ConfigRegionEntry).where(ConfigRegionEntry.name == region).values(**values))
+
+    @staticmethod
+    def _recount_newest(conn, region: str) -> None:
+        """最新文件被删除或移出后重新取区域内的最新修改时间"""
+        newest = select(func.max(ConfigFileEntry.mtime)).where(ConfigFileEntry.region == region).scalar_subquery()
+        conn.execute(update(ConfigRegionEntry).where(ConfigRegionEntry.name == region).values(newest_mtime=newest))
+
+    @staticmethod
+    def _device_totals(conn, region: str, device: str) -> Tuple[int, int]:
+        """(文件数, 总大小)"""
+        row = conn.execute(
+            select(func.count(), func.coalesce(func.sum(ConfigFileEntry.size), 0))
+            .where(ConfigFileEntry.region == region, ConfigFileEntry.device == device)
+        ).first()
+        return row[0], row[1]
+
+    @staticmethod
+    def _recount(conn) -> None:
+        """按索引重新汇总全部区域的统计 (全量校准后纠正可能的累计偏差)"""
+        files = {region: (count, size, newest) for region, count, size, newest in conn.execute(
+            select(ConfigFileEntry.region, func.count(), func.sum(ConfigFileEntry.size), func.max(ConfigFileEntry.mtime))
+            .group_by(ConfigFileEntry.region)
+        )}
+        devices = dict(conn.execute(
+            select(ConfigDeviceEntry.region, func.count()).group_by(ConfigDeviceEntry.region)
+        ).tuples().all())
+        for region in conn.execute(select(ConfigRegionEntry.name)).scalars().all():
+            count, size, newest = files.get(region, (0, 0, None))
+            conn.execute(update(ConfigRegionEntry).where(ConfigRegionEntry.name == region).values(
+                devices=devices.get(region, 0), files=count, total_bytes=size or 0, newest_mtime=newest))
+
+    @staticmethod
+    def _ensure_region(conn, region: str) -> bool:
+        return conn.execute(insert(ConfigRegionEntry).values(name=region).on_conflict_do_nothing()).rowcount > 0
+
+    @classmethod
+    def _drop(cls, conn, region: str, device: Optional[str] = None) -> bool:
+        """删除区域 (或区域下某设备) 的全部索引行，返回是否删除了内容"""
+        if device is None:
+            files = conn.execute(delete(ConfigFileEntry).where(ConfigFileEntry.region == region)).rowcount
+            devices = conn.execute(delete(ConfigDeviceEntry).where(ConfigDeviceEntry.region == region)).rowcount
+            regions = conn.execute(delete(ConfigRegionEntry).where(ConfigRegionEntry.name == region)).rowcount
+            return files + devices + regions > 0
+        count, size = cls._device_totals(conn, region, device)
+        files = conn.execute(delete(ConfigFileEntry).where(
+            ConfigFileEntry.region == region, ConfigFileEntry.device == device)).rowcount
+        devices = conn.execute(delete(ConfigDeviceEntry).where(
+            ConfigDeviceEntry.region == region, ConfigDeviceEntry.device == device)).rowcount
+        cls._adjust(conn, region, devices=-devices, files=-count, size=-size)
+        if files:
+            cls._recount_newest(conn, region)
+        return files + devices > 0
+
+    @staticmethod
+    def _bump(conn) -> None:
+        """递增索引版本号 (与索引变更在同一事务中提交)"""
+        stmt = insert(ConfigIndexState).values(id=1, generation=1)
+        conn.execute(stmt.on_conflict_do_update(index_elements=["id"],
+                                                set_={"generation": ConfigIndexState.generation + 1}))
+
+    # --- 全量校准 ---
+
+    def reconcile(self, pause: float = 0.0) -> Dict[str, int]:
+        """
+        遍历存储目录，与索引比对后增删改；未变化的文件只 stat 不读取。
+        每批设备单独加锁提交，校准期间的增量更新最多等待一批；pause 为批次之间的让出时间 (后台周期校准用)。
+        """
+        start = time.monotonic()
+        stats = {"devices": 0, "updated": 0, "removed": 0}
+        with self.engine.connect() as conn:
+            indexed_regions = set(conn.execute(select(ConfigRegionEntry.name)).scalars())
+            indexed_devices = set(conn.execute(select(ConfigDeviceEntry.region, ConfigDeviceEntry.device)).tuples())
+        targets: List[Tuple[str, Optional[str]]] = []
+        if self.root.exists():
+            for region in sorted(d.name for d in os.scandir(self.root) if d.is_dir()):
+                targets.append((region, None))
+                targets.extend((region, d.name) for d in os.scandir(self.root / region) if d.is_dir())
+
+        for i in range(0, len(targets), RECONCILE_BATCH):
+            with self._lock, self.engine.begin() as conn:
+                changed = False
+                for region, device in targets[i:i + RECONCILE_BATCH]:
+                    if device is None:
+                        changed |= self._ensure_region(conn, region)
+                        indexed_regions.discard(region)
+                        continue
+                    # 已索引的文件在加锁后读取，不会与校准期间的增量更新交错
+                    known, previous = self._known(conn, region, device)
+                    try:
+                        rows, removed, detected = self._scan_device(region, device, known, previous)
+                    except OSError as e:
+                        # 扫描期间目录被删除或改名，留给后续的增量更新 / 下次校准
+                        logger.debug(f"扫描设备目录失败 {region}/{device}: {e}")
+                        continue
+                    changed |= self._write_device(conn, region, device, rows, removed, detected, previous, known)
+                    indexed_devices.discard((region, device))
+                    stats["devices"] += 1
+                    stats["updated"] += len(rows)
+                    stats["removed"] += len(removed)
+                if changed:
+                    self._bump(conn)
+            if pause:
+                time.sleep(pause)
+
+        # 索引中有、磁盘上已不存在的区域与设备 (删除前再确认一次，避免误删校准期间新建的目录)
+        with self._lock, self.engine.begin() as conn:
+            changed = False
+            for region in indexed_regions:
+                if not (self.root / region).is_dir():
+                    changed |= self._drop(conn, region)
+            for region, device in indexed_devices:
+                if not (self.root / region / device).is_dir():
+                    changed |= self._drop(conn, region, device)
+            if changed:
+                self._bump(conn)
+            self._recount(conn)
+            stmt = insert(ConfigIndexState).values(id=1, generation=0, reconciled_at=time.time())
+            conn.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={"reconciled_at": stmt.excluded.reconciled_at}))
+        logger.info(f"配置元数据索引校准完成: {stats['devices']} 台设备，更新 {stats['updated']} 个文件，"
+                    f"移除 {stats['removed']} 个，耗时 {time.monotonic() - start:.2f}s")
+        return stats
+
+    # --- 增量更新 ---
+
+    def refresh_device(self, device_dir: Path) -> None:
+        """重新比对单个设备目录 (导入、删除、移动文件或打包版本之后调用)"""
+        parts = self.locate(device_dir)
+        if not parts or len(parts) != 2:
+            return
+        region, device = parts
+        with self._lock, self.engine.begin() as conn:
+            if not (self.root / region).is_dir():
+                changed = self._drop(conn, region)
+            elif not (self.root / region / device).is_dir():
+                changed = self._drop(conn, region, device)
+            else:
+                changed = self._ensure_region(conn, region)
+                known, previous = self._known(conn, region, device)
+                rows, removed, detected = self._scan_device(region, device, known, previous)
+                changed |= self._write_device(conn, region, device, rows, removed, detected, previous, known)
+            if changed:
+                self._bump(conn)
+
+    def refresh_region(self, region: str) -> None:
+        """重新比对一个区域目录下的全部设备 (区域级的外部变更，如整个设备目录被拷入或删除)"""
+        region_dir = self.root / region
+        with self._lock, self.engine.begin() as conn:
+            changed = self._drop(conn, region) if not region_dir.is_dir() else self._ensure_region(conn, region)
+            if changed:
+                self._bump(conn)
+            indexed = set(conn.execute(select(ConfigDeviceEntry.device).where(ConfigDeviceEntry.region == region)).scalars())
+        if region_dir.is_dir():
+            present = {d.name for d in os.scandir(region_dir) if d.is_dir()}
+            self.refresh_devices(region_dir / device for device in sorted(present | indexed))
+
+    def refresh_devices(self, device_dirs: Iterable[Path]) -> None:
+        for device_dir in device_dirs:
+            try:
+                self.refresh_device(Path(device_dir))
+            except Exception as e:
+                logger.error(f"更新配置元数据索引失败 {device_dir}: {e}")
+
+    def add_region(self, region: str) -> None:
+        with self._lock, self.engine.begin() as conn:
+            self._ensure_region(conn, region)
+            self._bump(conn)
+
+    def add_device(self, region: str, device: str) -> None:
+        with self._lock, self.engine.begin() as conn:
+            self._ensure_region(conn, region)
+            self._write_device(conn, region, device, [], [], ("unknown", None), None, {})
+            self._bump(conn)
+
+    def remove(self, region: str, device: Optional[str] = None) -> None:
+        with self._lock, self.engine.begin() as conn:
+            self._drop(conn, region, device)
+            self._bump(conn)
+
+    def rename_region(self, old: str, new: str) -> None:
+        with self._lock, self.engine.begin() as conn:
+            conn.execute(update(ConfigFileEntry).where(ConfigFileEntry.region == old).values(region=new))
+            conn.execute(update(ConfigDeviceEntry).where(ConfigDeviceEntry.region == old).values(region=new))
+            # 区域行 (含统计) 整体改名
+            conn.execute(delete(ConfigRegionEntry).where(ConfigRegionEntry.name == new))
+            conn.execute(update(ConfigRegionEntry).where(ConfigRegionEntry.name == old).values(name=new))
+            self._ensure_region(conn, new)
+            self._bump(conn)
+
+    def move_device(self, region: str, device: str, target_region: str, target_device: str) -> None:
+        """设备改名或移动到其他区域: 文件内容未变，只改写索引中的归属"""
+        with self._lock, self.engine.begin() as conn:
+            self._ensure_region(conn, target_region)
+            count, size = self._device_totals(conn, region, device)
+            conn.execute(update(ConfigFileEntry).where(ConfigFileEntry.region == region, ConfigFileEntry.device == device)
+                         .values(region=target_region, device=target_device))
+            moved = conn.execute(update(ConfigDeviceEntry)
+                                 .where(ConfigDeviceEntry.region == region, ConfigDeviceEntry.device == device)
+                                 .values(region=target_region, device=target_device)).rowcount
+            if target_region != region:
+                self._adjust(conn, region, devices=-moved, files=-count, size=-size)
+                self._adjust(conn, target_region, devices=moved, files=count, size=size)
+                self._recount_newest(conn, region)
+                self._recount_newest(conn, target_region)
+            self._bump(conn)
+
+    # --- 查询 ---
+
+    def state(self) -> Tuple[int, Optional[float]]:
+        """(索引版本号, 最近一次全量校准时间)"""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(ConfigIndexState.generation, ConfigIndexState.reconciled_at)
+                               .where(ConfigIndexState.id == 1)).first()
+        return (row[0], row[1]) if row else (0, None)
+
+    def built(self) -> bool:
+        """索引是否已完成过全量建立 (之后的变化由增量更新与校准维护)"""
+        return self.state()[1] is not None
+
+    def stats(self) -> Dict:
+        """存储统计 (只读区域行，与区域数成正比)"""
+        with self.engine.connect() as conn:
+            regions = conn.execute(
+                select(ConfigRegionEntry.name, ConfigRegionEntry.devices, ConfigRegionEntry.files,
+                       ConfigRegionEntry.total_bytes, ConfigRegionEntry.newest_mtime)
+                .order_by(ConfigRegionEntry.name)
+            ).all()
+        newest = max((r.newest_mtime for r in regions if r.newest_mtime is not None), default=None)
+        return {
+            "total_regions": len(regions),
+            "total_devices": sum(r.devices for r in regions),
+            "total_files": sum(r.files for r in regions),
+            "total_bytes": sum(r.total_bytes for r in regions),
+            "newest_mtime": newest,
+            # 距最近一次备份 / 导入的时长 (秒)
+            "newest_age": round(time.time() - newest, 1) if newest is not None else None,
+            "region_stats": [
+                {"name": r.name, "devices": r.devices, "configs": r.files, "bytes": r.total_bytes,
+                 "newest_mtime": r.newest_mtime}
+                for r in regions
+            ]
+        }
+
+    def tree_json(self) -> bytes:
+        """
+        文件树的 JSON 序列化结果
+        按索引版本号缓存，索引未变化时直接返回 (大型存储的文件树序列化本身即需数百毫秒)；
+        版本号随索引变更在同一事务中递增，其他 worker 进程的写入同样会使缓存失效。
+        """
+        generation = self.state()[0]
+        cached = self._tree_cache
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        with self._tree_lock:
+            cached = self._tree_cache
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+            # 版本号先于树读取: 期间发生的写入只会导致下次请求多重建一次，不会缓存过期内容
+            data = json.dumps(self.tree(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._tree_cache = (generation, data)
+            return data
+
+    def tree(self) -> List[Dict]:
+        """由索引生成 区域/设备/文件 树 (结构与遍历目录时一致)"""
+        root = str(self.root)
+        sep = os.sep
+        with self.engine.connect() as conn:
+            regions = list(conn.execute(select(ConfigRegionEntry.name).order_by(ConfigRegionEntry.name)).scalars())
+            devices = conn.execute(
+                select(ConfigDeviceEntry.region, ConfigDeviceEntry.device, ConfigDeviceEntry.device_type)
+                .order_by(ConfigDeviceEntry.region, ConfigDeviceEntry.device)
+            ).all()
+            files = conn.execute(
+                select(ConfigFileEntry.region, ConfigFileEntry.device, ConfigFileEntry.name,
+                       ConfigFileEntry.mtime, ConfigFileEntry.packed)
+                .order_by(ConfigFileEntry.region, ConfigFileEntry.device, ConfigFileEntry.mtime.desc())
+            ).all()
+
+        children: Dict[Tuple[str, str], List[Dict]] = {}
+        for region, device, name, mtime, packed in files:
+            node = {
+                "id": f"file_{region}_{device}_{name}",
+                "name": name,
+                "path": f"{root}{sep}{region}{sep}{device}{sep}{name}",
+                "type": "file",
+                "mtime": mtime
+            }
+            if packed:
+                node["packed"] = True
+            children.setdefault((region, device), []).append(node)
+
+        region_nodes = {}
+        tree = []
+        for region in regions:
+            node = {
+                "id": f"region_{region}",
+                "name": region,
+                "type": "region",
+                "children": [],
+                "device_count": 0
+            }
+            region_nodes[region] = node
+            tree.append(node)
+        for region, device, device_type in devices:
+            region_node = region_nodes.get(region)
+            if region_node is None:
+                continue
+            files = children.get((region, device), [])
+            region_node["children"].append({
+                "id": f"device_{region}_{device}",
+                "name": device,
+                "type": "device",
+                "device_type": device_type,
+                "children": files,
+                "file_count": len(files)
+            })
+            region_node["device_count"] += 1
+        return tree
+
+
+# 全局单例
+config_index = ConfigIndex(engine, settings.CONFIGS_DIR)
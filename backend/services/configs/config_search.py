@@ -0,0 +1,232 @@
+"""
+配置内容全文索引
+"""
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.sqlite import insert
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.models.configs import ConfigContentDoc, ConfigFileEntry
+from backend.services.configs.config_index import ConfigIndex, config_index
+
+logger = logging.getLogger("services")
+
+FTS_TABLE = "config_fts"
+# trigram 分词按 3 字符切分，可做任意子串匹配 (IP、VLAN、ACL 名称等)，查询词至少 3 个字符
+MIN_QUERY_LENGTH = 3
+# 每批建立索引的文件数 (每批一个事务)
+SYNC_BATCH = 200
+# 不建立索引的文件 (超出大小上限或无法读取)
+DOC_SKIPPED = 0
+# 命中行的展示长度，超出时以匹配位置为中心截取
+SNIPPET_WIDTH = 160
+
+
+def _fts_phrase(query: str) -> str:
+    """用户输入 -> FTS5 短语 (按字面匹配，不解析 AND/OR/NEAR 等语法)"""
+    return '"' + query.replace('"', '""') + '"'
+
+def _line_hits(content: str, query: str, limit: int) -> List[Dict]:
+    """逐行查找匹配 (不区分大小写)，返回 [{line, text, spans}]，spans 为 text 中匹配的 [起, 止) 偏移"""
+    needle = query.lower()
+    hits = []
+    for number, line in enumerate(content.splitlines(), 1):
+        lower = line.lower()
+        pos = lower.find(needle)
+        if pos < 0:
+            continue
+        start = 0
+        if len(line) > SNIPPET_WIDTH:
+            start = max(0, min(pos - (SNIPPET_WIDTH - len(needle)) // 2, len(line) - SNIPPET_WIDTH))
+            line = line[start:start + SNIPPET_WIDTH]
+            lower = lower[start:start + SNIPPET_WIDTH]
+        spans = []
+        pos = lower.find(needle)
+        while pos >= 0:
+            spans.append([pos, pos + len(needle)])
+            pos = lower.find(needle, pos + len(needle))
+        hits.append({"line": number, "text": line, "spans": spans})
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+class ConfigSearchIndex:
+    """
+    配置内容全文索引
+    基于 SQLite FTS5 (trigram 分词)，文档按内容哈希去重: 内容相同的版本 / 设备共用一个文档，
+    配置文件行 (ConfigFileEntry.doc_id) 指向文档。元数据索引发现新增或变化的文件后清空其 doc_id，
+    sync() 读取这些文件 (已打包版本从版本存储还原) 建立文档；搜索时先由 FTS5 找出命中的文档，
+    再只对返回的少量文件逐行定位行号与高亮位置。
+    """
+
+    def __init__(self, engine, index: ConfigIndex, max_file_bytes: int):
+        self.engine = engine
+        self.index = index
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, tokenize='trigram')"
+            )
+        self._schema_ready = True
+
+    # --- 建立索引 ---
+
+    def _read(self, region: str, device: str, name: str, packed: bool) -> Optional[bytes]:
+        path = self.index.root / region / device / name
+        if packed:
+            return self.index.versions.read(path)
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def sync(self) -> int:
+        """为待索引 (doc_id 为空) 的文件建立全文索引，返回处理的文件数"""
+        self.ensure_schema()
+        start = time.monotonic()
+        total = 0
+        with self._lock:
+            while True:
+                with self.engine.connect() as conn:
+                    pending = conn.execute(
+                        select(ConfigFileEntry.id, ConfigFileEntry.region, ConfigFileEntry.device, ConfigFileEntry.name,
+                               ConfigFileEntry.size, ConfigFileEntry.packed, ConfigFileEntry.hash)
+                        .where(ConfigFileEntry.doc_id.is_(None))
+                        .limit(SYNC_BATCH)
+                    ).all()
+                if not pending:
+                    break
+                with self.engine.begin() as conn:
+                    for row in pending:
+                        self._index_file(conn, row)
+                total += len(pending)
+        if total:
+            logger.info(f"配置全文索引已更新 {total} 个文件，耗时 {time.monotonic() - start:.2f}s")
+        return total
+
+    def _index_file(self, conn, row) -> None:
+        doc_id = DOC_SKIPPED
+        digest = row.hash
+        if row.size <= self.max_file_bytes:
+            doc_id = None
+            # 已有相同内容的文档时无需读取文件
+            if digest:
+                doc_id = conn.execute(select(ConfigContentDoc.id).where(ConfigContentDoc.hash == digest)).scalar()
+            if doc_id is None:
+                data = self._read(row.region, row.device, row.name, row.packed)
+                if data is None:
+                    # 文件已被删除或移走 (元数据索引随后会删除该行)；文件再次变化时 doc_id 会被重置
+                    logger.debug(f"全文索引读取文件失败 {row.region}/{row.device}/{row.name}")
+                    doc_id = DOC_SKIPPED
+                else:
+                    digest = hashlib.sha256(data).hexdigest()
+                    doc_id = self._ensure_doc(conn, digest, data)
+        values = {"doc_id": doc_id}
+        if digest and digest != row.hash:
+            values["hash"] = digest
+        # 只在索引期间文件未被改写时写入 (改写后 doc_id 已被重置为空，下次同步重新建立)
+        conn.execute(update(ConfigFileEntry)
+                     .where(ConfigFileEntry.id == row.id, ConfigFileEntry.size == row.size, ConfigFileEntry.doc_id.is_(None))
+                     .values(**values))
+
+    @staticmethod
+    def _ensure_doc(conn, digest: str, data: bytes) -> int:
+        result = conn.execute(insert(ConfigContentDoc).values(hash=digest, size=len(data))
+                              .on_conflict_do_nothing(index_elements=["hash"]))
+        if result.rowcount:
+            doc_id = result.inserted_primary_key[0]
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (:id, :content)"),
+                         {"id": doc_id, "content": data.decode("utf-8", errors="ignore")})
+            return doc_id
+        return conn.execute(select(ConfigContentDoc.id).where(ConfigContentDoc.hash == digest)).scalar()
+
+    def collect_garbage(self) -> int:
+        """删除已没有任何文件引用的文档 (文件删除 / 内容变化后残留)，返回删除数"""
+        self.ensure_schema()
+        orphan = (select(ConfigContentDoc.id)
+                  .where(~select(ConfigFileEntry.id).where(ConfigFileEntry.doc_id == ConfigContentDoc.id).exists()))
+        with self._lock, self.engine.begin() as conn:
+            ids = conn.execute(orphan).scalars().all()
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                conn.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({','.join(map(str, chunk))})"))
+                conn.execute(ConfigContentDoc.__table__.delete().where(ConfigContentDoc.id.in_(chunk)))
+        if ids:
+            logger.info(f"配置全文索引清理 {len(ids)} 个无引用文档")
+        return len(ids)
+
+    # --- 搜索 ---
+
+    def search(self, query: str, region: Optional[str] = None, device: Optional[str] = None,
+               version: str = "latest", limit: int = 50, hits_per_file: int = 20) -> Dict:
+        """
+        在配置内容中查找子串 (不区分大小写)
+        version: latest 只搜每台设备的最新配置；all 搜全部历史版本；其他值视为文件名，只搜该版本
+        返回 {total, files: [{region, device, name, path, mtime, packed, hits: [{line, text, spans}]}]}
+        """
+        query = query.strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValueError(f"搜索内容至少 {MIN_QUERY_LENGTH} 个字符")
+        self.ensure_schema()
+        started = time.monotonic()
+
+        f = ConfigFileEntry
+        matched = select(text("rowid")).select_from(text(FTS_TABLE)).where(text(f"{FTS_TABLE} MATCH :q"))
+        conditions = [f.doc_id.in_(matched)]
+        if region:
+            conditions.append(f.region == region)
+        if device:
+            conditions.append(f.device == device)
+        if version == "latest":
+            g = aliased(ConfigFileEntry)
+            conditions.append(f.mtime == select(func.max(g.mtime))
+                              .where(g.region == f.region, g.device == f.device).scalar_subquery())
+        elif version != "all":
+            conditions.append(f.name == version)
+        params = {"q": _fts_phrase(query)}
+
+        with self.engine.connect() as conn:
+            total = conn.execute(select(func.count()).select_from(f).where(*conditions), params).scalar()
+            rows = conn.execute(
+                select(f.region, f.device, f.name, f.mtime, f.packed, f.doc_id)
+                .where(*conditions).order_by(f.mtime.desc()).limit(limit),
+                params,
+            ).all()
+            contents: Dict[int, str] = {}
+            for doc_id in {row.doc_id for row in rows}:
+                contents[doc_id] = conn.execute(text(f"SELECT content FROM {FTS_TABLE} WHERE rowid = :id"),
+                                                {"id": doc_id}).scalar() or ""
+
+        hits_cache: Dict[int, List[Dict]] = {}
+        files = []
+        for row in rows:
+            if row.doc_id not in hits_cache:
+                hits_cache[row.doc_id] = _line_hits(contents[row.doc_id], query, hits_per_file)
+            files.append({
+                "region": row.region,
+                "device": row.device,
+                "name": row.name,
+                "path": str(self.index.root / row.region / row.device / row.name),
+                "mtime": row.mtime,
+                "packed": row.packed,
+                "hits": hits_cache[row.doc_id],
+            })
+        return {"total": total, "files": files, "elapsed": round(time.monotonic() - started, 3)}
+
+
+# 全局单例
+config_search = ConfigSearchIndex(engine, config_index, max_file_bytes=settings.CONFIG_SEARCH_MAX_FILE_BYTES)
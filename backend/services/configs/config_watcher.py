@@ -0,0 +1,188 @@
+"""
+配置存储目录监听
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from backend.core.config import settings
+from backend.services.configs.config_index import ConfigIndex, config_index
+from backend.services.configs.config_search import ConfigSearchIndex, config_search
+
+logger = logging.getLogger("services")
+
+# watchdog 为可选依赖，未安装时只做周期校准
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    FileSystemEventHandler = object
+    HAS_WATCHDOG = False
+
+# 只读访问产生的事件，不代表内容变化
+IGNORED_EVENTS = {"opened", "closed_no_write"}
+# 目录持续有写入时，最长延迟多少个防抖周期后强制刷新
+MAX_DEBOUNCE_ROUNDS = 10
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "ConfigWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.event_type in IGNORED_EVENTS:
+            return
+        self.watcher.notify(event.src_path)
+        dest = getattr(event, "dest_path", None)
+        if dest:
+            self.watcher.notify(dest)
+
+
+class ConfigWatcher:
+    """
+    配置存储目录监听
+    运维人员或外部脚本直接向存储目录放入、删除文件时，文件管理接口无从得知。
+    监听文件系统事件 (inotify / FSEvents / ReadDirectoryChangesW，需安装 watchdog)，按设备目录合并，
+    静默 debounce 秒后增量刷新元数据索引 (文件树、设备类型识别结果均由索引维护)，随后为变化的文件建立全文索引。
+    另在后台按 reconcile_interval 做低优先级的全量校准 (批次之间让出)，兜底未安装 watchdog、
+    事件丢失或监听数超出系统上限的情况；启动时的首次校准同样在监听线程中完成。
+    """
+
+    def __init__(self, index: ConfigIndex, debounce: float, reconcile_interval: float,
+                 reconcile_pause: float, watch: bool = True, search: Optional[ConfigSearchIndex] = None):
+        self.index = index
+        self.search = search
+        self.debounce = max(0.1, debounce)
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_pause = reconcile_pause
+        self.watch = watch
+        # (区域,) 或 (区域, 设备) -> (首次事件时间, 最近事件时间)
+        self._pending: Dict[Tuple[str, ...], Tuple[float, float]] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self.stats = {"events": 0, "refreshed": 0, "reconciles": 0}
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped = False
+        # 先开始监听再做首次校准，校准期间发生的变化不会遗漏
+        if self.watch and HAS_WATCHDOG:
+            try:
+                observer = Observer()
+                observer.schedule(_EventHandler(self), str(self.index.root), recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                logger.info(f"已开始监听配置存储目录 {self.index.root}")
+            except Exception as e:
+                logger.warning(f"监听配置存储目录失败，仅依靠周期校准: {e}")
+        elif self.watch:
+            interval = f"每 {self.reconcile_interval:g} 秒的" if self.reconcile_interval else "下次启动时的"
+            logger.warning(f"未安装 watchdog，配置存储目录的外部变更只能由{interval}全量校准发现 (pip install watchdog 后即时生效)")
+        self._thread = threading.Thread(target=self._loop, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def notify(self, path: str) -> None:
+        """记录一次文件系统事件 (可由监听线程或外部调用)"""
+        try:
+            parts = Path(path).relative_to(self.index.root).parts
+        except ValueError:
+            return
+        if not parts:
+            return
+        # 设备目录内的任何变化 (含 .versions 版本存储) 都归到设备；只涉及区域目录本身时刷新整个区域
+        key = parts[:2]
+        now = time.monotonic()
+        with self._cond:
+            self.stats["events"] += 1
+            first = self._pending.get(key, (now, now))[0]
+            self._pending[key] = (first, now)
+            self._cond.notify()
+
+    def _due(self, now: float) -> List[Tuple[str, ...]]:
+        """已静默满防抖时间、或累计等待过久的目录"""
+        due = [key for key, (first, last) in self._pending.items()
+               if now - last >= self.debounce or now - first >= self.debounce * MAX_DEBOUNCE_ROUNDS]
+        for key in due:
+            del self._pending[key]
+        return due
+
+    def _reconcile(self, pause: float) -> None:
+        try:
+            self.index.reconcile(pause=pause)
+            self.stats["reconciles"] += 1
+        except Exception as e:
+            logger.error(f"配置元数据索引校准失败: {e}")
+        self._sync_search(collect=True)
+
+    def _sync_search(self, collect: bool = False) -> None:
+        if self.search is None:
+            return
+        try:
+            self.search.sync()
+            if collect:
+                self.search.collect_garbage()
+        except Exception as e:
+            logger.error(f"配置全文索引更新失败: {e}")
+
+    def _loop(self) -> None:
+        self._reconcile(pause=0)
+        next_reconcile = time.monotonic() + self.reconcile_interval if self.reconcile_interval > 0 else None
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                timeout = self.debounce if self._pending else None
+                if next_reconcile is not None:
+                    remaining = max(0.0, next_reconcile - now)
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                due = self._due(time.monotonic())
+
+            for key in due:
+                try:
+                    if len(key) == 1:
+                        self.index.refresh_region(key[0])
+                    else:
+                        self.index.refresh_device(self.index.root / key[0] / key[1])
+                    self.stats["refreshed"] += 1
+                except Exception as e:
+                    logger.error(f"刷新配置元数据索引失败 {'/'.join(key)}: {e}")
+            if due:
+                self._sync_search()
+
+            if next_reconcile is not None and time.monotonic() >= next_reconcile:
+                self._reconcile(pause=self.reconcile_pause)
+                next_reconcile = time.monotonic() + self.reconcile_interval
+
+
+# 全局单例
+config_watcher = ConfigWatcher(
+    config_index,
+    debounce=settings.CONFIG_WATCH_DEBOUNCE,
+    reconcile_interval=settings.CONFIG_RECONCILE_INTERVAL,
+    reconcile_pause=settings.CONFIG_RECONCILE_PAUSE,
+    watch=settings.CONFIG_WATCH_ENABLED,
+    search=config_search,
+)
@@ -1,4 +1,5 @@
 ﻿import os
+import json
 import shutil
 import zipfile
 import re
@@ -8,6 +9,9 @@ from typing import List, Dict, Optional
 import logging
 from backend.core.config import settings
 from backend.services.devices.device_detector import DeviceDetector
+from backend.services.configs.version_store import config_version_store
+from backend.services.configs.config_index import config_index
+from backend.services.configs.config_search import config_search
 
 logger = logging.getLogger("services")
 
@@ -17,6 +21,18 @@ class FileService:
     def __init__(self, storage_root: Path = None):
         self.storage_root = storage_root or settings.CONFIGS_DIR
         self.storage_root.mkdir(parents=True, exist_ok=True)
+        self.versions = config_version_store
+        # 元数据索引只覆盖默认存储目录，其他目录仍按遍历方式构建文件树
+        self.index = config_index if self.storage_root == config_index.root else None
+
+    def _refresh(self, *device_dirs: Path):
+        """设备目录内容变化后增量更新元数据索引与全文索引"""
+        if self.index is not None:
+            self.index.refresh_devices(device_dirs)
+            try:
+                config_search.sync()
+            except Exception as e:
+                logger.error(f"配置全文索引更新失败: {e}")
 
     def scan_import_candidates(self, source_path: str) -> List[Dict]:
         """
@@ -163,12 +179,26 @@ class FileService:
             except Exception as e:
                 logger.warning(f"设置时间戳失败 {target_path}: {e}")
         
+        self._refresh(target_dir)
         return str(target_path)
 
     def get_tree(self) -> List[Dict]:
         """
         构建 区域/设备/文件 树状结构。
+        优先由元数据索引生成；索引尚未建立 (首次启动校准未完成) 时遍历存储目录。
         """
+        if self.index is not None and self.index.built():
+            return self.index.tree()
+        return self._scan_tree()
+
+    def get_tree_json(self) -> bytes:
+        """文件树的 JSON 序列化结果 (由索引生成时按索引版本号缓存)"""
+        if self.index is not None and self.index.built():
+            return self.index.tree_json()
+        return json.dumps(self._scan_tree(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def _scan_tree(self) -> List[Dict]:
+        """遍历存储目录构建文件树"""
         tree = []
         
         if not self.storage_root.exists():
@@ -226,6 +256,16 @@ class FileService:
                             "type": "file",
                             "mtime": file_path.stat().st_mtime
                         })
+                # 已打包压缩的历史版本 (路径形式与明文文件一致，内容由版本存储还原)
+                for version in self.versions.list_versions(device_dir):
+                    files.append({
+                        "id": f"file_{region_dir.name}_{device_dir.name}_{version['name']}",
+                        "name": version["name"],
+                        "path": str(device_dir / version["name"]),
+                        "type": "file",
+                        "mtime": version["mtime"],
+                        "packed": True
+                    })
                 
                 # 按修改时间倒序排列
                 files.sort(key=lambda x: x['mtime'], reverse=True)
@@ -245,7 +285,11 @@ class FileService:
         """
         file_path = Path(relative_path)
         if not file_path.exists():
-             raise FileNotFoundError("文件未找到")
+            # 不是明文文件时尝试从版本存储还原
+            data = self.versions.read(file_path)
+            if data is None:
+                raise FileNotFoundError("文件未找到")
+            return data.decode('utf-8', errors='ignore')
 
         if file_path.suffix.lower() == '.zip':
             try:
@@ -271,12 +315,16 @@ class FileService:
         if path.exists():
             raise ValueError("区域已存在")
         path.mkdir()
+        if self.index is not None:
+            self.index.add_region(name)
 
     def delete_region(self, name: str):
         path = self.storage_root / name
         if not path.exists():
             raise ValueError("区域未找到")
         shutil.rmtree(path)
+        if self.index is not None:
+            self.index.remove(name)
 
     def rename_region(self, old_name: str, new_name: str):
         old_path = self.storage_root / old_name
@@ -284,6 +332,8 @@ class FileService:
         if not old_path.exists(): raise ValueError("区域未找到")
         if new_path.exists(): raise ValueError("新名称已存在")
         old_path.rename(new_path)
+        if self.index is not None:
+            self.index.rename_region(old_name, new_name)
 
     def create_device(self, region: str, name: str):
         path = self.storage_root / region / name
@@ -291,12 +341,16 @@ class FileService:
             raise ValueError("设备已存在")
         path.parent.mkdir(parents=True, exist_ok=True)
         path.mkdir()
+        if self.index is not None:
+            self.index.add_device(region, name)
 
     def delete_device(self, region: str, name: str):
         path = self.storage_root / region / name
         if not path.exists():
             raise ValueError("设备未找到")
         shutil.rmtree(path)
+        if self.index is not None:
+            self.index.remove(region, name)
         
     def rename_device(self, region: str, old_name: str, new_name: str):
         old_path = self.storage_root / region / old_name
@@ -304,15 +358,19 @@ class FileService:
         if not old_path.exists(): raise ValueError("设备未找到")
         if new_path.exists(): raise ValueError("新名称已存在")
         old_path.rename(new_path)
+        if self.index is not None:
+            self.index.move_device(region, old_name, region, new_name)
 
     def delete_files(self, paths: List[str]):
         errors = []
+        touched = set()
         import time
         import stat
         
         for p in paths:
             try:
                 path = Path(p)
+                touched.add(path.parent)
                 if path.exists() and path.is_file():
                     # 尝试移除只读属性
                     try:
@@ -333,9 +391,12 @@ class FileService:
                             time.sleep(0.1)
                         except Exception as e:
                             raise e
+                elif self.versions.contains(path):
+                    self.versions.remove(path)
             except Exception as e:
                 errors.append(str(e))
         
+        self._refresh(*touched)
         if errors:
             error_msg = '; '.join(errors)
             logger.error(f"删除部分文件失败: {error_msg}")
@@ -343,7 +404,8 @@ class FileService:
 
     def move_file(self, src_path: str, target_region: str, target_device: str):
         src = Path(src_path)
-        if not src.exists():
+        packed = not src.exists() and self.versions.contains(src)
+        if not src.exists() and not packed:
             raise ValueError("源文件未找到")
             
         target_dir = self.storage_root / target_region / target_device
@@ -351,10 +413,18 @@ class FileService:
             raise ValueError("目标设备目录未找到")
             
         target_path = target_dir / src.name
-        if target_path.exists():
+        if target_path.exists() or self.versions.contains(target_path):
             raise ValueError("目标位置存在同名文件")
             
-        shutil.move(src, target_path)
+        if packed:
+            # 已打包版本: 还原为明文写入目标设备，再从源设备的版本存储移除
+            mtime = next(v["mtime"] for v in self.versions.list_versions(src.parent) if v["name"] == src.name)
+            target_path.write_bytes(self.versions.read(src))
+            os.utime(target_path, (mtime, mtime))
+            self.versions.remove(src)
+        else:
+            shutil.move(src, target_path)
+        self._refresh(src.parent, target_dir)
 
     def move_device(self, region: str, name: str, target_region: str):
         src_path = self.storage_root / region / name
@@ -370,6 +440,23 @@ class FileService:
             raise ValueError("目标区域已存在同名设备")
             
         shutil.move(src_path, target_path)
+        if self.index is not None:
+            self.index.move_device(region, name, target_region, name)
+
+    def compact(self, region: Optional[str] = None, device: Optional[str] = None) -> Dict:
+        """
+        将较旧的明文配置版本打包为压缩快照 + 行级差异。
+        未指定区域/设备时处理整个存储目录。
+        """
+        if region and device:
+            device_dirs = [self.storage_root / region / device]
+        else:
+            regions = [self.storage_root / region] if region else [d for d in self.storage_root.iterdir() if d.is_dir()]
+            device_dirs = [d for r in regions if r.is_dir() for d in r.iterdir() if d.is_dir()]
+        stats = self.versions.compact_many(device_dirs)
+        if stats["packed"]:
+            self._refresh(*device_dirs)
+        return stats
 
     def open_directory(self, path_str: str):
         """
@@ -391,7 +478,24 @@ class FileService:
     def get_stats(self) -> Dict:
         """
         获取仪表盘统计信息。
+        索引建立后直接读取增量维护的区域统计；否则遍历存储目录。
         """
+        if self.index is not None and self.index.built():
+            return self.index.stats()
+        return self._scan_stats()
+
+    def search_contents(self, query: str, region: Optional[str] = None, device: Optional[str] = None,
+                        version: str = "latest", limit: int = 50) -> Dict:
+        """
+        在配置内容中搜索 (IP、VLAN、ACL 名称等任意子串)，返回命中文件及行号、高亮位置。
+        依赖元数据索引与全文索引，索引尚未建立时抛出 RuntimeError。
+        """
+        if self.index is None or not self.index.built():
+            raise RuntimeError("配置索引尚未建立，请稍后重试")
+        return config_search.search(query, region=region, device=device, version=version, limit=limit)
+
+    def _scan_stats(self) -> Dict:
+        """遍历存储目录统计"""
         total_regions = 0
         total_devices = 0
         total_files = 0
@@ -408,7 +512,7 @@ class FileService:
                             devices += 1
                             total_devices += 1
                             # 统计文件
-                            f_count = len([f for f in device_dir.iterdir() if f.is_file()])
+                            f_count = len([f for f in device_dir.iterdir() if f.is_file()]) + self.versions.count(device_dir)
                             configs += f_count
                             total_files += f_count
                     
@@ -0,0 +1,296 @@
+"""
+配置版本压缩存储
+"""
+import bisect
+import difflib
+import json
+import os
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from backend.core.config import settings
+
+logger = logging.getLogger("services")
+
+# zstandard 为可选依赖，未安装时使用 zlib
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+STORE_DIR_NAME = ".versions"
+INDEX_NAME = "index.json"
+# 锚点之间的差异段超过该行数时整段替换，不再做精细比较
+GAP_DIFF_LIMIT = 2000
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if HAS_ZSTD:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("该版本使用 zstd 压缩，但服务器未安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def _split(data: bytes) -> List[str]:
+    # latin-1 与字节一一对应，保证 GBK 等非 UTF-8 配置也能无损还原
+    return data.decode("latin-1").splitlines(keepends=True)
+
+def _join(lines: List[str]) -> bytes:
+    return "".join(lines).encode("latin-1")
+
+def _anchors(a: List[str], b: List[str]) -> List[Tuple[int, int]]:
+    """两侧各只出现一次的行作为锚点，取按 base 顺序在 target 中位置递增的最长子序列 (patience diff)"""
+    count_a = Counter(a)
+    count_b = Counter(b)
+    pos_b = {line: j for j, line in enumerate(b) if count_b[line] == 1}
+    pairs = [(i, pos_b[line]) for i, line in enumerate(a) if count_a[line] == 1 and line in pos_b]
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    prev = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        x = bisect.bisect_left(tails, j)
+        if x == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[x] = j
+            tail_idx[x] = k
+        prev[k] = tail_idx[x - 1] if x > 0 else -1
+    result = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k != -1:
+        result.append(pairs[k])
+        k = prev[k]
+    return result[::-1]
+
+def make_delta(base: List[str], target: List[str]) -> list:
+    """行级差异: [[i1, i2, [新行...]], ...]，表示把 base[i1:i2] 替换为新行"""
+    # 大配置上直接用 SequenceMatcher 是秒级；先以唯一行锚点切分，只对锚点之间的小段做精细比较
+    prefix = 0
+    limit = min(len(base), len(target))
+    while prefix < limit and base[prefix] == target[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and base[-1 - suffix] == target[-1 - suffix]:
+        suffix += 1
+    end_a, end_b = len(base) - suffix, len(target) - suffix
+    anchors = [(prefix + i, prefix + j) for i, j in _anchors(base[prefix:end_a], target[prefix:end_b])]
+
+    ops = []
+    i0 = j0 = prefix
+    for i1, j1 in anchors + [(end_a, end_b)]:
+        a = base[i0:i1]
+        b = target[j0:j1]
+        if a != b:
+            if a and b and len(a) + len(b) <= GAP_DIFF_LIMIT:
+                for tag, ai, aj, bi, bj in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+                    if tag != "equal":
+                        ops.append([i0 + ai, i0 + aj, b[bi:bj]])
+            else:
+                ops.append([i0, i1, b])
+        i0, j0 = i1 + 1, j1 + 1
+    return ops
+
+def apply_delta(base: List[str], ops: list) -> List[str]:
+    result = []
+    pos = 0
+    for i1, i2, lines in ops:
+        result.extend(base[pos:i1])
+        result.extend(lines)
+        pos = i2
+    result.extend(base[pos:])
+    return result
+
+
+class ConfigVersionStore:
+    """
+    设备配置版本存储
+    每个设备目录下的 .versions/ 保存历史版本：每隔 snapshot_interval 个版本存一份压缩全量快照，
+    其余版本只存相对上一版本的压缩行级差异，读取时从最近的快照向后重放差异还原。
+    最新的 keep_plain 个版本保持明文文件，备份任务、设备类型识别与哈希校验不受影响；
+    文件树与文件内容接口对明文与已打包版本一视同仁 (路径仍为 设备目录/文件名)。
+    """
+
+    def __init__(self, snapshot_interval: int = 10, keep_plain: int = 1):
+        self.snapshot_interval = max(1, snapshot_interval)
+        # 至少保留最新一份明文: 备份哈希校验以最近一次备份文件存在为前提
+        self.keep_plain = max(1, keep_plain)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, device_dir: Path) -> threading.Lock:
+        key = str(device_dir.resolve())
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    # --- 索引 ---
+
+    @staticmethod
+    def _store_dir(device_dir: Path) -> Path:
+        return device_dir / STORE_DIR_NAME
+
+    def _load_index(self, device_dir: Path) -> List[Dict]:
+        index_path = self._store_dir(device_dir) / INDEX_NAME
+        if not index_path.exists():
+            return []
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_index(self, device_dir: Path, entries: List[Dict]) -> None:
+        store = self._store_dir(device_dir)
+        tmp = store / (INDEX_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp, store / INDEX_NAME)
+
+    def list_versions(self, device_dir: Path) -> List[Dict]:
+        """已打包的版本: [{name, mtime, size, kind}]"""
+        return [{"name": e["name"], "mtime": e["mtime"], "size": e["size"], "kind": e["kind"]}
+                for e in self._load_index(device_dir)]
+
+    def count(self, device_dir: Path) -> int:
+        return len(self._load_index(device_dir))
+
+    def contains(self, path: Path) -> bool:
+        return any(e["name"] == path.name for e in self._load_index(path.parent))
+
+    # --- 读取 ---
+
+    def _read_blob(self, device_dir: Path, entry: Dict):
+        raw = _decompress(entry["codec"], (self._store_dir(device_dir) / entry["blob"]).read_bytes())
+        if entry["kind"] == "full":
+            return raw
+        return json.loads(raw.decode("utf-8"))
+
+    def _reconstruct(self, device_dir: Path, entries: List[Dict], pos: int) -> List[str]:
+        chain = []
+        while entries[pos]["kind"] != "full":
+            chain.append(entries[pos])
+            pos = pos - 1
+        lines = _split(self._read_blob(device_dir, entries[pos]))
+        for entry in reversed(chain):
+            lines = apply_delta(lines, self._read_blob(device_dir, entry))
+        return lines
+
+    def read(self, path: Path) -> Optional[bytes]:
+        """还原已打包版本的原始字节，不存在时返回 None"""
+        device_dir = path.parent
+        entries = self._load_index(device_dir)
+        for pos, entry in enumerate(entries):
+            if entry["name"] == path.name:
+                return _join(self._reconstruct(device_dir, entries, pos))
+        return None
+
+    # --- 写入 ---
+
+    def _write_entry(self, device_dir: Path, entries: List[Dict], name: str, mtime: float,
+                     lines: List[str], prev_lines: Optional[List[str]], seq: int) -> Dict:
+        """编码一个版本: 距上一快照达到间隔或无前序版本时写全量，否则写相对前一版本的差异"""
+        prev = entries[-1] if entries else None
+        depth = prev["depth"] + 1 if prev is not None and prev_lines is not None else 0
+        if depth == 0 or depth >= self.snapshot_interval:
+            kind, depth, payload = "full", 0, _join(lines)
+        else:
+            kind = "delta"
+            payload = json.dumps(make_delta(prev_lines, lines), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        codec, blob = _compress(payload)
+        blob_name = f"{seq:06d}.{codec}"
+        (self._store_dir(device_dir) / blob_name).write_bytes(blob)
+        return {"name": name, "mtime": mtime, "size": len(_join(lines)), "kind": kind,
+                "depth": depth, "codec": codec, "blob": blob_name, "seq": seq}
+
+    def compact(self, device_dir: Path) -> Dict[str, int]:
+        """把设备目录中较旧的明文版本 (保留最新 keep_plain 个) 按修改时间顺序打包进版本存储"""
+        stats = {"packed": 0, "bytes_in": 0, "bytes_out": 0}
+        if not device_dir.is_dir():
+            return stats
+        with self._lock(device_dir):
+            # ZIP 原件保持原样，不参与打包
+            files = sorted((f for f in device_dir.iterdir() if f.is_file() and f.suffix.lower() != ".zip"),
+                           key=lambda f: f.stat().st_mtime)
+            candidates = files[:max(0, len(files) - self.keep_plain)]
+            if not candidates:
+                return stats
+            self._store_dir(device_dir).mkdir(exist_ok=True)
+            entries = self._load_index(device_dir)
+            names = {e["name"] for e in entries}
+            seq = max((e["seq"] for e in entries), default=0)
+            prev_lines = self._reconstruct(device_dir, entries, len(entries) - 1) if entries else None
+            for file_path in candidates:
+                if file_path.name in names:
+                    logger.warning(f"版本存储中已存在同名版本，跳过打包: {file_path}")
+                    continue
+                data = file_path.read_bytes()
+                lines = _split(data)
+                seq += 1
+                entry = self._write_entry(device_dir, entries, file_path.name, file_path.stat().st_mtime,
+                                          lines, prev_lines, seq)
+                entries.append(entry)
+                # 先落索引再删明文，中途崩溃最多留下一份重复的明文
+                self._save_index(device_dir, entries)
+                file_path.unlink()
+                prev_lines = lines
+                names.add(file_path.name)
+                stats["packed"] += 1
+                stats["bytes_in"] += len(data)
+                stats["bytes_out"] += (self._store_dir(device_dir) / entry["blob"]).stat().st_size
+        if stats["packed"]:
+            logger.info(f"配置版本打包 {device_dir}: {stats['packed']} 个版本，{stats['bytes_in']} -> {stats['bytes_out']} 字节")
+        return stats
+
+    def compact_many(self, device_dirs) -> Dict[str, int]:
+        total = {"devices": 0, "packed": 0, "bytes_in": 0, "bytes_out": 0}
+        for device_dir in device_dirs:
+            try:
+                stats = self.compact(Path(device_dir))
+            except Exception as e:
+                logger.error(f"配置版本打包失败 {device_dir}: {e}")
+                continue
+            if stats["packed"]:
+                total["devices"] += 1
+                for key in ("packed", "bytes_in", "bytes_out"):
+                    total[key] += stats[key]
+        return total
+
+    def remove(self, path: Path) -> bool:
+        """删除一个已打包版本；后继版本若以其为差异基准，则先还原后重新编码"""
+        device_dir = path.parent
+        with self._lock(device_dir):
+            entries = self._load_index(device_dir)
+            pos = next((i for i, e in enumerate(entries) if e["name"] == path.name), None)
+            if pos is None:
+                return False
+            removed = entries[pos]
+            stale = [removed["blob"]]
+            if pos + 1 < len(entries) and entries[pos + 1]["kind"] == "delta":
+                nxt = entries[pos + 1]
+                lines = self._reconstruct(device_dir, entries, pos + 1)
+                prev_lines = self._reconstruct(device_dir, entries, pos - 1) if pos > 0 else None
+                seq = max(e["seq"] for e in entries) + 1
+                rebuilt = self._write_entry(device_dir, entries[:pos], nxt["name"], nxt["mtime"], lines, prev_lines, seq)
+                entries[pos + 1] = rebuilt
+                stale.append(nxt["blob"])
+            del entries[pos]
+            self._save_index(device_dir, entries)
+            for blob in stale:
+                try:
+                    (self._store_dir(device_dir) / blob).unlink()
+                except FileNotFoundError:
+                    pass
+        return True
+
+
+# 全局单例
+config_version_store = ConfigVersionStore(
+    snapshot_interval=settings.CONFIG_SNAPSHOT_INTERVAL, keep_plain=settings.CONFIG_PLAIN_VERSIONS
+)
@@ -1,4 +1,5 @@
 ﻿from typing import List, Optional
+from datetime import datetime
 from sqlmodel import Session, select
 from backend.models.device import Device, DeviceCreate, DeviceUpdate, DeviceStatus
 import logging
@@ -6,6 +7,9 @@ from backend.core.security import encrypt_password
 
 logger = logging.getLogger("services")
 
+# 加密存储的凭据字段
+ENCRYPTED_FIELDS = ("password", "secret", "snmp_community", "snmp_auth_key", "snmp_priv_key")
+
 class DeviceService:
     """设备管理服务"""
     
@@ -44,10 +48,9 @@ class DeviceService:
         db_device = Device.model_validate(device_in)
         
         # 敏感信息加密
-        if db_device.password:
-            db_device.password = encrypt_password(db_device.password)
-        if db_device.secret:
-            db_device.secret = encrypt_password(db_device.secret)
+        for key in ENCRYPTED_FIELDS:
+            if getattr(db_device, key):
+                setattr(db_device, key, encrypt_password(getattr(db_device, key)))
             
         self.session.add(db_device)
         self.session.commit()
@@ -65,9 +68,11 @@ class DeviceService:
         device_data = device_in.model_dump(exclude_unset=True)
         for key, value in device_data.items():
             # 更新时也要加密敏感字段
-            if key in ["password", "secret"] and value:
+            if key in ENCRYPTED_FIELDS and value:
                 value = encrypt_password(value)
             setattr(db_device, key, value)
+        # updated_at 同时作为 Inventory 缓存的版本号
+        db_device.updated_at = datetime.utcnow()
             
         self.session.add(db_device)
         self.session.commit()
@@ -0,0 +1,132 @@
+"""
+异步执行引擎: 对本地模拟设备 (standin) 执行查询与巡检，并校验设备租约与中止统计
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+pytest.importorskip("asyncssh")
+
+from nornir.core.inventory import Host
+
+from backend.network_engine.async_engine.engine import AsyncEngine
+from backend.network_engine.async_engine.standin import start_server
+from backend.network_engine.job_control import ABORT_CANCELLED, ABORT_TIMEOUT, JobAbortedError, JobControl
+from backend.services.automation.lease_manager import DeviceLeaseManager
+
+
+class Reporter:
+    def __init__(self):
+        self.started: List[tuple] = []
+        self.completed: Dict[tuple, Dict[str, Any]] = {}
+
+    def record_step_started(self, host_name: str, step_name: str) -> None:
+        self.started.append((host_name, step_name))
+
+    def record_step_completed(self, host_name: str, step_name: str, failed: bool, result: Any,
+                              exception: Optional[BaseException]) -> None:
+        self.completed[(host_name, step_name)] = {"failed": failed, "result": result, "exception": exception}
+
+
+def _hosts(port: int, count: int = 3, password: str = "admin") -> List[Host]:
+    return [
+        Host(name=f"sw{i}", hostname="127.0.0.1", port=port, username="admin", password=password,
+             platform="huawei", data={"region": "lab"})
+        for i in range(count)
+    ]
+
+
+def _run(task_name: str, fail_auth: bool = False, leases=None, owner=None,
+         before_run=None, delay: float = 0.0, control=None, **kwargs):
+    """启动模拟设备 (随机端口)，在同一事件循环中执行引擎"""
+    reporter = Reporter()
+
+    async def scenario():
+        server = await start_server(port=0, fail_auth=fail_auth, delay=delay)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            if before_run:
+                before_run()
+            engine = AsyncEngine(max_concurrency=10, connect_timeout=5, read_timeout=10)
+            return await engine.run_async(_hosts(port), task_name, reporter, control=control,
+                                          leases=leases, lease_owner=owner, **kwargs)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(scenario()), reporter
+
+
+def test_run_commands_against_standin():
+    commands = ["display version", "display cpu-usage"]
+    stats, reporter = _run("run_commands", commands=commands)
+    assert stats["success"] == 3 and stats["failed"] == 0
+    for i in range(3):
+        version = reporter.completed[(f"sw{i}", "display version")]
+        assert not version["failed"]
+        assert "VRP (R) software" in version["result"]
+        assert "12%" in reporter.completed[(f"sw{i}", "display cpu-usage")]["result"]
+
+
+def test_inspect_health_against_standin():
+    stats, reporter = _run("inspect_health")
+    assert stats["success"] == 3
+    health = reporter.completed[("sw0", "inspect_health")]["result"]
+    assert health["basic"]["hostname"] == "StandIn"
+    assert health["resources"] == {"cpu_avg": 12.0, "memory_usage": 30.0}
+    assert health["interface_stats"] == {"total": 4, "up_count": 3, "error_total": 7}
+    assert health["interface_counters"]["GigabitEthernet0/0/3"][4] == 7
+
+
+def test_authentication_failure_is_reported_per_host():
+    stats, reporter = _run("run_commands", fail_auth=True, commands=["display version"])
+    assert stats["success"] == 0 and stats["failed"] == 3
+    result = reporter.completed[("sw0", "run_commands")]
+    assert result["failed"]
+    assert "Authentication failed" in result["result"]
+
+
+def test_async_lease_records_contention_stats():
+    leases = DeviceLeaseManager(max_sessions=10)
+    leases.register("job", total_hosts=3)
+    held = threading.Event()
+
+    def hold():
+        with leases.lease("other", "sw0"):
+            held.set()
+            time.sleep(0.5)
+
+    def occupy():
+        threading.Thread(target=hold, daemon=True).start()
+        held.wait(5)
+
+    stats, _ = _run("run_commands", leases=leases, owner="job", before_run=occupy, commands=["display version"])
+    lease_stats = leases.unregister("job")
+    assert stats["success"] == 3
+    assert lease_stats["leased"] == 3
+    assert lease_stats["contended"] == 1
+    assert lease_stats["queue_depth"] == 0 and lease_stats["active"] == 0
+    assert lease_stats["wait_max"] >= 0.3
+    snapshot = leases.snapshot()
+    assert snapshot["sessions_in_use"] == 0 and snapshot["leased_devices"] == 0
+
+
+def test_host_timeout_recorded_on_control():
+    control = JobControl(log_id=1, host_timeout=0.5)
+    stats, reporter = _run("run_commands", delay=2, control=control, commands=["display version"])
+    assert stats["failed"] == 3
+    assert isinstance(reporter.completed[("sw0", "run_commands")]["exception"], JobAbortedError)
+    # 与线程引擎一致: 作业指标 abort.hosts 按原因统计超时设备
+    assert control.aborted_hosts() == {ABORT_TIMEOUT: 3}
+
+
+def test_cancel_recorded_on_control():
+    control = JobControl(log_id=1)
+    threading.Timer(0.5, control.cancel).start()
+    stats, _ = _run("run_commands", delay=5, control=control, commands=["display version"])
+    assert stats["failed"] == 3
+    assert control.reason == ABORT_CANCELLED
+    assert control.aborted_hosts() == {ABORT_CANCELLED: 3}
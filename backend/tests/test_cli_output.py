@@ -0,0 +1,113 @@
+"""
+流水线命令输出: 按提示符切分、无法切分时只逐条补发对不齐的命令、读取整体超时
+"""
+import pytest
+
+from backend.network_engine.cli_output import split_pipelined_output
+from backend.network_engine.nornir_module.tasks import commands as commands_module
+from backend.network_engine.nornir_module.tasks.commands import send_batch
+
+PROMPT = "<SW1>"
+
+OUTPUTS = {
+    "display version": "Huawei Versatile Routing Platform Software\nVRP (R) software, Version 5.170",
+    "display clock": "2024-06-11 10:00:00",
+    "display cpu-usage": "CPU Usage            : 12% Max: 40%",
+}
+
+
+def _raw(commands, outputs=None, prompt=PROMPT):
+    """模拟设备对流水线输入的回显 (初始提示符已被读走): 每条命令依次为回显、结果、提示符"""
+    outputs = outputs or OUTPUTS
+    return "".join(f"{cmd}\r\n{outputs[cmd]}\r\n{prompt}" for cmd in commands)
+
+
+def test_split_all_commands():
+    commands = list(OUTPUTS)
+    assert split_pipelined_output(_raw(commands), PROMPT, commands) == [OUTPUTS[c] for c in commands]
+
+
+def test_split_stops_before_misaligned_command():
+    commands = list(OUTPUTS)
+    # 第二条命令改变了提示符: 只有第一条命令的输出能确定完整
+    raw = f"display version\n{OUTPUTS['display version']}\n{PROMPT}display clock\n" \
+          f"{OUTPUTS['display clock']}\n[SW1]display cpu-usage\n{OUTPUTS['display cpu-usage']}\n[SW1]"
+    assert split_pipelined_output(raw, PROMPT, commands) == [OUTPUTS["display version"]]
+
+
+def test_split_drops_output_truncated_by_prompt_like_line():
+    commands = list(OUTPUTS)
+    outputs = dict(OUTPUTS, **{"display clock": f"line 1\n{PROMPT} looks like a prompt\nline 3"})
+    assert split_pipelined_output(_raw(commands, outputs), PROMPT, commands) == [OUTPUTS["display version"]]
+
+    # 最后一条命令的输出中出现提示符样式行时，最后一条不返回
+    outputs = dict(OUTPUTS, **{"display cpu-usage": f"{PROMPT}"})
+    assert split_pipelined_output(_raw(commands, outputs), PROMPT, commands) == [OUTPUTS[c] for c in commands[:2]]
+
+
+def test_split_without_echo_returns_nothing():
+    commands = list(OUTPUTS)
+    assert split_pipelined_output(f"\n{PROMPT}\n{PROMPT}\n{PROMPT}", PROMPT, commands) == []
+
+
+class FakeConn:
+    """模拟 Netmiko 连接: 流水线写入后按块返回设备输出"""
+    RETURN = "\n"
+
+    def __init__(self, raw: str, chunk: int = 16, endless: bool = False):
+        self.raw = raw
+        self.chunk = chunk
+        self.endless = endless
+        self.pos = 0
+        self.sent = []
+        self.cleared = 0
+
+    def find_prompt(self):
+        return PROMPT
+
+    def write_channel(self, data):
+        self.written = data
+
+    def read_channel(self):
+        if self.endless:
+            return "more output\n"
+        data = self.raw[self.pos:self.pos + self.chunk]
+        self.pos += len(data)
+        return data
+
+    def strip_ansi_escape_codes(self, text):
+        return text
+
+    def clear_buffer(self):
+        self.cleared += 1
+
+    def send_command(self, cmd):
+        self.sent.append(cmd)
+        return OUTPUTS[cmd]
+
+
+def test_send_batch_pipelined():
+    commands = list(OUTPUTS)
+    conn = FakeConn(_raw(commands))
+    outputs, mode = send_batch(conn, commands, "sw1")
+    assert mode == "pipelined"
+    assert outputs == [OUTPUTS[c] for c in commands]
+    assert conn.sent == []
+
+
+def test_send_batch_retries_only_unsplit_commands():
+    commands = list(OUTPUTS)
+    outputs = dict(OUTPUTS, **{"display clock": f"{PROMPT} clock"})
+    conn = FakeConn(_raw(commands, outputs))
+    result, mode = send_batch(conn, commands, "sw1")
+    assert mode == "partial"
+    assert result == [OUTPUTS[c] for c in commands]
+    assert conn.sent == ["display clock", "display cpu-usage"]
+    assert conn.cleared == 1
+
+
+def test_send_batch_deadline_applies_while_output_keeps_arriving(monkeypatch):
+    monkeypatch.setattr(commands_module.settings, "AUTOMATION_QUERY_READ_TIMEOUT", 0.2)
+    conn = FakeConn("", endless=True)
+    with pytest.raises(TimeoutError):
+        send_batch(conn, list(OUTPUTS), "sw1")
@@ -0,0 +1,180 @@
+"""
+配置元数据索引: 增量更新后的文件树与存储统计应与从磁盘全量重建的索引一致
+"""
+import os
+import random
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from backend.models.configs import ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry
+from backend.services.configs.config_index import ConfigIndex
+from backend.services.configs.version_store import ConfigVersionStore
+
+TABLES = [t.__table__ for t in (ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry)]
+CONFIG = "#\nsysname {name}\n#\ninterface GigabitEthernet0/0/1\n description {body}\n#\nreturn\n"
+
+
+class Storage:
+    """存储目录 + 增量维护的索引；每次变更后与全量重建的索引比对"""
+
+    def __init__(self, tmp_path: Path):
+        self.tmp_path = tmp_path
+        self.root = tmp_path / "configs"
+        self.root.mkdir()
+        self.versions = ConfigVersionStore(snapshot_interval=3, keep_plain=1)
+        self.index = self._new_index("incremental.db")
+        self.clock = 1_700_000_000
+        self.rebuilds = 0
+
+    def _new_index(self, db: str) -> ConfigIndex:
+        engine = create_engine(f"sqlite:///{self.tmp_path / db}")
+        SQLModel.metadata.create_all(engine, tables=TABLES)
+        return ConfigIndex(engine, self.root, versions=self.versions)
+
+    def write(self, region: str, device: str, name: str, body: str = "") -> Path:
+        path = self.root / region / device / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(CONFIG.format(name=device, body=body or name))
+        # 修改时间互不相同，文件树内的排序确定
+        self.clock += 1
+        os.utime(path, (self.clock, self.clock))
+        return path
+
+    def check(self) -> None:
+        """增量统计与文件树 == 同一磁盘状态下全量校准得到的结果"""
+        self.rebuilds += 1
+        fresh = self._new_index(f"fresh_{self.rebuilds}.db")
+        fresh.reconcile()
+        expected, actual = fresh.stats(), self.index.stats()
+        for stats in (expected, actual):
+            stats.pop("newest_age")
+        assert actual == expected
+        assert self.index.tree() == fresh.tree()
+        fresh.engine.dispose()
+
+
+@pytest.fixture()
+def storage(tmp_path):
+    storage = Storage(tmp_path)
+    storage.write("beijing", "sw1", "a.cfg")
+    storage.write("beijing", "sw1", "b.cfg")
+    storage.write("beijing", "sw2", "a.cfg")
+    storage.write("shanghai", "sw3", "a.cfg")
+    storage.index.reconcile()
+    yield storage
+    storage.index.engine.dispose()
+
+
+def test_incremental_stats_match_full_reconcile(storage):
+    root, index = storage.root, storage.index
+    storage.check()
+
+    # 修改: 大小与修改时间变化
+    storage.write("beijing", "sw1", "a.cfg", body="x" * 500)
+    index.refresh_device(root / "beijing" / "sw1")
+    storage.check()
+
+    # 新增文件与新设备
+    storage.write("beijing", "sw1", "c.cfg")
+    storage.write("shanghai", "sw4", "a.cfg")
+    index.refresh_device(root / "beijing" / "sw1")
+    index.refresh_device(root / "shanghai" / "sw4")
+    storage.check()
+
+    # 删除最新的文件 (区域最新修改时间回退)
+    (root / "shanghai" / "sw4" / "a.cfg").unlink()
+    index.refresh_device(root / "shanghai" / "sw4")
+    storage.check()
+
+    # 旧版本打包进版本存储
+    storage.versions.compact(root / "beijing" / "sw1")
+    index.refresh_device(root / "beijing" / "sw1")
+    storage.check()
+
+    # 设备改名 (同区域) 与移动到其他区域
+    os.rename(root / "beijing" / "sw2", root / "beijing" / "sw2-new")
+    index.move_device("beijing", "sw2", "beijing", "sw2-new")
+    storage.check()
+    os.rename(root / "beijing" / "sw2-new", root / "shanghai" / "sw2-new")
+    index.move_device("beijing", "sw2-new", "shanghai", "sw2-new")
+    storage.check()
+
+    # 区域改名
+    os.rename(root / "shanghai", root / "guangzhou")
+    index.rename_region("shanghai", "guangzhou")
+    storage.check()
+
+    # 删除设备、删除区域，新建空区域与空设备
+    shutil.rmtree(root / "guangzhou" / "sw3")
+    index.remove("guangzhou", "sw3")
+    storage.check()
+    shutil.rmtree(root / "guangzhou")
+    index.remove("guangzhou")
+    storage.check()
+    (root / "wuhan" / "sw9").mkdir(parents=True)
+    index.add_region("wuhan")
+    index.add_device("wuhan", "sw9")
+    storage.check()
+
+
+def test_random_operations_match_full_reconcile(storage):
+    rng = random.Random(42)
+    root, index = storage.root, storage.index
+    regions = ["beijing", "shanghai", "shenzhen"]
+
+    def devices():
+        return [(r, d.name) for r in regions if (root / r).is_dir() for d in (root / r).iterdir() if d.is_dir()]
+
+    def files(region, device):
+        return [f.name for f in (root / region / device).iterdir() if f.is_file()]
+
+    for step in range(60):
+        op = rng.choice(["modify", "add", "remove", "move", "rename", "drop", "compact"])
+        present = devices()
+        if op in ("modify", "remove", "compact", "move", "drop") and not present:
+            op = "add"
+        if op == "add":
+            region, device = rng.choice(regions), f"sw{rng.randrange(8)}"
+            storage.write(region, device, f"f{step}.cfg")
+            index.refresh_device(root / region / device)
+        elif op == "modify":
+            region, device = rng.choice(present)
+            names = files(region, device)
+            if names:
+                storage.write(region, device, rng.choice(names), body="y" * rng.randrange(1, 300))
+            index.refresh_device(root / region / device)
+        elif op == "remove":
+            region, device = rng.choice(present)
+            names = files(region, device)
+            if names:
+                (root / region / device / rng.choice(names)).unlink()
+            index.refresh_device(root / region / device)
+        elif op == "compact":
+            region, device = rng.choice(present)
+            storage.versions.compact(root / region / device)
+            index.refresh_device(root / region / device)
+        elif op == "move":
+            region, device = rng.choice(present)
+            target_region, target_device = rng.choice(regions), f"sw{rng.randrange(8, 16)}"
+            if (root / target_region / target_device).exists():
+                continue
+            (root / target_region).mkdir(exist_ok=True)
+            index.add_region(target_region)
+            os.rename(root / region / device, root / target_region / target_device)
+            index.move_device(region, device, target_region, target_device)
+        elif op == "rename":
+            old = rng.choice(regions)
+            new = f"region{step}"
+            if not (root / old).is_dir():
+                continue
+            os.rename(root / old, root / new)
+            index.rename_region(old, new)
+            regions[regions.index(old)] = new
+        elif op == "drop":
+            region, device = rng.choice(present)
+            shutil.rmtree(root / region / device)
+            index.remove(region, device)
+        storage.check()
@@ -0,0 +1,140 @@
+"""
+配置全文索引与全局搜索: trigram 子串匹配、最新版本过滤、按内容哈希去重、无引用文档清理，
+以及文件名搜索的通配符转义、结果 id 唯一、索引建立前回退为遍历存储目录
+"""
+import os
+from pathlib import Path
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from backend.api.system.logs import _config_content_results, _config_file_results
+from backend.models.configs import (ConfigContentDoc, ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState,
+                                    ConfigRegionEntry)
+from backend.services.configs.config_index import ConfigIndex
+from backend.services.configs.config_search import ConfigSearchIndex
+from backend.services.configs.version_store import ConfigVersionStore
+
+TABLES = [t.__table__ for t in (ConfigContentDoc, ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry)]
+CONFIG = "#\nsysname {name}\n#\nvlan batch 10 20\n#\ninterface Vlanif10\n ip address {ip} 255.255.255.0\n#\nreturn\n"
+
+
+class Storage:
+    def __init__(self, tmp_path: Path):
+        self.root = tmp_path / "configs"
+        self.root.mkdir()
+        self.engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+        SQLModel.metadata.create_all(self.engine, tables=TABLES)
+        self.index = ConfigIndex(self.engine, self.root, versions=ConfigVersionStore(snapshot_interval=3, keep_plain=10))
+        self.search = ConfigSearchIndex(self.engine, self.index, max_file_bytes=1024 * 1024)
+        self.clock = 1_700_000_000
+
+    def write(self, region: str, device: str, name: str, content: str) -> Path:
+        path = self.root / region / device / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        self.clock += 1
+        os.utime(path, (self.clock, self.clock))
+        return path
+
+    def docs(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql("SELECT count(*) FROM configcontentdoc").scalar()
+
+
+@pytest.fixture()
+def storage(tmp_path):
+    storage = Storage(tmp_path)
+    storage.write("beijing", "sw1", "sw1_20240101.cfg", CONFIG.format(name="SW1", ip="10.1.1.1"))
+    storage.write("beijing", "sw1", "sw1_20240201.cfg", CONFIG.format(name="SW1", ip="10.1.1.254"))
+    storage.write("shanghai", "sw2", "sw2_20240101.cfg", CONFIG.format(name="SW2", ip="10.2.2.1"))
+    storage.index.reconcile()
+    storage.search.sync()
+    yield storage
+    storage.engine.dispose()
+
+
+def _found(result):
+    return sorted((f["device"], f["name"]) for f in result["files"])
+
+
+def test_trigram_substring_case_insensitive(storage):
+    result = storage.search.search("VLANIF10")
+    assert result["total"] == 2
+    hit = result["files"][0]["hits"][0]
+    assert hit["text"] == "interface Vlanif10" and hit["spans"] == [[10, 18]]
+
+    # 任意子串 (IP 片段) 与只在旧版本中出现的内容
+    assert _found(storage.search.search("10.2.2")) == [("sw2", "sw2_20240101.cfg")]
+    assert storage.search.search("10.1.1.1")["total"] == 0
+    assert _found(storage.search.search("10.1.1.1", version="all")) == [("sw1", "sw1_20240101.cfg")]
+
+    with pytest.raises(ValueError):
+        storage.search.search("10")
+
+
+def test_version_filter(storage):
+    latest = _found(storage.search.search("sysname"))
+    assert latest == [("sw1", "sw1_20240201.cfg"), ("sw2", "sw2_20240101.cfg")]
+    assert storage.search.search("sysname", version="all")["total"] == 3
+    assert _found(storage.search.search("sysname", version="sw1_20240101.cfg")) == [("sw1", "sw1_20240101.cfg")]
+    assert _found(storage.search.search("sysname", region="shanghai")) == [("sw2", "sw2_20240101.cfg")]
+
+
+def test_query_syntax_is_literal(storage):
+    # FTS5 关键字与引号按字面匹配，不报语法错误
+    assert storage.search.search('SW1 OR SW2')["total"] == 0
+    assert storage.search.search('"sysname')["total"] == 0
+
+
+def test_identical_content_shares_one_document(storage):
+    assert storage.docs() == 3
+    storage.write("shanghai", "sw3", "sw3_20240101.cfg", CONFIG.format(name="SW2", ip="10.2.2.1"))
+    storage.index.refresh_device(storage.root / "shanghai" / "sw3")
+    assert storage.search.sync() == 1
+    assert storage.docs() == 3
+    assert _found(storage.search.search("10.2.2.1")) == [("sw2", "sw2_20240101.cfg"), ("sw3", "sw3_20240101.cfg")]
+
+
+def test_changed_and_deleted_files_garbage_collected(storage):
+    storage.write("shanghai", "sw2", "sw2_20240101.cfg", CONFIG.format(name="SW2", ip="10.9.9.9"))
+    (storage.root / "beijing" / "sw1" / "sw1_20240101.cfg").unlink()
+    storage.index.refresh_device(storage.root / "shanghai" / "sw2")
+    storage.index.refresh_device(storage.root / "beijing" / "sw1")
+    storage.search.sync()
+
+    assert storage.search.collect_garbage() == 2
+    assert storage.docs() == 2
+    assert storage.search.search("10.2.2", version="all")["total"] == 0
+    assert _found(storage.search.search("10.9.9")) == [("sw2", "sw2_20240101.cfg")]
+    assert storage.search.collect_garbage() == 0
+
+
+def test_global_search_file_names_escape_wildcards(storage):
+    storage.write("beijing", "sw1", "sw1_50%_backup.cfg", CONFIG.format(name="SW1", ip="10.1.1.254"))
+    storage.index.refresh_device(storage.root / "beijing" / "sw1")
+
+    assert [r["title"] for r in _config_file_results("50%", storage.index)] == ["sw1_50%_backup.cfg"]
+    # "_" 不作为单字符通配符
+    assert _config_file_results("sw1_2024_", storage.index) == []
+    assert len(_config_file_results("_2024", storage.index)) == 3
+
+
+def test_global_search_ids_unique_across_file_and_content_hits(storage):
+    results = _config_file_results("sw1", storage.index) + _config_content_results("sw1", storage.search)
+    assert {r["type"] for r in results} == {"config", "config_content"}
+    assert len({r["id"] for r in results}) == len(results)
+    content = next(r for r in results if r["type"] == "config_content")
+    assert content["id"].endswith("_L2") and content["description"] == "第 2 行: sysname SW1"
+
+
+def test_global_search_before_index_built(tmp_path):
+    storage = Storage(tmp_path)
+    storage.write("beijing", "sw1", "sw1_20240101.cfg", CONFIG.format(name="SW1", ip="10.1.1.1"))
+    assert not storage.index.built()
+
+    # 首次校准完成前: 文件名搜索遍历存储目录，内容搜索暂不可用
+    results = _config_file_results("sw1_2024", storage.index)
+    assert [(r["title"], r["id"]) for r in results] == [("sw1_20240101.cfg", "file_beijing_sw1_sw1_20240101.cfg")]
+    assert _config_content_results("sysname", storage.search) == []
+    storage.engine.dispose()
@@ -0,0 +1,143 @@
+"""
+配置备份去重: 易变行规范化不掩盖真实变更；未变更时只校验，换区域后在新目录写入
+"""
+import os
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from backend.models.automation import ConfigBackupState
+from backend.network_engine.config_state import ConfigStateStore, config_fingerprint, normalize_config
+
+IOS = """Building configuration...
+
+Current configuration : 1234 bytes
+!
+! Last configuration change at 10:00:00 UTC Mon Jun 10 2024 by admin
+! NVRAM config last updated at 10:00:01 UTC Mon Jun 10 2024 by admin
+!
+version 15.2
+hostname SW1
+ntp clock-period 17179856
+!
+interface GigabitEthernet0/1
+ description uplink
+!
+end"""
+
+NXOS = """!Command: show running-config
+!Time: Mon Jun 10 10:00:00 2024
+
+version 9.3(8)
+hostname N9K"""
+
+ASA = """: Saved
+: Written by enable_15 at 10:00:00.123 UTC Mon Jun 10 2024
+ASA Version 9.8(4)
+hostname asa1
+Cryptochecksum:0123456789abcdef0123456789abcdef"""
+
+HUAWEI = """!Software Version V200R019C10SPC500
+!Last configuration was updated at 2024-06-10 10:00:00+08:00
+!Last configuration was saved at 2024-06-10 09:00:00+08:00
+#
+sysname SW1
+#
+return"""
+
+JUNOS = """## Last commit: 2024-06-10 10:00:00 UTC by admin
+version 20.4R3;
+system {
+    host-name mx1;
+}"""
+
+# 易变行被替换为其他时间 / 数值后，指纹不变
+VOLATILE_EDITS = [
+    (IOS, "Current configuration : 1234 bytes", "Current configuration : 1240 bytes"),
+    (IOS, "Last configuration change at 10:00:00", "Last configuration change at 11:30:00"),
+    (IOS, "NVRAM config last updated at 10:00:01", "NVRAM config last updated at 11:30:01"),
+    (IOS, "ntp clock-period 17179856", "ntp clock-period 17179870"),
+    (NXOS, "!Time: Mon Jun 10 10:00:00 2024", "!Time: Tue Jun 11 08:00:00 2024"),
+    (ASA, "Written by enable_15 at 10:00:00.123", "Written by admin at 12:00:00.456"),
+    (ASA, "Cryptochecksum:0123456789abcdef", "Cryptochecksum:fedcba9876543210"),
+    (HUAWEI, "was updated at 2024-06-10 10:00:00", "was updated at 2024-06-11 10:00:00"),
+    (HUAWEI, "was saved at 2024-06-10 09:00:00", "was saved at 2024-06-11 09:00:00"),
+    (JUNOS, "## Last commit: 2024-06-10 10:00:00", "## Last commit: 2024-06-11 10:00:00"),
+]
+
+# 真实的配置变更 (包括与易变行相邻或相似的行) 必须改变指纹
+REAL_EDITS = [
+    (IOS, " description uplink", " description core-uplink"),
+    (IOS, "hostname SW1", "hostname SW2"),
+    (IOS, "version 15.2", "version 15.9"),
+    (IOS, "ntp clock-period 17179856", "ntp server 10.0.0.1"),
+    (NXOS, "hostname N9K", "hostname N9K-2"),
+    (ASA, "hostname asa1", "hostname asa2"),
+    (HUAWEI, "sysname SW1", "sysname SW2"),
+    (HUAWEI, "!Software Version V200R019C10SPC500", "!Software Version V200R020C00"),
+    (JUNOS, "host-name mx1;", "host-name mx2;"),
+]
+
+
+@pytest.mark.parametrize("config,old,new", VOLATILE_EDITS)
+def test_volatile_lines_ignored(config, old, new):
+    assert old in config
+    assert config_fingerprint(config.replace(old, new)) == config_fingerprint(config)
+
+
+@pytest.mark.parametrize("config,old,new", REAL_EDITS)
+def test_real_changes_detected(config, old, new):
+    assert old in config
+    assert config_fingerprint(config.replace(old, new)) != config_fingerprint(config)
+
+
+def test_added_description_containing_volatile_text_detected():
+    # 接口描述中出现时间戳样式的文字不属于易变行
+    changed = IOS.replace(" description uplink", " description Last configuration change at 10:00")
+    assert config_fingerprint(changed) != config_fingerprint(IOS)
+
+
+def test_line_endings_and_trailing_whitespace_normalized():
+    assert normalize_config(HUAWEI.replace("\n", "\r\n").replace("sysname SW1", "sysname SW1   ")) == normalize_config(HUAWEI)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'state.db'}")
+    SQLModel.metadata.create_all(engine, tables=[ConfigBackupState.__table__])
+    yield ConfigStateStore(engine)
+    engine.dispose()
+
+
+def test_unchanged_config_only_verified(store, tmp_path):
+    root = str(tmp_path / "backups")
+    changed, path = store.save_backup("sw1", "beijing", HUAWEI, root)
+    assert changed and os.path.exists(path)
+
+    volatile = HUAWEI.replace("2024-06-10 10:00:00", "2024-06-12 10:00:00")
+    assert store.save_backup("sw1", "beijing", volatile, root) == (False, path)
+    assert store.get("sw1").verify_count == 1
+
+    changed, new_path = store.save_backup("sw1", "beijing", HUAWEI.replace("SW1", "SW2"), root)
+    assert changed and "sysname SW2" in open(new_path, encoding="utf-8").read()
+    assert store.get("sw1").verify_count == 0
+
+
+def test_region_change_writes_backup_in_new_directory(store, tmp_path):
+    root = str(tmp_path / "backups")
+    _, old_path = store.save_backup("sw1", "beijing", HUAWEI, root)
+
+    changed, new_path = store.save_backup("sw1", "shanghai", HUAWEI, root)
+    assert changed
+    assert os.path.dirname(new_path) == os.path.join(root, "shanghai", "sw1")
+    # 在新区域再次备份: 以新目录中的文件为准校验
+    assert store.save_backup("sw1", "shanghai", HUAWEI, root) == (False, new_path)
+    assert os.path.exists(old_path)
+
+
+def test_missing_backup_file_rewritten(store, tmp_path):
+    root = str(tmp_path / "backups")
+    _, path = store.save_backup("sw1", "beijing", HUAWEI, root)
+    os.remove(path)
+    changed, new_path = store.save_backup("sw1", "beijing", HUAWEI, root)
+    assert changed and os.path.exists(new_path)
@@ -0,0 +1,123 @@
+"""
+配置存储目录监听: 事件按设备目录合并防抖、持续写入时限时强制刷新、目录外事件忽略，
+以及 watchdog 实际监听外部写入后增量更新索引
+"""
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from backend.models.configs import ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry
+from backend.services.configs import config_watcher as watcher_module
+from backend.services.configs.config_index import ConfigIndex
+from backend.services.configs.config_watcher import MAX_DEBOUNCE_ROUNDS, ConfigWatcher
+from backend.services.configs.version_store import ConfigVersionStore
+
+
+class FakeIndex:
+    """记录刷新调用的索引替身"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.calls = []
+        self.refreshed = threading.Event()
+
+    def reconcile(self, pause: float = 0) -> None:
+        self.calls.append(("reconcile",))
+
+    def refresh_device(self, path: Path) -> None:
+        self.calls.append(("device", path.parent.name, path.name))
+        self.refreshed.set()
+
+    def refresh_region(self, region: str) -> None:
+        self.calls.append(("region", region))
+        self.refreshed.set()
+
+
+def _wait(predicate, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_events_grouped_by_device_directory(tmp_path):
+    root = tmp_path / "configs"
+    watcher = ConfigWatcher(FakeIndex(root), debounce=1, reconcile_interval=0, reconcile_pause=0, watch=False)
+    watcher.notify(str(root / "beijing" / "sw1" / "a.cfg"))
+    watcher.notify(str(root / "beijing" / "sw1" / ".versions" / "pack.bin"))
+    watcher.notify(str(root / "beijing" / "sw2"))
+    watcher.notify(str(root / "shanghai"))
+    # 存储目录本身与目录外的事件忽略
+    watcher.notify(str(root))
+    watcher.notify(str(tmp_path / "elsewhere" / "x.cfg"))
+    assert set(watcher._pending) == {("beijing", "sw1"), ("beijing", "sw2"), ("shanghai",)}
+    assert watcher.stats["events"] == 4
+
+
+def test_debounce_waits_for_silence_but_not_forever(tmp_path):
+    root = tmp_path / "configs"
+    watcher = ConfigWatcher(FakeIndex(root), debounce=1, reconcile_interval=0, reconcile_pause=0, watch=False)
+    watcher.notify(str(root / "beijing" / "sw1" / "a.cfg"))
+    first, _ = watcher._pending[("beijing", "sw1")]
+
+    # 持续有写入: 未静默满防抖时间不刷新
+    watcher._pending[("beijing", "sw1")] = (first, first + 5)
+    assert watcher._due(first + 5.5) == []
+    # 静默满防抖时间后刷新并移出待处理
+    assert watcher._due(first + 6) == [("beijing", "sw1")]
+    assert watcher._pending == {}
+
+    # 写入从未停止: 累计等待达到上限后强制刷新
+    watcher._pending[("beijing", "sw1")] = (first, first + MAX_DEBOUNCE_ROUNDS - 0.1)
+    assert watcher._due(first + MAX_DEBOUNCE_ROUNDS) == [("beijing", "sw1")]
+
+
+def test_loop_refreshes_each_directory_once(tmp_path):
+    root = tmp_path / "configs"
+    index = FakeIndex(root)
+    watcher = ConfigWatcher(index, debounce=0.2, reconcile_interval=0, reconcile_pause=0, watch=False)
+    watcher.start()
+    try:
+        assert _wait(lambda: index.calls == [("reconcile",)])
+        for i in range(20):
+            watcher.notify(str(root / "beijing" / "sw1" / f"{i}.cfg"))
+        watcher.notify(str(root / "shanghai"))
+        assert _wait(lambda: watcher.stats["refreshed"] == 2)
+        time.sleep(0.3)
+    finally:
+        watcher.stop()
+    assert sorted(index.calls[1:]) == [("device", "beijing", "sw1"), ("region", "shanghai")]
+    assert watcher.stats["events"] == 21
+
+
+def test_periodic_reconcile(tmp_path):
+    index = FakeIndex(tmp_path / "configs")
+    watcher = ConfigWatcher(index, debounce=1, reconcile_interval=0.1, reconcile_pause=0, watch=False)
+    watcher.start()
+    try:
+        assert _wait(lambda: watcher.stats["reconciles"] >= 3)
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.skipif(not watcher_module.HAS_WATCHDOG, reason="未安装 watchdog")
+def test_external_write_updates_index(tmp_path):
+    root = tmp_path / "configs"
+    (root / "beijing" / "sw1").mkdir(parents=True)
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    SQLModel.metadata.create_all(engine, tables=[t.__table__ for t in (
+        ConfigDeviceEntry, ConfigFileEntry, ConfigIndexState, ConfigRegionEntry)])
+    index = ConfigIndex(engine, root, versions=ConfigVersionStore(snapshot_interval=3, keep_plain=10))
+    watcher = ConfigWatcher(index, debounce=0.1, reconcile_interval=0, reconcile_pause=0)
+    watcher.start()
+    try:
+        assert _wait(index.built)
+        (root / "beijing" / "sw1" / "sw1_20240101.cfg").write_text("#\nsysname SW1\n#\nreturn\n")
+        assert _wait(lambda: index.stats()["total_files"] == 1)
+    finally:
+        watcher.stop()
+        engine.dispose()
+    assert index.stats()["total_devices"] == 1
@@ -0,0 +1,71 @@
+"""
+连接池: 空闲会话计入全局会话预算
+"""
+from types import SimpleNamespace
+
+from backend.network_engine.connection_pool import ConnectionPool
+from backend.services.automation import lease_manager as lease_module
+from backend.services.automation.lease_manager import DeviceLeaseManager
+
+
+class FakePlugin:
+    def __init__(self):
+        self.closed = False
+        self.connection = SimpleNamespace(is_alive=lambda: {"is_alive": not self.closed})
+
+    def close(self):
+        self.closed = True
+
+
+def _host(name: str, plugin=None):
+    host = SimpleNamespace(name=name, hostname=f"10.0.0.{name[-1]}", port=22, platform="huawei",
+                           username="u", password="p", connections={})
+    if plugin is not None:
+        host.connections["netmiko"] = plugin
+    return host
+
+
+def test_trim_evicts_least_recently_used_other_devices():
+    pool = ConnectionPool(max_idle=10, idle_timeout=300)
+    plugins = {name: FakePlugin() for name in ("d1", "d2", "d3")}
+    for name, plugin in plugins.items():
+        pool.checkin(_host(name, plugin))
+
+    assert pool.trim(0, keep="d1") == 2
+    assert plugins["d2"].closed and plugins["d3"].closed
+    assert not plugins["d1"].closed
+    assert pool.snapshot()["idle_connections"] == 1
+    assert pool.snapshot()["evicted_budget"] == 2
+
+
+def test_lease_keeps_open_sessions_within_budget(monkeypatch):
+    pool = ConnectionPool(max_idle=10, idle_timeout=300)
+    monkeypatch.setattr(lease_module, "connection_pool", pool)
+    leases = DeviceLeaseManager(max_sessions=3)
+    plugins = {name: FakePlugin() for name in ("d1", "d2", "d3")}
+    for name, plugin in plugins.items():
+        pool.checkin(_host(name, plugin))
+
+    # d4 没有空闲连接，需要新建会话: 最久未用的 d1 被淘汰
+    with leases.lease("job", "d4"):
+        assert plugins["d1"].closed
+        assert pool.snapshot()["idle_connections"] == 2
+        # d2 的空闲连接即将被借出，不占用额外预算
+        with leases.lease("job", "d2"):
+            assert pool.checkout(_host("d2"))
+            assert not plugins["d2"].closed and not plugins["d3"].closed
+            # 预算已满: 在途 d4、d2 + 新租约 d5，剩余的空闲会话 d3 被淘汰
+            with leases.lease("job", "d5"):
+                assert plugins["d3"].closed
+                assert pool.snapshot()["idle_connections"] == 0
+
+
+def test_checkout_counts_health_failures():
+    pool = ConnectionPool(max_idle=10, idle_timeout=300)
+    plugin = FakePlugin()
+    pool.checkin(_host("d1", plugin))
+    plugin.closed = True
+    host = _host("d1")
+    assert not pool.checkout(host)
+    assert pool.snapshot()["health_failures"] == 1
+    assert host.connections == {}
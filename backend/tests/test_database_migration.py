@@ -0,0 +1,68 @@
+"""
+旧库升级: 补齐的新字段带缺省值，已有行按模型缺省值回填，读取模型校验通过
+"""
+from sqlalchemy import inspect
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.core.database import _add_missing_columns
+from backend.models.automation import JobLog
+from backend.models.configs import ConfigRegionEntry
+from backend.models.device import Device, DeviceRead
+
+# 基线版本之后新增的字段
+ADDED = {
+    "device": ["snmp_port", "snmp_version", "snmp_community"],
+    "joblog": ["unreachable_count", "metrics"],
+    "configregionentry": ["devices", "files", "total_bytes", "newest_mtime"],
+}
+
+
+def _baseline_engine(tmp_path):
+    """建表并写入数据后删除新增字段，模拟升级前的数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Device(name="sw1", ip="10.0.0.1", platform="huawei"))
+        session.add(JobLog(job_id=1))
+        session.add(ConfigRegionEntry(name="beijing"))
+        session.commit()
+    with engine.begin() as conn:
+        for table, columns in ADDED.items():
+            for column in columns:
+                conn.exec_driver_sql(f'ALTER TABLE "{table}" DROP COLUMN "{column}"')
+    return engine
+
+
+def test_added_columns_backfilled_with_model_defaults(tmp_path):
+    engine = _baseline_engine(tmp_path)
+    _add_missing_columns(engine)
+
+    inspector = inspect(engine)
+    for table, columns in ADDED.items():
+        assert set(columns) <= {c["name"] for c in inspector.get_columns(table)}
+
+    with Session(engine) as session:
+        device = session.exec(select(Device)).one()
+        assert device.snmp_port == 161 and device.snmp_version is None
+        # 设备列表接口的响应模型
+        assert DeviceRead.model_validate(device).snmp_port == 161
+
+        log = session.exec(select(JobLog)).one()
+        assert log.unreachable_count == 0 and log.metrics == {}
+
+        region = session.exec(select(ConfigRegionEntry)).one()
+        assert (region.devices, region.files, region.total_bytes, region.newest_mtime) == (0, 0, 0, None)
+    engine.dispose()
+
+
+def test_added_columns_default_applies_to_raw_inserts(tmp_path):
+    engine = _baseline_engine(tmp_path)
+    _add_missing_columns(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO device (name, ip, status, port, connection_type, created_at, updated_at) "
+            "VALUES ('sw2', '10.0.0.2', 'UNKNOWN', 22, 'ssh', '2024-01-01', '2024-01-01')")
+        assert conn.exec_driver_sql("SELECT snmp_port FROM device WHERE name = 'sw2'").scalar() == 161
+    # 再次执行不重复添加
+    _add_missing_columns(engine)
+    engine.dispose()
@@ -0,0 +1,105 @@
+"""
+有界作业执行池: 按优先级通道出队、同优先级先进先出、准入上限、取消排队中的作业、排队位置推送
+"""
+import threading
+import time
+
+import pytest
+
+from backend.services.automation.executor import JobExecutor, JobPriority, JobQueueFullError
+
+
+class Runner:
+    """记录执行顺序；第一个作业阻塞直到放行，使后续作业留在队列中"""
+
+    def __init__(self):
+        self.order = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.finished = threading.Event()
+        self.expected = 0
+
+    def __call__(self, job_id: int, log_id: int) -> None:
+        self.order.append(log_id)
+        if len(self.order) == 1:
+            self.started.set()
+            self.release.wait(5)
+        if len(self.order) == self.expected:
+            self.finished.set()
+
+
+def _busy_executor(max_queue: int = 10, on_queue_change=None):
+    runner = Runner()
+    executor = JobExecutor(runner, max_workers=1, max_queue=max_queue, on_queue_change=on_queue_change)
+    executor.submit(job_id=100, log_id=100, priority=JobPriority.SCHEDULED)
+    assert runner.started.wait(5)
+    return executor, runner
+
+
+def test_priority_lanes_then_fifo():
+    executor, runner = _busy_executor()
+    assert executor.is_running(100)
+    submitted = [(1, JobPriority.SCHEDULED), (2, JobPriority.MANUAL), (3, JobPriority.INTERACTIVE),
+                 (4, JobPriority.SCHEDULED), (5, JobPriority.INTERACTIVE)]
+    for log_id, priority in submitted:
+        executor.submit(job_id=log_id, log_id=log_id, priority=priority)
+    assert executor.position(3) == 1 and executor.position(4) == 5
+    assert executor.snapshot()["lanes"] == {"interactive": 2, "manual": 1, "scheduled": 2}
+
+    runner.expected = 6
+    runner.release.set()
+    assert runner.finished.wait(5)
+    assert runner.order == [100, 3, 5, 2, 1, 4]
+    assert executor.position(3) is None
+
+
+def test_queue_full_rejected():
+    executor, runner = _busy_executor(max_queue=2)
+    executor.submit(job_id=1, log_id=1)
+    executor.submit(job_id=2, log_id=2)
+    with pytest.raises(JobQueueFullError):
+        executor.submit(job_id=3, log_id=3)
+    runner.release.set()
+
+
+def test_cancel_and_find_queued():
+    changes = []
+    executor, runner = _busy_executor(on_queue_change=changes.append)
+    executor.submit(job_id=7, log_id=1)
+    executor.submit(job_id=8, log_id=2)
+    assert executor.find_queued(8) == 2 and executor.find_queued(9) is None
+
+    assert executor.cancel(1)
+    assert not executor.cancel(1)
+    # 执行中的作业不在队列中，无法从队列取消
+    assert not executor.cancel(100)
+    assert executor.position(2) == 1
+    # 每次排队变化都推送最新排队位置
+    assert changes[-1] == [{"log_id": 2, "job_id": 8, "priority": "manual", "position": 1,
+                            "waited": changes[-1][0]["waited"]}]
+
+    runner.expected = 2
+    runner.release.set()
+    assert runner.finished.wait(5)
+    assert runner.order == [100, 2]
+
+
+def test_runner_exception_does_not_kill_worker():
+    done = threading.Event()
+    calls = []
+
+    def runner(job_id, log_id):
+        calls.append(log_id)
+        if log_id == 1:
+            raise RuntimeError("boom")
+        done.set()
+
+    executor = JobExecutor(runner, max_workers=1, max_queue=10)
+    executor.submit(job_id=1, log_id=1)
+    executor.submit(job_id=2, log_id=2)
+    assert done.wait(5)
+    assert calls == [1, 2]
+    deadline = time.monotonic() + 5
+    while executor.is_running(2) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor.snapshot()["running"] == []
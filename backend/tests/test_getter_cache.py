@@ -0,0 +1,53 @@
+"""
+Getter 缓存: 返回值与缓存隔离、TTL 过期、配置备份不占用缓存
+"""
+import time
+from types import SimpleNamespace
+
+from nornir.core.task import Result
+
+from backend.network_engine.getter_cache import GetterCache, getter_cache
+from backend.network_engine.nornir_module.tasks import backup as backup_module
+
+
+def test_cached_values_are_isolated_from_callers():
+    cache = GetterCache(ttl=60, max_entries=10)
+    value = {"interfaces": {"Gi0/0/1": {"is_up": True}}}
+    cache.put("sw1", "interfaces", value)
+    value["interfaces"]["Gi0/0/1"]["is_up"] = False
+
+    hit, cached = cache.get("sw1", "interfaces")
+    assert hit and cached["interfaces"]["Gi0/0/1"]["is_up"] is True
+    cached["interfaces"].clear()
+    assert cache.get("sw1", "interfaces")[1]["interfaces"]["Gi0/0/1"]["is_up"] is True
+
+
+def test_entries_expire_and_evict():
+    cache = GetterCache(ttl=60, max_entries=2)
+    cache.put("sw1", "facts", {"a": 1}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("sw1", "facts") == (False, None)
+    for host in ("sw1", "sw2", "sw3"):
+        cache.put(host, "facts", {})
+    assert cache.get("sw1", "facts")[0] is False
+    assert cache.snapshot()["evicted"] == 1
+
+
+def test_backup_reads_device_without_filling_cache(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_napalm_get(task, getters, **kwargs):
+        calls.append(list(getters))
+        return Result(host=task.host, result={"config": {"running": "sysname SW1\n", "startup": ""}})
+
+    task = SimpleNamespace(host=SimpleNamespace(name="backup-cache-sw", data={"region": "beijing"}))
+    task.run = lambda **kwargs: kwargs.pop("task")(task, **kwargs)
+    monkeypatch.setattr(backup_module, "napalm_get", fake_napalm_get)
+    monkeypatch.setattr(backup_module.config_states, "save_backup", lambda *args, **kwargs: (True, "saved.cfg"))
+
+    before = getter_cache.snapshot()["entries"]
+    for _ in range(2):
+        assert backup_module.backup_config(task, str(tmp_path)).result == "saved.cfg"
+    assert calls == [["config"], ["config"]]
+    assert getter_cache.get("backup-cache-sw", "config") == (False, None)
+    assert getter_cache.snapshot()["entries"] == before
@@ -0,0 +1,69 @@
+"""
+健康巡检: 资源利用率与接口计数器不经 getter 缓存，TTL 内重复巡检也取到新计数器
+"""
+from types import SimpleNamespace
+
+from nornir.core.task import Result
+
+from backend.network_engine import getter_cache as getter_cache_module
+from backend.network_engine.async_engine.standin import RESPONSES
+from backend.network_engine.getter_cache import getter_cache
+from backend.network_engine.nornir_module.tasks import health as health_module
+from backend.network_engine.nornir_module.tasks.health import inspect_health
+
+
+class FakeTask:
+    """只支持 inspect_health 用到的 task.run / host.get_connection"""
+
+    def __init__(self, platform: str):
+        self.host = SimpleNamespace(name="health-test-sw", platform=platform,
+                                    get_connection=lambda *args: SimpleNamespace(base_prompt="SW1"))
+        self.nornir = SimpleNamespace(config=None)
+
+    def run(self, task, name=None, **kwargs):
+        return task(self, **kwargs)
+
+
+def test_napalm_counters_bypass_cache(monkeypatch):
+    calls = []
+
+    def fake_napalm_get(task, getters, **kwargs):
+        calls.append(list(getters))
+        n = len(calls)
+        data = {
+            "facts": {"hostname": "SW1", "model": "S5735"},
+            "environment": {"cpu": {"0": {"usage": 10 + n}}, "memory": {"used": n, "limit": 100}},
+            "interfaces": {"Gi0/0/1": {"is_up": True, "speed": 1000}},
+            "interfaces_counters": {"Gi0/0/1": {"rx_octets": 1000 * n, "tx_octets": 2000 * n}},
+        }
+        return Result(host=task.host, result={g: data[g] for g in getters})
+
+    monkeypatch.setattr(getter_cache_module, "napalm_get", fake_napalm_get)
+    task = FakeTask("ios")
+    try:
+        first = inspect_health(task, native=False).result
+        second = inspect_health(task, native=False).result
+    finally:
+        getter_cache.invalidate(task.host.name)
+
+    # facts 第二次命中缓存，资源与计数器两次都向设备采集
+    assert calls.count(["facts"]) == 1
+    assert calls.count(["environment"]) == 2
+    assert calls.count(["interfaces", "interfaces_counters"]) == 2
+    assert second["interface_counters"]["Gi0/0/1"][0] > first["interface_counters"]["Gi0/0/1"][0]
+    assert second["resources"]["cpu_avg"] != first["resources"]["cpu_avg"]
+
+
+def test_native_collector_always_reads_device(monkeypatch):
+    batches = []
+
+    def fake_send_batch(conn, commands, host_name):
+        batches.append(commands)
+        return [RESPONSES.get(cmd, "") for cmd in commands], "pipelined"
+
+    monkeypatch.setattr(health_module, "send_batch", fake_send_batch)
+    task = FakeTask("huawei")
+    for _ in range(2):
+        health = inspect_health(task).result
+        assert health["interface_counters"]["GigabitEthernet0/0/3"][4] == 7
+    assert len(batches) == 2
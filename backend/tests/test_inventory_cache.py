@@ -0,0 +1,99 @@
+"""
+Inventory 缓存: 按 updated_at 判定变更、只解密新增或变更的设备、删除与改名后剔除、定向刷新只查询指定设备
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.core.security import encrypt_password
+from backend.models.device import Device
+from backend.network_engine import inventory as inventory_module
+from backend.network_engine.inventory import InventoryCache
+
+
+@pytest.fixture()
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'inventory.db'}")
+    SQLModel.metadata.create_all(engine, tables=[Device.__table__])
+    with Session(engine) as session:
+        for i in range(4):
+            session.add(Device(name=f"sw{i}", ip=f"10.0.0.{i}", platform="huawei", username="admin",
+                               password=encrypt_password(f"pw{i}"), group_name="core" if i < 2 else "access",
+                               region="beijing"))
+        # 缺少平台的设备不进入 Inventory
+        session.add(Device(name="incomplete", ip="10.0.0.99"))
+        session.commit()
+    monkeypatch.setattr(inventory_module, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def _update(engine, device_name: str, **values) -> None:
+    with Session(engine) as session:
+        device = session.exec(select(Device).where(Device.name == device_name)).one()
+        for key, value in values.items():
+            setattr(device, key, value)
+        device.updated_at = datetime.utcnow() + timedelta(seconds=1)
+        session.add(device)
+        session.commit()
+
+
+def test_only_changed_devices_are_reloaded(engine):
+    cache = InventoryCache()
+    inventory = cache.build()
+    assert sorted(inventory.hosts) == ["sw0", "sw1", "sw2", "sw3"]
+    assert inventory.hosts["sw1"].password == "pw1"
+    assert sorted(inventory.groups) == ["access", "core"]
+    assert cache.stats["decrypted"] == 5
+
+    cache.build()
+    assert cache.stats["decrypted"] == 5
+
+    _update(engine, "sw2", ip="10.0.1.2", password=encrypt_password("new"))
+    inventory = cache.build()
+    assert cache.stats["decrypted"] == 6
+    assert inventory.hosts["sw2"].hostname == "10.0.1.2" and inventory.hosts["sw2"].password == "new"
+
+
+def test_each_build_returns_fresh_hosts(engine):
+    cache = InventoryCache()
+    first, second = cache.build(), cache.build()
+    assert first.hosts["sw0"] is not second.hosts["sw0"]
+    first.hosts["sw0"].data["region"] = "changed"
+    assert second.hosts["sw0"].data["region"] == "beijing"
+
+
+def test_deleted_and_renamed_devices_evicted(engine):
+    cache = InventoryCache()
+    cache.build()
+    with Session(engine) as session:
+        session.delete(session.exec(select(Device).where(Device.name == "sw3")).one())
+        session.commit()
+    _update(engine, "sw0", name="sw0-new")
+
+    inventory = cache.build()
+    assert sorted(inventory.hosts) == ["sw0-new", "sw1", "sw2"]
+    assert cache.stats["evicted"] == 1
+
+
+def test_targeted_refresh(engine):
+    cache = InventoryCache()
+    inventory = cache.build(["sw1", "sw2", "missing"])
+    assert sorted(inventory.hosts) == ["sw1", "sw2"]
+    assert cache.stats["decrypted"] == 2
+
+    # 定向刷新: 请求了但已改名的设备被剔除，未请求的缓存条目保留
+    cache.build(["sw0"])
+    _update(engine, "sw1", name="sw1-new")
+    inventory = cache.build(["sw1"])
+    assert list(inventory.hosts) == []
+    assert sorted(cache.build(["sw0", "sw2"]).hosts) == ["sw0", "sw2"]
+    assert cache.stats["decrypted"] == 3
+
+
+def test_snmp_credentials_in_host_data(engine):
+    _update(engine, "sw0", snmp_version="2c", snmp_community=encrypt_password("secret"))
+    host = InventoryCache().build(["sw0"]).hosts["sw0"]
+    assert host.data["snmp"]["community"] == "secret" and host.data["snmp"]["port"] == 161
+    assert InventoryCache().build(["sw1"]).hosts["sw1"].data["snmp"] is None
@@ -0,0 +1,83 @@
+"""
+作业事件流: 订阅不再为历史日志遗留频道；其他进程执行的作业按明细表 updated_at 增量推送
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from backend.models.automation import JobHostResult, JobStepResult
+from backend.services.automation.event_bus import JobEventBus
+from backend.services.automation.job_results import JobResultService
+
+
+def test_subscribe_to_unknown_log_leaves_no_channel():
+    bus = JobEventBus(retention=0)
+
+    async def scenario():
+        sub, backlog, need_snapshot = bus.subscribe(1, None)
+        assert need_snapshot and backlog == []
+        bus.unsubscribe(1, sub)
+
+    asyncio.run(scenario())
+    assert bus._channels == {}
+
+
+def test_live_and_closed_channels_survive_unsubscribe():
+    bus = JobEventBus(retention=3600)
+    bus.attach(1, lambda: ({}, 0))
+    bus.publish(2, "queued", {"position": 1})
+
+    async def scenario():
+        for log_id in (1, 2):
+            sub, _, _ = bus.subscribe(log_id, None)
+            bus.unsubscribe(log_id, sub)
+
+    asyncio.run(scenario())
+    assert set(bus._channels) == {1, 2}
+    assert bus.is_live(1) and not bus.is_live(2)
+
+    bus.close(1)
+    assert not bus.is_live(1) and bus.is_closed(1)
+    # 保留期过后由下一次订阅 / 登记清理
+    bus.retention = 0
+    bus.attach(3, lambda: ({}, 0))
+    assert 1 not in bus._channels and 3 in bus._channels
+
+
+def test_changes_since_returns_rows_written_after_watermark(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'results.db'}")
+    SQLModel.metadata.create_all(engine, tables=[JobHostResult.__table__, JobStepResult.__table__])
+    with Session(engine) as session:
+        service = JobResultService(session)
+        service.init_hosts(1, {
+            "sw1": {"status": "running", "steps": [{"name": "巡检", "status": "pending"}]},
+            "sw2": {"status": "running", "steps": [{"name": "巡检", "status": "pending"}]},
+        })
+        service.init_hosts(2, {"sw9": {"status": "running"}})
+
+        hosts, steps, watermark = service.changes_since(1, None)
+        assert {h["host"] for h in hosts} == {"sw1", "sw2"} and len(steps) == 2
+        assert watermark == service.last_update(1)
+
+        # 没有新写入: 增量为空，起点不变
+        assert service.changes_since(1, watermark) == ([], [], watermark)
+
+        later = watermark + timedelta(seconds=1)
+        host_row = dict(service._host_row(1, "sw2", {"success": True, "status": "success"}), updated_at=later)
+        step_row = dict(service._step_row(1, "sw2", 0, {"name": "巡检", "status": "success"}), updated_at=later)
+        service.upsert([host_row], [step_row])
+
+        hosts, steps, new_watermark = service.changes_since(1, watermark)
+        assert hosts == [{"host": "sw2", "status": "success", "success": True, "error": None}]
+        assert steps == [{"host": "sw2", "step": "巡检", "status": "success", "success": True, "exception": None}]
+        assert new_watermark == later
+    engine.dispose()
+
+
+def test_last_update_of_empty_log():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[JobHostResult.__table__, JobStepResult.__table__])
+    with Session(engine) as session:
+        assert JobResultService(session).last_update(1) is None
+        assert JobResultService(session).changes_since(1, datetime(2024, 1, 1)) == ([], [], datetime(2024, 1, 1))
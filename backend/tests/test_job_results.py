@@ -0,0 +1,100 @@
+"""
+作业结果明细表: 设备 / 步骤 upsert 覆盖、统计与终态转换、组装旧格式 results、历史 JSON 迁移可重复执行
+"""
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.models.automation import JobHostResult, JobLog, JobStepResult
+from backend.services.automation.job_results import JobResultService
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'results.db'}")
+    SQLModel.metadata.create_all(engine, tables=[JobLog.__table__, JobHostResult.__table__, JobStepResult.__table__])
+    yield engine
+    engine.dispose()
+
+
+def _steps(*names):
+    return [{"name": name, "status": "pending"} for name in names]
+
+
+def test_upsert_overwrites_by_unique_key(engine):
+    with Session(engine) as session:
+        service = JobResultService(session)
+        service.init_hosts(1, {"sw1": {"status": "running", "steps": _steps("连接", "巡检")},
+                               "sw2": {"status": "running", "steps": _steps("连接", "巡检")}})
+        step = service._step_row(1, "sw1", 1, {"name": "巡检", "status": "success", "result": {"cpu": 12}})
+        service.upsert([service._host_row(1, "sw1", {"success": True, "status": "running"})], [step])
+        # 同一步骤再次更新不新增行
+        service.upsert([], [dict(step, result={"cpu": 15})])
+
+        assert len(session.exec(select(JobHostResult)).all()) == 2
+        assert len(session.exec(select(JobStepResult)).all()) == 4
+
+        log = JobLog(id=1, job_id=1, results={"system_error": "boom"})
+        session.add(log)
+        session.commit()
+        results = service.get_results([log])[1]
+        assert results["system_error"] == "boom"
+        assert [s["name"] for s in results["sw1"]["steps"]] == ["连接", "巡检"]
+        assert results["sw1"]["steps"][1]["result"] == {"cpu": 15}
+        assert results["sw1"]["success"] is True
+
+
+def test_finalize_and_fail_unfinished(engine):
+    with Session(engine) as session:
+        service = JobResultService(session)
+        service.init_hosts(1, {
+            "ok": {"success": True, "status": "running", "steps": [{"name": "a", "status": "success"}]},
+            "bad": {"success": False, "status": "running", "steps": _steps("a")},
+            "other": {"status": "pending", "steps": _steps("a")},
+        })
+        service.finalize_hosts(1, hosts=["ok", "bad"])
+        service.fail_unfinished(1, "分片执行失败", hosts=["other"])
+
+        results = service.get_results([JobLog(id=1, job_id=1)])[1]
+        assert {h: results[h]["status"] for h in results} == {"ok": "success", "bad": "failed", "other": "failed"}
+        assert results["other"]["error"] == "分片执行失败"
+        assert results["other"]["steps"][0]["status"] == "failed"
+        # 已完成的步骤保持原状态
+        assert results["ok"]["steps"][0]["status"] == "success"
+        assert service.host_counts(1) == (3, 1)
+        assert service.host_counts(2) == (0, 0)
+
+
+def test_fail_unfinished_chunks_large_host_lists(engine):
+    hosts = {f"sw{i}": {"status": "running"} for i in range(1200)}
+    with Session(engine) as session:
+        service = JobResultService(session)
+        service.init_hosts(1, hosts)
+        service.fail_unfinished(1, "作业已取消", "cancelled", hosts=list(hosts))
+        statuses = set(session.exec(select(JobHostResult.status)).all())
+    assert statuses == {"cancelled"}
+
+
+def test_migrate_legacy_results_is_idempotent(engine):
+    with Session(engine) as session:
+        session.add(JobLog(id=1, job_id=1, results={
+            "sw1": {"success": True, "status": "success", "steps": [{"name": "巡检", "success": True, "status": "success",
+                                                                     "result": {"cpu": 1}}]},
+            "system_error": "partial failure",
+        }))
+        # 更早期的格式: 只有 result 字段
+        session.add(JobLog(id=2, job_id=1, results={"sw2": {"success": False, "result": "timeout"}}))
+        session.add(JobLog(id=3, job_id=1, results={}))
+        session.commit()
+
+    assert JobResultService.migrate_legacy_results(engine, batch_size=2) == 2
+    assert JobResultService.migrate_legacy_results(engine) == 0
+
+    with Session(engine) as session:
+        logs = session.exec(select(JobLog).order_by(JobLog.id)).all()
+        assert logs[0].results == {"system_error": "partial failure"} and logs[1].results == {}
+        merged = JobResultService(session).get_results(logs)
+        assert len(session.exec(select(JobHostResult)).all()) == 2
+    assert merged[1]["sw1"]["steps"][0]["result"] == {"cpu": 1}
+    assert merged[1]["system_error"] == "partial failure"
+    assert merged[2]["sw2"]["steps"] == [{"name": "result", "success": False, "status": "failed",
+                                          "result": "timeout", "exception": None}]
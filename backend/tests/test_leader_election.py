@@ -0,0 +1,134 @@
+"""
+调度领导者选举: 租约互斥、续约保留当选时间、过期接管、主动释放、数据库故障时到期退位
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, create_engine
+
+from backend.models.automation import SchedulerLease
+from backend.services.automation.leader_election import LeaderElector
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lease.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=[SchedulerLease.__table__])
+    yield engine
+    engine.dispose()
+
+
+def _elector(engine, ttl: float = 30, renew_interval: float = 10, **callbacks) -> LeaderElector:
+    return LeaderElector(engine, "scheduler", ttl=ttl, renew_interval=renew_interval, **callbacks)
+
+
+def _lease(engine) -> SchedulerLease:
+    with Session(engine) as session:
+        return session.get(SchedulerLease, "scheduler")
+
+
+def _expire(engine) -> None:
+    with Session(engine) as session:
+        session.exec(update(SchedulerLease).values(expires_at=datetime.now() - timedelta(seconds=1)))
+        session.commit()
+
+
+def test_single_holder_among_concurrent_candidates(engine):
+    candidates = [_elector(engine) for _ in range(6)]
+    barrier = threading.Barrier(len(candidates))
+    won = []
+
+    def run(elector):
+        barrier.wait()
+        if elector.try_acquire():
+            won.append(elector.identity)
+
+    threads = [threading.Thread(target=run, args=(c,)) for c in candidates]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(won) == 1
+    assert _lease(engine).holder == won[0]
+
+
+def test_renew_keeps_acquired_at(engine):
+    leader, other = _elector(engine), _elector(engine)
+    assert leader.try_acquire()
+    acquired_at, expires_at = _lease(engine).acquired_at, _lease(engine).expires_at
+    time.sleep(0.01)
+    assert leader.try_acquire()
+    assert _lease(engine).acquired_at == acquired_at
+    assert _lease(engine).expires_at > expires_at
+    assert not other.try_acquire()
+
+
+def test_expired_lease_taken_over(engine):
+    leader, other = _elector(engine), _elector(engine)
+    assert leader.try_acquire()
+    _expire(engine)
+    assert other.try_acquire()
+    lease = _lease(engine)
+    assert lease.holder == other.identity and lease.acquired_at > datetime.now() - timedelta(seconds=5)
+    # 原领导者下次续约失败
+    assert not leader.try_acquire()
+
+
+def test_loop_callbacks_and_release_on_stop(engine):
+    events = []
+    leader = _elector(engine, renew_interval=0.05, on_elected=lambda: events.append("elected"),
+                      on_demoted=lambda: events.append("demoted"), on_renewed=lambda: events.append("renewed"))
+    leader.start()
+    deadline = time.monotonic() + 5
+    while events.count("renewed") < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert leader.is_leader and events[0] == "elected"
+
+    leader.stop()
+    assert not leader.is_leader and events[-1] == "demoted"
+    assert _lease(engine).holder is None
+    # 释放后其他进程无需等待过期即可接管
+    assert _elector(engine).try_acquire()
+
+
+def test_loop_demotes_when_lease_lost(engine):
+    events = []
+    leader = _elector(engine, renew_interval=0.05, on_demoted=lambda: events.append("demoted"))
+    leader.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not leader.is_leader and time.monotonic() < deadline:
+            time.sleep(0.01)
+        _expire(engine)
+        assert _elector(engine).try_acquire()
+        # 退位回调在 is_leader 置位之后执行，以回调为准等待
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not leader.is_leader and events == ["demoted"]
+    finally:
+        leader.stop()
+
+
+def test_database_error_keeps_leadership_until_expiry(engine, monkeypatch):
+    leader = _elector(engine, ttl=0.3, renew_interval=0.05)
+    assert leader.try_acquire()
+    leader._set_leader(True)
+
+    def broken():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(leader, "try_acquire", broken)
+    leader.start()
+    try:
+        time.sleep(0.1)
+        assert leader.is_leader
+        deadline = time.monotonic() + 5
+        while leader.is_leader and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # 租约到期后主动退位，避免与新领导者重复调度
+        assert not leader.is_leader
+    finally:
+        leader._stop.set()
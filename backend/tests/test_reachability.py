@@ -0,0 +1,72 @@
+"""
+可达性预检: 本地监听端口可达、拒绝连接与超时给出原因、整批耗时约为一个 timeout
+"""
+import asyncio
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from backend.network_engine import reachability
+from backend.network_engine.reachability import probe_hosts
+
+
+def _host(name: str, port: int, hostname: str = "127.0.0.1"):
+    return SimpleNamespace(name=name, hostname=hostname, port=port)
+
+
+@pytest.fixture()
+def listening_port():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture()
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_reachable_and_refused(listening_port, closed_port):
+    hosts = [_host(f"up{i}", listening_port) for i in range(5)] + [_host("down", closed_port)]
+    unreachable, stats = probe_hosts(hosts, timeout=1.0, concurrency=2)
+    assert list(unreachable) == ["down"]
+    assert "拒绝" in unreachable["down"]
+    assert (stats["checked"], stats["reachable"], stats["unreachable"]) == (6, 5, 1)
+
+
+def test_timeouts_run_concurrently(monkeypatch):
+    async def hang(address, port):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(reachability.asyncio, "open_connection", hang)
+    unreachable, stats = probe_hosts([_host(f"sw{i}", 22) for i in range(50)], timeout=0.2, concurrency=100)
+    assert len(unreachable) == 50
+    assert all("超时" in reason for reason in unreachable.values())
+    # 所有设备并发探测，整批耗时约为一个 timeout 而不是逐台累加
+    assert stats["elapsed"] < 2
+
+
+def test_resolution_failure_and_missing_port(monkeypatch):
+    seen = []
+
+    async def fail(address, port):
+        seen.append(port)
+        raise socket.gaierror(-2, "Name or service not known")
+
+    monkeypatch.setattr(reachability.asyncio, "open_connection", fail)
+    unreachable, _ = probe_hosts([_host("sw1", None, hostname="no-such-host")], timeout=0.5)
+    assert unreachable["sw1"].startswith("地址解析失败")
+    # 未设置端口时探测 SSH 缺省端口
+    assert seen == [22]
+
+
+def test_no_hosts():
+    unreachable, stats = probe_hosts([])
+    assert unreachable == {} and stats["checked"] == 0
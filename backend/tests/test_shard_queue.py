@@ -0,0 +1,210 @@
+"""
+分布式分片队列: 并发领取不重复、心跳超时重新入队 / 重试耗尽、取消与领取竞争、最后完成者唯一汇总
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from backend.models.automation import JobHostResult, JobLog, JobShard, JobStatus, ShardStatus
+from backend.models.device import Device
+from backend.services.automation.job_results import JobResultService
+from backend.services.automation.shard_queue import ShardQueue
+
+LOG_ID = 1
+HOSTS = [f"sw{i}" for i in range(6)]
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shards.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i, name in enumerate(HOSTS):
+            session.add(Device(name=name, ip=f"10.0.0.{i}", region="beijing" if i < 3 else "shanghai"))
+        session.add(JobLog(id=LOG_ID, job_id=1, status=JobStatus.RUNNING))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def _queue(engine, max_attempts: int = 3) -> ShardQueue:
+    queue = ShardQueue(engine, shard_size=10, shard_by="region", heartbeat_timeout=30, max_attempts=max_attempts)
+    with Session(engine) as session:
+        assert queue.enqueue(session, LOG_ID, 1) == 2
+    return queue
+
+
+def _shards(engine):
+    with Session(engine) as session:
+        return {s.id: s for s in session.exec(select(JobShard).order_by(JobShard.id)).all()}
+
+
+def _log(engine) -> JobLog:
+    with Session(engine) as session:
+        return session.get(JobLog, LOG_ID)
+
+
+def _host_status(engine):
+    with Session(engine) as session:
+        return {h.host: h.status for h in session.exec(select(JobHostResult)).all()}
+
+
+def _expire_heartbeat(engine, shard_id: int) -> None:
+    with Session(engine) as session:
+        session.exec(update(JobShard).where(JobShard.id == shard_id)
+                     .values(heartbeat_at=datetime.now() - timedelta(seconds=60)))
+        session.commit()
+
+
+def _succeed_hosts(engine, hosts) -> None:
+    with Session(engine) as session:
+        JobResultService(session).init_hosts(LOG_ID, {h: {"success": True, "status": "success"} for h in hosts})
+
+
+def test_concurrent_claims_never_share_a_shard(engine):
+    queue = _queue(engine)
+    barrier = threading.Barrier(6)
+    claimed = {}
+
+    def worker(worker_id):
+        barrier.wait()
+        shard = queue.claim(worker_id)
+        claimed[worker_id] = shard.id if shard else None
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    won = [shard_id for shard_id in claimed.values() if shard_id is not None]
+    assert sorted(won) == sorted(_shards(engine))
+    shards = _shards(engine)
+    for worker_id, shard_id in claimed.items():
+        if shard_id is not None:
+            assert shards[shard_id].worker_id == worker_id and shards[shard_id].attempts == 1
+    assert queue.claim("late") is None
+
+
+def test_stale_shard_requeued_and_old_worker_loses_ownership(engine):
+    queue = _queue(engine)
+    first = queue.claim("w1")
+    assert queue.heartbeat(first.id, "w1") and queue.owns(first.id, "w1")
+
+    _expire_heartbeat(engine, first.id)
+    assert queue.requeue_stale() == 1
+    shard = _shards(engine)[first.id]
+    assert shard.status == ShardStatus.PENDING and shard.worker_id is None
+
+    # 原 worker 的心跳与结果写入均失效
+    assert not queue.heartbeat(first.id, "w1")
+    assert not queue.owns(first.id, "w1")
+
+    again = queue.claim("w2")
+    assert again.id == first.id and again.attempts == 2
+    assert not queue.complete(first.id, "w1", ShardStatus.DONE)
+    assert queue.owns(first.id, "w2")
+
+
+def test_shard_fails_after_max_attempts(engine):
+    queue = _queue(engine, max_attempts=1)
+    first = queue.claim("w1")
+    second = queue.claim("w2")
+    _succeed_hosts(engine, second.hosts)
+    assert queue.complete(second.id, "w2", ShardStatus.DONE)
+    assert not queue.finalize_if_done(LOG_ID)
+
+    _expire_heartbeat(engine, first.id)
+    queue.requeue_stale()
+    shard = _shards(engine)[first.id]
+    assert shard.status == ShardStatus.FAILED and "最大重试次数" in shard.error
+    assert queue.claim("w3") is None
+
+    # 最后一个分片结束触发汇总: 失败分片中未执行的设备置为 failed
+    log = _log(engine)
+    assert log.status == JobStatus.PARTIAL
+    assert (log.total_devices, log.success_count, log.failed_count) == (6, 3, 3)
+    statuses = _host_status(engine)
+    assert all(statuses[h] == "failed" for h in first.hosts)
+    assert all(statuses[h] == "success" for h in second.hosts)
+
+
+def test_cancel_pending_and_claimed_shards(engine):
+    queue = _queue(engine)
+    claimed = queue.claim("w1")
+    pending_id = next(i for i in _shards(engine) if i != claimed.id)
+
+    assert queue.cancel_log(LOG_ID)
+    shards = _shards(engine)
+    assert shards[pending_id].status == ShardStatus.CANCELLED
+    assert shards[claimed.id].status == ShardStatus.CANCELLING
+    statuses = _host_status(engine)
+    assert all(statuses[h] == ShardStatus.CANCELLED.value for h in shards[pending_id].hosts)
+    assert all(statuses[h] == "pending" for h in claimed.hosts)
+    # 执行中的分片尚未结束，作业仍在运行
+    assert _log(engine).status == JobStatus.RUNNING
+
+    # worker 心跳感知取消，仍持有分片直至写入终态
+    assert not queue.heartbeat(claimed.id, "w1")
+    assert queue.owns(claimed.id, "w1")
+    assert queue.complete(claimed.id, "w1", ShardStatus.CANCELLED)
+    assert queue.finalize_if_done(LOG_ID)
+    assert _log(engine).status == JobStatus.CANCELLED
+    assert queue.cancel_log(2) is False
+
+
+def test_cancel_does_not_overwrite_concurrent_claim(engine):
+    queue = _queue(engine)
+    raced = []
+
+    def claim_first(conn, cursor, statement, parameters, context, executemany):
+        # 取消已读到 pending 分片、条件更新执行之前，另一 worker 抢先领取
+        if statement.startswith("UPDATE jobshard") and not raced and "cancelled" in str(parameters).lower():
+            raced.append(queue.claim("w1"))
+
+    event.listen(engine, "before_cursor_execute", claim_first)
+    try:
+        assert queue.cancel_log(LOG_ID)
+    finally:
+        event.remove(engine, "before_cursor_execute", claim_first)
+
+    shards = _shards(engine)
+    won = raced[0]
+    # 被抢先领取的分片转为 cancelling 交由 worker 结束，设备状态不被取消覆盖
+    assert shards[won.id].status == ShardStatus.CANCELLING and shards[won.id].worker_id == "w1"
+    assert all(_host_status(engine)[h] == "pending" for h in won.hosts)
+    other = next(s for i, s in shards.items() if i != won.id)
+    assert other.status == ShardStatus.CANCELLED
+
+
+def test_exactly_one_finalize_writes_terminal_log(engine):
+    queue = _queue(engine)
+    shards = [queue.claim("w1"), queue.claim("w2")]
+    _succeed_hosts(engine, HOSTS)
+    for shard in shards:
+        assert queue.complete(shard.id, shard.worker_id, ShardStatus.DONE)
+
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def finalize():
+        barrier.wait()
+        outcomes.append(queue.finalize_if_done(LOG_ID))
+
+    threads = [threading.Thread(target=finalize) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert outcomes.count(True) == 1
+    log = _log(engine)
+    assert log.status == JobStatus.SUCCESS
+    assert (log.total_devices, log.success_count) == (6, 6)
+    assert log.metrics["shards"]["total"] == 2
+    assert log.metrics["shards"]["workers"] == ["w1", "w2"]
+    # 已是终态，不再重复汇总
+    assert not queue.finalize_if_done(LOG_ID)
@@ -0,0 +1,106 @@
+"""
+SNMP 巡检: 对本地模拟设备 (simulator) 采集，校验 HealthData 结构、接口名与 SSH 巡检一致、计数器随时间增长
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.network_engine.snmp import SnmpCollector
+from backend.network_engine.snmp.oids import interface_name
+from backend.network_engine.snmp.simulator import start_simulator
+from backend.services.automation.interface_counters import counter_rows_from_health
+
+STEP = "深度健康巡检"
+
+
+class Host:
+    """采集只用到 name / hostname / platform / data"""
+
+    def __init__(self, name: str, port: int, platform: str, community: str = "public"):
+        self.name = name
+        self.hostname = "127.0.0.1"
+        self.platform = platform
+        self.data = {"snmp": {"version": "2c", "community": community, "port": port}}
+
+
+class Reporter:
+    def __init__(self):
+        self.results: Dict[tuple, Any] = {}
+
+    def record_step_started(self, host_name: str, step_name: str) -> None:
+        pass
+
+    def record_step_completed(self, host_name: str, step_name: str, failed: bool, result: Any, exception) -> None:
+        self.results[(host_name, step_name)] = result
+
+
+def _collect(vendor: str, hosts: int = 2, rounds: int = 1, community: str = "public") -> List[Dict[str, Any]]:
+    """启动模拟设备 (随机端口)，在同一事件循环中采集 rounds 轮，返回每轮的 (统计, 回退, 结果)"""
+    async def scenario():
+        transport, _ = await start_simulator(port=0, vendor=vendor, interfaces=8)
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            out = []
+            for i in range(rounds):
+                if i:
+                    await asyncio.sleep(0.3)
+                reporter = Reporter()
+                collector = SnmpCollector(timeout=1.0, retries=0)
+                stats, fallback = await collector.run_async(
+                    [Host(f"sw{n}", port, vendor, community) for n in range(hosts)], reporter, STEP)
+                out.append((stats, fallback, reporter.results))
+            return out
+        finally:
+            transport.close()
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("vendor,first_interface", [
+    ("huawei", "GigabitEthernet0/0/1"),
+    ("h3c", "Ten-GigabitEthernet1/0/1"),
+    ("cisco", "GigabitEthernet1/0/1"),
+])
+def test_collect_against_simulator(vendor, first_interface):
+    (stats, fallback, results), = _collect(vendor)
+    assert stats["success"] == 2 and fallback == {}
+    health = results[("sw0", STEP)]
+    assert health["basic"]["hostname"] == "SnmpSim"
+    assert 0 < health["resources"]["cpu_avg"] <= 100
+    assert 0 < health["resources"]["memory_usage"] <= 100
+    assert health["hardware"]["fans_ok"] and health["hardware"]["pwr_ok"]
+    assert health["interface_stats"]["total"] == 8
+    assert health["interface_stats"]["up_count"] == 6
+    # 接口名与 SSH 巡检一致 (Cisco 的 ifName 缩写已展开)，速率表与计数器使用同一键
+    assert first_interface in health["interface_counters"]
+    assert set(health["interface_speeds"]) == set(health["interface_counters"])
+    assert all(len(v) == 8 for v in health["interface_counters"].values())
+
+
+def test_counters_increase_between_rounds():
+    (_, _, first), (_, _, second) = _collect("huawei", hosts=1, rounds=2)
+    before = first[("sw0", STEP)]["interface_counters"]["GigabitEthernet0/0/1"]
+    after = second[("sw0", STEP)]["interface_counters"]["GigabitEthernet0/0/1"]
+    assert after[0] > before[0]
+
+    rows = counter_rows_from_health("sw0", second[("sw0", STEP)], None, 0)
+    row = next(r for r in rows if r["interface"] == "GigabitEthernet0/0/1")
+    assert row["speed"] == 1000 and row["rx_octets"] == after[0]
+
+
+def test_wrong_community_falls_back():
+    (stats, fallback, _), = _collect("huawei", hosts=1, community="wrong")
+    assert stats["fallback"] == 1 and "sw0" in fallback
+
+
+def test_interface_name_normalization():
+    assert interface_name("Gi1/0/1", "cisco") == "GigabitEthernet1/0/1"
+    assert interface_name("Po10", "cisco") == "Port-channel10"
+    assert interface_name("XGE1/0/49", "h3c") == "Ten-GigabitEthernet1/0/49"
+    assert interface_name("XGE0/0/1", "huawei") == "XGigabitEthernet0/0/1"
+    assert interface_name("GigabitEthernet 1/0/1", "h3c") == "GigabitEthernet1/0/1"
+    # 完整名称与未知前缀保持原样
+    assert interface_name("Eth-Trunk1", "huawei") == "Eth-Trunk1"
+    assert interface_name("25GE1/0/1", "huawei") == "25GE1/0/1"
+    assert interface_name("Gi1/0/1", None) == "Gi1/0/1"
@@ -0,0 +1,142 @@
+"""
+厂商原生采集器: 华为 VRP / H3C Comware 命令输出解析为 HealthData
+"""
+import time
+
+from backend.network_engine.async_engine.standin import RESPONSES
+from backend.network_engine.vendors import H3cComwareCollector, HuaweiVrpCollector, collector_for
+
+H3C_INTERFACES = """GigabitEthernet1/0/1
+Current state: UP
+Line protocol state: UP
+IP packet frame type: Ethernet II, hardware address: 0cda-41b1-2c3d
+Description: GigabitEthernet1/0/1 Interface
+Bandwidth: 1000000 kbps
+Loopback is not set
+Media type is twisted pair
+1000Mbps-speed mode, full-duplex mode
+Last clearing of counters: Never
+ Last 300 second input: 0 packets/sec 12 bytes/sec 0%
+ Last 300 second output: 0 packets/sec 5 bytes/sec 0%
+ Input (total):  123456 packets, 98765432 bytes
+          100000 unicasts, 20000 broadcasts, 3456 multicasts, 0 pauses
+ Input (normal):  123456 packets, - bytes
+          100000 unicasts, 20000 broadcasts, 3456 multicasts, 0 pauses
+ Input:  5 input errors, 0 runts, 0 giants, 0 throttles
+          5 CRC, 0 frame, - overruns, 0 aborts
+          - ignored, - parity errors
+ Output (total): 234567 packets, 87654321 bytes
+          200000 unicasts, 30000 broadcasts, 4567 multicasts, 0 pauses
+ Output (normal): 234567 packets, - bytes
+          200000 unicasts, 30000 broadcasts, 4567 multicasts, 0 pauses
+ Output: 0 output errors, - underruns, - buffer failures
+          0 aborts, 0 deferred, 0 collisions, 0 late collisions
+          0 lost carrier, - no carrier
+
+Ten-GigabitEthernet1/0/49
+Current state: DOWN
+Line protocol state: DOWN
+Bandwidth: 10000000 kbps
+ Input (total):  0 packets, 0 bytes
+ Input:  0 input errors, 0 runts, 0 giants, 0 throttles
+ Output (total): 0 packets, 0 bytes
+ Output: 0 output errors, - underruns, - buffer failures
+
+Vlan-interface1
+Current state: UP
+Line protocol state: UP
+Description: Vlan-interface1 Interface
+"""
+H3C_OUTPUTS = {
+    "display version": "H3C Comware Software, Version 7.1.070, Release 6615P01\nCopyright (c) 2004-2021 New H3C Technologies Co., Ltd. All rights reserved.\nH3C S6520X-30QC-EI uptime is 0 weeks, 1 day, 2 hours, 3 minutes\nLast reboot reason : Cold reboot",
+    "display device manuinfo": "Slot 1 CPU 0:\nDEVICE_NAME          : S6520X-30QC-EI\nDEVICE_SERIAL_NUMBER : 210235A2CSH123000012\nMAC_ADDRESS          : 0CDA-41B1-2C00\n Fan 1:\nDEVICE_SERIAL_NUMBER : NONE",
+    "display cpu-usage": "Slot 1 CPU 0 CPU usage:\n       6% in last 5 seconds\n       5% in last 1 minute\n       5% in last 5 minutes\nSlot 2 CPU 0 CPU usage:\n       10% in last 5 seconds\n",
+    "display memory": "Memory statistics are measured in KB:\nSlot 1:\n             Total      Used      Free    Shared   Buffers    Cached   FreeRatio\nMem:       1001904    600000    401904         0      1000     20000       40.1%\n-/+ Buffers/Cache:    579000    422904\nSwap:            0         0         0",
+    "display device": "Slot Type             State    Subslot  Soft Ver             Patch Ver\n1    S6520X-30QC-EI   Master   0        S6520X-6615P01       None",
+    "display environment": " System temperature information (degree centigrade):\n ----------------------------------------------------------------------\n Slot  Sensor    Temperature  Lower  Warning  Alarm  Shutdown\n 1     hotspot 1  38           0      80       95     NA\n 1     inflow 1   29           0      60       70     NA",
+    "display fan": " Slot 1:\n Fan 1:\n State    : Normal\n Airflow Direction: Port-to-power\n Fan 2:\n State    : Fault",
+    "display power": " Slot 1:\n PowerID State    Mode   Current(A)  Voltage(V)  Power(W)  FanDirection\n 1       Normal   AC     --          --          --        Back-to-front\n 2       Absent   AC     --          --          --        --",
+    "display interface brief": "Brief information on interfaces in route mode:\nLink: ADM - administratively down; Stby - standby\nProtocol: (s) - spoofing\nInterface            Link Protocol Primary IP      Description\nInLoop0              UP   UP(s)    --\nVlan1                UP   UP       192.168.1.1\n\nBrief information on interfaces in bridge mode:\nLink: ADM - administratively down; Stby - standby\nSpeed: (a) - auto\nDuplex: (a)/A - auto; H - half; F - full\nType: A - access; T - trunk; H - hybrid\nInterface            Link Speed   Duplex Type PVID Description\nGE1/0/1              UP   1G(a)   F(a)   A    1\nXGE1/0/49            DOWN auto    A      A    1\nXGE1/0/50            ADM  auto    A      A    1",
+    "display interface": H3C_INTERFACES,
+}
+
+
+def _health(collector, outputs, hostname="SW1"):
+    now = time.monotonic()
+    return collector.build_health(outputs, hostname, now, now, now)
+
+
+def test_collector_selection():
+    assert isinstance(collector_for("huawei_vrpv8"), HuaweiVrpCollector)
+    assert isinstance(collector_for("hp_comware"), H3cComwareCollector)
+    assert collector_for("ios") is None
+
+
+def test_huawei_standin_output():
+    health = _health(HuaweiVrpCollector(), dict(RESPONSES), "StandIn")
+    assert health["basic"] == {"hostname": "StandIn", "model": "S5735-L48T4X-A1", "version": "V200R021C10SPC600",
+                               "uptime": 788640, "sn": "2102353171DMK9000123"}
+    assert health["resources"] == {"cpu_avg": 12.0, "memory_usage": 30.0}
+    assert health["hardware"] == {"fans_ok": True, "pwr_ok": True, "temp_ok": True, "max_temp": 39.0}
+    assert health["interface_stats"] == {"total": 4, "up_count": 3, "error_total": 7}
+    # Vlanif 没有报文统计，不产生计数器
+    assert set(health["interface_counters"]) == {f"GigabitEthernet0/0/{i}" for i in (1, 2, 3)}
+    assert health["interface_counters"]["GigabitEthernet0/0/3"] == [296296296, 262962963, 370368, 703701, 7, 0, 3, 0]
+    assert health["interface_speeds"]["GigabitEthernet0/0/1"] == 1000
+
+
+def test_huawei_unsupported_commands_and_faults():
+    outputs = dict(RESPONSES)
+    outputs["display esn"] = "Error: Unrecognized command found at '^' position."
+    # 堆叠设备: 两个主控各一段，且只有 Total/Used 字节数
+    outputs["display memory-usage"] = (
+        "System Total Memory Is: 1000 bytes\nTotal Memory Used Is: 200 bytes\n"
+        "System Total Memory Is: 1000 bytes\nTotal Memory Used Is: 400 bytes"
+    )
+    outputs["display temperature all"] = outputs["display temperature all"].replace("NORMAL  39", "ABNORMAL 72")
+    outputs["display fan"] = outputs["display fan"].replace("Normal", "Abnormal")
+    health = _health(HuaweiVrpCollector(), outputs)
+    assert health["basic"]["sn"] == "Unknown"
+    assert health["resources"]["memory_usage"] == 30.0
+    assert health["hardware"] == {"fans_ok": False, "pwr_ok": True, "temp_ok": False, "max_temp": 72.0}
+
+
+def test_huawei_bandwidth_without_speed_line():
+    outputs = dict(RESPONSES)
+    outputs["display interface"] = (
+        "100GE1/0/1 current state : UP (ifindex: 13)\n"
+        "Line protocol current state : UP\n"
+        "Port Mode: COMMON FIBER, Port Split/Aggregate: -\n"
+        "Current BW: 100Gbps, Inbound Limit BW: 100Gbps, Outbound Limit BW: 100Gbps\n"
+        "Input:  10 packets, 1000 bytes\n"
+        "  Total Error:                  0\n"
+        "  Discard:                      2\n"
+        "Output:  20 packets, 2000 bytes\n"
+        "  Total Error:                  1\n"
+        "  Discard:                      0\n"
+    )
+    health = _health(HuaweiVrpCollector(), outputs)
+    assert health["interface_counters"] == {"100GE1/0/1": [1000, 2000, 10, 20, 0, 1, 2, 0]}
+    assert health["interface_speeds"] == {"100GE1/0/1": 100000}
+
+
+def test_h3c_comware7_output():
+    health = _health(H3cComwareCollector(), H3C_OUTPUTS, "H3C")
+    assert health["basic"] == {"hostname": "H3C", "model": "S6520X-30QC-EI", "version": "7.1.070 Release 6615P01",
+                               "uptime": 93780, "sn": "210235A2CSH123000012"}
+    assert health["resources"] == {"cpu_avg": 8.0, "memory_usage": 59.9}
+    # Fan 2 处于 Fault 状态；Absent 的电源不算故障
+    assert health["hardware"] == {"fans_ok": False, "pwr_ok": True, "temp_ok": True, "max_temp": 38.0}
+    assert health["interface_stats"] == {"total": 5, "up_count": 3, "error_total": 5}
+    # Comware 不区分收发丢弃计数时以 -1 表示不支持
+    assert health["interface_counters"] == {
+        "GigabitEthernet1/0/1": [98765432, 87654321, 123456, 234567, 5, 0, -1, -1],
+        "Ten-GigabitEthernet1/0/49": [0, 0, 0, 0, 0, 0, -1, -1],
+    }
+    assert health["interface_speeds"] == {"GigabitEthernet1/0/1": 1000, "Ten-GigabitEthernet1/0/49": 10000}
+
+
+def test_h3c_comware5_memory_rate():
+    outputs = dict(H3C_OUTPUTS)
+    outputs["display memory"] = "System Total Memory(bytes): 1048576\nTotal Used Memory(bytes): 471859\nUsed Rate: 45%"
+    assert _health(H3cComwareCollector(), outputs)["resources"]["memory_usage"] == 45.0
@@ -0,0 +1,84 @@
+"""
+配置版本存储: 行级差异编码的往返一致性、打包后读取与删除
+"""
+import os
+import random
+
+from backend.services.configs import version_store as version_module
+from backend.services.configs.version_store import ConfigVersionStore, apply_delta, make_delta
+
+
+def _random_lines(rng: random.Random, count: int, alphabet: int):
+    # 小字母表制造大量重复行，覆盖锚点不足与重复行对齐的情况
+    lines = [f"line {rng.randrange(alphabet)}\n" for _ in range(count)]
+    if lines and rng.random() < 0.3:
+        lines[-1] = lines[-1].rstrip("\n")
+    return lines
+
+
+def _mutate(rng: random.Random, base, alphabet: int):
+    target = list(base)
+    for _ in range(rng.randrange(0, 8)):
+        op = rng.randrange(3)
+        pos = rng.randrange(len(target) + 1)
+        if op == 0:
+            target[pos:pos] = _random_lines(rng, rng.randrange(1, 5), alphabet)
+        elif op == 1 and target:
+            del target[pos:pos + rng.randrange(1, 5)]
+        elif target:
+            target[min(pos, len(target) - 1)] = f"changed {rng.random()}\n"
+    return target
+
+
+def test_delta_round_trip_random():
+    rng = random.Random(20240611)
+    for case in range(3000):
+        alphabet = rng.choice([3, 20, 1000])
+        base = _random_lines(rng, rng.randrange(0, 60), alphabet)
+        target = _mutate(rng, base, alphabet) if rng.random() < 0.8 else _random_lines(rng, rng.randrange(0, 60), alphabet)
+        ops = make_delta(base, target)
+        assert apply_delta(base, ops) == target, f"case {case}"
+
+
+def test_delta_round_trip_large_gap(monkeypatch):
+    # 超过精细比较上限的差异段整段替换
+    monkeypatch.setattr(version_module, "GAP_DIFF_LIMIT", 10)
+    rng = random.Random(7)
+    for _ in range(200):
+        base = _random_lines(rng, 80, 5)
+        target = _mutate(rng, base, 5)
+        assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_identical_versions_have_empty_delta():
+    lines = ["sysname SW1\n", "interface Gi0/0/1\n", " shutdown\n"]
+    assert make_delta(lines, list(lines)) == []
+
+
+def test_compact_read_and_remove(tmp_path):
+    store = ConfigVersionStore(snapshot_interval=3, keep_plain=1)
+    rng = random.Random(1)
+    versions = []
+    lines = _random_lines(rng, 200, 1000)
+    for i in range(8):
+        lines = _mutate(rng, lines, 1000)
+        # 含非 UTF-8 字节，校验按字节无损还原
+        data = "".join(lines).encode("latin-1") + bytes([0xC4, 0xE3, i])
+        path = tmp_path / f"running_{i:02d}.cfg"
+        path.write_bytes(data)
+        os.utime(path, (1000 + i, 1000 + i))
+        versions.append((path, data))
+
+    stats = store.compact(tmp_path)
+    assert stats["packed"] == 7
+    assert versions[-1][0].exists() and not versions[0][0].exists()
+    kinds = [e["kind"] for e in store.list_versions(tmp_path)]
+    assert kinds == ["full", "delta", "delta", "full", "delta", "delta", "full"]
+    for path, data in versions[:-1]:
+        assert store.read(path) == data
+
+    # 删除差异链中间的版本后，后继版本重新编码，内容不变
+    assert store.remove(versions[1][0])
+    assert store.read(versions[1][0]) is None
+    for path, data in versions[:1] + versions[2:-1]:
+        assert store.read(path) == data
@@ -0,0 +1,84 @@
+"""
+分布式执行 worker
+
+从持久化分片队列 (JobShard 表) 领取作业分片，在本进程内执行并把结果写回同一 JobLog 的明细表。
+可在多台主机上启动多个 worker 横向扩展执行能力，API 进程只负责拆分入队 (AUTOMATION_EXECUTION_MODE=distributed
+或作业参数 distributed=true)，10k 设备的备份不再占用 API 进程的 GIL。
+用法: python -m backend.worker [--worker-id ID] [--poll 2] [--once]
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import asyncio
+
+# On Windows, enforced ProactorEventLoop is required for asyncio subprocesses
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+from backend.core.logger import setup_logging
+
+setup_logging()
+logger = logging.getLogger("automation")
+
+from backend.core.database import init_db
+from backend.services.automation.job_runner import job_runner
+from backend.services.automation.shard_queue import shard_queue
+
+
+class ShardWorker:
+    """分片执行循环：每次领取一个分片执行 (分片内部仍由运行器并发驱动设备)，空闲时按间隔轮询"""
+
+    def __init__(self, worker_id: str, poll_interval: float = 2.0):
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def stop(self, *args) -> None:
+        logger.info(f"worker {self.worker_id} 收到停止信号，当前分片结束后退出")
+        self._stop.set()
+
+    def run_once(self) -> bool:
+        """领取并执行一个分片，返回是否领取到分片"""
+        shard = shard_queue.claim(self.worker_id)
+        if shard is None:
+            return False
+        logger.info(f"worker {self.worker_id} 领取分片 {shard.id} (作业日志 {shard.log_id}，{shard.shard_key}，{len(shard.hosts)} 台设备)")
+        status = job_runner.run_shard(shard, self.worker_id)
+        logger.info(f"worker {self.worker_id} 完成分片 {shard.id}: {status.value}")
+        return True
+
+    def run_forever(self) -> None:
+        logger.info(f"worker {self.worker_id} 已启动，等待作业分片")
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"worker {self.worker_id} 执行分片异常: {e}", exc_info=True)
+            self._stop.wait(self.poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}", help="worker 标识 (默认 主机名-进程号)")
+    parser.add_argument("--poll", type=float, default=2.0, help="队列为空时的轮询间隔 (秒)")
+    parser.add_argument("--once", action="store_true", help="执行完当前排队的分片后退出")
+    args = parser.parse_args()
+
+    init_db()
+    worker = ShardWorker(args.worker_id, args.poll)
+    if args.once:
+        while worker.run_once():
+            pass
+        return
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
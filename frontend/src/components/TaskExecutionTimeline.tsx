@@ -10,7 +10,8 @@ import {
     Activity,
     Database,
     Cpu,
-    Network
+    Network,
+    WifiOff
 } from 'lucide-react';
 import { cn } from '@/lib/utils';
 import HealthResultCard, { HealthData } from './HealthResultCard';
@@ -32,7 +33,7 @@ interface StepData {
 
 interface HostResult {
     success: boolean;
-    status?: 'running' | 'pending' | 'success' | 'failed';
+    status?: 'running' | 'pending' | 'success' | 'failed' | 'unreachable';
     steps?: StepData[];
     final_result?: string | null;
     error?: string | null;
@@ -67,7 +68,7 @@ const formatStepName = (name: string): string => {
 };
 
 // 状态徽章组件
-const StatusBadge = ({ success, status }: { success: boolean, status?: string }) => {
+const StatusBadge = ({ success, status, error }: { success: boolean, status?: string, error?: string | null }) => {
     if (status === 'running') {
         return (
             <span className="px-3 py-1 rounded-full text-[10px] font-black uppercase bg-blue-50 text-blue-600 flex items-center gap-1.5 animate-pulse">
@@ -84,6 +85,18 @@ const StatusBadge = ({ success, status }: { success: boolean, status?: string })
             </span>
         );
     }
+    // 预检不可达: 设备未被分派执行，与执行失败区分显示
+    if (status === 'unreachable') {
+        return (
+            <span
+                title={error || undefined}
+                className="px-3 py-1 rounded-full text-[10px] font-black uppercase bg-amber-100 text-amber-700 flex items-center gap-1.5"
+            >
+                <WifiOff className="h-3 w-3" />
+                设备不可达
+            </span>
+        );
+    }
     return (
         <span className={cn(
             "px-3 py-1 rounded-full text-[10px] font-black uppercase",
@@ -224,7 +237,7 @@ export default function TaskExecutionTimeline({ results, isLoading }: TaskExecut
                                 </div>
                             </div>
                             <div className="flex items-center gap-3">
-                                <StatusBadge success={data.success} status={data.status} />
+                                <StatusBadge success={data.success} status={data.status} error={data.error} />
                                 {hasSteps && (
                                     isHostExpanded
                                         ? <ChevronDown className="h-4 w-4 text-slate-400" />
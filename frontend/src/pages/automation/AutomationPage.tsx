@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import {
     Plus, Search, Terminal, Play,
@@ -144,7 +144,7 @@ export default function AutomationPage() {
                 const sortedData = data.sort((a: JobLog, b: JobLog) => b.id - a.id);
                 setJobLogs(sortedData);
                 if (sortedData.length > 0 && selectedLogId === null && !keepSelection) setSelectedLogId(sortedData[0].id);
-                setPollingEnabled(sortedData.some((log: JobLog) => log.status === 'running'));
+                setPollingEnabled(sortedData.some((log: JobLog) => log.status === 'running' || log.status === 'pending'));
             }
         } catch (err) { console.error("Fetch job logs error:", err); } finally { setLogsLoading(false); }
     }, [selectedLogId]);
@@ -218,11 +218,76 @@ export default function AutomationPage() {
         }
     }, [selectedJob?.id]);
 
+    // 运行中的日志通过事件流 (SSE) 接收增量进度，取代定时轮询整份日志
+    const liveLogId = jobLogs.find(log => log.status === 'running' || log.status === 'pending')?.id ?? null;
+    const selectedJobId = selectedJob?.id ?? null;
+    // 事件流结束时调用最新的 fetchJobLogs，其依赖变化不应导致事件流重连
+    const fetchJobLogsRef = useRef(fetchJobLogs);
+    useEffect(() => { fetchJobLogsRef.current = fetchJobLogs; }, [fetchJobLogs]);
     useEffect(() => {
-        let interval: NodeJS.Timeout;
-        if (pollingEnabled && selectedJob) interval = setInterval(() => fetchJobLogs(selectedJob.id, true), 3000);
-        return () => { if (interval) clearInterval(interval); };
-    }, [pollingEnabled, selectedJob?.id, fetchJobLogs]);
+        if (!pollingEnabled || selectedJobId === null || liveLogId === null) return;
+        let source: EventSource | null = null;
+        let lastSeq: string | null = null;
+        let closed = false;
+        const patchResults = (patch: (results: Record<string, any>) => Record<string, any>) =>
+            setJobLogs(prev => prev.map(log => log.id === liveLogId ? { ...log, results: patch(log.results || {}) } : log));
+
+        const parse = (e: Event) => {
+            const msg = e as MessageEvent;
+            if (msg.lastEventId) lastSeq = msg.lastEventId;
+            return JSON.parse(msg.data);
+        };
+
+        // EventSource 无法携带 Authorization 头：先申请短期令牌，再以 URL 参数建立连接
+        const connect = async () => {
+            if (closed) return;
+            let es: EventSource;
+            try {
+                const res = await fetch(`/api/automation/jobs/${liveLogId}/events/token`, {
+                    method: 'POST',
+                    headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+                });
+                if (!res.ok || closed) return;
+                const { token } = await res.json();
+                if (closed) return;
+                const params = new URLSearchParams({ token });
+                if (lastSeq) params.set('since', lastSeq);
+                es = new EventSource(`/api/automation/jobs/${liveLogId}/events?${params}`);
+                source = es;
+            } catch (err) { console.error("Open job events failed:", err); return; }
+
+            es.addEventListener('snapshot', (e) => {
+                const data = parse(e);
+                patchResults(() => data.results || {});
+            });
+            es.addEventListener('step', (e) => {
+                const d = parse(e);
+                patchResults(results => {
+                    const host = results[d.host] || { success: false, status: 'running', steps: [], error: null };
+                    const steps = [...(host.steps || [])];
+                    const idx = steps.findIndex((s: any) => s.name === d.step);
+                    const step = { ...(idx >= 0 ? steps[idx] : { name: d.step, result: null }), status: d.status, success: d.success, exception: d.exception };
+                    if (idx >= 0) steps[idx] = step; else steps.push(step);
+                    return { ...results, [d.host]: { ...host, steps } };
+                });
+            });
+            es.addEventListener('host', (e) => {
+                const d = parse(e);
+                patchResults(results => ({ ...results, [d.host]: { ...(results[d.host] || { steps: [] }), status: d.status, success: d.success, error: d.error } }));
+            });
+            es.addEventListener('done', () => {
+                closed = true;
+                es.close();
+                fetchJobLogsRef.current(selectedJobId, true);
+            });
+            es.onerror = () => {
+                // 自动重连被拒绝 (令牌已过期) 时连接进入 CLOSED 状态，重新申请令牌后续传
+                if (es.readyState === EventSource.CLOSED && !closed) setTimeout(connect, 3000);
+            };
+        };
+        connect();
+        return () => { closed = true; source?.close(); };
+    }, [pollingEnabled, selectedJobId, liveLogId]);
 
     const batchDeleteJobs = () => {
         if (selectedJobIds.size === 0) return;